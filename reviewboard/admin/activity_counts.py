@@ -0,0 +1,396 @@
+"""Rolled-up activity counts for the administration dashboard.
+
+The dashboard widgets used to count objects by scanning the tables of the
+objects themselves. Instead, counts are now kept in
+:py:class:`~reviewboard.reviews.models.DailyActivityCount` rows, which are
+updated as objects are saved and deleted.
+
+Each counted model has a list of counters it contributes to, computed from
+a few of its fields. A snapshot of those fields is taken when an object is
+loaded, so that when it's saved, only the counters that changed (such as
+the count of pending review requests, when a review request is closed) are
+updated, without any extra queries.
+
+Counts are only maintained and used once they've been built by the
+:command:`rebuild-activity-counts` management command. Until then, the
+widgets fall back to counting the objects directly, and no signal handlers
+are connected for the counted models.
+"""
+
+from __future__ import unicode_literals
+
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.utils import six, timezone
+from djblets.siteconfig.models import SiteConfiguration
+from djblets.siteconfig.signals import siteconfig_reloaded
+
+from reviewboard.attachments.models import FileAttachment
+from reviewboard.changedescs.models import ChangeDescription
+from reviewboard.diffviewer.models import DiffSet
+from reviewboard.reviews.models import (Comment,
+                                        DailyActivityCount,
+                                        Review,
+                                        ReviewRequest,
+                                        ReviewRequestDraft,
+                                        Screenshot)
+
+
+#: The counter names for each review request status.
+REVIEW_REQUEST_STATUS_COUNTERS = {
+    ReviewRequest.PENDING_REVIEW: 'review_requests_pending',
+    ReviewRequest.SUBMITTED: 'review_requests_submitted',
+    ReviewRequest.DISCARDED: 'review_requests_discarded',
+}
+
+#: The counter name for unpublished review requests.
+REVIEW_REQUEST_DRAFT_COUNTER = 'review_requests_draft'
+
+
+def _get_date(timestamp):
+    """Return the UTC date for a timestamp.
+
+    This matches the dates used when grouping by ``date(timestamp)`` in the
+    database.
+
+    Args:
+        timestamp (datetime.datetime):
+            The timestamp.
+
+    Returns:
+        datetime.date:
+        The date, or ``None`` if there's no timestamp.
+    """
+    if timestamp is None:
+        return None
+
+    if timezone.is_aware(timestamp):
+        timestamp = timestamp.astimezone(timezone.utc)
+
+    return timestamp.date()
+
+
+def _get_dated_counter(name, field):
+    """Return a function computing a counter for the date of a field.
+
+    Args:
+        name (unicode):
+            The name of the counter.
+
+        field (unicode):
+            The name of the timestamp field.
+
+    Returns:
+        callable:
+        The function for computing counters.
+    """
+    return lambda values: [(name, _get_date(values[field]), None)]
+
+
+def _get_total_counter(name):
+    """Return a function computing a counter that only tracks a total.
+
+    Args:
+        name (unicode):
+            The name of the counter.
+
+    Returns:
+        callable:
+        The function for computing counters.
+    """
+    return lambda values: [(name, None, None)]
+
+
+def _get_review_request_counters(values):
+    """Return the counters for a review request.
+
+    Args:
+        values (dict):
+            The values of the fields for the review request.
+
+    Returns:
+        list of tuple:
+        The counters, as ``(name, date, local_site_id)`` tuples.
+    """
+    if values['public']:
+        status_counter = REVIEW_REQUEST_STATUS_COUNTERS.get(values['status'])
+    else:
+        status_counter = REVIEW_REQUEST_DRAFT_COUNTER
+
+    counters = [
+        ('review_requests', _get_date(values['time_added']),
+         values['local_site']),
+    ]
+
+    if status_counter:
+        counters.append((status_counter, None, values['local_site']))
+
+    return counters
+
+
+def _get_user_counters(values):
+    """Return the counters for a user.
+
+    Args:
+        values (dict):
+            The values of the fields for the user.
+
+    Returns:
+        list of tuple:
+        The counters, as ``(name, date, local_site_id)`` tuples.
+    """
+    counters = [('users', None, None)]
+
+    if values['last_login'] is not None:
+        counters.append(('user_logins', _get_date(values['last_login']),
+                         None))
+
+    return counters
+
+
+#: The counted models.
+#:
+#: Each entry contains the model, the names of the fields needed to compute
+#: its counters, and a function taking a dictionary of those field values
+#: (with IDs for foreign keys) and returning a list of
+#: ``(name, date, local_site_id)`` counters.
+COUNTED_MODELS = [
+    (ChangeDescription, ('timestamp',),
+     _get_dated_counter('change_descriptions', 'timestamp')),
+    (Comment, ('timestamp',),
+     _get_dated_counter('comments', 'timestamp')),
+    (DiffSet, (),
+     _get_total_counter('diffsets')),
+    (FileAttachment, ('local_site',),
+     lambda values: [('file_attachments', None, values['local_site'])]),
+    (Review, ('timestamp',),
+     _get_dated_counter('reviews', 'timestamp')),
+    (ReviewRequest, ('time_added', 'public', 'status', 'local_site'),
+     _get_review_request_counters),
+    (ReviewRequestDraft, (),
+     _get_total_counter('review_request_drafts')),
+    (Screenshot, (),
+     _get_total_counter('screenshots')),
+    (User, ('last_login',),
+     _get_user_counters),
+]
+
+
+def activity_counts_enabled():
+    """Return whether activity counts have been built and are in use.
+
+    Returns:
+        bool:
+        Whether activity counts are in use.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    return siteconfig.get('activity_counts_enabled')
+
+
+def rebuild_activity_counts():
+    """Rebuild all activity counts from the counted objects.
+
+    This scans every counted table once, and then enables the use of
+    activity counts. Objects created or changed while this runs may be
+    missed, so it's best run while the server is quiet. It can be run again
+    at any time to correct the counts.
+    """
+    with transaction.atomic():
+        DailyActivityCount.objects.all().delete()
+
+        for model, fields, get_counters in COUNTED_MODELS:
+            counts = Counter()
+
+            if fields:
+                rows = model.objects.values_list(*fields).iterator()
+
+                for row in rows:
+                    counts.update(get_counters(dict(zip(fields, row))))
+            else:
+                for counter in get_counters({}):
+                    counts[counter] = model.objects.count()
+
+            DailyActivityCount.objects.bulk_create(
+                DailyActivityCount(name=name,
+                                   date=date,
+                                   local_site_id=local_site_id,
+                                   count=count)
+                for (name, date, local_site_id), count
+                in six.iteritems(counts)
+                if count
+            )
+
+    siteconfig = SiteConfiguration.objects.get_current()
+    siteconfig.set('activity_counts_enabled', True)
+    siteconfig.save()
+
+
+def _snapshot_fields(attnames, instance):
+    """Take a snapshot of the fields used to compute an object's counters.
+
+    Args:
+        attnames (dict):
+            A mapping of field names to the attribute names storing their
+            values.
+
+        instance (django.db.models.Model):
+            The object.
+
+    Returns:
+        dict:
+        The values of the fields, or ``None`` if any were deferred.
+    """
+    try:
+        return dict(
+            (field, instance.__dict__[attname])
+            for field, attname in six.iteritems(attnames)
+        )
+    except KeyError:
+        return None
+
+
+def _make_handlers(model, fields, get_counters):
+    """Return signal handlers for maintaining a model's counters.
+
+    Args:
+        model (type):
+            The counted model.
+
+        fields (tuple of unicode):
+            The names of the fields used to compute counters.
+
+        get_counters (callable):
+            The function computing counters from the field values.
+
+    Returns:
+        tuple:
+        A 3-tuple of the ``post_init``, ``post_save`` and ``post_delete``
+        signal handlers.
+    """
+    attnames = dict(
+        (field, model._meta.get_field(field).attname)
+        for field in fields
+    )
+
+    def _on_post_init(instance, **kwargs):
+        instance._activity_count_fields = _snapshot_fields(attnames, instance)
+
+    def _on_post_save(instance, created=False, **kwargs):
+        old_values = getattr(instance, '_activity_count_fields', None)
+        new_values = _snapshot_fields(attnames, instance)
+        instance._activity_count_fields = new_values
+
+        if new_values is None or not activity_counts_enabled():
+            return
+
+        if created:
+            old_counters = []
+        elif old_values is None:
+            # We don't know what this was counted as before, so assume
+            # it's unchanged.
+            return
+        else:
+            old_counters = get_counters(old_values)
+
+        _apply_changes(old_counters, get_counters(new_values))
+
+    def _on_post_delete(instance, **kwargs):
+        old_values = getattr(instance, '_activity_count_fields', None)
+
+        if old_values is not None and activity_counts_enabled():
+            _apply_changes(get_counters(old_values), [])
+
+    return _on_post_init, _on_post_save, _on_post_delete
+
+
+def _apply_changes(old_counters, new_counters):
+    """Update activity counts for an object's changed counters.
+
+    Args:
+        old_counters (list of tuple):
+            The counters the object previously contributed to.
+
+        new_counters (list of tuple):
+            The counters the object now contributes to.
+    """
+    changes = Counter(new_counters)
+    changes.subtract(old_counters)
+
+    for (name, date, local_site_id), delta in six.iteritems(changes):
+        if delta:
+            DailyActivityCount.objects.add(name, date, local_site_id, delta)
+
+
+def _on_siteconfig_saved(instance, **kwargs):
+    """Connect or disconnect the signal handlers when settings are saved.
+
+    Args:
+        instance (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration that was saved.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    _set_handlers_connected(instance.get('activity_counts_enabled'))
+
+
+def _on_siteconfig_reloaded(siteconfig, **kwargs):
+    """Connect or disconnect the signal handlers when settings are reloaded.
+
+    This handles settings changed by other processes, such as the
+    :command:`rebuild-activity-counts` management command.
+
+    Args:
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The reloaded site configuration.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    _set_handlers_connected(siteconfig.get('activity_counts_enabled'))
+
+
+def _set_handlers_connected(connected):
+    """Connect or disconnect the signal handlers for counted models.
+
+    The handlers run every time a counted object is loaded, so they're only
+    connected while activity counts are in use.
+
+    Args:
+        connected (bool):
+            Whether the handlers should be connected.
+    """
+    for model, fields, get_counters in COUNTED_MODELS:
+        uid = 'activity-counts-%s' % model.__name__
+
+        if connected:
+            on_post_init, on_post_save, on_post_delete = \
+                _make_handlers(model, fields, get_counters)
+
+            post_init.connect(on_post_init, sender=model, weak=False,
+                              dispatch_uid=uid)
+            post_save.connect(on_post_save, sender=model, weak=False,
+                              dispatch_uid=uid)
+            post_delete.connect(on_post_delete, sender=model, weak=False,
+                                dispatch_uid=uid)
+        else:
+            post_init.disconnect(sender=model, dispatch_uid=uid)
+            post_save.disconnect(sender=model, dispatch_uid=uid)
+            post_delete.disconnect(sender=model, dispatch_uid=uid)
+
+
+def connect_signals():
+    """Connect signals for maintaining activity counts.
+
+    The handlers for counted models are only connected while activity
+    counts are enabled, and are connected or disconnected when the setting
+    changes.
+    """
+    post_save.connect(_on_siteconfig_saved, sender=SiteConfiguration)
+    siteconfig_reloaded.connect(_on_siteconfig_reloaded)
+
+    _set_handlers_connected(activity_counts_enabled())
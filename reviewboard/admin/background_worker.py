@@ -0,0 +1,99 @@
+"""Base support for background worker threads."""
+
+from __future__ import unicode_literals
+
+import logging
+import threading
+import time
+
+from django.db import close_old_connections
+
+
+class BackgroundWorker(object):
+    """A background thread that processes work when woken.
+
+    The thread is started the first time the worker is woken (or explicitly
+    started), and runs as a daemon, so it never holds up the process from
+    exiting. Each time the worker wakes up, :py:meth:`process` is called,
+    and any database connections are then closed if they're too old or
+    unusable.
+
+    Subclasses must set :py:attr:`thread_name` and implement
+    :py:meth:`process`.
+    """
+
+    #: The name of the worker thread.
+    thread_name = None
+
+    #: The number of seconds to wait for more work after being woken.
+    #:
+    #: This gives bulk operations a chance to finish queueing work before
+    #: it's processed.
+    coalesce_delay = 0
+
+    #: The number of seconds between runs when the worker isn't woken.
+    #:
+    #: If ``None``, the worker only runs when woken.
+    poll_interval = None
+
+    def __init__(self):
+        """Initialize the worker."""
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the worker thread, if it's not already running."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name=str(self.thread_name))
+                self._thread.daemon = True
+                self._thread.start()
+
+                self.on_started()
+
+    def wake(self):
+        """Wake the worker to process any pending work."""
+        self.start()
+        self._wake_event.set()
+
+    def on_started(self):
+        """Handle the worker thread starting.
+
+        This is called in the thread that started the worker, while holding
+        the worker's lock. Subclasses can override this to set up any state
+        needed while the worker is running.
+        """
+        pass
+
+    def process(self):
+        """Process any pending work.
+
+        Subclasses must implement this. Exceptions will be logged, and the
+        worker will continue processing the next time it wakes up.
+
+        Raises:
+            NotImplementedError:
+                The subclass didn't implement this method.
+        """
+        raise NotImplementedError
+
+    def _run(self):
+        """Process work each time the worker wakes up."""
+        while True:
+            self._wake_event.wait(self.poll_interval)
+
+            if self.coalesce_delay:
+                time.sleep(self.coalesce_delay)
+
+            self._wake_event.clear()
+
+            try:
+                self.process()
+            except Exception as e:
+                logging.exception('Unexpected error in background worker '
+                                  '"%s": %s',
+                                  self.thread_name, e)
+            finally:
+                close_old_connections()
@@ -928,6 +928,22 @@ class LoggingSettingsForm(SiteSettingsForm):
                     "size of log files."),
         required=False)
 
+    instrumentation_enabled = forms.BooleanField(
+        label=_('Enable request instrumentation'),
+        help_text=_('Records the SQL queries, cache lookups, repository '
+                    'calls and diff generation time for each request. '
+                    'These are logged, and totals are available to staff '
+                    'users in the Prometheus format at /admin/metrics/.'),
+        required=False)
+
+    instrumentation_metrics_token = forms.CharField(
+        label=_('Metrics access token'),
+        help_text=_('If set, /admin/metrics/ can also be fetched by passing '
+                    'this token in an "Authorization: Bearer" header, for '
+                    'use by Prometheus or other scrapers.'),
+        required=False,
+        widget=forms.TextInput(attrs={'size': '40'}))
+
     def clean_logging_directory(self):
         """Validate that the logging_directory path is valid.
 
@@ -967,7 +983,9 @@ class LoggingSettingsForm(SiteSettingsForm):
             {
                 'title': _('Advanced'),
                 'classes': ('wide',),
-                'fields': ('logging_allow_profiling',),
+                'fields': ('logging_allow_profiling',
+                           'instrumentation_enabled',
+                           'instrumentation_metrics_token'),
             }
         )
 
@@ -1379,6 +1397,20 @@ class SearchSettingsForm(SiteSettingsForm):
                    'with the Whoosh engine for large or multi-server '
                    'installs.'))
 
+    search_index_diff_content = forms.BooleanField(
+        label=_('Index diff content'),
+        required=False,
+        help_text=_('If enabled, the lines changed in diffs will be '
+                    'searchable. This requires rebuilding the search index, '
+                    'and will increase its size.'))
+
+    search_index_comments = forms.BooleanField(
+        label=_('Index review comments'),
+        required=False,
+        help_text=_('If enabled, the text of published review comments will '
+                    'be searchable. This requires rebuilding the search '
+                    'index.'))
+
     def __init__(self, siteconfig, data=None, *args, **kwargs):
         """Initialize the search engine settings form.
 
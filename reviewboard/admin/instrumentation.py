@@ -0,0 +1,518 @@
+"""Request-level instrumentation.
+
+When enabled in the logging settings, each request records the number and
+time of SQL queries, cache hits and misses by key prefix, SCM calls by
+tool, and the time spent in named spans (such as the phases of generating
+a diff). These are written to the log as JSON at the end of each request,
+and added to per-process totals that can be scraped in the Prometheus text
+format from the ``/admin/metrics/`` endpoint.
+
+Instrumentation is designed to cost almost nothing when it's disabled.
+Nothing is recorded outside of a request (for instance, in background
+workers).
+"""
+
+from __future__ import unicode_literals
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections, reset_queries
+from django.utils import six
+from djblets.cache.backend import (cache_memoize as djblets_cache_memoize,
+                                   make_cache_key)
+from djblets.siteconfig.models import SiteConfiguration
+
+
+_CACHE_KEY_PREFIX_RE = re.compile(r'^[A-Za-z_-]+:?')
+
+_state = threading.local()
+
+
+class RequestMetrics(object):
+    """Metrics recorded for a single request.
+
+    Attributes:
+        cache (dict):
+            A mapping of cache key prefixes to ``[hits, misses]`` lists.
+
+        scm_calls (dict):
+            A mapping of ``(tool_name, operation)`` tuples to
+            ``[calls, seconds]`` lists.
+
+        spans (dict):
+            A mapping of span names to ``[calls, seconds]`` lists.
+
+        sql_queries (int):
+            The number of SQL queries performed.
+
+        sql_seconds (float):
+            The time spent performing SQL queries.
+    """
+
+    def __init__(self):
+        """Initialize the metrics."""
+        self.cache = defaultdict(lambda: [0, 0])
+        self.scm_calls = defaultdict(lambda: [0, 0.0])
+        self.spans = defaultdict(lambda: [0, 0.0])
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+
+    def serialize(self):
+        """Serialize the metrics for logging.
+
+        Returns:
+            dict:
+            The serialized metrics.
+        """
+        return {
+            'cache': dict(
+                (prefix, {'hits': hits, 'misses': misses})
+                for prefix, (hits, misses) in six.iteritems(self.cache)
+            ),
+            'scm_calls': [
+                {
+                    'tool': tool_name,
+                    'operation': operation,
+                    'calls': calls,
+                    'seconds': round(seconds, 6),
+                }
+                for (tool_name, operation), (calls, seconds)
+                in sorted(six.iteritems(self.scm_calls))
+            ],
+            'spans': dict(
+                (name, {'calls': calls, 'seconds': round(seconds, 6)})
+                for name, (calls, seconds) in six.iteritems(self.spans)
+            ),
+            'sql': {
+                'queries': self.sql_queries,
+                'seconds': round(self.sql_seconds, 6),
+            },
+        }
+
+
+class MetricsRegistry(object):
+    """Per-process totals of recorded metrics.
+
+    Each server process has its own totals, so a scrape of the metrics
+    endpoint only covers the process that handled it.
+    """
+
+    def __init__(self):
+        """Initialize the registry."""
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Reset all totals."""
+        with self._lock:
+            self._counters = defaultdict(float)
+
+    def add_request(self, metrics, seconds):
+        """Add the metrics for a request to the totals.
+
+        Args:
+            metrics (RequestMetrics):
+                The metrics recorded for the request.
+
+            seconds (float):
+                The time taken by the request.
+        """
+        with self._lock:
+            counters = self._counters
+            counters[('requests_total', ())] += 1
+            counters[('request_seconds_total', ())] += seconds
+            counters[('sql_queries_total', ())] += metrics.sql_queries
+            counters[('sql_seconds_total', ())] += metrics.sql_seconds
+
+            for prefix, (hits, misses) in six.iteritems(metrics.cache):
+                counters[('cache_lookups_total',
+                          (('prefix', prefix), ('result', 'hit')))] += hits
+                counters[('cache_lookups_total',
+                          (('prefix', prefix), ('result', 'miss')))] += misses
+
+            for (tool_name, operation), (calls, call_seconds) in \
+                    six.iteritems(metrics.scm_calls):
+                labels = (('tool', tool_name), ('operation', operation))
+                counters[('scm_calls_total', labels)] += calls
+                counters[('scm_call_seconds_total', labels)] += call_seconds
+
+            for name, (calls, span_seconds) in six.iteritems(metrics.spans):
+                labels = (('span', name),)
+                counters[('span_calls_total', labels)] += calls
+                counters[('span_seconds_total', labels)] += span_seconds
+
+    def render_prometheus(self):
+        """Render the totals in the Prometheus text exposition format.
+
+        Returns:
+            unicode:
+            The rendered metrics.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+
+        by_name = defaultdict(list)
+
+        for (name, labels), value in six.iteritems(counters):
+            by_name[name].append((labels, value))
+
+        lines = []
+
+        for name, help_text in METRICS:
+            metric_name = 'reviewboard_%s' % name
+            lines += [
+                '# HELP %s %s' % (metric_name, help_text),
+                '# TYPE %s counter' % metric_name,
+            ]
+
+            for labels, value in sorted(by_name.get(name, [])):
+                if labels:
+                    label_str = '{%s}' % ','.join(
+                        '%s="%s"' % (label, _escape_label_value(label_value))
+                        for label, label_value in labels)
+                else:
+                    label_str = ''
+
+                lines.append('%s%s %s' % (metric_name, label_str,
+                                          repr(float(value))))
+
+        return '\n'.join(lines) + '\n'
+
+
+#: The exported metrics, with their help text.
+METRICS = [
+    ('requests_total', 'Requests handled.'),
+    ('request_seconds_total', 'Time spent handling requests.'),
+    ('sql_queries_total', 'SQL queries performed during requests.'),
+    ('sql_seconds_total', 'Time spent on SQL queries during requests.'),
+    ('cache_lookups_total', 'Cache lookups, by key prefix and result.'),
+    ('scm_calls_total', 'Calls to repositories, by tool and operation.'),
+    ('scm_call_seconds_total',
+     'Time spent on calls to repositories, by tool and operation.'),
+    ('span_calls_total', 'Times each instrumented span was entered.'),
+    ('span_seconds_total',
+     'Time spent in each instrumented span. Spans may be nested.'),
+]
+
+
+#: The metrics totals for this process.
+metrics_registry = MetricsRegistry()
+
+
+def instrumentation_enabled():
+    """Return whether request instrumentation is enabled.
+
+    Returns:
+        bool:
+        Whether request instrumentation is enabled.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    return siteconfig.get('instrumentation_enabled')
+
+
+def get_request_metrics():
+    """Return the metrics being recorded for the current request.
+
+    Returns:
+        RequestMetrics:
+        The metrics, or ``None`` if instrumentation is disabled or there's
+        no request being handled in this thread.
+    """
+    return getattr(_state, 'metrics', None)
+
+
+def start_request():
+    """Start recording metrics for a request in this thread.
+
+    This is called by
+    :py:class:`~reviewboard.admin.middleware.InstrumentationMiddleware`.
+    """
+    metrics = RequestMetrics()
+    db_state = []
+
+    for connection in connections.all():
+        db_state.append((connection, _get_debug_cursor(connection),
+                         len(_get_queries(connection))))
+        _set_debug_cursor(connection, True)
+
+    _state.metrics = metrics
+    _state.db_state = db_state
+    _state.start_time = time.time()
+
+
+def finish_request(request, response=None):
+    """Finish recording metrics for a request in this thread.
+
+    The metrics are logged and added to the process's totals.
+
+    Args:
+        request (django.http.HttpRequest):
+            The HTTP request.
+
+        response (django.http.HttpResponse, optional):
+            The HTTP response, if any.
+
+    Returns:
+        RequestMetrics:
+        The metrics recorded for the request, or ``None`` if recording
+        wasn't started.
+    """
+    metrics = get_request_metrics()
+
+    if metrics is None:
+        return None
+
+    seconds = time.time() - _state.start_time
+
+    for connection, debug_cursor, num_queries in _state.db_state:
+        queries = list(_get_queries(connection))[num_queries:]
+        metrics.sql_queries += len(queries)
+        metrics.sql_seconds += sum(float(query['time'])
+                                   for query in queries)
+        _set_debug_cursor(connection, debug_cursor)
+
+    if not settings.DEBUG:
+        reset_queries()
+
+    _state.metrics = None
+    _state.db_state = None
+
+    metrics_registry.add_request(metrics, seconds)
+
+    data = metrics.serialize()
+    data.update({
+        'method': request.method,
+        'path': request.path,
+        'seconds': round(seconds, 6),
+        'status': getattr(response, 'status_code', None),
+    })
+    logging.info('Request instrumentation: %s', json.dumps(data,
+                                                           sort_keys=True))
+
+    return metrics
+
+
+def discard_request():
+    """Stop recording metrics in this thread, without recording them.
+
+    This cleans up after a request whose recording was never finished, such
+    as when an exception skipped the response middleware.
+    """
+    db_state = getattr(_state, 'db_state', None)
+
+    if db_state:
+        for connection, debug_cursor, num_queries in db_state:
+            _set_debug_cursor(connection, debug_cursor)
+
+    _state.metrics = None
+    _state.db_state = None
+
+
+@contextmanager
+def span(name):
+    """Record the time spent in a named span of code.
+
+    Spans are inclusive, so a span nested in another is counted in both.
+
+    Args:
+        name (unicode):
+            The name of the span, such as ``diff.patch``.
+
+    Context:
+        The code being timed.
+    """
+    metrics = get_request_metrics()
+
+    if metrics is None:
+        yield
+        return
+
+    start_time = time.time()
+
+    try:
+        yield
+    finally:
+        totals = metrics.spans[name]
+        totals[0] += 1
+        totals[1] += time.time() - start_time
+
+
+@contextmanager
+def scm_call(repository, operation):
+    """Record a call to a repository.
+
+    Args:
+        repository (reviewboard.scmtools.models.Repository):
+            The repository being called.
+
+        operation (unicode):
+            The name of the operation, such as ``get_file``.
+
+    Context:
+        The call to the repository.
+    """
+    metrics = get_request_metrics()
+
+    if metrics is None:
+        yield
+        return
+
+    start_time = time.time()
+
+    try:
+        yield
+    finally:
+        totals = metrics.scm_calls[(repository.scmtool_class.name,
+                                    operation)]
+        totals[0] += 1
+        totals[1] += time.time() - start_time
+
+
+def cache_memoize(key, lookup_callable, *args, **kwargs):
+    """Memoize the result of a function, recording cache hits and misses.
+
+    This wraps :py:func:`djblets.cache.backend.cache_memoize`, taking the
+    same arguments. Hits and misses are recorded by the prefix of the key
+    (such as ``diff-sidebyside-`` or ``file:``).
+
+    Args:
+        key (unicode):
+            The cache key.
+
+        lookup_callable (callable):
+            The function computing the value if it's not cached.
+
+        *args (tuple):
+            Additional positional arguments for ``cache_memoize``.
+
+        **kwargs (dict):
+            Additional keyword arguments for ``cache_memoize``.
+
+    Returns:
+        object:
+        The cached or computed value.
+    """
+    metrics = get_request_metrics()
+
+    if metrics is None:
+        return djblets_cache_memoize(key, lookup_callable, *args, **kwargs)
+
+    missed = []
+
+    def _lookup():
+        missed.append(True)
+
+        return lookup_callable()
+
+    try:
+        return djblets_cache_memoize(key, _lookup, *args, **kwargs)
+    finally:
+        metrics.cache[_get_cache_key_prefix(key)][bool(missed)] += 1
+
+
+def _get_cache_key_prefix(key):
+    """Return the prefix of a cache key, used to group cache lookups.
+
+    Args:
+        key (unicode or bytes):
+            The cache key, optionally already made site-specific by
+            :py:func:`~djblets.cache.backend.make_cache_key`.
+
+    Returns:
+        unicode:
+        The prefix of the key.
+    """
+    if isinstance(key, bytes):
+        key = key.decode('utf-8', 'replace')
+
+    site_prefix = make_cache_key('').decode('utf-8')
+
+    if key.startswith(site_prefix):
+        key = key[len(site_prefix):]
+
+    m = _CACHE_KEY_PREFIX_RE.match(key)
+
+    if m:
+        return m.group(0)
+
+    return 'other'
+
+
+def _escape_label_value(value):
+    """Escape a label value for the Prometheus text format.
+
+    Args:
+        value (unicode):
+            The label value.
+
+    Returns:
+        unicode:
+        The escaped label value.
+    """
+    return (
+        six.text_type(value)
+        .replace('\\', '\\\\')
+        .replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+def _get_debug_cursor(connection):
+    """Return whether a database connection is forced to log queries.
+
+    Args:
+        connection (django.db.backends.BaseDatabaseWrapper):
+            The database connection.
+
+    Returns:
+        bool:
+        The current value of the setting.
+    """
+    if hasattr(connection, 'force_debug_cursor'):
+        # Django >= 1.8
+        return connection.force_debug_cursor
+    else:
+        return connection.use_debug_cursor
+
+
+def _set_debug_cursor(connection, enabled):
+    """Set whether a database connection is forced to log queries.
+
+    Args:
+        connection (django.db.backends.BaseDatabaseWrapper):
+            The database connection.
+
+        enabled (bool):
+            Whether to log queries.
+    """
+    if hasattr(connection, 'force_debug_cursor'):
+        # Django >= 1.8
+        connection.force_debug_cursor = enabled
+    else:
+        connection.use_debug_cursor = enabled
+
+
+def _get_queries(connection):
+    """Return the queries logged for a database connection.
+
+    Args:
+        connection (django.db.backends.BaseDatabaseWrapper):
+            The database connection.
+
+    Returns:
+        list:
+        The logged queries.
+    """
+    if hasattr(connection, 'queries_log'):
+        # Django >= 1.8
+        return connection.queries_log
+    else:
+        return connection.queries
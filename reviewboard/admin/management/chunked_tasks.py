@@ -0,0 +1,192 @@
+"""Helpers for management commands that process objects in chunks.
+
+Commands such as ``index`` and ``condensediffs`` can split their work into
+chunks of primary keys, process them across several worker processes, and
+record completed chunks in a checkpoint file so that an interrupted run can
+be resumed.
+"""
+
+from __future__ import unicode_literals
+
+import json
+import multiprocessing
+import os
+
+from django import db
+from django.db.models import Max, Min
+from django.utils.six.moves import range
+
+
+def _run_task(func_and_args):
+    """Run a task in a worker process.
+
+    :py:meth:`multiprocessing.pool.Pool.imap_unordered` only passes a single
+    argument to the function.
+
+    Args:
+        func_and_args (tuple):
+            A 2-tuple of the function to call and a tuple of arguments to
+            pass to it.
+
+    Returns:
+        object:
+        The result of the function.
+    """
+    func, args = func_and_args
+
+    return func(*args)
+
+
+def get_pk_chunks(queryset, chunk_size):
+    """Return primary key ranges covering all objects in a queryset.
+
+    The ranges are aligned to multiples of ``chunk_size`` and cover the
+    lowest through highest primary keys in the queryset, so chunks may
+    contain fewer objects than ``chunk_size`` if there are gaps in the
+    primary keys. Since the ranges are aligned, they stay the same between
+    runs, which allows processing to be resumed from a checkpoint.
+
+    Args:
+        queryset (django.db.models.query.QuerySet):
+            The queryset for the objects to process.
+
+        chunk_size (int):
+            The number of primary keys in each chunk.
+
+    Returns:
+        list of tuple:
+        A list of ``(start_pk, end_pk)`` tuples, where ``end_pk`` is
+        exclusive.
+    """
+    bounds = queryset.aggregate(min_pk=Min('pk'),
+                                max_pk=Max('pk'))
+
+    if bounds['min_pk'] is None:
+        return []
+
+    first_pk = bounds['min_pk'] - bounds['min_pk'] % chunk_size
+
+    return [
+        (start_pk, start_pk + chunk_size)
+        for start_pk in range(first_pk, bounds['max_pk'] + 1, chunk_size)
+    ]
+
+
+def run_chunked_tasks(func, tasks, workers, on_result, initializer=None,
+                      initargs=()):
+    """Run tasks, optionally across several worker processes.
+
+    Results are passed to ``on_result`` in this process as each task
+    completes, in whatever order they complete.
+
+    If processing is interrupted, or ``on_result`` raises an exception, any
+    worker processes will be terminated and the exception will be raised.
+
+    Args:
+        func (callable):
+            The function to call for each task. This must be defined at the
+            top level of a module, so that worker processes can find it.
+
+        tasks (list of tuple):
+            The arguments to pass to ``func`` for each task.
+
+        workers (int):
+            The number of worker processes to use. If 1, tasks will be run
+            in this process.
+
+        on_result (callable):
+            The function to call with the result of each task.
+
+        initializer (callable, optional):
+            A function to call in each worker process before running any
+            tasks.
+
+        initargs (tuple, optional):
+            The arguments to pass to ``initializer``.
+    """
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+
+        for task in tasks:
+            on_result(func(*task))
+    elif tasks:
+        # Connections can't be shared with the worker processes. They'll
+        # open their own.
+        for db_connection in db.connections.all():
+            db_connection.close()
+
+        pool = multiprocessing.Pool(processes=workers,
+                                    initializer=initializer,
+                                    initargs=initargs)
+        finished = False
+
+        try:
+            for result in pool.imap_unordered(_run_task,
+                                              [(func, task)
+                                               for task in tasks]):
+                on_result(result)
+
+            finished = True
+        finally:
+            if finished:
+                pool.close()
+            else:
+                pool.terminate()
+
+            pool.join()
+
+
+def read_checkpoint(path):
+    """Return the data from a checkpoint file.
+
+    Args:
+        path (unicode):
+            The path to the checkpoint file. This may be ``None``.
+
+    Returns:
+        dict:
+        The data in the checkpoint, or ``None`` if there's no checkpoint.
+    """
+    if not path or not os.path.exists(path):
+        return None
+
+    with open(path, 'r') as fp:
+        return json.load(fp)
+
+
+def write_checkpoint(path, data):
+    """Write data to a checkpoint file.
+
+    The data is written to a temporary file first, which then replaces the
+    checkpoint, so that an interruption doesn't leave behind a truncated
+    checkpoint.
+
+    Args:
+        path (unicode):
+            The path to the checkpoint file. If ``None``, nothing will be
+            written.
+
+        data (dict):
+            The data to write. This must be serializable to JSON.
+    """
+    if not path:
+        return
+
+    temp_path = '%s.tmp' % path
+
+    with open(temp_path, 'w') as fp:
+        json.dump(data, fp)
+
+    os.rename(temp_path, path)
+
+
+def remove_checkpoint(path):
+    """Remove a checkpoint file, if it exists.
+
+    Args:
+        path (unicode):
+            The path to the checkpoint file. This may be ``None``.
+    """
+    if path and os.path.exists(path):
+        os.unlink(path)
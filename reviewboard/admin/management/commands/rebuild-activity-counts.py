@@ -0,0 +1,33 @@
+"""Management command to rebuild the administration dashboard counts."""
+
+from __future__ import unicode_literals
+
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.admin.activity_counts import rebuild_activity_counts
+
+
+class Command(BaseCommand):
+    """Management command to rebuild the administration dashboard counts.
+
+    This counts all review requests, reviews, comments and other objects
+    shown in the administration dashboard, and stores the counts so the
+    dashboard no longer needs to scan those tables. The counts are kept up
+    to date after this, so it only needs to be run once, though it can be
+    run again at any time to correct them.
+    """
+
+    help = _('Rebuilds the activity counts shown in the administration '
+             'dashboard.')
+
+    def handle(self, **options):
+        """Handle the command.
+
+        Args:
+            **options (dict):
+                Options parsed on the command line.
+        """
+        rebuild_activity_counts()
+
+        self.stdout.write(_('Rebuilt activity counts.'))
@@ -9,6 +9,10 @@ from reviewboard import initialize
 from reviewboard.accounts.backends.registry import get_enabled_auth_backends
 from reviewboard.accounts.backends.x509 import X509Backend
 from reviewboard.admin.checks import check_updates_required
+from reviewboard.admin.instrumentation import (discard_request,
+                                               finish_request,
+                                               instrumentation_enabled,
+                                               start_request)
 from reviewboard.admin.siteconfig import load_site_config
 from reviewboard.admin.views import manual_updates_required
 
@@ -51,6 +55,44 @@ class LoadSettingsMiddleware(object):
             request.META['wsgi.url_scheme'] = 'https'
 
 
+class InstrumentationMiddleware(object):
+    """Middleware that records instrumentation for each request.
+
+    This only records anything if instrumentation is enabled in the logging
+    settings. See :py:mod:`reviewboard.admin.instrumentation` for details.
+    """
+
+    def process_request(self, request):
+        """Start recording instrumentation for the request.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+        """
+        discard_request()
+
+        if instrumentation_enabled():
+            start_request()
+
+    def process_response(self, request, response):
+        """Finish recording instrumentation for the request.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            response (django.http.HttpResponse):
+                The HTTP response being returned.
+
+        Returns:
+            django.http.HttpResponse:
+            The HTTP response.
+        """
+        finish_request(request, response)
+
+        return response
+
+
 class CheckUpdatesRequiredMiddleware(object):
     """Middleware that checks if manual updates need to be done.
 
@@ -130,6 +130,7 @@ defaults.update(log_siteconfig.defaults)
 defaults.update(recaptcha_siteconfig.defaults)
 defaults.update(avatar_services.get_siteconfig_defaults())
 defaults.update({
+    'activity_counts_enabled': False,
     'auth_ldap_anon_bind_uid': '',
     'auth_ldap_anon_bind_passwd': '',
     'auth_ldap_email_domain': '',
@@ -155,15 +156,29 @@ defaults.update({
     'diffviewer_syntax_highlighting': True,
     'diffviewer_syntax_highlighting_threshold': 0,
     'diffviewer_show_trailing_whitespace': True,
+    'file_attachment_thumbnails_in_background': True,
+    'instrumentation_enabled': False,
+    'instrumentation_metrics_token': '',
     'mail_send_review_mail': False,
     'mail_send_new_user_mail': False,
     'mail_send_password_changed_mail': False,
     'mail_enable_autogenerated_header': True,
     'mail_from_spoofing': EmailMessage.FROM_SPOOFING_SMART,
+    'mail_send_batch_size': 100,
+    'mail_send_in_background': True,
+    'mail_send_max_attempts': 5,
+    'mail_send_rate_limit': 0,
+    'mail_send_retry_delay': 60,
+    'reviews_page_entries_window': 50,
     'search_enable': False,
     'send_support_usage_stats': True,
     'site_domain_method': 'http',
     'site_read_only': False,
+    'webhooks_delivery_max_attempts': 5,
+    'webhooks_delivery_retry_delay': 30,
+    'webhooks_delivery_target_concurrency': 2,
+    'webhooks_delivery_timeout': 10,
+    'webhooks_delivery_workers': 4,
 
     'privacy_enable_user_consent': False,
     'privacy_info_html': None,
@@ -173,6 +188,10 @@ defaults.update({
     'search_results_per_page': 20,
     'search_backend_id': WhooshBackend.search_backend_id,
     'search_backend_settings': {},
+    'search_index_batch_size': 100,
+    'search_index_comments': False,
+    'search_index_diff_content': False,
+    'search_index_in_background': True,
     'search_on_the_fly_indexing': False,
 
     # Overwrite this.
@@ -0,0 +1,207 @@
+"""Unit tests for reviewboard.admin.activity_counts."""
+
+from __future__ import unicode_literals
+
+from django.db.models import F
+from django.test.client import RequestFactory
+from django.utils import timezone
+from djblets.siteconfig.models import SiteConfiguration
+from kgb import SpyAgency
+
+from reviewboard.admin.activity_counts import rebuild_activity_counts
+from reviewboard.admin.widgets import (DatabaseStatsWidget,
+                                       ReviewRequestStatusesWidget,
+                                       UserActivityWidget,
+                                       dynamic_activity_data)
+from reviewboard.reviews.managers import DailyActivityCountManager
+from reviewboard.reviews.models import DailyActivityCount, ReviewRequest
+from reviewboard.site.models import LocalSite
+from reviewboard.testing.testcase import TestCase
+
+
+class ActivityCountsTests(SpyAgency, TestCase):
+    """Unit tests for reviewboard.admin.activity_counts."""
+
+    fixtures = ['test_users', 'test_scmtools']
+
+    def setUp(self):
+        super(ActivityCountsTests, self).setUp()
+
+        self.request = RequestFactory().get('/')
+
+    def test_rebuild(self):
+        """Testing rebuild_activity_counts matches counting objects"""
+        self._create_activity()
+        expected = self._get_widget_data()
+
+        rebuild_activity_counts()
+
+        self.assertTrue(SiteConfiguration.objects.get_current().get(
+            'activity_counts_enabled'))
+        self.assertEqual(self._get_widget_data(), expected)
+
+    def test_create_and_update(self):
+        """Testing activity counts are updated when objects are created and
+        changed
+        """
+        rebuild_activity_counts()
+        self._create_activity()
+
+        review_request = self.create_review_request(publish=True)
+        review_request.close(ReviewRequest.SUBMITTED)
+
+        review_request = ReviewRequest.objects.get(pk=review_request.pk)
+        review_request.reopen()
+
+        data = self._get_widget_data()
+        self._set_activity_counts_enabled(False)
+
+        self.assertEqual(data, self._get_widget_data())
+        self.assertEqual(
+            DailyActivityCount.objects.get_totals(
+                ['review_requests_pending'])['review_requests_pending'],
+            2)
+
+    def test_delete(self):
+        """Testing activity counts are updated when objects are deleted"""
+        rebuild_activity_counts()
+        self._create_activity()
+
+        ReviewRequest.objects.get(summary='Draft').delete()
+
+        data = self._get_widget_data()
+        self._set_activity_counts_enabled(False)
+
+        self.assertEqual(data, self._get_widget_data())
+
+    def test_deferred_fields(self):
+        """Testing activity counts ignore saved objects with deferred
+        fields
+        """
+        rebuild_activity_counts()
+        self._create_activity()
+
+        review_request = \
+            ReviewRequest.objects.only('summary').get(summary='Draft')
+        review_request.summary = 'New summary'
+        review_request.save(update_fields=('summary',))
+
+        data = self._get_widget_data()
+        self._set_activity_counts_enabled(False)
+
+        self.assertEqual(data, self._get_widget_data())
+
+    def test_handlers_disconnected_when_disabled(self):
+        """Testing activity count handlers are only connected while
+        activity counts are enabled
+        """
+        review_request = self.create_review_request()
+
+        self.assertFalse(hasattr(
+            ReviewRequest.objects.get(pk=review_request.pk),
+            '_activity_count_fields'))
+
+        rebuild_activity_counts()
+
+        self.assertTrue(hasattr(
+            ReviewRequest.objects.get(pk=review_request.pk),
+            '_activity_count_fields'))
+
+        self._set_activity_counts_enabled(False)
+
+        self.assertFalse(hasattr(
+            ReviewRequest.objects.get(pk=review_request.pk),
+            '_activity_count_fields'))
+
+    def test_add_with_duplicate_rows(self):
+        """Testing DailyActivityCountManager.add only updates one row when
+        there are duplicates
+        """
+        DailyActivityCount.objects.bulk_create([
+            DailyActivityCount(name='users', count=2),
+            DailyActivityCount(name='users', count=3),
+        ])
+
+        DailyActivityCount.objects.add('users', None, None, 1)
+
+        self.assertEqual(
+            DailyActivityCount.objects.get_totals(['users']),
+            {'users': 6})
+
+    def test_add_with_concurrent_create(self):
+        """Testing DailyActivityCountManager.add when another process creates
+        the row first
+        """
+        local_site = LocalSite.objects.create(name='test-site')
+        today = timezone.now().date()
+        DailyActivityCount.objects.create(name='reviews',
+                                          date=today,
+                                          local_site=local_site,
+                                          count=4)
+        calls = []
+
+        def _add_to_first_row(manager, name, date, local_site_id, delta):
+            calls.append(name)
+
+            if len(calls) == 1:
+                # Simulate the row not existing yet, as if another process
+                # created it after this check.
+                return False
+
+            return (
+                DailyActivityCount.objects
+                .filter(name=name, date=date, local_site=local_site_id)
+                .update(count=F('count') + delta)
+            ) > 0
+
+        self.spy_on(DailyActivityCountManager._add_to_first_row,
+                    owner=DailyActivityCountManager,
+                    call_fake=_add_to_first_row)
+
+        DailyActivityCount.objects.add('reviews', today, local_site.pk, 1)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(DailyActivityCount.objects.get(name='reviews').count,
+                         5)
+
+    def _create_activity(self):
+        """Create review requests, reviews and comments to count."""
+        repository = self.create_repository(tool_name='Test')
+        review_request = self.create_review_request(repository=repository,
+                                                    publish=True)
+        self.create_review_request(summary='Draft')
+
+        diffset = self.create_diffset(review_request)
+        filediff = self.create_filediff(diffset)
+        review = self.create_review(review_request, publish=True)
+        self.create_diff_comment(review, filediff)
+        self.create_review(review_request)
+
+    def _get_widget_data(self):
+        """Return the data from the widgets that use activity counts.
+
+        Returns:
+            dict:
+            The data for each widget.
+        """
+        user_activity = UserActivityWidget().generate_data(self.request)
+
+        return {
+            'activity': dynamic_activity_data(self.request)['activity_data'],
+            'database_stats':
+                DatabaseStatsWidget().generate_data(self.request),
+            'statuses':
+                ReviewRequestStatusesWidget().generate_data(self.request),
+            'users': user_activity['total'],
+        }
+
+    def _set_activity_counts_enabled(self, enabled):
+        """Set whether activity counts are in use.
+
+        Args:
+            enabled (bool):
+                Whether activity counts are in use.
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        siteconfig.set('activity_counts_enabled', enabled)
+        siteconfig.save()
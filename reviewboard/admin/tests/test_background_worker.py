@@ -0,0 +1,86 @@
+"""Unit tests for reviewboard.admin.background_worker."""
+
+from __future__ import unicode_literals
+
+import threading
+
+from kgb import SpyAgency
+
+from reviewboard.admin.background_worker import BackgroundWorker
+from reviewboard.testing.testcase import TestCase
+
+
+class _TestWorker(BackgroundWorker):
+    """A worker that records each time it processes work."""
+
+    thread_name = 'test-worker'
+
+    def __init__(self, fail_first=False):
+        """Initialize the worker.
+
+        Args:
+            fail_first (bool, optional):
+                Whether the first call to :py:meth:`process` should fail.
+        """
+        super(_TestWorker, self).__init__()
+
+        self.fail_first = fail_first
+        self.num_processed = 0
+        self.processed_event = threading.Event()
+
+    def process(self):
+        """Record that work was processed.
+
+        Raises:
+            ValueError:
+                This is the first call, and ``fail_first`` was set.
+        """
+        self.num_processed += 1
+
+        try:
+            if self.fail_first and self.num_processed == 1:
+                raise ValueError('oops')
+        finally:
+            self.processed_event.set()
+
+
+class BackgroundWorkerTests(SpyAgency, TestCase):
+    """Unit tests for reviewboard.admin.background_worker.BackgroundWorker."""
+
+    def test_start(self):
+        """Testing BackgroundWorker.start only starts one thread"""
+        worker = _TestWorker()
+        self.spy_on(worker.on_started)
+
+        worker.start()
+        thread = worker._thread
+
+        worker.start()
+
+        self.assertIs(worker._thread, thread)
+        self.assertTrue(thread.daemon)
+        self.assertEqual(thread.name, 'test-worker')
+        self.assertEqual(len(worker.on_started.calls), 1)
+
+    def test_wake(self):
+        """Testing BackgroundWorker.wake starts the worker and processes
+        work
+        """
+        worker = _TestWorker()
+        worker.wake()
+
+        self.assertTrue(worker.processed_event.wait(5))
+        self.assertEqual(worker.num_processed, 1)
+
+    def test_wake_after_error(self):
+        """Testing BackgroundWorker keeps processing work after an error"""
+        worker = _TestWorker(fail_first=True)
+        worker.wake()
+
+        self.assertTrue(worker.processed_event.wait(5))
+        worker.processed_event.clear()
+
+        worker.wake()
+
+        self.assertTrue(worker.processed_event.wait(5))
+        self.assertEqual(worker.num_processed, 2)
@@ -0,0 +1,123 @@
+"""Unit tests for reviewboard.admin.management.chunked_tasks."""
+
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+
+from reviewboard.admin.management.chunked_tasks import (get_pk_chunks,
+                                                        read_checkpoint,
+                                                        remove_checkpoint,
+                                                        run_chunked_tasks,
+                                                        write_checkpoint)
+from reviewboard.testing.testcase import TestCase
+
+
+def _add(a, b):
+    """Return the sum of two numbers.
+
+    Args:
+        a (int):
+            The first number.
+
+        b (int):
+            The second number.
+
+    Returns:
+        int:
+        The sum.
+    """
+    return a + b
+
+
+class ChunkedTasksTests(TestCase):
+    """Unit tests for reviewboard.admin.management.chunked_tasks."""
+
+    def setUp(self):
+        super(ChunkedTasksTests, self).setUp()
+
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+
+        self.checkpoint_path = os.path.join(tempdir, 'checkpoint.json')
+
+    def test_checkpoint(self):
+        """Testing write_checkpoint, read_checkpoint and remove_checkpoint"""
+        self.assertIsNone(read_checkpoint(self.checkpoint_path))
+
+        write_checkpoint(self.checkpoint_path, {
+            'completed': [[1, 10]],
+        })
+
+        self.assertEqual(read_checkpoint(self.checkpoint_path), {
+            'completed': [[1, 10]],
+        })
+        self.assertFalse(os.path.exists('%s.tmp' % self.checkpoint_path))
+
+        remove_checkpoint(self.checkpoint_path)
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+        # Removing a missing checkpoint is harmless.
+        remove_checkpoint(self.checkpoint_path)
+
+    def test_checkpoint_without_path(self):
+        """Testing checkpoint functions without a path"""
+        write_checkpoint(None, {})
+        self.assertIsNone(read_checkpoint(None))
+        remove_checkpoint(None)
+
+    def test_get_pk_chunks(self):
+        """Testing get_pk_chunks"""
+        self.assertEqual(get_pk_chunks(User.objects.all(), 10), [])
+
+        User.objects.create(pk=5, username='user1')
+        User.objects.create(pk=27, username='user2')
+
+        # Objects outside the queryset aren't included in the range.
+        User.objects.create(pk=40, username='user3', is_active=False)
+
+        self.assertEqual(get_pk_chunks(User.objects.filter(is_active=True),
+                                       10),
+                         [(0, 10), (10, 20), (20, 30)])
+
+    def test_run_chunked_tasks_in_process(self):
+        """Testing run_chunked_tasks with 1 worker"""
+        initialized = []
+        results = []
+
+        run_chunked_tasks(func=_add,
+                          tasks=[(1, 2), (3, 4)],
+                          workers=1,
+                          on_result=results.append,
+                          initializer=initialized.append,
+                          initargs=(True,))
+
+        self.assertEqual(initialized, [True])
+        self.assertEqual(results, [3, 7])
+
+    def test_run_chunked_tasks_with_workers(self):
+        """Testing run_chunked_tasks with multiple workers"""
+        results = []
+
+        run_chunked_tasks(func=_add,
+                          tasks=[(1, 2), (3, 4), (5, 6)],
+                          workers=2,
+                          on_result=results.append)
+
+        self.assertEqual(sorted(results), [3, 7, 11])
+
+    def test_run_chunked_tasks_with_workers_and_error(self):
+        """Testing run_chunked_tasks with multiple workers stops when
+        processing a result fails
+        """
+        def _on_result(result):
+            raise ValueError('oops')
+
+        with self.assertRaises(ValueError):
+            run_chunked_tasks(func=_add,
+                              tasks=[(1, 2), (3, 4)],
+                              workers=2,
+                              on_result=_on_result)
@@ -0,0 +1,175 @@
+"""Unit tests for reviewboard.admin.instrumentation."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
+from django.test.client import RequestFactory
+from djblets.cache.backend import make_cache_key
+from djblets.siteconfig.models import SiteConfiguration
+
+from reviewboard.admin.instrumentation import (cache_memoize,
+                                               discard_request,
+                                               finish_request,
+                                               get_request_metrics,
+                                               metrics_registry,
+                                               span,
+                                               start_request,
+                                               _get_cache_key_prefix)
+from reviewboard.testing.testcase import TestCase
+
+
+class InstrumentationTests(TestCase):
+    """Unit tests for reviewboard.admin.instrumentation."""
+
+    def setUp(self):
+        super(InstrumentationTests, self).setUp()
+
+        metrics_registry.reset()
+        self.request = RequestFactory().get('/r/1/')
+
+    def tearDown(self):
+        discard_request()
+        metrics_registry.reset()
+
+        super(InstrumentationTests, self).tearDown()
+
+    def test_disabled(self):
+        """Testing instrumentation records nothing outside of a request"""
+        with span('diff.patch'):
+            pass
+
+        self.assertIsNone(get_request_metrics())
+        self.assertIsNone(finish_request(self.request))
+
+    def test_request(self):
+        """Testing instrumentation records spans, cache lookups and queries
+        for a request
+        """
+        start_request()
+
+        with span('diff.patch'):
+            with span('diff.patch'):
+                pass
+
+        cache_memoize('diff-sidebyside-123', lambda: 'value')
+        cache_memoize('diff-sidebyside-123', lambda: 'value')
+        User.objects.count()
+
+        metrics = finish_request(self.request)
+
+        self.assertIsNone(get_request_metrics())
+        self.assertEqual(metrics.spans['diff.patch'][0], 2)
+        self.assertEqual(metrics.cache['diff-sidebyside-'], [1, 1])
+        self.assertEqual(metrics.sql_queries, 1)
+
+        rendered = metrics_registry.render_prometheus()
+        self.assertIn('reviewboard_requests_total 1.0\n', rendered)
+        self.assertIn('reviewboard_sql_queries_total 1.0\n', rendered)
+        self.assertIn(
+            'reviewboard_cache_lookups_total{prefix="diff-sidebyside-",'
+            'result="miss"} 1.0\n',
+            rendered)
+        self.assertIn(
+            'reviewboard_span_calls_total{span="diff.patch"} 2.0\n',
+            rendered)
+
+    def test_get_cache_key_prefix(self):
+        """Testing _get_cache_key_prefix"""
+        self.assertEqual(_get_cache_key_prefix('file:1:README:abc'), 'file:')
+        self.assertEqual(_get_cache_key_prefix('diff-sidebyside-hl-123'),
+                         'diff-sidebyside-hl-')
+        self.assertEqual(
+            _get_cache_key_prefix(make_cache_key('repository-1-branches')),
+            'repository-')
+        self.assertEqual(_get_cache_key_prefix('123'), 'other')
+
+
+class InstrumentationMetricsViewTests(TestCase):
+    """Unit tests for the instrumentation metrics view."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(InstrumentationMetricsViewTests, self).setUp()
+
+        self.siteconfig = SiteConfiguration.objects.get_current()
+        self.siteconfig.set('instrumentation_enabled', True)
+        self.siteconfig.save()
+
+    def tearDown(self):
+        self.siteconfig.set('instrumentation_enabled', False)
+        self.siteconfig.set('instrumentation_metrics_token', '')
+        self.siteconfig.save()
+        discard_request()
+
+        super(InstrumentationMetricsViewTests, self).tearDown()
+
+    def test_get_disabled(self):
+        """Testing instrumentation metrics view with instrumentation
+        disabled
+        """
+        self.siteconfig.set('instrumentation_enabled', False)
+        self.siteconfig.save()
+
+        self.client.login(username='admin', password='admin')
+        response = self.client.get(reverse('admin-instrumentation-metrics'))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_as_staff(self):
+        """Testing instrumentation metrics view as a staff user"""
+        self.client.login(username='admin', password='admin')
+        response = self.client.get(reverse('admin-instrumentation-metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'# TYPE reviewboard_requests_total counter',
+                      response.content)
+
+    def test_get_as_remote_user(self):
+        """Testing instrumentation metrics view as a non-staff remote user"""
+        self.client.login(username='doc', password='doc')
+        response = self.client.get(reverse('admin-instrumentation-metrics'),
+                                   REMOTE_ADDR='192.0.2.1')
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_as_local_anonymous(self):
+        """Testing instrumentation metrics view as an anonymous user from the
+        local host
+        """
+        response = self.client.get(reverse('admin-instrumentation-metrics'),
+                                   REMOTE_ADDR='127.0.0.1')
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_with_token(self):
+        """Testing instrumentation metrics view with the access token"""
+        self.siteconfig.set('instrumentation_metrics_token', 'abc123')
+        self.siteconfig.save()
+
+        response = self.client.get(reverse('admin-instrumentation-metrics'),
+                                   HTTP_AUTHORIZATION='Bearer abc123')
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_with_invalid_token(self):
+        """Testing instrumentation metrics view with an invalid access token
+        """
+        self.siteconfig.set('instrumentation_metrics_token', 'abc123')
+        self.siteconfig.save()
+
+        response = self.client.get(reverse('admin-instrumentation-metrics'),
+                                   HTTP_AUTHORIZATION='Bearer xyz')
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_with_empty_token(self):
+        """Testing instrumentation metrics view with an empty access token
+        when no token is configured
+        """
+        response = self.client.get(reverse('admin-instrumentation-metrics'),
+                                   HTTP_AUTHORIZATION='Bearer ')
+
+        self.assertEqual(response.status_code, 403)
@@ -57,6 +57,9 @@ urlpatterns = [
 
     url(r'^log/', include('djblets.log.urls')),
 
+    url(r'^metrics/$', views.instrumentation_metrics,
+        name='admin-instrumentation-metrics'),
+
     url(r'^security/$', views.security, name='admin-security-checks'),
 
     url(r'^settings/', include([
@@ -6,7 +6,9 @@ import logging
 from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
 from django.core.urlresolvers import reverse
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import (Http404, HttpResponse, HttpResponseForbidden,
+                         HttpResponseRedirect)
+from django.utils.crypto import constant_time_compare
 from django.utils.translation import ugettext as _
 from django.views.decorators.csrf import csrf_protect
 from djblets.cache.forwarding_backend import DEFAULT_FORWARD_CACHE_ALIAS
@@ -19,6 +21,8 @@ from reviewboard.accounts.models import Profile
 from reviewboard.admin.cache_stats import get_cache_stats
 from reviewboard.admin.decorators import superuser_required
 from reviewboard.admin.forms import SSHSettingsForm
+from reviewboard.admin.instrumentation import (instrumentation_enabled,
+                                               metrics_registry)
 from reviewboard.admin.security_checks import SecurityCheckRunner
 from reviewboard.admin.support import get_support_url, serialize_support_data
 from reviewboard.admin.widgets import (dynamic_activity_data,
@@ -167,6 +171,46 @@ def security(request, template_name="admin/security.html"):
         })
 
 
+def instrumentation_metrics(request):
+    """Return the request instrumentation totals for this process.
+
+    The totals are returned in the Prometheus text exposition format. They
+    can be fetched by staff users, or by a scraper (such as Prometheus)
+    passing the configured ``instrumentation_metrics_token`` in an
+    ``Authorization: Bearer <token>`` header. If no token is configured,
+    only staff users have access.
+
+    Args:
+        request (django.http.HttpRequest):
+            The HTTP request from the client.
+
+    Returns:
+        django.http.HttpResponse:
+        The HTTP response containing the metrics.
+
+    Raises:
+        django.http.Http404:
+            Request instrumentation is disabled.
+    """
+    if not instrumentation_enabled():
+        raise Http404
+
+    if not request.user.is_staff:
+        siteconfig = SiteConfiguration.objects.get_current()
+        token = siteconfig.get('instrumentation_metrics_token')
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+
+        if (not token or
+            not authorization.startswith('Bearer ') or
+            not constant_time_compare(authorization[len('Bearer '):],
+                                      token)):
+            return HttpResponseForbidden()
+
+    return HttpResponse(metrics_registry.render_prometheus(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
+
+
 @superuser_required
 def site_settings(request, form_class, template_name='admin/settings.html'):
     """Render the general site settings page."""
@@ -14,13 +14,14 @@ from django.utils.translation import ugettext_lazy as _
 from djblets.cache.backend import cache_memoize
 from djblets.util.compat.django.template.loader import render_to_string
 
+from reviewboard.admin import activity_counts
 from reviewboard.admin.cache_stats import get_cache_stats
 from reviewboard.attachments.models import FileAttachment
 from reviewboard.changedescs.models import ChangeDescription
 from reviewboard.diffviewer.models import DiffSet
 from reviewboard.reviews.models import (ReviewRequest, Group,
-                                        Comment, Review, Screenshot,
-                                        ReviewRequestDraft)
+                                        Comment, DailyActivityCount, Review,
+                                        Screenshot, ReviewRequestDraft)
 from reviewboard.scmtools.models import Repository
 
 
@@ -151,6 +152,9 @@ class UserActivityWidget(Widget):
 
     def generate_data(self, request):
         """Generate data for the widget."""
+        if activity_counts.activity_counts_enabled():
+            return self._generate_data_from_activity_counts()
+
         now = timezone.now()
         users = User.objects
 
@@ -175,6 +179,45 @@ class UserActivityWidget(Widget):
             'total': users.count()
         }
 
+    def _generate_data_from_activity_counts(self):
+        """Generate data for the widget from the activity counts.
+
+        Users are grouped by the day of their last login, rather than the
+        exact time.
+
+        Returns:
+            dict:
+            The data for the widget.
+        """
+        today = timezone.now().astimezone(timezone.utc).date()
+        data = {
+            'now': 0,
+            'seven_days': 0,
+            'thirty_days': 0,
+            'sixty_days': 0,
+            'ninety_days': 0,
+            'total': DailyActivityCount.objects.get_totals(['users'])['users'],
+        }
+
+        for date, count in DailyActivityCount.objects.get_daily_totals(
+                'user_logins'):
+            age = (today - date).days
+
+            if age < 7:
+                key = 'now'
+            elif age < 30:
+                key = 'seven_days'
+            elif age < 60:
+                key = 'thirty_days'
+            elif age < 90:
+                key = 'sixty_days'
+            else:
+                key = 'ninety_days'
+
+            data[key] += count
+
+        return data
+
 
 class ReviewRequestStatusesWidget(Widget):
     """Review request statuses widget.
@@ -188,6 +231,19 @@ class ReviewRequestStatusesWidget(Widget):
 
     def generate_data(self, request):
         """Generate data for the widget."""
+        if activity_counts.activity_counts_enabled():
+            counters = dict(activity_counts.REVIEW_REQUEST_STATUS_COUNTERS,
+                            draft=activity_counts.REVIEW_REQUEST_DRAFT_COUNTER)
+            totals = DailyActivityCount.objects.get_totals(
+                list(six.itervalues(counters)))
+
+            return {
+                'draft': totals[counters['draft']],
+                'pending': totals[counters[ReviewRequest.PENDING_REVIEW]],
+                'discarded': totals[counters[ReviewRequest.DISCARDED]],
+                'submit': totals[counters[ReviewRequest.SUBMITTED]],
+            }
+
         public_requests = ReviewRequest.objects.filter(public=True)
 
         return {
@@ -339,6 +395,25 @@ class DatabaseStatsWidget(Widget):
 
     def generate_data(self, request):
         """Generate data for the widget."""
+        if activity_counts.activity_counts_enabled():
+            totals = DailyActivityCount.objects.get_totals([
+                'comments',
+                'diffsets',
+                'file_attachments',
+                'review_request_drafts',
+                'reviews',
+                'screenshots',
+            ])
+
+            return {
+                'count_comments': totals['comments'],
+                'count_reviews': totals['reviews'],
+                'count_attachments': totals['file_attachments'],
+                'count_reviewdrafts': totals['review_request_drafts'],
+                'count_screenshots': totals['screenshots'],
+                'count_diffsets': totals['diffsets'],
+            }
+
         return {
             'count_comments': Comment.objects.all().count(),
             'count_reviews': Review.objects.all().count(),
@@ -407,6 +482,21 @@ def dynamic_activity_data(request):
         "range_end": new_range_end.strftime("%Y-%m-%d")
     }
 
+    def large_stats_data_from_activity_counts(range_start, range_end):
+        """Return the activity data from the activity counts."""
+        start_date = range_start.astimezone(timezone.utc).date()
+        end_date = range_end.astimezone(timezone.utc).date()
+
+        return dict(
+            (name, [
+                [time.mktime(date.timetuple()) * 1000, count]
+                for date, count in DailyActivityCount.objects.get_daily_totals(
+                    name, start_date, end_date)
+            ])
+            for name in ('change_descriptions', 'comments', 'reviews',
+                         'review_requests')
+        )
+
     def large_stats_data(range_start, range_end):
         def get_objects(model_name, timestamp_field, date_field):
             """Perform timestamp based queries.
@@ -449,7 +539,11 @@ def dynamic_activity_data(request):
             'review_requests': rr_array
         }
 
-    stats_data = large_stats_data(new_range_start, new_range_end)
+    if activity_counts.activity_counts_enabled():
+        stats_data = large_stats_data_from_activity_counts(new_range_start,
+                                                           new_range_end)
+    else:
+        stats_data = large_stats_data(new_range_start, new_range_end)
 
     return {
         "range": response_data,
@@ -511,13 +605,16 @@ class ActivityGraphWidget(Widget):
 def init_widgets():
     """Initialize the widgets subsystem.
 
-    This will listen for events in order to manage the widget caches.
+    This will listen for events in order to manage the widget caches and
+    the activity counts used by the widgets.
     """
     post_save.connect(_increment_sync_num, sender=Group)
     post_save.connect(_increment_sync_num, sender=Repository)
     post_delete.connect(_increment_sync_num, sender=Group)
     post_delete.connect(_increment_sync_num, sender=Repository)
 
+    activity_counts.connect_signals()
+
 
 def register_admin_widget(widget_cls, primary=False):
     """Register an administration widget.
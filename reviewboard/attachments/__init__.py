@@ -19,4 +19,12 @@ def _register_mimetype_handlers(**kwargs):
     register_mimetype_handler(TextMimetype)
 
 
+def _connect_thumbnail_signals(**kwargs):
+    """Connect signals for generating thumbnails in the background."""
+    from reviewboard.attachments.thumbnails import connect_signals
+
+    connect_signals()
+
+
 initializing.connect(_register_mimetype_handlers)
+initializing.connect(_connect_thumbnail_signals)
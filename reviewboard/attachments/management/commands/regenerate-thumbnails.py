@@ -0,0 +1,72 @@
+"""Management command to regenerate stored file attachment thumbnails."""
+
+from __future__ import unicode_literals
+
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.attachments.models import FileAttachment
+from reviewboard.attachments.thumbnails import (generate_thumbnail,
+                                                get_thumbnail_path)
+
+
+class Command(BaseCommand):
+    """Management command to regenerate stored file attachment thumbnails.
+
+    Thumbnails are generated in this process, rather than by the background
+    worker. This can be used to generate thumbnails for file attachments
+    uploaded before thumbnails were stored, or after changing how
+    thumbnails are rendered.
+    """
+
+    help = _('Regenerates the stored thumbnails for file attachments.')
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            'attachment_ids',
+            metavar='ATTACHMENT_ID',
+            nargs='*',
+            type=int,
+            help=_('The IDs of the file attachments to regenerate '
+                   'thumbnails for. Defaults to all file attachments.'))
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            default=False,
+            dest='missing_only',
+            help=_('Only generate thumbnails that have not yet been '
+                   'stored.'))
+
+    def handle(self, **options):
+        """Handle the command.
+
+        Args:
+            **options (dict):
+                Options parsed on the command line.
+        """
+        q = FileAttachment.objects.exclude(file='').order_by('pk')
+        attachment_ids = options.get('attachment_ids')
+
+        if attachment_ids:
+            q = q.filter(pk__in=attachment_ids)
+
+        missing_only = options.get('missing_only')
+        num_generated = 0
+
+        for attachment in q.iterator():
+            if (missing_only and
+                attachment.file.storage.exists(
+                    get_thumbnail_path(attachment))):
+                continue
+
+            if generate_thumbnail(attachment):
+                num_generated += 1
+
+        self.stdout.write(_('Generated %d file attachment thumbnails.')
+                          % num_generated)
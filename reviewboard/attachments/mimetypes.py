@@ -13,7 +13,6 @@ from django.contrib.staticfiles.templatetags.staticfiles import static
 from django.utils.html import format_html, format_html_join
 from django.utils.encoding import smart_str, force_text
 from django.utils.safestring import mark_safe
-from djblets.cache.backend import cache_memoize
 from djblets.util.filesystem import is_exe_in_path
 from djblets.util.templatetags.djblets_images import thumbnail
 from pygments import highlight
@@ -269,6 +268,14 @@ class MimetypeHandler(object):
     #: size thumbnails they should generate.
     use_hd_thumbnails = True
 
+    #: Whether thumbnails are generated in the background and stored.
+    #:
+    #: If set, :py:meth:`generate_thumbnail` will be called by a background
+    #: worker when a file attachment is created, and the result will be
+    #: stored alongside the file and served from there by
+    #: :py:meth:`get_thumbnail`. Until then, a placeholder will be shown.
+    generate_thumbnails_in_background = False
+
     def __init__(self, attachment, mimetype):
         """Initialize the handler.
 
@@ -385,14 +392,36 @@ class MimetypeHandler(object):
         outer element of the thumbnail should have a ``file-thumbnail`` CSS
         class.
 
-        By default, this returns an empty thumbnail.
+        If :py:attr:`generate_thumbnails_in_background` is set, this returns
+        the stored thumbnail from :py:meth:`generate_thumbnail`, or a
+        placeholder if it hasn't been generated yet. Otherwise, this returns
+        an empty thumbnail.
 
         Returns:
             django.utils.safestring.SafeText:
             The HTML for the thumbnail for the associated attachment.
         """
+        if self.generate_thumbnails_in_background:
+            from reviewboard.attachments.thumbnails import \
+                get_stored_thumbnail
+
+            return get_stored_thumbnail(self)
+
         return mark_safe('<pre class="file-thumbnail"></pre>')
 
+    def generate_thumbnail(self):
+        """Generate the HTML for a thumbnail of the attachment.
+
+        This must be implemented by subclasses that set
+        :py:attr:`generate_thumbnails_in_background`. It's called from a
+        background worker, and the result is stored for future requests.
+
+        Returns:
+            django.utils.safestring.SafeText:
+            The HTML for the thumbnail for the associated attachment.
+        """
+        raise NotImplementedError
+
     def set_thumbnail(self):
         """Set the thumbnail data for this attachment.
 
@@ -409,9 +438,13 @@ class ImageMimetype(MimetypeHandler):
     """Handles image mimetypes."""
 
     supported_mimetypes = ['image/*']
+    generate_thumbnails_in_background = True
 
-    def get_thumbnail(self):
-        """Return a thumbnail of the image.
+    def generate_thumbnail(self):
+        """Generate a thumbnail of the image.
+
+        This will create the scaled-down images, if they don't already
+        exist.
 
         Returns:
             django.utils.safestring.SafeText:
@@ -445,6 +478,8 @@ class TextMimetype(MimetypeHandler):
     FILE_CROP_CHAR_LIMIT = 1000
     TEXT_CROP_NUM_HEIGHT = 50
 
+    generate_thumbnails_in_background = True
+
     def _generate_preview_html(self, data):
         """Return the first few truncated lines of the text file.
 
@@ -484,8 +519,8 @@ class TextMimetype(MimetypeHandler):
                 for line in lines[:self.TEXT_CROP_NUM_HEIGHT]
             ))
 
-    def _generate_thumbnail(self):
-        """Return the HTML for a thumbnail preview for a text file.
+    def generate_thumbnail(self):
+        """Generate the HTML for a thumbnail preview for a text file.
 
         Returns:
             django.utils.safestring.SafeText:
@@ -514,24 +549,6 @@ class TextMimetype(MimetypeHandler):
             '</div>',
             self._generate_preview_html(data))
 
-    def get_thumbnail(self):
-        """Return the thumbnail of the text file as rendered as html.
-
-        The content will be generated and then cached for future requests.
-
-        Returns:
-            django.utils.safestring.SafeText:
-            The resulting HTML-safe thumbnail content.
-        """
-        # Caches the generated thumbnail to eliminate the need on each page
-        # reload to:
-        # 1) re-read the file attachment
-        # 2) re-generate the html based on the data read
-        return mark_safe(
-            cache_memoize('file-attachment-thumbnail-%s-html-%s'
-                          % (self.__class__.__name__, self.attachment.pk),
-                          self._generate_thumbnail))
-
 
 class ReStructuredTextMimetype(TextMimetype):
     """Handles ReStructuredText (.rst) mimetypes.
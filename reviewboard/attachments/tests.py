@@ -6,8 +6,12 @@ import os
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser, User
 from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import six
 from django.utils.safestring import SafeText
+from djblets.siteconfig.models import SiteConfiguration
 from djblets.testing.decorators import add_fixtures
 from kgb import SpyAgency
 
@@ -18,6 +22,11 @@ from reviewboard.attachments.mimetypes import (MimetypeHandler,
                                                unregister_mimetype_handler)
 from reviewboard.attachments.models import (FileAttachment,
                                             FileAttachmentHistory)
+from reviewboard.attachments.thumbnails import (PENDING_THUMBNAIL_HTML,
+                                                ThumbnailWorker,
+                                                delete_stored_thumbnail,
+                                                get_thumbnail_path,
+                                                get_thumbnail_worker)
 from reviewboard.diffviewer.models import DiffSet, DiffSetHistory, FileDiff
 from reviewboard.scmtools.core import PRE_CREATION
 from reviewboard.site.models import LocalSite
@@ -810,9 +819,108 @@ class TextMimetypeTests(SpyAgency, TestCase):
         # rely on just calling thumbnail twice. We have to fake it, so that
         # that we simulate the real-world behavior of getting a raw string
         # back out of a real cache.
-        self.spy_on(self.file_attachment.mimetype_handler._generate_thumbnail,
+        self.spy_on(self.file_attachment.mimetype_handler.generate_thumbnail,
                     call_fake=lambda self: '<div>My thumbnail</div>')
 
         thumbnail = self.file_attachment.thumbnail
 
         self.assertIsInstance(thumbnail, SafeText)
+
+
+class StoredThumbnailTests(SpyAgency, TestCase):
+    """Unit tests for reviewboard.attachments.thumbnails."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(StoredThumbnailTests, self).setUp()
+
+        uploaded_file = SimpleUploadedFile(
+            'test.txt',
+            b'<p>This is a test</p>',
+            content_type='text/plain')
+
+        review_request = self.create_review_request(publish=True)
+
+        form = UploadFileForm(review_request, files={
+            'path': uploaded_file,
+        })
+        self.assertTrue(form.is_valid())
+
+        self.file_attachment = form.create()
+        self.handler = self.file_attachment.mimetype_handler
+        self.storage = self.file_attachment.file.storage
+        self.thumbnail_path = get_thumbnail_path(self.file_attachment)
+
+    def tearDown(self):
+        delete_stored_thumbnail(self.handler)
+
+        super(StoredThumbnailTests, self).tearDown()
+
+    def test_get_thumbnail_stores_thumbnail(self):
+        """Testing MimetypeHandler.get_thumbnail stores generated thumbnails
+        """
+        self.assertFalse(self.storage.exists(self.thumbnail_path))
+
+        thumbnail = self.file_attachment.thumbnail
+
+        self.assertIn('This is a test', thumbnail)
+        self.assertTrue(self.storage.exists(self.thumbnail_path))
+
+        with self.storage.open(self.thumbnail_path, 'rb') as fp:
+            self.assertEqual(fp.read().decode('utf-8'), thumbnail)
+
+    def test_get_thumbnail_with_stored(self):
+        """Testing MimetypeHandler.get_thumbnail with stored thumbnail"""
+        self.storage.save(self.thumbnail_path,
+                          ContentFile(b'<div>My thumbnail</div>'))
+
+        self.spy_on(self.handler.generate_thumbnail,
+                    call_fake=lambda self: '<div>New thumbnail</div>')
+
+        thumbnail = self.handler.get_thumbnail()
+
+        self.assertEqual(thumbnail, '<div>My thumbnail</div>')
+        self.assertIsInstance(thumbnail, SafeText)
+        self.assertFalse(self.handler.generate_thumbnail.called)
+
+    def test_get_thumbnail_pending_in_background(self):
+        """Testing MimetypeHandler.get_thumbnail with thumbnails generated
+        in the background returns a placeholder until generated
+        """
+        worker = get_thumbnail_worker()
+        self.spy_on(worker.queue, call_original=False)
+
+        siteconfig = SiteConfiguration.objects.get_current()
+        siteconfig.set('file_attachment_thumbnails_in_background', True)
+        siteconfig.save()
+
+        thumbnail = self.handler.get_thumbnail()
+
+        self.assertEqual(thumbnail, PENDING_THUMBNAIL_HTML)
+        self.assertTrue(worker.queue.called_with(self.file_attachment.pk))
+        self.assertFalse(self.storage.exists(self.thumbnail_path))
+
+    def test_worker_process(self):
+        """Testing ThumbnailWorker.process"""
+        worker = ThumbnailWorker()
+        self.spy_on(worker.start, call_original=False)
+
+        worker.queue(self.file_attachment.pk)
+        worker.queue(self.file_attachment.pk)
+
+        self.assertEqual(worker.process(), 1)
+        self.assertTrue(self.storage.exists(self.thumbnail_path))
+
+    def test_regenerate_thumbnails_command(self):
+        """Testing regenerate-thumbnails management command"""
+        self.spy_on(self.handler.__class__.generate_thumbnail,
+                    owner=self.handler.__class__)
+
+        call_command('regenerate-thumbnails', stdout=six.StringIO())
+        self.assertTrue(self.storage.exists(self.thumbnail_path))
+
+        call_command('regenerate-thumbnails', missing_only=True,
+                     stdout=six.StringIO())
+        self.assertEqual(
+            len(self.handler.__class__.generate_thumbnail.calls), 1)
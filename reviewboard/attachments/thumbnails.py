@@ -0,0 +1,323 @@
+"""Background generation of stored file attachment thumbnails.
+
+Thumbnails for mimetype handlers with
+:py:attr:`~reviewboard.attachments.mimetypes.MimetypeHandler.
+generate_thumbnails_in_background` set are generated by a background worker
+when a file attachment is created. The resulting HTML is stored in a file
+next to the attachment, and served from there (through the cache) when
+rendering pages. A placeholder is shown until the thumbnail is ready.
+"""
+
+from __future__ import unicode_literals
+
+import logging
+
+from django.core.files.base import ContentFile
+from django.db.models.signals import post_save
+from django.utils.encoding import force_bytes
+from django.utils.safestring import mark_safe
+from djblets.cache.backend import make_cache_key
+from djblets.siteconfig.models import SiteConfiguration
+
+from reviewboard.admin.background_worker import BackgroundWorker
+from reviewboard.admin.instrumentation import cache_memoize
+
+
+#: The HTML shown while a thumbnail is being generated.
+PENDING_THUMBNAIL_HTML = (
+    '<div class="file-thumbnail file-thumbnail-pending">'
+    '<span class="fa fa-spinner fa-pulse"></span>'
+    '</div>'
+)
+
+
+class _ThumbnailNotStored(Exception):
+    """A stored thumbnail could not be found."""
+
+
+def get_thumbnail_path(attachment):
+    """Return the storage path of an attachment's stored thumbnail.
+
+    Args:
+        attachment (reviewboard.attachments.models.FileAttachment):
+            The file attachment.
+
+    Returns:
+        unicode:
+        The path to the thumbnail in the attachment's file storage.
+    """
+    return '%s.thumbnail.html' % attachment.file.name
+
+
+def get_stored_thumbnail(handler):
+    """Return the stored thumbnail for a mimetype handler's attachment.
+
+    If the thumbnail hasn't been generated yet, it will be queued for
+    generation (or generated immediately, if background generation is
+    disabled) and a placeholder will be returned.
+
+    Args:
+        handler (reviewboard.attachments.mimetypes.MimetypeHandler):
+            The mimetype handler for the attachment.
+
+    Returns:
+        django.utils.safestring.SafeText:
+        The HTML for the thumbnail.
+    """
+    attachment = handler.attachment
+
+    if not attachment.file:
+        return mark_safe('')
+
+    def _read_thumbnail():
+        storage = attachment.file.storage
+        path = get_thumbnail_path(attachment)
+
+        if not storage.exists(path):
+            raise _ThumbnailNotStored
+
+        with storage.open(path, 'rb') as fp:
+            return fp.read().decode('utf-8')
+
+    try:
+        return mark_safe(cache_memoize(_get_thumbnail_cache_key(handler),
+                                       _read_thumbnail))
+    except _ThumbnailNotStored:
+        pass
+
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    if siteconfig.get('file_attachment_thumbnails_in_background'):
+        get_thumbnail_worker().queue(attachment.pk)
+
+        return mark_safe(PENDING_THUMBNAIL_HTML)
+    else:
+        return mark_safe(store_thumbnail(handler))
+
+
+def store_thumbnail(handler):
+    """Generate and store the thumbnail for a mimetype handler's attachment.
+
+    Any previously-stored thumbnail will be replaced.
+
+    Args:
+        handler (reviewboard.attachments.mimetypes.MimetypeHandler):
+            The mimetype handler for the attachment.
+
+    Returns:
+        unicode:
+        The HTML for the thumbnail.
+    """
+    attachment = handler.attachment
+    storage = attachment.file.storage
+    path = get_thumbnail_path(attachment)
+    html = handler.generate_thumbnail()
+
+    if not html:
+        # The file couldn't be read. Try again next time.
+        return html
+
+    if storage.exists(path):
+        storage.delete(path)
+
+    stored_path = storage.save(path, ContentFile(force_bytes(html)))
+
+    if stored_path != path:
+        # The storage backend chose a different name, which would never be
+        # found again. Don't leave it behind.
+        logging.error('Unable to store thumbnail for file attachment %s '
+                      'at %s (stored as %s)',
+                      attachment.pk, path, stored_path)
+        storage.delete(stored_path)
+    else:
+        cache_memoize(_get_thumbnail_cache_key(handler), lambda: html,
+                      force_overwrite=True)
+
+    return html
+
+
+def delete_stored_thumbnail(handler):
+    """Delete the stored thumbnail for a mimetype handler's attachment.
+
+    Args:
+        handler (reviewboard.attachments.mimetypes.MimetypeHandler):
+            The mimetype handler for the attachment.
+    """
+    from django.core.cache import cache
+
+    attachment = handler.attachment
+    storage = attachment.file.storage
+    path = get_thumbnail_path(attachment)
+
+    if storage.exists(path):
+        storage.delete(path)
+
+    cache.delete(make_cache_key(_get_thumbnail_cache_key(handler)))
+
+
+def generate_thumbnail(attachment):
+    """Generate and store the thumbnail for an attachment, if needed.
+
+    Args:
+        attachment (reviewboard.attachments.models.FileAttachment):
+            The file attachment.
+
+    Returns:
+        bool:
+        Whether a thumbnail was generated.
+    """
+    handler = attachment.mimetype_handler
+
+    if (not attachment.file or
+        handler is None or
+        not handler.generate_thumbnails_in_background):
+        return False
+
+    try:
+        store_thumbnail(handler)
+    except Exception as e:
+        logging.exception('Unable to generate thumbnail for file '
+                          'attachment %s: %s',
+                          attachment.pk, e)
+        return False
+
+    return True
+
+
+def _get_thumbnail_cache_key(handler):
+    """Return the cache key for a stored thumbnail.
+
+    Args:
+        handler (reviewboard.attachments.mimetypes.MimetypeHandler):
+            The mimetype handler for the attachment.
+
+    Returns:
+        unicode:
+        The cache key.
+    """
+    return ('file-attachment-thumbnail-%s-html-%s'
+            % (handler.__class__.__name__, handler.attachment.pk))
+
+
+class ThumbnailWorker(BackgroundWorker):
+    """A background thread for generating file attachment thumbnails.
+
+    Attachments are queued by ID, so an attachment queued several times
+    before the worker gets to it is only processed once. Anything still
+    queued when the process exits is dropped, and will be queued again the
+    next time its thumbnail is shown.
+    """
+
+    thread_name = 'thumbnail-worker'
+
+    def __init__(self):
+        """Initialize the worker."""
+        super(ThumbnailWorker, self).__init__()
+
+        self._pending = []
+        self._pending_ids = set()
+
+    def queue(self, attachment_id):
+        """Queue an attachment for thumbnail generation.
+
+        Args:
+            attachment_id (int):
+                The ID of the file attachment.
+        """
+        with self._lock:
+            if attachment_id not in self._pending_ids:
+                self._pending.append(attachment_id)
+                self._pending_ids.add(attachment_id)
+
+        self.wake()
+
+    def process(self):
+        """Generate thumbnails for all queued attachments.
+
+        Returns:
+            int:
+            The number of thumbnails generated.
+        """
+        from reviewboard.attachments.models import FileAttachment
+
+        num_generated = 0
+
+        while True:
+            with self._lock:
+                if not self._pending:
+                    break
+
+                attachment_id = self._pending.pop(0)
+
+            try:
+                attachment = FileAttachment.objects.get(pk=attachment_id)
+            except FileAttachment.DoesNotExist:
+                attachment = None
+
+            if attachment is not None and generate_thumbnail(attachment):
+                num_generated += 1
+
+            with self._lock:
+                # This is only discarded now, so that the attachment isn't
+                # queued again while it's being generated.
+                self._pending_ids.discard(attachment_id)
+
+        return num_generated
+
+
+_thumbnail_worker = ThumbnailWorker()
+
+
+def get_thumbnail_worker():
+    """Return the thumbnail worker for this process.
+
+    Returns:
+        ThumbnailWorker:
+        The worker.
+    """
+    return _thumbnail_worker
+
+
+def _on_file_attachment_saved(instance, created=False, raw=False, **kwargs):
+    """Queue thumbnail generation for a saved file attachment.
+
+    Thumbnails are generated for new file attachments. Existing thumbnails
+    are regenerated when a file attachment is changed, since they may
+    contain the caption.
+
+    Args:
+        instance (reviewboard.attachments.models.FileAttachment):
+            The file attachment that was saved.
+
+        created (bool, optional):
+            Whether the file attachment was just created.
+
+        raw (bool, optional):
+            Whether the file attachment is being loaded from a fixture.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    if raw or not instance.file:
+        return
+
+    handler = instance.mimetype_handler
+
+    if handler is None or not handler.generate_thumbnails_in_background:
+        return
+
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    if siteconfig.get('file_attachment_thumbnails_in_background'):
+        # Any existing thumbnail will be replaced once the new one is
+        # generated.
+        get_thumbnail_worker().queue(instance.pk)
+    elif not created:
+        delete_stored_thumbnail(handler)
+
+
+def connect_signals():
+    """Connect signals for generating thumbnails."""
+    from reviewboard.attachments.models import FileAttachment
+
+    post_save.connect(_on_file_attachment_saved, sender=FileAttachment)
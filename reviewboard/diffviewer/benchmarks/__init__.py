@@ -0,0 +1,8 @@
+"""Benchmarks for the diff pipeline.
+
+These measure the throughput and peak memory use of each stage of diff
+processing (parsing, diffing, generating opcodes and chunks, and the full
+fetch/patch/render pipeline) against generated and recorded corpora. They
+are run by the :command:`benchmark-diffs` management command, which can
+compare the results against a stored baseline.
+"""
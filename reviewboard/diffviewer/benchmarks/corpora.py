@@ -0,0 +1,411 @@
+"""Corpora of files used to benchmark the diff pipeline.
+
+Generated corpora are built from a fixed random seed, so the same scale
+always produces the same files and diffs. Recorded corpora are pairs of
+real files named ``<name>-old.<ext>`` and ``<name>-new.<ext>``.
+"""
+
+from __future__ import unicode_literals
+
+import difflib
+import os
+import random
+import re
+
+from django.utils.six.moves import range
+
+
+#: The directory containing the default recorded corpora.
+RECORDED_CORPORA_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', 'testdata',
+                 'move_detection'))
+
+_RECORDED_FILENAME_RE = re.compile(r'^(?P<name>.+)-old(?P<ext>\.[^.]+)?$')
+
+
+class CorpusFile(object):
+    """A file changed in a corpus.
+
+    Attributes:
+        orig_filename (unicode):
+            The original filename.
+
+        modified_filename (unicode):
+            The modified filename.
+
+        old (bytes):
+            The original contents of the file.
+
+        new (bytes):
+            The modified contents of the file.
+    """
+
+    def __init__(self, orig_filename, modified_filename, old, new):
+        """Initialize the file.
+
+        Args:
+            orig_filename (unicode):
+                The original filename.
+
+            modified_filename (unicode):
+                The modified filename.
+
+            old (bytes):
+                The original contents of the file.
+
+            new (bytes):
+                The modified contents of the file.
+        """
+        self.orig_filename = orig_filename
+        self.modified_filename = modified_filename
+        self.old = old
+        self.new = new
+
+
+class Corpus(object):
+    """A set of changed files to benchmark against.
+
+    Attributes:
+        name (unicode):
+            The name of the corpus.
+
+        files (list of CorpusFile):
+            The changed files.
+    """
+
+    def __init__(self, name, files):
+        """Initialize the corpus.
+
+        Args:
+            name (unicode):
+                The name of the corpus.
+
+            files (list of CorpusFile):
+                The changed files.
+        """
+        self.name = name
+        self.files = files
+        self._diff = None
+
+    @property
+    def num_lines(self):
+        """The total number of original and modified lines."""
+        return sum(f.old.count(b'\n') + f.new.count(b'\n')
+                   for f in self.files)
+
+    def get_diff(self):
+        """Return a unified diff of all files in the corpus.
+
+        Returns:
+            bytes:
+            The diff.
+        """
+        if self._diff is None:
+            self._diff = b''.join(
+                _make_unified_diff(f)
+                for f in self.files
+            )
+
+        return self._diff
+
+
+def get_generated_corpora(scale=1.0):
+    """Return the generated corpora.
+
+    Args:
+        scale (float, optional):
+            A multiplier for the size of each corpus.
+
+    Returns:
+        list of Corpus:
+        The generated corpora.
+    """
+    def _scaled(n):
+        return max(1, int(round(n * scale)))
+
+    return [
+        _make_huge_file_corpus(_scaled(50000)),
+        _make_many_files_corpus(_scaled(5000)),
+        _make_mass_rename_corpus(_scaled(1000)),
+        _make_whitespace_corpus(_scaled(10000)),
+        _make_move_heavy_corpus(_scaled(200)),
+    ]
+
+
+def get_recorded_corpora(path=RECORDED_CORPORA_DIR):
+    """Return the recorded corpora in a directory.
+
+    Each pair of ``<name>-old.<ext>`` and ``<name>-new.<ext>`` files in the
+    directory is loaded as a corpus named ``recorded-<name>``.
+
+    Args:
+        path (unicode, optional):
+            The directory containing the recorded files.
+
+    Returns:
+        list of Corpus:
+        The recorded corpora.
+    """
+    corpora = []
+
+    for filename in sorted(os.listdir(path)):
+        m = _RECORDED_FILENAME_RE.match(filename)
+
+        if not m:
+            continue
+
+        name = m.group('name')
+        ext = m.group('ext') or ''
+        new_path = os.path.join(path, '%s-new%s' % (name, ext))
+
+        if not os.path.exists(new_path):
+            continue
+
+        with open(os.path.join(path, filename), 'rb') as fp:
+            old = fp.read()
+
+        with open(new_path, 'rb') as fp:
+            new = fp.read()
+
+        corpus_filename = 'recorded/%s%s' % (name, ext)
+        corpora.append(Corpus(
+            'recorded-%s' % name,
+            [CorpusFile(corpus_filename, corpus_filename, old, new)]))
+
+    return corpora
+
+
+def _make_huge_file_corpus(num_lines):
+    """Return a corpus with a single large file with scattered changes.
+
+    About 2% of the lines are replaced, inserted or deleted.
+
+    Args:
+        num_lines (int):
+            The number of lines in the file.
+
+    Returns:
+        Corpus:
+        The corpus.
+    """
+    rand = random.Random(4371)
+    old_lines = _make_source_lines(rand, num_lines)
+    new_lines = []
+
+    for i, line in enumerate(old_lines):
+        if rand.random() < 0.02:
+            action = rand.choice(('replace', 'insert', 'delete'))
+
+            if action == 'replace':
+                new_lines.append(_make_source_line(rand, i, 'changed'))
+            elif action == 'insert':
+                new_lines += [line, _make_source_line(rand, i, 'inserted')]
+        else:
+            new_lines.append(line)
+
+    return Corpus('huge-file', [
+        CorpusFile('src/huge.py', 'src/huge.py',
+                   b''.join(old_lines), b''.join(new_lines)),
+    ])
+
+
+def _make_many_files_corpus(num_files):
+    """Return a corpus with many small changed files.
+
+    Args:
+        num_files (int):
+            The number of files.
+
+    Returns:
+        Corpus:
+        The corpus.
+    """
+    rand = random.Random(5000)
+    files = []
+
+    for i in range(num_files):
+        filename = 'src/module%d/file%d.py' % (i // 100, i)
+        old_lines = _make_source_lines(rand, 40)
+        new_lines = list(old_lines)
+        new_lines[rand.randrange(len(new_lines))] = \
+            _make_source_line(rand, i, 'changed')
+        files.append(CorpusFile(filename, filename,
+                                b''.join(old_lines), b''.join(new_lines)))
+
+    return Corpus('many-files', files)
+
+
+def _make_mass_rename_corpus(num_files):
+    """Return a corpus with many renamed files.
+
+    Each file is moved to a new directory, with its import line updated to
+    match, as is common when reorganizing a codebase.
+
+    Args:
+        num_files (int):
+            The number of files.
+
+    Returns:
+        Corpus:
+        The corpus.
+    """
+    rand = random.Random(1000)
+    files = []
+
+    for i in range(num_files):
+        lines = _make_source_lines(rand, 30)
+        old_import = ('from oldpkg import base%d\n' % i).encode('utf-8')
+        new_import = ('from newpkg import base%d\n' % i).encode('utf-8')
+        files.append(CorpusFile('oldpkg/file%d.py' % i,
+                                'newpkg/file%d.py' % i,
+                                old_import + b''.join(lines),
+                                new_import + b''.join(lines)))
+
+    return Corpus('mass-rename', files)
+
+
+def _make_whitespace_corpus(num_lines):
+    """Return a corpus with a file whose whitespace was reformatted.
+
+    Indentation is converted from spaces to tabs and trailing whitespace is
+    added, without changing anything else.
+
+    Args:
+        num_lines (int):
+            The number of lines in the file.
+
+    Returns:
+        Corpus:
+        The corpus.
+    """
+    rand = random.Random(8)
+    old_lines = _make_source_lines(rand, num_lines)
+    new_lines = [
+        line.replace(b'    ', b'\t').replace(b'\n', b'  \n')
+        for line in old_lines
+    ]
+
+    return Corpus('whitespace-reformat', [
+        CorpusFile('src/reformatted.py', 'src/reformatted.py',
+                   b''.join(old_lines), b''.join(new_lines)),
+    ])
+
+
+def _make_move_heavy_corpus(num_blocks):
+    """Return a corpus with a file whose functions were reordered.
+
+    The file is made of 50-line blocks, about a third of which are moved,
+    with a few lines changed in some of the moved blocks.
+
+    Args:
+        num_blocks (int):
+            The number of blocks in the file.
+
+    Returns:
+        Corpus:
+        The corpus.
+    """
+    rand = random.Random(42)
+    blocks = [
+        _make_source_lines(rand, 50, first_line_num=i * 50)
+        for i in range(num_blocks)
+    ]
+    new_blocks = list(blocks)
+    moved = rand.sample(range(num_blocks), num_blocks // 3)
+
+    for i in moved:
+        new_blocks.remove(blocks[i])
+
+    for i in moved:
+        block = list(blocks[i])
+
+        if rand.random() < 0.3:
+            block[rand.randrange(1, len(block))] = \
+                _make_source_line(rand, i, 'changed')
+
+        new_blocks.insert(rand.randrange(len(new_blocks) + 1), block)
+
+    return Corpus('move-heavy', [
+        CorpusFile('src/refactored.py', 'src/refactored.py',
+                   b''.join(line for block in blocks for line in block),
+                   b''.join(line for block in new_blocks for line in block)),
+    ])
+
+
+def _make_source_lines(rand, num_lines, first_line_num=0):
+    """Return generated lines of source code.
+
+    Args:
+        rand (random.Random):
+            The random number generator to use.
+
+        num_lines (int):
+            The number of lines to generate.
+
+        first_line_num (int, optional):
+            The number used for the first line, to keep lines unique across
+            calls.
+
+    Returns:
+        list of bytes:
+        The lines, each ending with a newline.
+    """
+    return [
+        _make_source_line(rand, first_line_num + i)
+        for i in range(num_lines)
+    ]
+
+
+def _make_source_line(rand, line_num, variant='original'):
+    """Return a generated line of source code.
+
+    Args:
+        rand (random.Random):
+            The random number generator to use.
+
+        line_num (int):
+            A number to include in the line.
+
+        variant (unicode, optional):
+            A word to include in the line.
+
+    Returns:
+        bytes:
+        The line, ending with a newline.
+    """
+    indent = '    ' * rand.randint(0, 3)
+
+    if rand.random() < 0.1:
+        line = '%s# %s comment for line %d\n' % (indent, variant, line_num)
+    else:
+        line = '%svalue_%d = compute_%s(%d, "%s")\n' % (
+            indent, line_num, variant, rand.randint(0, 1000),
+            rand.choice(('alpha', 'beta', 'gamma', 'delta')))
+
+    return line.encode('utf-8')
+
+
+def _make_unified_diff(corpus_file):
+    """Return a unified diff of a changed file.
+
+    Args:
+        corpus_file (CorpusFile):
+            The changed file.
+
+    Returns:
+        bytes:
+        The diff.
+    """
+    lines = difflib.unified_diff(
+        corpus_file.old.decode('utf-8').splitlines(True),
+        corpus_file.new.decode('utf-8').splitlines(True),
+        fromfile=corpus_file.orig_filename,
+        tofile=corpus_file.modified_filename,
+        fromfiledate='(original)',
+        tofiledate='(modified)')
+
+    return ''.join(
+        line if line.endswith('\n')
+        else '%s\n\\ No newline at end of file\n' % line
+        for line in lines
+    ).encode('utf-8')
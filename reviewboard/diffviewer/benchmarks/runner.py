@@ -0,0 +1,299 @@
+"""Running benchmarks and comparing them against a baseline."""
+
+from __future__ import division, unicode_literals
+
+import gc
+import json
+import platform
+from contextlib import contextmanager
+from timeit import default_timer
+
+from django.utils import six
+from djblets.siteconfig.models import SiteConfiguration
+
+from reviewboard.admin.siteconfig import defaults
+
+try:
+    # Python >= 3.4
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+#: The version of the format used to store results.
+RESULTS_VERSION = 1
+
+
+class BenchmarkResult(object):
+    """The result of benchmarking a stage against a corpus.
+
+    Attributes:
+        stage (unicode):
+            The name of the stage.
+
+        corpus (unicode):
+            The name of the corpus.
+
+        seconds (float):
+            The fastest time taken to run the stage once.
+
+        peak_memory (int):
+            The peak memory allocated while running the stage, in bytes, or
+            ``None`` if it wasn't measured.
+
+        num_units (int):
+            The number of units of work processed.
+
+        unit (unicode):
+            The unit of work, such as ``lines``.
+    """
+
+    def __init__(self, stage, corpus, seconds, peak_memory, num_units, unit):
+        """Initialize the result.
+
+        Args:
+            stage (unicode):
+                The name of the stage.
+
+            corpus (unicode):
+                The name of the corpus.
+
+            seconds (float):
+                The fastest time taken to run the stage once.
+
+            peak_memory (int):
+                The peak memory allocated while running the stage, in bytes,
+                or ``None`` if it wasn't measured.
+
+            num_units (int):
+                The number of units of work processed.
+
+            unit (unicode):
+                The unit of work, such as ``lines``.
+        """
+        self.stage = stage
+        self.corpus = corpus
+        self.seconds = seconds
+        self.peak_memory = peak_memory
+        self.num_units = num_units
+        self.unit = unit
+
+    @property
+    def key(self):
+        """The key identifying the result in stored results."""
+        return '%s/%s' % (self.stage, self.corpus)
+
+    @property
+    def throughput(self):
+        """The number of units processed per second."""
+        if self.seconds:
+            return self.num_units / self.seconds
+
+        return None
+
+    def serialize(self):
+        """Serialize the result for storage.
+
+        Returns:
+            dict:
+            The serialized result.
+        """
+        return {
+            'num_units': self.num_units,
+            'peak_memory': self.peak_memory,
+            'seconds': self.seconds,
+            'unit': self.unit,
+        }
+
+
+@contextmanager
+def default_diff_settings():
+    """Use the default diff viewer settings while benchmarking.
+
+    This keeps results comparable between sites, by not depending on their
+    syntax highlighting, whitespace or context settings. The settings are
+    only changed in memory, and are restored afterward.
+
+    Context:
+        The code to run with the default settings.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+    keys = [key for key in defaults if key.startswith('diffviewer_')]
+    saved = dict((key, siteconfig.get(key)) for key in keys)
+
+    try:
+        for key in keys:
+            siteconfig.set(key, defaults[key])
+
+        yield
+    finally:
+        for key, value in six.iteritems(saved):
+            siteconfig.set(key, value)
+
+
+def measure_memory_supported():
+    """Return whether peak memory can be measured.
+
+    Returns:
+        bool:
+        Whether peak memory can be measured. This requires Python 3.4+.
+    """
+    return tracemalloc is not None
+
+
+def run_benchmark(stage, corpus, repeat=3, measure_memory=True):
+    """Benchmark a stage against a corpus.
+
+    The stage is timed ``repeat`` times, keeping the fastest time. Peak
+    memory is measured in a separate run, since tracing allocations slows
+    down the code being measured.
+
+    Args:
+        stage (reviewboard.diffviewer.benchmarks.stages.BenchmarkStage):
+            The stage to benchmark.
+
+        corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+            The corpus to run the stage against.
+
+        repeat (int, optional):
+            The number of times to time the stage.
+
+        measure_memory (bool, optional):
+            Whether to measure peak memory, if supported.
+
+    Returns:
+        BenchmarkResult:
+        The result of the benchmark.
+    """
+    seconds = None
+    peak_memory = None
+
+    for i in range(repeat):
+        with stage.prepare(corpus) as run:
+            gc.collect()
+            start_time = default_timer()
+            run()
+            elapsed = default_timer() - start_time
+
+        if seconds is None or elapsed < seconds:
+            seconds = elapsed
+
+    if measure_memory and measure_memory_supported():
+        with stage.prepare(corpus) as run:
+            gc.collect()
+            tracemalloc.start()
+
+            try:
+                run()
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+    return BenchmarkResult(stage=stage.name,
+                           corpus=corpus.name,
+                           seconds=seconds,
+                           peak_memory=peak_memory,
+                           num_units=stage.get_num_units(corpus),
+                           unit=stage.unit)
+
+
+def save_results(path, results, scale):
+    """Save benchmark results, for use as a baseline.
+
+    Args:
+        path (unicode):
+            The path to save the results to.
+
+        results (list of BenchmarkResult):
+            The results to save.
+
+        scale (float):
+            The scale the generated corpora were built at.
+    """
+    data = {
+        'python_version': platform.python_version(),
+        'results': dict(
+            (result.key, result.serialize())
+            for result in results
+        ),
+        'scale': scale,
+        'version': RESULTS_VERSION,
+    }
+
+    with open(path, 'w') as fp:
+        fp.write(json.dumps(data, indent=2, sort_keys=True))
+
+
+def load_results(path):
+    """Load saved benchmark results.
+
+    Args:
+        path (unicode):
+            The path to the saved results.
+
+    Returns:
+        dict:
+        The saved results.
+
+    Raises:
+        ValueError:
+            The file isn't a supported set of results.
+    """
+    with open(path, 'r') as fp:
+        data = json.load(fp)
+
+    if data.get('version') != RESULTS_VERSION:
+        raise ValueError('Unsupported benchmark results version: %r'
+                         % data.get('version'))
+
+    return data
+
+
+def compare_results(results, baseline, time_tolerance=0.2,
+                    memory_tolerance=0.1):
+    """Compare benchmark results against a baseline.
+
+    Results that aren't in the baseline are ignored.
+
+    Args:
+        results (list of BenchmarkResult):
+            The new results.
+
+        baseline (dict):
+            The baseline, as returned by :py:func:`load_results`.
+
+        time_tolerance (float, optional):
+            The fraction by which a time may exceed the baseline before it's
+            considered a regression.
+
+        memory_tolerance (float, optional):
+            The fraction by which peak memory may exceed the baseline before
+            it's considered a regression.
+
+    Returns:
+        list of tuple:
+        A list of ``(result, measurement, old_value, new_value)`` tuples for
+        each regression, where ``measurement`` is ``seconds`` or
+        ``peak_memory``.
+    """
+    baseline_results = baseline['results']
+    regressions = []
+
+    for result in results:
+        old = baseline_results.get(result.key)
+
+        if old is None:
+            continue
+
+        for measurement, tolerance in (('seconds', time_tolerance),
+                                       ('peak_memory', memory_tolerance)):
+            old_value = old.get(measurement)
+            new_value = getattr(result, measurement)
+
+            if (old_value is not None and
+                new_value is not None and
+                new_value > old_value * (1 + tolerance)):
+                regressions.append((result, measurement, old_value,
+                                    new_value))
+
+    return regressions
@@ -0,0 +1,335 @@
+"""Stages of the diff pipeline that can be benchmarked."""
+
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+from django.db import transaction
+
+from reviewboard.diffviewer.chunk_generator import (DiffChunkGenerator,
+                                                    RawDiffChunkGenerator)
+from reviewboard.diffviewer.differ import get_differ
+from reviewboard.diffviewer.models import DiffSet
+from reviewboard.diffviewer.myersdiff import MyersDiffer
+from reviewboard.diffviewer.opcode_generator import get_diff_opcode_generator
+from reviewboard.diffviewer.parser import DiffParser
+from reviewboard.scmtools.localfile import LocalFileTool
+from reviewboard.scmtools.models import Repository, Tool
+
+
+class _Rollback(Exception):
+    """Used to roll back the changes made while benchmarking."""
+
+
+class BenchmarkStage(object):
+    """A stage of the diff pipeline to benchmark.
+
+    Subclasses must set :py:attr:`name` and :py:attr:`unit`, and implement
+    :py:meth:`prepare` and :py:meth:`get_num_units`.
+    """
+
+    #: The name of the stage.
+    name = None
+
+    #: The unit used to measure throughput, such as ``lines``.
+    unit = None
+
+    def get_num_units(self, corpus):
+        """Return the number of units of work in a corpus.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Returns:
+            int:
+            The number of units of work.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def prepare(self, corpus):
+        """Prepare to run the stage against a corpus.
+
+        Anything done before yielding is not measured.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Context:
+            callable:
+            A function running the stage once.
+        """
+        raise NotImplementedError
+
+
+class _LinesStage(BenchmarkStage):
+    """Base class for stages that process the lines of each file."""
+
+    unit = 'lines'
+
+    def get_num_units(self, corpus):
+        """Return the number of lines in a corpus.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Returns:
+            int:
+            The total number of original and modified lines.
+        """
+        return corpus.num_lines
+
+    def get_file_lines(self, corpus):
+        """Return the decoded lines of each file in a corpus.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Returns:
+            list of tuple:
+            A list of ``(old_lines, new_lines)`` tuples.
+        """
+        return [
+            (f.old.decode('utf-8').splitlines(),
+             f.new.decode('utf-8').splitlines())
+            for f in corpus.files
+        ]
+
+
+class MyersDifferStage(_LinesStage):
+    """Benchmarks computing opcodes with :py:class:`MyersDiffer`."""
+
+    name = 'myers'
+
+    @contextmanager
+    def prepare(self, corpus):
+        """Prepare to run the stage against a corpus.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Context:
+            callable:
+            A function running the stage once.
+        """
+        file_lines = self.get_file_lines(corpus)
+
+        def _run():
+            for old_lines, new_lines in file_lines:
+                list(MyersDiffer(old_lines, new_lines).get_opcodes())
+
+        yield _run
+
+
+class OpcodeGeneratorStage(_LinesStage):
+    """Benchmarks generating opcodes with move detection.
+
+    This uses the differ and
+    :py:class:`~reviewboard.diffviewer.opcode_generator.DiffOpcodeGenerator`
+    in the same way as the chunk generator, ignoring whitespace changes.
+    """
+
+    name = 'opcodes'
+
+    @contextmanager
+    def prepare(self, corpus):
+        """Prepare to run the stage against a corpus.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Context:
+            callable:
+            A function running the stage once.
+        """
+        file_lines = self.get_file_lines(corpus)
+
+        def _run():
+            for old_lines, new_lines in file_lines:
+                differ = get_differ(old_lines, new_lines, ignore_space=True)
+                list(get_diff_opcode_generator(differ))
+
+        yield _run
+
+
+class RawChunkGeneratorStage(_LinesStage):
+    """Benchmarks generating chunks with :py:class:`RawDiffChunkGenerator`.
+
+    This includes decoding, diffing and syntax highlighting the files.
+    """
+
+    name = 'chunks'
+
+    @contextmanager
+    def prepare(self, corpus):
+        """Prepare to run the stage against a corpus.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Context:
+            callable:
+            A function running the stage once.
+        """
+        def _run():
+            for f in corpus.files:
+                generator = RawDiffChunkGenerator(
+                    old=f.old,
+                    new=f.new,
+                    orig_filename=f.orig_filename,
+                    modified_filename=f.modified_filename)
+                list(generator.get_chunks_uncached())
+
+        yield _run
+
+
+class DiffParserStage(BenchmarkStage):
+    """Benchmarks parsing a diff with :py:class:`DiffParser`."""
+
+    name = 'parser'
+    unit = 'bytes'
+
+    def get_num_units(self, corpus):
+        """Return the size of the diff for a corpus.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Returns:
+            int:
+            The size of the diff, in bytes.
+        """
+        return len(corpus.get_diff())
+
+    @contextmanager
+    def prepare(self, corpus):
+        """Prepare to run the stage against a corpus.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Context:
+            callable:
+            A function running the stage once.
+        """
+        diff = corpus.get_diff()
+
+        def _run():
+            DiffParser(diff).parse()
+
+        yield _run
+
+
+class PipelineStage(BenchmarkStage):
+    """Benchmarks the full pipeline for rendering a stored diff.
+
+    The corpus's diff is uploaded to a temporary Local File repository, and
+    then the chunks for each file are generated through
+    :py:class:`~reviewboard.diffviewer.chunk_generator.DiffChunkGenerator`,
+    which fetches the original files, patches them and diffs them, as when
+    viewing a diff. Setting up the repository and diff is not measured, and
+    all changes to the database are rolled back afterward.
+
+    Each run uses a new directory within the repository, so that files
+    cached by previous runs aren't used.
+    """
+
+    name = 'pipeline'
+    unit = 'files'
+
+    def get_num_units(self, corpus):
+        """Return the number of files in a corpus.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Returns:
+            int:
+            The number of files.
+        """
+        return len(corpus.files)
+
+    @contextmanager
+    def prepare(self, corpus):
+        """Prepare to run the stage against a corpus.
+
+        Args:
+            corpus (reviewboard.diffviewer.benchmarks.corpora.Corpus):
+                The corpus.
+
+        Context:
+            callable:
+            A function running the stage once.
+        """
+        repo_path = tempfile.mkdtemp(prefix='rb-benchmark-')
+        basedir = 'run-%s' % uuid.uuid4().hex
+
+        try:
+            for f in corpus.files:
+                path = os.path.join(repo_path, basedir, f.orig_filename)
+                dirname = os.path.dirname(path)
+
+                if not os.path.exists(dirname):
+                    os.makedirs(dirname)
+
+                with open(path, 'wb') as fp:
+                    fp.write(f.old)
+
+            try:
+                with transaction.atomic():
+                    # The Local File tool isn't registered by default, so
+                    # it may need to be added.
+                    tool = Tool.objects.get_or_create(
+                        class_name='%s.%s' % (LocalFileTool.__module__,
+                                              LocalFileTool.__name__),
+                        defaults={
+                            'name': LocalFileTool.name,
+                        })[0]
+                    repository = Repository.objects.create(name=basedir,
+                                                           path=repo_path,
+                                                           tool=tool)
+                    diffset = DiffSet.objects.create_from_data(
+                        repository=repository,
+                        diff_file_name='diff',
+                        diff_file_contents=corpus.get_diff(),
+                        basedir=basedir,
+                        check_existence=False)
+                    filediffs = list(diffset.files.all())
+
+                    def _run():
+                        for filediff in filediffs:
+                            generator = DiffChunkGenerator(request=None,
+                                                           filediff=filediff)
+                            list(generator.get_chunks_uncached())
+
+                    yield _run
+
+                    raise _Rollback
+            except _Rollback:
+                pass
+        finally:
+            shutil.rmtree(repo_path)
+
+
+#: All stages that can be benchmarked, in pipeline order.
+STAGES = [
+    DiffParserStage(),
+    MyersDifferStage(),
+    OpcodeGeneratorStage(),
+    RawChunkGeneratorStage(),
+    PipelineStage(),
+]
@@ -11,12 +11,13 @@ from django.utils.safestring import mark_safe
 from django.utils.six.moves import range, zip_longest
 from django.utils.translation import get_language, ugettext as _
 from djblets.log import log_timed
-from djblets.cache.backend import cache_memoize
 from djblets.siteconfig.models import SiteConfiguration
 from pygments import highlight
 from pygments.lexers import guess_lexer_for_filename
 from pygments.formatters import HtmlFormatter
 
+from reviewboard.admin.instrumentation import cache_memoize, span
+from reviewboard.diffviewer.chunk_index import DiffChunkIndex
 from reviewboard.diffviewer.differ import DiffCompatVersion, get_differ
 from reviewboard.diffviewer.diffutils import (get_line_changed_regions,
                                               get_original_file,
@@ -726,8 +727,9 @@ class RawDiffChunkGenerator(object):
                                          encoding='utf-8')
         lexer.add_filter('codetagify')
 
-        return split_line_endings(
-            highlight(data, lexer, NoWrapperHtmlFormatter()))
+        with span('diff.highlight'):
+            return split_line_endings(
+                highlight(data, lexer, NoWrapperHtmlFormatter()))
 
 
 class DiffChunkGenerator(RawDiffChunkGenerator):
@@ -869,14 +871,7 @@ class DiffChunkGenerator(RawDiffChunkGenerator):
         yielded. Otherwise, new chunks will be generated, stored in cache,
         and yielded.
         """
-        counts = self.filediff.get_line_counts()
-
-        if (self.filediff.binary or
-            self.filediff.source_revision == '' or
-            ((self.filediff.is_new or self.filediff.deleted or
-              self.filediff.moved or self.filediff.copied) and
-             counts['raw_insert_count'] == 0 and
-             counts['raw_delete_count'] == 0)):
+        if not self._has_chunks():
             return
 
         cache_key = self.make_cache_key()
@@ -884,6 +879,81 @@ class DiffChunkGenerator(RawDiffChunkGenerator):
         for chunk in super(DiffChunkGenerator, self).get_chunks(cache_key):
             yield chunk
 
+    def get_chunk_index(self):
+        """Return the index of the chunks for the diff.
+
+        The index is stored in the cache alongside the chunks. If it's not
+        cached, it will be built from the chunks, which will be loaded from
+        the cache or generated.
+
+        Returns:
+            reviewboard.diffviewer.chunk_index.DiffChunkIndex:
+            The index of the chunks.
+        """
+        if not self._has_chunks():
+            return DiffChunkIndex.from_chunks([])
+
+        cache_key = '%s-index-v%d' % (self.make_cache_key(),
+                                      DiffChunkIndex.VERSION)
+
+        return DiffChunkIndex.deserialize(cache_memoize(
+            cache_key,
+            lambda: DiffChunkIndex.from_chunks(self.get_chunks()).serialize(),
+            large_data=True))
+
+    def get_chunks_in_range(self, first_line, num_lines):
+        """Return the chunks within a range of lines in the diff.
+
+        Using the chunk index, only the chunks overlapping the range are
+        loaded. Each of these chunks is stored in the cache individually,
+        the first time it's needed.
+
+        See :py:func:`~reviewboard.diffviewer.diffutils.get_chunks_in_range`
+        for information on the returned chunks.
+
+        Args:
+            first_line (int):
+                The first virtual line number in the range.
+
+            num_lines (int):
+                The number of lines in the range.
+
+        Returns:
+            list of dict:
+            The chunks within the range.
+        """
+        chunk_ranges = self.get_chunk_index().get_chunk_ranges(first_line,
+                                                               num_lines)
+
+        if not chunk_ranges:
+            return []
+
+        cache_key = self.make_cache_key()
+        all_chunks = []
+
+        def _load_chunk(i):
+            if not all_chunks:
+                all_chunks.extend(self.get_chunks())
+
+            return all_chunks[i]
+
+        result = []
+
+        for i, start_index, end_index in chunk_ranges:
+            chunk = cache_memoize('%s-chunk-%d' % (cache_key, i),
+                                  functools.partial(_load_chunk, i),
+                                  large_data=True)
+
+            result.append({
+                'index': i,
+                'lines': chunk['lines'][start_index:end_index],
+                'numlines': end_index - start_index,
+                'change': chunk['change'],
+                'meta': chunk.get('meta', {}),
+            })
+
+        return result
+
     def get_chunks_uncached(self):
         """Yield the list of chunks, bypassing the cache."""
         old = get_original_file(self.filediff, self.request,
@@ -965,8 +1035,9 @@ class DiffChunkGenerator(RawDiffChunkGenerator):
                 (self.filediff.id, self.filediff.source_file),
                 request=self.request)
 
-        for chunk in self.generate_chunks(old, new):
-            yield chunk
+        with span('diff.diff'):
+            for chunk in self.generate_chunks(old, new):
+                yield chunk
 
         log_timer.done()
 
@@ -989,6 +1060,27 @@ class DiffChunkGenerator(RawDiffChunkGenerator):
     def normalize_path_for_display(self, filename):
         return self.tool.normalize_path_for_display(filename)
 
+    def _has_chunks(self):
+        """Return whether there may be chunks for the diff.
+
+        There are no chunks for binary files, files without a source
+        revision, or added, deleted, moved or copied files without any
+        changed lines.
+
+        Returns:
+            bool:
+            Whether there may be chunks for the diff.
+        """
+        counts = self.filediff.get_line_counts()
+
+        return not (
+            self.filediff.binary or
+            self.filediff.source_revision == '' or
+            ((self.filediff.is_new or self.filediff.deleted or
+              self.filediff.moved or self.filediff.copied) and
+             counts['raw_insert_count'] == 0 and
+             counts['raw_delete_count'] == 0))
+
     def _get_checksum(self, content):
         hasher = hashlib.sha1()
         hasher.update(content)
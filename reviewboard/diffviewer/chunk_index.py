@@ -0,0 +1,313 @@
+"""An index of the chunks in a diff, for fast lookups of line ranges."""
+
+from __future__ import unicode_literals
+
+from bisect import bisect_left, bisect_right
+
+from django.utils.six.moves import range
+
+
+class DiffChunkIndex(object):
+    """An index of the chunks generated for a file.
+
+    This stores enough information about a list of chunks to look up the
+    chunks covering a range of virtual line numbers, the last virtual line
+    number, and the last headers before a line, without needing the chunks
+    themselves. Lookups use binary searches over the boundaries of the
+    chunks, rather than scanning every chunk.
+
+    Indexes are small, and are stored in the cache alongside the chunks (see
+    :py:meth:`~reviewboard.diffviewer.chunk_generator.DiffChunkGenerator.
+    get_chunk_index`).
+    """
+
+    #: The version of the serialized index.
+    #:
+    #: This is part of the cache key for the index, and must be bumped
+    #: whenever the serialized format changes.
+    VERSION = 1
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Build an index from a list of chunks.
+
+        Args:
+            chunks (list of dict):
+                The chunks for the file. See
+                :py:func:`~reviewboard.diffviewer.diffutils.
+                get_chunks_in_range` for a description of the chunks.
+
+        Returns:
+            DiffChunkIndex:
+            The new index.
+        """
+        first_lines = []
+        last_lines = []
+        num_lines = []
+        headers = ([], [])
+        header_counts = ([], [])
+
+        for chunk in chunks:
+            lines = chunk['lines']
+            meta = chunk.get('meta', {})
+            first_line = lines[0][0]
+
+            first_lines.append(first_line)
+            last_lines.append(lines[-1][0])
+            num_lines.append(len(lines))
+
+            for i, (real_line_index, headers_key) in enumerate(
+                    ((1, 'left_headers'), (4, 'right_headers'))):
+                real_first_line = lines[0][real_line_index]
+
+                if headers_key in meta and real_first_line:
+                    # The header line numbers are real line numbers, which
+                    # need to be converted to virtual line numbers using the
+                    # offset of this chunk.
+                    #
+                    # In the case of interdiffs, merged chunks may contain
+                    # headers that don't belong to them. Only those up to the
+                    # last real line number in the chunk are kept.
+                    offset = first_line - real_first_line
+                    end_line = offset + next(
+                        line[real_line_index]
+                        for line in reversed(lines)
+                        if line[real_line_index]
+                    )
+
+                    headers[i].extend(
+                        (header[0] + offset, header[1])
+                        for header in meta[headers_key]
+                        if header[0] + offset < end_line
+                    )
+
+                header_counts[i].append(len(headers[i]))
+
+        return cls(first_lines=first_lines,
+                   last_lines=last_lines,
+                   num_lines=num_lines,
+                   left_headers=headers[0],
+                   left_header_counts=header_counts[0],
+                   right_headers=headers[1],
+                   right_header_counts=header_counts[1])
+
+    @classmethod
+    def deserialize(cls, data):
+        """Return an index from serialized data.
+
+        Args:
+            data (dict):
+                The data returned by :py:meth:`serialize`.
+
+        Returns:
+            DiffChunkIndex:
+            The index.
+        """
+        return cls(first_lines=data['first_lines'],
+                   last_lines=data['last_lines'],
+                   num_lines=data['num_lines'],
+                   left_headers=data['left_headers'],
+                   left_header_counts=data['left_header_counts'],
+                   right_headers=data['right_headers'],
+                   right_header_counts=data['right_header_counts'])
+
+    def __init__(self, first_lines, last_lines, num_lines, left_headers,
+                 left_header_counts, right_headers, right_header_counts):
+        """Initialize the index.
+
+        Callers should use :py:meth:`from_chunks` or :py:meth:`deserialize`
+        instead.
+
+        Args:
+            first_lines (list of int):
+                The first virtual line number of each chunk.
+
+            last_lines (list of int):
+                The last virtual line number of each chunk.
+
+            num_lines (list of int):
+                The number of lines in each chunk.
+
+            left_headers (list of tuple):
+                The ``(virtual_line, text)`` headers of the original file, in
+                chunk order.
+
+            left_header_counts (list of int):
+                The cumulative number of ``left_headers`` up to and including
+                each chunk.
+
+            right_headers (list of tuple):
+                The ``(virtual_line, text)`` headers of the patched file, in
+                chunk order.
+
+            right_header_counts (list of int):
+                The cumulative number of ``right_headers`` up to and
+                including each chunk.
+        """
+        self.first_lines = first_lines
+        self.last_lines = last_lines
+        self.num_lines = num_lines
+        self.left_headers = left_headers
+        self.left_header_counts = left_header_counts
+        self.right_headers = right_headers
+        self.right_header_counts = right_header_counts
+
+    def __len__(self):
+        """Return the number of chunks in the index.
+
+        Returns:
+            int:
+            The number of chunks.
+        """
+        return len(self.first_lines)
+
+    def serialize(self):
+        """Serialize the index for storage in the cache.
+
+        Returns:
+            dict:
+            The serialized index.
+        """
+        return {
+            'first_lines': self.first_lines,
+            'last_lines': self.last_lines,
+            'num_lines': self.num_lines,
+            'left_headers': self.left_headers,
+            'left_header_counts': self.left_header_counts,
+            'right_headers': self.right_headers,
+            'right_header_counts': self.right_header_counts,
+        }
+
+    def get_last_line_number(self):
+        """Return the last virtual line number in the file.
+
+        Returns:
+            int:
+            The last virtual line number.
+
+        Raises:
+            IndexError:
+                There are no chunks in the file.
+        """
+        return self.last_lines[-1]
+
+    def get_chunk_ranges(self, first_line, num_lines):
+        """Return the ranges of lines within chunks covering a line range.
+
+        This follows the same rules as
+        :py:func:`~reviewboard.diffviewer.diffutils.get_chunks_in_range`.
+
+        Args:
+            first_line (int):
+                The first virtual line number in the range.
+
+            num_lines (int):
+                The number of lines in the range.
+
+        Returns:
+            list of tuple:
+            A list of ``(chunk_index, start_index, end_index)`` tuples, where
+            ``start_index`` and ``end_index`` are the slice of the chunk's
+            lines in the range.
+        """
+        ranges = []
+        i = max(bisect_right(self.first_lines, first_line) - 1, 0)
+
+        while i < len(self.first_lines):
+            chunk_first_line = self.first_lines[i]
+            chunk_last_line = self.last_lines[i]
+
+            if chunk_first_line > first_line:
+                # There's a gap in the line numbers, so no further chunks
+                # can contain the range.
+                break
+
+            if chunk_last_line >= first_line:
+                start_index = first_line - chunk_first_line
+
+                if first_line + num_lines <= chunk_last_line:
+                    end_index = start_index + num_lines
+                else:
+                    end_index = self.num_lines[i]
+
+                ranges.append((i, start_index, end_index))
+
+                first_line += end_index - start_index
+                num_lines -= end_index - start_index
+
+                assert num_lines >= 0
+
+                if num_lines == 0:
+                    break
+
+            i += 1
+
+        return ranges
+
+    def get_last_header_before_line(self, target_line):
+        """Return the last headers in the file before the target line.
+
+        See :py:func:`~reviewboard.diffviewer.diffutils.
+        get_last_header_before_line` for a description of the returned data.
+
+        Args:
+            target_line (int):
+                The virtual line number to find the headers for.
+
+        Returns:
+            dict:
+            The ``left`` and ``right`` headers.
+        """
+        # Only chunks starting before the target line are considered.
+        num_chunks = bisect_left(self.first_lines, target_line)
+
+        return {
+            'left': self._find_header(self.left_headers,
+                                      self.left_header_counts,
+                                      num_chunks,
+                                      target_line),
+            'right': self._find_header(self.right_headers,
+                                       self.right_header_counts,
+                                       num_chunks,
+                                       target_line),
+        }
+
+    def _find_header(self, headers, header_counts, num_chunks, target_line):
+        """Return the last header in the leading chunks before a line.
+
+        Headers are searched from the end of the last chunk being
+        considered. Headers were already limited to the lines of their
+        chunks, so this will usually only need to look at the last few
+        headers.
+
+        Args:
+            headers (list of tuple):
+                The ``(virtual_line, text)`` headers for one side of the
+                diff.
+
+            header_counts (list of int):
+                The cumulative number of headers in each chunk.
+
+            num_chunks (int):
+                The number of leading chunks to search.
+
+            target_line (int):
+                The virtual line number the header must come before.
+
+        Returns:
+            dict:
+            The header, or ``None`` if there isn't one.
+        """
+        if num_chunks == 0:
+            return None
+
+        for i in range(header_counts[num_chunks - 1] - 1, -1, -1):
+            virtual_line, text = headers[i]
+
+            if virtual_line < target_line:
+                return {
+                    'line': virtual_line,
+                    'text': text,
+                }
+
+        return None
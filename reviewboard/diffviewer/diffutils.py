@@ -9,6 +9,7 @@ import subprocess
 import tempfile
 from difflib import SequenceMatcher
 from functools import cmp_to_key
+from itertools import islice
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils import six
@@ -19,6 +20,8 @@ from djblets.siteconfig.models import SiteConfiguration
 from djblets.util.compat.python.past import cmp
 from djblets.util.contextmanagers import controlled_subprocess
 
+from reviewboard.admin.instrumentation import span
+from reviewboard.diffviewer.chunk_index import DiffChunkIndex
 from reviewboard.diffviewer.commit_utils import exclude_ancestor_filediffs
 from reviewboard.diffviewer.errors import DiffTooBigError, PatchError
 from reviewboard.scmtools.core import PRE_CREATION, HEAD
@@ -187,6 +190,36 @@ def patch(diff, orig_file, filename, request=None):
         bytes:
         The contents of the patched file.
 
+    Raises:
+        reviewboard.diffutils.errors.PatchError:
+            An error occurred when trying to apply the patch.
+    """
+    with span('diff.patch'):
+        return _apply_patch(diff, orig_file, filename, request)
+
+
+def _apply_patch(diff, orig_file, filename, request):
+    """Apply a patch to a file.
+
+    This does the work for :py:func:`patch`.
+
+    Args:
+        diff (bytes):
+            The contents of the patch to apply.
+
+        orig_file (bytes):
+            The contents of the original file.
+
+        filename (unicode):
+            The name of the file being patched.
+
+        request (django.http.HttpRequest):
+            The HTTP request, for use in logging.
+
+    Returns:
+        bytes:
+        The contents of the patched file.
+
     Raises:
         reviewboard.diffutils.errors.PatchError:
             An error occurred when trying to apply the patch.
@@ -284,11 +317,12 @@ def get_original_file_from_repo(filediff, request, encoding_list):
     data = b''
 
     if not filediff.is_new:
-        data = filediff.diffset.repository.get_file(
-            filediff.source_file,
-            filediff.source_revision,
-            base_commit_id=filediff.diffset.base_commit_id,
-            request=request)
+        with span('diff.fetch'):
+            data = filediff.diffset.repository.get_file(
+                filediff.source_file,
+                filediff.source_revision,
+                base_commit_id=filediff.diffset.base_commit_id,
+                request=request)
 
         # Convert to unicode before we do anything to manipulate the string.
         encoding, data = convert_to_unicode(data, encoding_list)
@@ -1017,16 +1051,10 @@ def populate_diff_chunks(files, enable_syntax_highlighting=True,
     diff chunk data for each file in the list. The chunk data is stored in
     the file state.
     """
-    from reviewboard.diffviewer.chunk_generator import get_diff_chunk_generator
-
     for diff_file in files:
-        generator = get_diff_chunk_generator(
-            request,
-            diff_file['filediff'],
-            diff_file['interfilediff'],
-            diff_file['force_interdiff'],
-            enable_syntax_highlighting,
-            base_filediff=diff_file.get('base_filediff'))
+        generator = _get_diff_file_chunk_generator(diff_file,
+                                                   enable_syntax_highlighting,
+                                                   request)
         chunks = list(generator.get_chunks())
 
         diff_file.update({
@@ -1052,6 +1080,84 @@ def populate_diff_chunks(files, enable_syntax_highlighting=True,
         })
 
 
+def _get_diff_file_chunk_generator(diff_file, enable_syntax_highlighting,
+                                   request):
+    """Return a chunk generator for a diff file.
+
+    Args:
+        diff_file (dict):
+            The file, as returned by :py:func:`get_diff_files`.
+
+        enable_syntax_highlighting (bool):
+            Whether to syntax-highlight the chunks.
+
+        request (django.http.HttpRequest):
+            The HTTP request from the client.
+
+    Returns:
+        reviewboard.diffviewer.chunk_generator.DiffChunkGenerator:
+        The chunk generator for the file.
+    """
+    from reviewboard.diffviewer.chunk_generator import get_diff_chunk_generator
+
+    return get_diff_chunk_generator(
+        request,
+        diff_file['filediff'],
+        diff_file['interfilediff'],
+        diff_file['force_interdiff'],
+        enable_syntax_highlighting,
+        base_filediff=diff_file.get('base_filediff'))
+
+
+def _make_diff_files_context_key(filediff, interfilediff):
+    """Return the key for caching a filediff's diff files in a context.
+
+    Args:
+        filediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff.
+
+        interfilediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff for the interdiff, if any.
+
+    Returns:
+        unicode:
+        The key for the context.
+    """
+    key = "_diff_files_%s_%s" % (filediff.diffset.id, filediff.id)
+
+    if interfilediff:
+        key += "_%s" % (interfilediff.id)
+
+    return key
+
+
+def _get_diff_files_for_filediff(context, filediff, interfilediff):
+    """Return the diff files for a filediff/interfilediff, without chunks.
+
+    Args:
+        context (django.template.Context):
+            The context used for looking up the user and request.
+
+        filediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff.
+
+        interfilediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff for the interdiff, if any.
+
+    Returns:
+        list of dict:
+        The files, as returned by :py:func:`get_diff_files`.
+    """
+    if interfilediff:
+        interdiffset = interfilediff.diffset
+    else:
+        interdiffset = None
+
+    return get_diff_files(filediff.diffset, filediff, interdiffset,
+                          interfilediff=interfilediff,
+                          request=context.get('request', None))
+
+
 def get_file_from_filediff(context, filediff, interfilediff):
     """Return the files that corresponds to the filediff/interfilediff.
 
@@ -1062,25 +1168,16 @@ def get_file_from_filediff(context, filediff, interfilediff):
 
     This function returns either exactly one file or ``None``.
     """
-    interdiffset = None
-
-    key = "_diff_files_%s_%s" % (filediff.diffset.id, filediff.id)
-
-    if interfilediff:
-        key += "_%s" % (interfilediff.id)
-        interdiffset = interfilediff.diffset
+    key = _make_diff_files_context_key(filediff, interfilediff)
 
     if key in context:
         files = context[key]
     else:
         assert 'user' in context
 
-        request = context.get('request', None)
-        files = get_diff_files(filediff.diffset, filediff, interdiffset,
-                               interfilediff=interfilediff,
-                               request=request)
+        files = _get_diff_files_for_filediff(context, filediff, interfilediff)
         populate_diff_chunks(files, get_enable_highlighting(context['user']),
-                             request=request)
+                             request=context.get('request', None))
         context[key] = files
 
     if not files:
@@ -1090,22 +1187,119 @@ def get_file_from_filediff(context, filediff, interfilediff):
     return files[0]
 
 
+def get_file_chunk_generator(context, filediff, interfilediff):
+    """Return the chunk generator for the filediff/interfilediff.
+
+    Like :py:func:`get_file_from_filediff`, this takes a RequestContext for
+    looking up the user and for caching the generator. Unlike that function,
+    no chunks are loaded.
+
+    Args:
+        context (django.template.Context):
+            The context used for looking up the user and request, and for
+            caching the generator.
+
+        filediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff.
+
+        interfilediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff for the interdiff, if any.
+
+    Returns:
+        reviewboard.diffviewer.chunk_generator.DiffChunkGenerator:
+        The chunk generator, or ``None`` if there's no file for the
+        filediff/interfilediff.
+    """
+    key = '%s_chunk_generator' % _make_diff_files_context_key(filediff,
+                                                              interfilediff)
+
+    if key not in context:
+        assert 'user' in context
+
+        files = _get_diff_files_for_filediff(context, filediff, interfilediff)
+
+        if files:
+            assert len(files) == 1
+
+            context[key] = _get_diff_file_chunk_generator(
+                files[0],
+                get_enable_highlighting(context['user']),
+                context.get('request', None))
+        else:
+            context[key] = None
+
+    return context[key]
+
+
+def get_file_chunk_index(context, filediff, interfilediff):
+    """Return the chunk index for the filediff/interfilediff.
+
+    The index is loaded from the cache, if possible, avoiding loading all
+    the chunks for the file. It's cached in the context for later lookups.
+
+    Args:
+        context (django.template.Context):
+            The context used for looking up the user and request, and for
+            caching the index.
+
+        filediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff.
+
+        interfilediff (reviewboard.diffviewer.models.filediff.FileDiff):
+            The FileDiff for the interdiff, if any.
+
+    Returns:
+        reviewboard.diffviewer.chunk_index.DiffChunkIndex:
+        The index of the chunks, or ``None`` if there's no file for the
+        filediff/interfilediff.
+    """
+    files_key = _make_diff_files_context_key(filediff, interfilediff)
+    key = '%s_chunk_index' % files_key
+
+    if key not in context:
+        if files_key in context:
+            # The chunks have already been loaded, so there's no need to go
+            # to the cache.
+            f = get_file_from_filediff(context, filediff, interfilediff)
+            index = f and DiffChunkIndex.from_chunks(f['chunks'])
+        else:
+            generator = get_file_chunk_generator(context, filediff,
+                                                 interfilediff)
+            index = generator and generator.get_chunk_index()
+
+        context[key] = index
+
+    return context[key]
+
+
 def get_last_line_number_in_diff(context, filediff, interfilediff):
     """Determine the last virtual line number in the filediff/interfilediff.
 
     This returns the virtual line number to be used in expandable diff
     fragments.
     """
-    f = get_file_from_filediff(context, filediff, interfilediff)
-
-    last_chunk = f['chunks'][-1]
-    last_line = last_chunk['lines'][-1]
+    index = get_file_chunk_index(context, filediff, interfilediff)
 
-    return last_line[0]
+    return index.get_last_line_number()
 
 
 def _get_last_header_in_chunks_before_line(chunks, target_line):
-    """Find the last header in the list of chunks before the target line."""
+    """Find the last header in the list of chunks before the target line.
+
+    See :py:func:`get_last_header_before_line` for a description of the
+    returned data.
+
+    Args:
+        chunks (list of dict):
+            The list of chunks for a file.
+
+        target_line (int):
+            The virtual line number to find the header for.
+
+    Returns:
+        dict:
+        The ``left`` and ``right`` headers.
+    """
     def find_last_line_numbers(lines):
         """Return a tuple of the last line numbers in the given list of lines.
 
@@ -1207,9 +1401,9 @@ def get_last_header_before_line(context, filediff, interfilediff, target_line):
     ``text`` The header text
     ======== ==============================================================
     """
-    f = get_file_from_filediff(context, filediff, interfilediff)
+    index = get_file_chunk_index(context, filediff, interfilediff)
 
-    return _get_last_header_in_chunks_before_line(f['chunks'], target_line)
+    return index.get_last_header_before_line(target_line)
 
 
 def get_file_chunks_in_range(context, filediff, interfilediff,
@@ -1223,11 +1417,22 @@ def get_file_chunks_in_range(context, filediff, interfilediff,
 
     See :py:func:`get_chunks_in_range` for information on the returned state
     of the chunks.
+
+    If the chunks for the file haven't already been loaded into the context,
+    only the chunks within the range are loaded.
     """
-    f = get_file_from_filediff(context, filediff, interfilediff)
+    if _make_diff_files_context_key(filediff, interfilediff) in context:
+        f = get_file_from_filediff(context, filediff, interfilediff)
+
+        if f:
+            return get_chunks_in_range(f['chunks'], first_line, num_lines)
+        else:
+            return []
 
-    if f:
-        return get_chunks_in_range(f['chunks'], first_line, num_lines)
+    generator = get_file_chunk_generator(context, filediff, interfilediff)
+
+    if generator:
+        return generator.get_chunks_in_range(first_line, num_lines)
     else:
         return []
 
@@ -1264,8 +1469,17 @@ def get_chunks_in_range(chunks, first_line, num_lines):
     6        Changed regions of the patched line (for "replace" chunks)
     7        True if line consists of only whitespace changes
     ======== =============================================================
+
+    If ``chunks`` is a list, the first chunk in the range is found with a
+    binary search.
     """
-    for i, chunk in enumerate(chunks):
+    if isinstance(chunks, list):
+        start = _find_chunk_for_line(chunks, first_line)
+        chunks_iter = enumerate(islice(chunks, start, None), start)
+    else:
+        chunks_iter = enumerate(chunks)
+
+    for i, chunk in chunks_iter:
         lines = chunk['lines']
 
         if lines[-1][0] >= first_line >= lines[0][0]:
@@ -1294,6 +1508,34 @@ def get_chunks_in_range(chunks, first_line, num_lines):
                 break
 
 
+def _find_chunk_for_line(chunks, line):
+    """Return the index of the last chunk starting at or before a line.
+
+    Args:
+        chunks (list of dict):
+            The list of chunks for a file.
+
+        line (int):
+            The virtual line number to find.
+
+    Returns:
+        int:
+        The index of the chunk, or 0 if all chunks start after the line.
+    """
+    low = 0
+    high = len(chunks)
+
+    while low < high:
+        mid = (low + high) // 2
+
+        if chunks[mid]['lines'][0][0] <= line:
+            low = mid + 1
+        else:
+            high = mid
+
+    return max(low - 1, 0)
+
+
 def get_enable_highlighting(user):
     user_syntax_highlighting = True
 
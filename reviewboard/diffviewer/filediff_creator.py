@@ -5,11 +5,13 @@ from __future__ import unicode_literals
 import os
 from functools import cmp_to_key
 
+from django.utils import six
 from django.utils.encoding import force_bytes, force_text
 from django.utils.translation import ugettext as _
 from djblets.util.compat.python.past import cmp
 
 from reviewboard.diffviewer.errors import EmptyDiffError
+from reviewboard.diffviewer.parser import DiffParser
 from reviewboard.scmtools.core import (FileNotFoundError,
                                        PRE_CREATION,
                                        Revision,
@@ -26,13 +28,20 @@ _IMPL_EXTENSIONS = [
     b'c', b'C', b'cc', b'cpp', b'cxx', b'c++', b'm', b'mm', b'M'
 ]
 
+# The number of FileDiffs to save to the database at a time.
+_FILEDIFF_BATCH_SIZE = 100
+
 
 def create_filediffs(diff_file_contents, parent_diff_file_contents,
                      repository, basedir, base_commit_id, diffset,
                      request=None, check_existence=True, get_file_exists=None,
-                     diffcommit=None, validate_only=False):
+                     diffcommit=None, validate_only=False, batch_size=None):
     """Create FileDiffs from the given data.
 
+    FileDiffs are saved in batches as files are processed. The diff data for
+    each file is stored as soon as the file is processed, and isn't kept in
+    memory by the returned FileDiffs.
+
     Args:
         diff_file_contents (bytes):
             The contents of the diff file.
@@ -78,14 +87,18 @@ def create_filediffs(diff_file_contents, parent_diff_file_contents,
             won't populate the database at all and will return ``None``
             upon success. This defaults to ``False``.
 
+        batch_size (int, optional):
+            The number of FileDiffs to save to the database at a time.
+
     Returns:
         list of reviewboard.diffviewer.models.filediff.FileDiff:
-        The created FileDiffs.
+        The created FileDiffs. Their diff data will be loaded from the
+        database when accessed.
 
         If ``validate_only`` is ``True``, the returned list will be empty.
     """
     from reviewboard.diffviewer.diffutils import convert_to_unicode
-    from reviewboard.diffviewer.models import FileDiff
+    from reviewboard.diffviewer.models import FileDiff, RawFileDiffData
 
     files, parser, parent_commit_id, parent_files = _prepare_file_list(
         diff_file_contents=diff_file_contents,
@@ -98,7 +111,9 @@ def create_filediffs(diff_file_contents, parent_diff_file_contents,
         base_commit_id=base_commit_id)
 
     encoding_list = repository.get_encoding_list()
+    batch_size = batch_size or _FILEDIFF_BATCH_SIZE
     filediffs = []
+    batch = []
 
     for f in files:
         parent_file = None
@@ -158,17 +173,38 @@ def create_filediffs(diff_file_contents, parent_diff_file_contents,
         if not validate_only:
             # This state all requires making modifications to the database.
             # We only want to do this if we're saving.
-            filediff.diff = f.data
-            filediff.parent_diff = parent_content
-
-            filediff.set_line_counts(raw_insert_count=f.insert_count,
-                                     raw_delete_count=f.delete_count)
+            #
+            # Only the IDs of the stored diff data are set on the FileDiff,
+            # so that the data isn't held in memory for every file.
+            diff_hash = RawFileDiffData.objects.get_or_create_from_data(
+                f.data)[0]
+            diff_hash.insert_count = f.insert_count
+            diff_hash.delete_count = f.delete_count
+            diff_hash.save(update_fields=('extra_data',))
+
+            filediff.diff_hash_id = diff_hash.pk
+            filediff.diff64 = b''
+            filediff.extra_data.update({
+                'raw_insert_count': f.insert_count,
+                'raw_delete_count': f.delete_count,
+            })
+
+            if parent_content:
+                filediff.parent_diff_hash_id = \
+                    RawFileDiffData.objects.get_or_create_from_data(
+                        parent_content)[0].pk
+                filediff.parent_diff64 = b''
+
+            batch.append(filediff)
+
+            if len(batch) >= batch_size:
+                FileDiff.objects.bulk_create(batch)
+                batch = []
 
         filediffs.append(filediff)
 
-    if not validate_only:
-        FileDiff.objects.bulk_create(filediffs)
-        num_filediffs = len(filediffs)
+    if batch:
+        FileDiff.objects.bulk_create(batch)
 
     return filediffs
 
@@ -235,6 +271,10 @@ def _prepare_file_list(diff_file_contents, parent_diff_file_contents,
 
     tool = repository.get_scmtool()
     parser = tool.get_parser(diff_file_contents)
+
+    # The files are collected so they can be sorted. This is cheap for large
+    # diffs, which are parsed using DiffLines: each file references ranges
+    # of the diff's content, and its data is only built when accessed.
     files = list(_process_files(
         parser=parser,
         basedir=basedir,
@@ -339,7 +379,17 @@ def _process_files(parser, basedir, repository, base_commit_id,
     tool = repository.get_scmtool()
     basedir = force_bytes(basedir)
 
-    for f in parser.parse():
+    if (six.get_unbound_function(type(parser).parse) is
+        six.get_unbound_function(DiffParser.parse)):
+        # Files can be processed as they're parsed, without holding onto
+        # them in the parser.
+        parsed_files = parser.iter_files()
+    else:
+        # This parser overrides parse(), rather than iter_files(), so the
+        # files must be parsed up-front.
+        parsed_files = parser.parse()
+
+    for f in parsed_files:
         # This will either be a Revision or bytes. Either way, convert it
         # bytes now.
         orig_revision = force_bytes(f.orig_file_details)
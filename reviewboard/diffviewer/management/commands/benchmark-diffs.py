@@ -0,0 +1,240 @@
+"""Management command to benchmark the diff pipeline."""
+
+from __future__ import division, unicode_literals
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.template.defaultfilters import filesizeformat
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.diffviewer.benchmarks.corpora import (RECORDED_CORPORA_DIR,
+                                                       get_generated_corpora,
+                                                       get_recorded_corpora)
+from reviewboard.diffviewer.benchmarks.runner import (
+    compare_results,
+    default_diff_settings,
+    load_results,
+    measure_memory_supported,
+    run_benchmark,
+    save_results)
+from reviewboard.diffviewer.benchmarks.stages import STAGES
+
+
+class Command(BaseCommand):
+    """Management command to benchmark the diff pipeline.
+
+    Each stage of the diff pipeline is run against generated corpora (a
+    huge file, thousands of changed files, mass renames, whitespace-only
+    reformatting and a move-heavy refactor) and recorded corpora, measuring
+    throughput and peak memory. Everything runs locally, using a temporary
+    Local File repository for the full pipeline, and database changes are
+    rolled back.
+
+    Results can be saved as a baseline, and later runs compared against it
+    to catch regressions. Baselines are only comparable on the same machine
+    and at the same scale.
+    """
+
+    help = _('Benchmarks the diff pipeline, optionally comparing against '
+             'a saved baseline.')
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--stage',
+            action='append',
+            dest='stages',
+            choices=[stage.name for stage in STAGES],
+            help=_('A stage to benchmark. This can be specified multiple '
+                   'times. Defaults to all stages.'))
+        parser.add_argument(
+            '--corpus',
+            action='append',
+            dest='corpora',
+            metavar='NAME',
+            help=_('A corpus to benchmark against. This can be specified '
+                   'multiple times. Defaults to all corpora.'))
+        parser.add_argument(
+            '--recorded-dir',
+            dest='recorded_dir',
+            default=RECORDED_CORPORA_DIR,
+            help=_('A directory of recorded corpora, containing pairs of '
+                   '<name>-old.<ext> and <name>-new.<ext> files.'))
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1.0,
+            help=_('A multiplier for the size of the generated corpora.'))
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help=_('The number of times to time each benchmark. The '
+                   'fastest time is kept.'))
+        parser.add_argument(
+            '--no-memory',
+            action='store_false',
+            dest='measure_memory',
+            default=True,
+            help=_("Don't measure peak memory use."))
+        parser.add_argument(
+            '--baseline',
+            metavar='FILE',
+            help=_('Compare the results against a baseline saved by '
+                   '--save-baseline, failing if any have regressed.'))
+        parser.add_argument(
+            '--save-baseline',
+            dest='save_baseline',
+            metavar='FILE',
+            help=_('Save the results as a baseline.'))
+        parser.add_argument(
+            '--time-tolerance',
+            dest='time_tolerance',
+            type=float,
+            default=0.2,
+            help=_('The fraction by which a time may exceed the baseline '
+                   'before it is considered a regression.'))
+        parser.add_argument(
+            '--memory-tolerance',
+            dest='memory_tolerance',
+            type=float,
+            default=0.1,
+            help=_('The fraction by which peak memory may exceed the '
+                   'baseline before it is considered a regression.'))
+
+    def handle(self, **options):
+        """Handle the command.
+
+        Args:
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.base.CommandError:
+                The options were invalid, or results regressed from the
+                baseline.
+        """
+        scale = options['scale']
+        baseline = None
+
+        if options['baseline']:
+            try:
+                baseline = load_results(options['baseline'])
+            except (IOError, ValueError) as e:
+                raise CommandError(_('Unable to load the baseline: %s') % e)
+
+            if baseline['scale'] != scale:
+                raise CommandError(
+                    _('The baseline was run at scale %(baseline_scale)s, '
+                      'not %(scale)s.')
+                    % {
+                        'baseline_scale': baseline['scale'],
+                        'scale': scale,
+                    })
+
+        stages = STAGES
+
+        if options['stages']:
+            stages = [
+                stage
+                for stage in stages
+                if stage.name in options['stages']
+            ]
+
+        all_corpora = (get_generated_corpora(scale) +
+                       get_recorded_corpora(options['recorded_dir']))
+        corpora = all_corpora
+
+        if options['corpora']:
+            corpora = [
+                corpus
+                for corpus in corpora
+                if corpus.name in options['corpora']
+            ]
+
+            if not corpora:
+                raise CommandError(
+                    _('No corpora matched. The available corpora are: %s')
+                    % ', '.join(corpus.name for corpus in all_corpora))
+
+        measure_memory = options['measure_memory']
+
+        if measure_memory and not measure_memory_supported():
+            self.stdout.write(_('Peak memory can only be measured on '
+                                'Python 3.4 or higher.'))
+            measure_memory = False
+
+        # Don't allow queries to be stored.
+        settings.DEBUG = False
+
+        results = []
+
+        with default_diff_settings():
+            for stage in stages:
+                for corpus in corpora:
+                    result = run_benchmark(stage, corpus,
+                                           repeat=options['repeat'],
+                                           measure_memory=measure_memory)
+                    results.append(result)
+                    self._write_result(result)
+
+        if options['save_baseline']:
+            save_results(options['save_baseline'], results, scale)
+            self.stdout.write(_('Saved the results to %s')
+                              % options['save_baseline'])
+
+        if baseline is not None:
+            regressions = compare_results(
+                results,
+                baseline,
+                time_tolerance=options['time_tolerance'],
+                memory_tolerance=options['memory_tolerance'])
+
+            if regressions:
+                for result, measurement, old_value, new_value in regressions:
+                    self.stderr.write(
+                        _('%(key)s: %(measurement)s regressed from '
+                          '%(old_value)s to %(new_value)s')
+                        % {
+                            'key': result.key,
+                            'measurement': measurement,
+                            'new_value': new_value,
+                            'old_value': old_value,
+                        })
+
+                raise CommandError(
+                    _('%d benchmarks regressed from the baseline.')
+                    % len(regressions))
+
+            self.stdout.write(_('No benchmarks regressed from the '
+                                'baseline.'))
+
+    def _write_result(self, result):
+        """Write the result of a benchmark.
+
+        Args:
+            result (reviewboard.diffviewer.benchmarks.runner.
+                    BenchmarkResult):
+                The result to write.
+        """
+        if result.peak_memory is None:
+            peak_memory = _('n/a')
+        else:
+            peak_memory = filesizeformat(result.peak_memory)
+
+        self.stdout.write(
+            _('%(key)-40s %(seconds)9.3fs %(throughput)14.0f %(unit)s/s '
+              '%(peak_memory)12s peak')
+            % {
+                'key': result.key,
+                'peak_memory': peak_memory,
+                'seconds': result.seconds,
+                'throughput': result.throughput or 0,
+                'unit': result.unit,
+            })
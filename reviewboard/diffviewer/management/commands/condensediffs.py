@@ -3,16 +3,50 @@
 from __future__ import unicode_literals, division
 
 import sys
+import time
 from datetime import datetime, timedelta
+from functools import partial
 
 from django.conf import settings
 from django.contrib.humanize.templatetags.humanize import intcomma
+from django.core.management.base import CommandError
+from django.utils import six
 from django.utils.translation import ugettext as _, ungettext_lazy as N_
 from djblets.util.compat.django.core.management.base import BaseCommand
 
+from reviewboard.admin.management.chunked_tasks import (get_pk_chunks,
+                                                        read_checkpoint,
+                                                        remove_checkpoint,
+                                                        run_chunked_tasks,
+                                                        write_checkpoint)
 from reviewboard.diffviewer.models import FileDiff
 
 
+def _migrate_chunk_in_worker(start_pk, end_pk, max_rate):
+    """Migrate a chunk of FileDiffs in a worker process.
+
+    Args:
+        start_pk (int):
+            The first primary key in the chunk.
+
+        end_pk (int):
+            The primary key ending the chunk (exclusive).
+
+        max_rate (float):
+            The maximum number of diffs for this worker to migrate per
+            second, or ``None``.
+
+    Returns:
+        tuple:
+        The range of primary keys, along with the result of the migration,
+        so the parent process can record the chunk as completed.
+    """
+    info = FileDiff.objects.migrate_chunk(start_pk, end_pk,
+                                          max_rate=max_rate)
+
+    return start_pk, end_pk, info
+
+
 class Command(BaseCommand):
     """Management command to condense stored diffs in the database."""
 
@@ -36,19 +70,71 @@ class Command(BaseCommand):
 
     CALC_TIME_REMAINING_STR = _('Calculating time remaining')
 
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help=_('Migrate diffs in chunks of FileDiff IDs split across '
+                   'this many processes.'))
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            dest='chunk_size',
+            help=_('The number of FileDiff IDs to migrate in each chunk '
+                   'when using --workers.'))
+        parser.add_argument(
+            '--checkpoint',
+            metavar='FILE',
+            default=None,
+            help=_('A file for recording completed chunks when using '
+                   '--workers. If the file exists, migration resumes after '
+                   'the chunks it lists. It is removed once migration '
+                   'completes.'))
+        parser.add_argument(
+            '--max-rate',
+            type=float,
+            default=0,
+            dest='max_rate',
+            help=_('The maximum number of diffs to migrate per second, '
+                   'across all workers. This can be used to reduce the load '
+                   'on the database while Review Board is in use.'))
+
     def handle(self, **options):
         """Handle the command.
 
         Args:
-            **options (dict, unused):
-                Options parsed on the command line. For this command, no
-                options are available.
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                There was an error with the provided options.
         """
+        workers = options['workers']
+        max_rate = options['max_rate']
+
+        if workers < 0:
+            raise CommandError(_('--workers must be 0 or higher.'))
+
+        if max_rate < 0:
+            raise CommandError(_('--max-rate must be 0 or higher.'))
+
         counts = FileDiff.objects.get_migration_counts()
         total_count = counts['total_count']
 
         if total_count == 0:
             self.stdout.write(_('All diffs have already been migrated.\n'))
+
+            remove_checkpoint(options['checkpoint'])
+
             return
 
         self.stdout.write(
@@ -68,11 +154,25 @@ class Command(BaseCommand):
         self.prev_time_remaining_s = ''
         self.show_remaining = False
 
-        info = FileDiff.objects.migrate_all(self._on_batch_done, counts)
+        if workers:
+            info = self._migrate_in_chunks(
+                workers=workers,
+                chunk_size=options['chunk_size'],
+                checkpoint_path=options['checkpoint'],
+                max_rate=max_rate or None)
+        else:
+            info = FileDiff.objects.migrate_all(self._on_batch_done, counts,
+                                                max_rate=max_rate or None)
 
         old_diff_size = info['old_diff_size']
         new_diff_size = info['new_diff_size']
 
+        if old_diff_size:
+            savings_pct = (float(old_diff_size - new_diff_size) /
+                           float(old_diff_size) * 100)
+        else:
+            savings_pct = 0
+
         self.stdout.write(
             _('\n'
               '\n'
@@ -81,8 +181,155 @@ class Command(BaseCommand):
             % {
                 'old_size': intcomma(old_diff_size),
                 'new_size': intcomma(new_diff_size),
-                'savings_pct': (float(old_diff_size - new_diff_size) /
-                                float(old_diff_size) * 100),
+                'savings_pct': savings_pct,
+            })
+
+    def _migrate_in_chunks(self, workers, chunk_size, checkpoint_path,
+                           max_rate):
+        """Migrate all diffs in chunks of FileDiff IDs.
+
+        Each chunk is migrated by
+        :py:meth:`FileDiffManager.migrate_chunk()
+        <reviewboard.diffviewer.managers.FileDiffManager.migrate_chunk>`.
+        Any remaining legacy diff data not referenced by a FileDiff is then
+        migrated in this process.
+
+        Args:
+            workers (int):
+                The number of worker processes to use. If 1, chunks will be
+                migrated in this process.
+
+            chunk_size (int):
+                The number of primary keys in each chunk.
+
+            checkpoint_path (unicode):
+                The path to the checkpoint file, if any.
+
+            max_rate (float):
+                The maximum number of diffs to migrate per second across all
+                workers, or ``None``.
+
+        Returns:
+            dict:
+            The totals for the migration, including those recorded in the
+            checkpoint.
+
+        Raises:
+            django.core.management.CommandError:
+                There was an error with the provided options.
+        """
+        if chunk_size < 1:
+            raise CommandError(_('--chunk-size must be 1 or higher.'))
+
+        completed = []
+        totals = {
+            'diffs_migrated': 0,
+            'old_diff_size': 0,
+            'new_diff_size': 0,
+            'bytes_saved': 0,
+        }
+
+        checkpoint = read_checkpoint(checkpoint_path)
+
+        if checkpoint:
+            # The chunks must line up with the ones already completed.
+            chunk_size = checkpoint['chunk_size']
+            completed = checkpoint['completed']
+            totals = checkpoint['totals']
+
+            self.stdout.write(_('Resuming from checkpoint %s')
+                              % checkpoint_path)
+
+        if max_rate:
+            max_rate /= workers
+
+        completed_starts = set(start_pk for start_pk, end_pk in completed)
+        tasks = [
+            (start_pk, end_pk, max_rate)
+            for start_pk, end_pk in get_pk_chunks(
+                FileDiff.objects.needing_migration(),
+                chunk_size)
+            if start_pk not in completed_starts
+        ]
+
+        self._chunk_size = chunk_size
+        self._num_completed = 0
+        self._chunk_start_time = time.time()
+        self._chunk_diffs_migrated = 0
+        self._chunk_diff_size = 0
+
+        run_chunked_tasks(func=_migrate_chunk_in_worker,
+                          tasks=tasks,
+                          workers=workers,
+                          on_result=partial(self._record_chunk,
+                                            completed=completed,
+                                            totals=totals,
+                                            checkpoint_path=checkpoint_path,
+                                            num_tasks=len(tasks)))
+
+        # Legacy diff data that no FileDiff references isn't covered by any
+        # chunk.
+        info = FileDiff.objects.migrate_all(max_rate=max_rate)
+
+        for key in six.iterkeys(totals):
+            totals[key] += info[key]
+
+        remove_checkpoint(checkpoint_path)
+
+        return totals
+
+    def _record_chunk(self, result, completed, totals, checkpoint_path,
+                      num_tasks):
+        """Record a completed chunk and report throughput.
+
+        Args:
+            result (tuple):
+                The result from :py:func:`_migrate_chunk_in_worker`.
+
+            completed (list):
+                The list of completed ``[start_pk, end_pk]`` chunks, which
+                will be updated.
+
+            totals (dict):
+                The totals for the migration, which will be updated.
+
+            checkpoint_path (unicode):
+                The path to the checkpoint file, if any.
+
+            num_tasks (int):
+                The total number of chunks being migrated in this run.
+        """
+        start_pk, end_pk, info = result
+
+        completed.append([start_pk, end_pk])
+        self._num_completed += 1
+
+        for key in six.iterkeys(totals):
+            totals[key] += info[key]
+
+        write_checkpoint(checkpoint_path, {
+            'chunk_size': self._chunk_size,
+            'completed': completed,
+            'totals': totals,
+        })
+
+        self._chunk_diffs_migrated += info['diffs_migrated']
+        self._chunk_diff_size += info['old_diff_size']
+        elapsed = max(time.time() - self._chunk_start_time, 0.001)
+
+        self.stdout.write(
+            _('Migrated %(diffs_migrated)s diffs in FileDiffs with IDs '
+              '%(start_pk)s-%(end_pk)s (%(num_completed)s/%(num_tasks)s '
+              'chunks, %(diffs_per_sec)0.1f diffs/s, %(kb_per_sec)0.1f '
+              'KB/s)')
+            % {
+                'diffs_migrated': info['diffs_migrated'],
+                'diffs_per_sec': self._chunk_diffs_migrated / elapsed,
+                'end_pk': end_pk - 1,
+                'kb_per_sec': self._chunk_diff_size / elapsed / 1024,
+                'num_completed': self._num_completed,
+                'num_tasks': num_tasks,
+                'start_pk': start_pk,
             })
 
     def _on_batch_done(self, processed_count, total_count):
@@ -1,10 +1,11 @@
 """Managers for reviewboard.diffviewer.models."""
 
-from __future__ import unicode_literals
+from __future__ import division, unicode_literals
 
 import bz2
 import gc
 import hashlib
+import time
 import warnings
 from functools import partial
 
@@ -51,7 +52,26 @@ class FileDiffManager(models.Manager):
             'total_count': unmigrated_filediffs_count + legacy_fdd_count,
         }
 
-    def migrate_all(self, batch_done_cb=None, counts=None, batch_size=40):
+    def needing_migration(self):
+        """Return FileDiffs with diff content that needs to be migrated.
+
+        This covers FileDiffs that store their own diff content and those
+        that reference
+        :py:class:`~reviewboard.diffviewer.models.legacy_file_diff_data.
+        LegacyFileDiffData`.
+
+        Returns:
+            django.db.models.query.QuerySet:
+            The queryset for FileDiffs needing migration.
+        """
+        return self.exclude((Q(diff64='') | Q(diff64__isnull=True)) &
+                            (Q(parent_diff64='') |
+                             Q(parent_diff64__isnull=True)) &
+                            Q(legacy_diff_hash__isnull=True) &
+                            Q(legacy_parent_diff_hash__isnull=True))
+
+    def migrate_all(self, batch_done_cb=None, counts=None, batch_size=40,
+                    max_rate=None):
         """Migrates diff content in FileDiffs to use RawFileDiffData.
 
         This will run through all unmigrated FileDiffs and migrate them,
@@ -59,13 +79,12 @@ class FileDiffManager(models.Manager):
         FileDiffs.
 
         This will return a dictionary with the result of the process.
+
+        If ``max_rate`` is provided, this will pause between batches in
+        order to migrate no more than that many diffs per second.
         """
         from reviewboard.diffviewer.models import LegacyFileDiffData
 
-        total_diffs_migrated = 0
-        total_diff_size = 0
-        total_bytes_saved = 0
-
         unmigrated_filediffs = self.unmigrated()
         legacy_data_items = LegacyFileDiffData.objects.all()
 
@@ -87,6 +106,112 @@ class FileDiffManager(models.Manager):
              legacy_data_items_count),
         )
 
+        return self._run_migration_tasks(migration_tasks,
+                                         batch_size=batch_size,
+                                         batch_done_cb=batch_done_cb,
+                                         total_count=total_count,
+                                         max_rate=max_rate)
+
+    def migrate_chunk(self, start_pk, end_pk, batch_size=40, max_rate=None):
+        """Migrate the diff content for a range of FileDiffs.
+
+        This migrates the FileDiffs in the range that store their own diff
+        content, along with any
+        :py:class:`~reviewboard.diffviewer.models.legacy_file_diff_data.
+        LegacyFileDiffData` they reference. Converted legacy entries are
+        transitioned in bulk for all FileDiffs referencing them, including
+        those outside of the range.
+
+        Chunks covering different ranges can be migrated concurrently in
+        separate processes. Any legacy data not referenced by a FileDiff
+        will be left for :py:meth:`migrate_all`.
+
+        Args:
+            start_pk (int):
+                The first primary key in the range.
+
+            end_pk (int):
+                The primary key ending the range (exclusive).
+
+            batch_size (int, optional):
+                The number of diffs to migrate in each batch.
+
+            max_rate (float, optional):
+                The maximum number of diffs to migrate per second.
+
+        Returns:
+            dict:
+            A dictionary with the result of the migration, in the same form
+            as :py:meth:`migrate_all`.
+        """
+        from reviewboard.diffviewer.models import LegacyFileDiffData
+
+        filediffs = self.filter(pk__gte=start_pk, pk__lt=end_pk)
+        legacy_hashes = set()
+
+        for hashes in (filediffs
+                       .filter(Q(legacy_diff_hash__isnull=False) |
+                               Q(legacy_parent_diff_hash__isnull=False))
+                       .values_list('legacy_diff_hash',
+                                    'legacy_parent_diff_hash')):
+            legacy_hashes.update(hashes)
+
+        legacy_hashes.discard(None)
+        legacy_hashes = sorted(legacy_hashes)
+
+        unmigrated_filediffs = self.unmigrated().filter(pk__gte=start_pk,
+                                                        pk__lt=end_pk)
+        migration_tasks = [
+            (self._migrate_filediffs,
+             unmigrated_filediffs,
+             unmigrated_filediffs.count()),
+        ]
+
+        # Keep the number of hashes in each query small enough for all
+        # databases.
+        for i in range(0, len(legacy_hashes), self.MIGRATE_OBJECT_LIMIT):
+            hashes = legacy_hashes[i:i + self.MIGRATE_OBJECT_LIMIT]
+            migration_tasks.append((
+                self._migrate_legacy_fdd,
+                LegacyFileDiffData.objects.filter(pk__in=hashes),
+                len(hashes),
+            ))
+
+        return self._run_migration_tasks(migration_tasks,
+                                         batch_size=batch_size,
+                                         max_rate=max_rate)
+
+    def _run_migration_tasks(self, migration_tasks, batch_size,
+                             batch_done_cb=None, total_count=None,
+                             max_rate=None):
+        """Run a series of migration tasks, totalling up the results.
+
+        Args:
+            migration_tasks (list of tuple):
+                A list of ``(migrate_func, queryset, count)`` tuples.
+
+            batch_size (int):
+                The number of diffs to migrate in each batch.
+
+            batch_done_cb (callable, optional):
+                A function to call with the number of diffs migrated so far
+                and ``total_count`` after each batch.
+
+            total_count (int, optional):
+                The total number of diffs to migrate, for ``batch_done_cb``.
+
+            max_rate (float, optional):
+                The maximum number of diffs to migrate per second.
+
+        Returns:
+            dict:
+            A dictionary with the result of the migration.
+        """
+        total_diffs_migrated = 0
+        total_diff_size = 0
+        total_bytes_saved = 0
+        start_time = time.time()
+
         for migrate_func, queryset, count in migration_tasks:
             for batch_info in migrate_func(queryset, count, batch_size):
                 total_diffs_migrated += batch_info[0]
@@ -96,6 +221,13 @@ class FileDiffManager(models.Manager):
                 if callable(batch_done_cb):
                     batch_done_cb(total_diffs_migrated, total_count)
 
+                if max_rate:
+                    delay = (total_diffs_migrated / max_rate -
+                             (time.time() - start_time))
+
+                    if delay > 0:
+                        time.sleep(delay)
+
         return {
             'diffs_migrated': total_diffs_migrated,
             'old_diff_size': total_diff_size,
@@ -28,6 +28,9 @@ class RawFileDiffData(models.Model):
         (COMPRESSION_BZIP2, _('BZip2-compressed')),
     )
 
+    #: The number of bytes of stored data to decompress at a time.
+    CONTENT_BLOCK_SIZE = 64 * 1024
+
     binary_hash = models.CharField(_("hash"), max_length=40, unique=True)
     binary = models.BinaryField()
     compression = models.CharField(max_length=1, choices=COMPRESSION_CHOICES,
@@ -52,6 +55,72 @@ class RawFileDiffData(models.Model):
                 'Unsupported compression method %s for RawFileDiffData %s'
                 % (self.compression, self.pk))
 
+    @classmethod
+    def iter_decompressed(cls, data, compression,
+                          block_size=CONTENT_BLOCK_SIZE):
+        """Yield blocks of decompressed diff data.
+
+        The data is decompressed incrementally, so only a block of the
+        decompressed diff is held in memory at a time.
+
+        Args:
+            data (bytes):
+                The stored diff data, from :py:attr:`binary`.
+
+            compression (unicode):
+                The compression method used for the data, from
+                :py:attr:`compression`.
+
+            block_size (int, optional):
+                The number of bytes of stored data to decompress at a time.
+
+        Yields:
+            bytes:
+            Each block of decompressed data. Blocks may be empty.
+
+        Raises:
+            NotImplementedError:
+                The compression method isn't supported.
+        """
+        if compression == cls.COMPRESSION_BZIP2:
+            decompressor = bz2.BZ2Decompressor()
+        elif compression is None:
+            decompressor = None
+        else:
+            raise NotImplementedError(
+                'Unsupported compression method %s' % compression)
+
+        data = bytes(data)
+
+        for i in range(0, len(data), block_size):
+            block = data[i:i + block_size]
+
+            if decompressor is not None:
+                block = decompressor.decompress(block)
+
+            yield block
+
+    def iter_content(self, block_size=CONTENT_BLOCK_SIZE):
+        """Yield the content of the diff in blocks.
+
+        This is an alternative to :py:attr:`content` for large diffs, which
+        avoids decompressing the entire diff into memory at once.
+
+        Args:
+            block_size (int, optional):
+                The number of bytes of stored data to decompress at a time.
+
+        Yields:
+            bytes:
+            Each block of decompressed data.
+
+        Raises:
+            NotImplementedError:
+                The compression method isn't supported.
+        """
+        return self.iter_decompressed(self.binary, self.compression,
+                                      block_size)
+
     @property
     def insert_count(self):
         return self.extra_data.get('insert_count')
@@ -1,7 +1,8 @@
 from __future__ import unicode_literals
 
-import io
+import array
 import logging
+import mmap
 import re
 
 from django.utils import six
@@ -98,20 +99,37 @@ class ParsedDiffFile(object):
         self.insert_count = 0
         self.delete_count = 0
 
-        self._data_io = io.BytesIO()
         self._data = None
+        self._data_pieces = []
+        self._data_source = None
+        self._finalized = False
 
     @property
     def data(self):
         """The data for this diff.
 
         This must be accessed after :py:meth:`finalize` has been called.
+
+        If the diff was parsed from :py:class:`DiffLines`, the data is
+        built from the diff's content each time this is accessed, rather
+        than being held in memory.
         """
-        if self._data is None:
+        if not self._finalized:
             raise ValueError('ParsedDiffFile.data cannot be accessed until '
                              'finalize() is called.')
 
-        return self._data
+        if self._data is not None:
+            return self._data
+
+        pieces = [
+            self._get_piece_data(piece)
+            for piece in self._data_pieces
+        ]
+
+        if len(pieces) == 1:
+            return pieces[0]
+
+        return b''.join(pieces)
 
     def finalize(self):
         """Finalize the parsed diff.
@@ -119,8 +137,14 @@ class ParsedDiffFile(object):
         This makes the diff data available to consumers and closes the buffer
         for writing.
         """
-        self._data = self._data_io.getvalue()
-        self._data_io.close()
+        if self._finalized:
+            return
+
+        self._finalized = True
+
+        if self._data_source is None:
+            self._data = b''.join(self._data_pieces)
+            self._data_pieces = None
 
     def prepend_data(self, data):
         """Prepend data to the buffer.
@@ -130,12 +154,7 @@ class ParsedDiffFile(object):
                 The data to prepend.
         """
         if data:
-            new_data_io = io.BytesIO()
-            new_data_io.write(data)
-            new_data_io.write(self._data_io.getvalue())
-
-            self._data_io.close()
-            self._data_io = new_data_io
+            self._data_pieces.insert(0, data)
 
     def append_data(self, data):
         """Append data to the buffer.
@@ -145,7 +164,318 @@ class ParsedDiffFile(object):
                 The data to append.
         """
         if data:
-            self._data_io.write(data)
+            self._data_pieces.append(data)
+
+    def prepend_lines(self, lines, start_linenum, end_linenum):
+        """Prepend lines from a diff to the buffer.
+
+        Each line will be followed by a newline.
+
+        Args:
+            lines (list of bytes or DiffLines):
+                The lines of the diff.
+
+            start_linenum (int):
+                The 0-based line number of the first line to prepend.
+
+            end_linenum (int):
+                The 0-based line number ending the range (exclusive).
+        """
+        pieces = self._get_line_pieces(lines, start_linenum, end_linenum)
+        data_pieces = self._data_pieces
+
+        if not pieces:
+            return
+
+        # Merge with the next range, if this leads into it.
+        if (data_pieces and
+            isinstance(data_pieces[0], tuple) and
+            isinstance(pieces[-1], tuple) and
+            pieces[-1][1] == data_pieces[0][0]):
+            data_pieces[0] = (pieces[-1][0], data_pieces[0][1])
+            pieces = pieces[:-1]
+
+        data_pieces[0:0] = pieces
+
+    def append_lines(self, lines, start_linenum, end_linenum):
+        """Append lines from a diff to the buffer.
+
+        Each line will be followed by a newline. If the lines come from
+        :py:class:`DiffLines`, consecutive lines are stored as a single range
+        of the diff's content, rather than being copied.
+
+        Args:
+            lines (list of bytes or DiffLines):
+                The lines of the diff.
+
+            start_linenum (int):
+                The 0-based line number of the first line to append.
+
+            end_linenum (int):
+                The 0-based line number ending the range (exclusive).
+        """
+        pieces = self._get_line_pieces(lines, start_linenum, end_linenum)
+        data_pieces = self._data_pieces
+
+        if not pieces:
+            return
+
+        # Merge with the previous range, if this continues on from it.
+        if (data_pieces and
+            isinstance(data_pieces[-1], tuple) and
+            isinstance(pieces[0], tuple) and
+            data_pieces[-1][1] == pieces[0][0]):
+            data_pieces[-1] = (data_pieces[-1][0], pieces[0][1])
+            pieces = pieces[1:]
+
+        data_pieces += pieces
+
+    def _get_line_pieces(self, lines, start_linenum, end_linenum):
+        """Return pieces of data for lines from a diff.
+
+        Args:
+            lines (list of bytes or DiffLines):
+                The lines of the diff.
+
+            start_linenum (int):
+                The 0-based line number of the first line.
+
+            end_linenum (int):
+                The 0-based line number ending the range (exclusive).
+
+        Returns:
+            list:
+            A list of pieces of data. Each is either a :py:class:`bytes` or
+            a ``(start, end)`` tuple of offsets into the diff's content.
+        """
+        if isinstance(lines, DiffLines):
+            assert self._data_source in (None, lines.data), (
+                'Lines from different diffs cannot be added to a '
+                'ParsedDiffFile.')
+
+            self._data_source = lines.data
+
+            return lines.get_data_ranges(start_linenum, end_linenum)
+        else:
+            pieces = []
+
+            for line in lines[start_linenum:end_linenum]:
+                pieces += [line, b'\n']
+
+            return pieces
+
+    def _get_piece_data(self, piece):
+        """Return the data for a piece of the buffer.
+
+        Args:
+            piece (bytes or tuple):
+                The piece of data, or a ``(start, end)`` tuple of offsets into
+                the diff's content.
+
+        Returns:
+            bytes:
+            The data for the piece.
+        """
+        if isinstance(piece, tuple):
+            piece = self._data_source[piece[0]:piece[1]]
+
+            if isinstance(piece, memoryview):
+                piece = piece.tobytes()
+
+        return piece
+
+
+class DiffLines(object):
+    """The lines in a diff, backed by the diff's content.
+
+    This acts as a read-only sequence of lines, split in the same way as
+    :py:func:`~reviewboard.diffviewer.diffutils.split_line_endings`. Rather
+    than holding a copy of every line, only the offset of each line within
+    the content is stored, and lines are returned as they're accessed.
+
+    This allows a large diff to be parsed without holding the diff in memory
+    more than once. The content can be a :py:class:`bytes`,
+    :py:class:`memoryview` or :py:class:`mmap.mmap`.
+    """
+
+    #: A regex for finding carriage returns.
+    _CR_RE = re.compile(br'\r')
+
+    def __init__(self, data):
+        """Initialize the lines.
+
+        Args:
+            data (bytes or memoryview or mmap.mmap):
+                The content of the diff.
+        """
+        from reviewboard.diffviewer.diffutils import NEWLINE_RE
+
+        self.data = data
+        self._size = len(data)
+
+        # Each line starts after the previous line's line ending. This is a
+        # compact array, rather than a list, since there may be millions of
+        # lines.
+        offsets = array.array(str('L'), [0])
+        offsets.extend(m.end() for m in NEWLINE_RE.finditer(data))
+
+        if offsets[-1] == self._size:
+            # The content ended in a newline (or is empty), so there's no
+            # line after it.
+            offsets.pop()
+
+        self._offsets = offsets
+
+        # If all lines end in "\n", lines and their line endings can be
+        # referenced as a single range, without normalizing line endings.
+        self._newlines_only = self._CR_RE.search(data) is None
+
+    def __len__(self):
+        """Return the number of lines.
+
+        Returns:
+            int:
+            The number of lines.
+        """
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        """Return a line or a list of lines.
+
+        Args:
+            index (int or slice):
+                The 0-based index of the line, or a slice of lines.
+
+        Returns:
+            bytes or list of bytes:
+            The line without its line ending, or a list of lines for a slice.
+
+        Raises:
+            IndexError:
+                The index is out of range.
+        """
+        num_lines = len(self._offsets)
+
+        if isinstance(index, slice):
+            return [
+                self[i]
+                for i in range(*index.indices(num_lines))
+            ]
+
+        if index < 0:
+            index += num_lines
+
+        if not 0 <= index < num_lines:
+            raise IndexError('line index out of range')
+
+        start, end = self._get_line_bounds(index)
+
+        # Lines never contain line ending characters, so anything trailing
+        # is the line ending.
+        return self._get_bytes(start, end).rstrip(b'\r\n')
+
+    def __iter__(self):
+        """Iterate through the lines.
+
+        Yields:
+            bytes:
+            Each line, without its line ending.
+        """
+        for i in range(len(self._offsets)):
+            yield self[i]
+
+    def get_data_ranges(self, start_linenum, end_linenum):
+        """Return the content for a range of lines, with normalized newlines.
+
+        Each line is followed by a ``\n``, regardless of its line ending in
+        the content. Where possible, this is represented as offsets into the
+        content, to avoid copying the lines.
+
+        Args:
+            start_linenum (int):
+                The 0-based line number of the first line.
+
+            end_linenum (int):
+                The 0-based line number ending the range (exclusive).
+
+        Returns:
+            list:
+            A list of pieces of data. Each is either a :py:class:`bytes` or
+            a ``(start, end)`` tuple of offsets into the content.
+        """
+        num_lines = len(self._offsets)
+        end_linenum = min(end_linenum, num_lines)
+
+        if start_linenum >= end_linenum:
+            return []
+
+        if self._newlines_only:
+            start = self._offsets[start_linenum]
+            end = self._get_line_bounds(end_linenum - 1)[1]
+            pieces = [(start, end)]
+
+            if (end_linenum == num_lines and
+                self._get_bytes(end - 1, end) != b'\n'):
+                # The last line has no line ending, so one is added.
+                pieces.append(b'\n')
+
+            return pieces
+
+        pieces = []
+
+        for linenum in range(start_linenum, end_linenum):
+            start, end = self._get_line_bounds(linenum)
+            line_end = start + len(self[linenum])
+
+            if (end - line_end == 1 and
+                self._get_bytes(line_end, end) == b'\n'):
+                pieces.append((start, end))
+            else:
+                pieces += [(start, line_end), b'\n']
+
+        return pieces
+
+    def _get_line_bounds(self, linenum):
+        """Return the offsets of a line, including its line ending.
+
+        Args:
+            linenum (int):
+                The 0-based line number.
+
+        Returns:
+            tuple:
+            A ``(start, end)`` tuple of offsets into the content.
+        """
+        offsets = self._offsets
+        start = offsets[linenum]
+
+        if linenum + 1 < len(offsets):
+            end = offsets[linenum + 1]
+        else:
+            end = self._size
+
+        return start, end
+
+    def _get_bytes(self, start, end):
+        """Return a range of the content.
+
+        Args:
+            start (int):
+                The offset of the start of the range.
+
+            end (int):
+                The offset of the end of the range (exclusive).
+
+        Returns:
+            bytes:
+            The content in the range.
+        """
+        data = self.data[start:end]
+
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+
+        return data
 
 
 class DiffParser(object):
@@ -156,29 +486,123 @@ class DiffParser(object):
 
     INDEX_SEP = b"=" * 67
 
+    #: The number of FileDiffs to fetch diff data for at a time.
+    #:
+    #: This is used by :py:meth:`iter_raw_diff` to bound the amount of stored
+    #: diff data held in memory while streaming a diff.
+    RAW_DIFF_BATCH_SIZE = 20
+
+    #: The minimum size of diff data for lines to be read as needed.
+    #:
+    #: Diffs at least this large will be parsed using :py:class:`DiffLines`,
+    #: rather than being split into a list of lines up-front. This reduces
+    #: memory usage at the cost of some parsing speed.
+    STREAMING_MIN_DIFF_SIZE = 4 * 1024 * 1024
+
     def __init__(self, data):
+        """Initialize the parser.
+
+        Args:
+            data (bytes or memoryview or mmap.mmap or file):
+                The diff content to parse.
+
+                If this is a :py:class:`memoryview`, :py:class:`mmap.mmap`,
+                or a file-like object, or is :py:class:`bytes` at least
+                :py:attr:`STREAMING_MIN_DIFF_SIZE` in size, lines will be
+                read from the content as needed (see :py:class:`DiffLines`).
+                A file with a file descriptor will be memory-mapped, and the
+                whole file will be parsed. The mapping is closed by
+                :py:meth:`close`.
+
+        Raises:
+            TypeError:
+                The data was not of a supported type.
+        """
         from reviewboard.diffviewer.diffutils import split_line_endings
 
-        if not isinstance(data, bytes):
+        self._mapped_data = None
+
+        if (not isinstance(data, (bytes, memoryview, mmap.mmap)) and
+            hasattr(data, 'read')):
+            data = self._get_file_data(data)
+
+            if isinstance(data, mmap.mmap):
+                self._mapped_data = data
+
+        if not isinstance(data, (bytes, memoryview, mmap.mmap)):
             raise TypeError(
                 _('%s expects bytes values for "data", not %s')
                 % (self.__class__.__name__, type(data)))
 
+        if six.PY2 and isinstance(data, memoryview):
+            # Regexes can't search a memoryview on Python 2.
+            data = data.tobytes()
+
         self.base_commit_id = None
         self.new_commit_id = None
         self.data = data
-        self.lines = split_line_endings(data)
+
+        if (isinstance(data, bytes) and
+            len(data) < self.STREAMING_MIN_DIFF_SIZE):
+            self.lines = split_line_endings(data)
+        else:
+            self.lines = DiffLines(data)
+
+    def __enter__(self):
+        """Enter the parser's context.
+
+        Returns:
+            DiffParser:
+            This parser.
+        """
+        return self
+
+    def __exit__(self, *args):
+        """Exit the parser's context, closing the parser.
+
+        Args:
+            *args (tuple):
+                The exception information, if any.
+        """
+        self.close()
+
+    def close(self):
+        """Close the parser.
+
+        If the diff was memory-mapped from a file, the mapping will be
+        closed. The data of any files parsed from it can no longer be
+        accessed.
+
+        This is safe to call more than once.
+        """
+        if self._mapped_data is not None:
+            self._mapped_data.close()
+            self._mapped_data = None
 
     def parse(self):
         """
         Parses the diff, returning a list of File objects representing each
         file in the diff.
+
+        Subclasses should override :py:meth:`iter_files` instead.
+        """
+        self.files = list(self.iter_files())
+
+        return self.files
+
+    def iter_files(self):
+        """Parse the diff, yielding each file as it's parsed.
+
+        Unlike :py:meth:`parse`, the parsed files aren't held onto, so a
+        caller can process each file and then discard it.
+
+        Yields:
+            ParsedDiffFile:
+            Each file in the diff.
         """
         logging.debug("DiffParser.parse: Beginning parse of diff, size = %s",
                       len(self.data))
 
-        preamble = io.BytesIO()
-        self.files = []
         parsed_file = None
         i = 0
 
@@ -190,36 +614,29 @@ class DiffParser(object):
                 # This line is the start of a new file diff.
                 #
                 # First, finalize the last one.
-                if self.files:
-                    self.files[-1].finalize()
-
-                parsed_file = new_file
-
-                # We need to prepend the preamble, if we have one.
-                parsed_file.prepend_data(preamble.getvalue())
+                if parsed_file:
+                    parsed_file.finalize()
 
-                preamble.close()
-                preamble = io.BytesIO()
+                    yield parsed_file
+                else:
+                    # Anything before the first file is a preamble, which
+                    # needs to be prepended to the file.
+                    new_file.prepend_lines(self.lines, 0, i)
 
-                self.files.append(parsed_file)
+                parsed_file = new_file
                 i = next_linenum
+            elif parsed_file:
+                i = self.parse_diff_line(i, parsed_file)
             else:
-                if parsed_file:
-                    i = self.parse_diff_line(i, parsed_file)
-                else:
-                    preamble.write(self.lines[i])
-                    preamble.write(b'\n')
-                    i += 1
+                i += 1
 
-        if self.files:
-            self.files[-1].finalize()
+        if parsed_file:
+            parsed_file.finalize()
 
-        preamble.close()
+            yield parsed_file
 
         logging.debug("DiffParser.parse: Finished parsing diff.")
 
-        return self.files
-
     def parse_diff_line(self, linenum, parsed_file):
         """Parse a line of data in a diff.
 
@@ -243,8 +660,7 @@ class DiffParser(object):
             elif line.startswith(b'+'):
                 parsed_file.insert_count += 1
 
-        parsed_file.append_data(line)
-        parsed_file.append_data(b'\n')
+        parsed_file.append_lines(self.lines, linenum, linenum + 1)
 
         return linenum + 1
 
@@ -309,11 +725,7 @@ class DiffParser(object):
 
             # The header is part of the diff, so make sure it gets in the
             # diff content.
-            lines = self.lines[start:linenum]
-
-            for line in lines:
-                parsed_file.append_data(line)
-                parsed_file.append_data(b'\n')
+            parsed_file.append_lines(self.lines, start, linenum)
 
         return linenum, parsed_file
 
@@ -429,6 +841,9 @@ class DiffParser(object):
     def raw_diff(self, diffset_or_commit):
         """Return a raw diff as a string.
 
+        This builds the entire diff in memory. For large diffs, consider
+        using :py:meth:`iter_raw_diff` instead.
+
         Args:
             diffset_or_commit (reviewboard.diffviewer.models.diffset.DiffSet or
                                reviewboard.diffviewer.models.diffcommit
@@ -445,6 +860,42 @@ class DiffParser(object):
             bytes:
             The diff composed of all the component FileDiffs.
         """
+        return b''.join(self.iter_raw_diff(diffset_or_commit))
+
+    def iter_raw_diff(self, diffset_or_commit, batch_size=None):
+        """Yield the contents of a raw diff in blocks.
+
+        The stored diff data for the FileDiffs is fetched in batches and
+        decompressed incrementally, so only a bounded amount of the diff is
+        held in memory at a time. This is suitable for streaming a diff in
+        a :py:class:`~django.http.StreamingHttpResponse`.
+
+        Args:
+            diffset_or_commit (reviewboard.diffviewer.models.diffset.DiffSet or
+                               reviewboard.diffviewer.models.diffcommit
+                               .DiffCommit):
+                The DiffSet or DiffCommit to render.
+
+                If passing in a DiffSet, only the cumulative diff's file
+                contents will be returned.
+
+                If passing in a DiffCommit, only that commit's file contents
+                will be returned.
+
+            batch_size (int, optional):
+                The number of FileDiffs to fetch diff data for at a time.
+                This defaults to :py:attr:`RAW_DIFF_BATCH_SIZE`.
+
+        Yields:
+            bytes:
+            Each block of the diff composed of all the component FileDiffs.
+
+        Raises:
+            TypeError:
+                The provided object was not a DiffSet or DiffCommit.
+        """
+        from reviewboard.diffviewer.models import RawFileDiffData
+
         if hasattr(diffset_or_commit, 'cumulative_files'):
             filediffs = diffset_or_commit.cumulative_files
         elif hasattr(diffset_or_commit, 'files'):
@@ -454,10 +905,60 @@ class DiffParser(object):
                             'or DiffCommit.'
                             % diffset_or_commit)
 
-        return b''.join(
-            filediff.diff
-            for filediff in filediffs
-        )
+        filediffs = list(filediffs)
+        batch_size = batch_size or self.RAW_DIFF_BATCH_SIZE
+
+        for i in range(0, len(filediffs), batch_size):
+            batch = filediffs[i:i + batch_size]
+
+            for filediff in batch:
+                if filediff._needs_diff_migration():
+                    filediff._migrate_diff_data()
+
+            raw_diffs = RawFileDiffData.objects.in_bulk(set(
+                filediff.diff_hash_id
+                for filediff in batch
+            ))
+
+            for filediff in batch:
+                for block in raw_diffs[filediff.diff_hash_id].iter_content():
+                    if block:
+                        yield block
+
+            # Release this batch's diff data before fetching the next.
+            raw_diffs = None
+
+    def _get_file_data(self, fp):
+        """Return the diff content for a file.
+
+        Args:
+            fp (file):
+                The file-like object containing the diff.
+
+        Returns:
+            bytes or memoryview or mmap.mmap:
+            The diff content. Where possible, this will reference the file's
+            content without copying it.
+        """
+        try:
+            fileno = fp.fileno()
+        except (AttributeError, IOError, OSError, ValueError):
+            fileno = None
+
+        if fileno is not None:
+            try:
+                return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files can't be mapped.
+                return b''
+            except EnvironmentError:
+                # This isn't a regular file, so it will have to be read.
+                pass
+
+        if hasattr(fp, 'getbuffer'):
+            return fp.getbuffer()
+
+        return fp.read()
 
     def get_orig_commit_id(self):
         """Returns the commit ID of the original revision for the diff.
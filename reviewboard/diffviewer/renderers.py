@@ -4,9 +4,9 @@ from django.conf import settings
 from django.http import HttpResponse
 from django.utils import six
 from django.utils.translation import ugettext as _, get_language
-from djblets.cache.backend import cache_memoize
 from djblets.util.compat.django.template.loader import render_to_string
 
+from reviewboard.admin.instrumentation import cache_memoize, span
 from reviewboard.diffviewer.chunk_generator import compute_chunk_last_header
 from reviewboard.diffviewer.diffutils import populate_diff_chunks
 from reviewboard.diffviewer.errors import UserVisibleError
@@ -97,8 +97,9 @@ class DiffRenderer(object):
                     _('Invalid chunk index %s specified.')
                     % self.chunk_index)
 
-        return render_to_string(template_name=self.template_name,
-                                context=self.make_context())
+        with span('diff.render'):
+            return render_to_string(template_name=self.template_name,
+                                    context=self.make_context())
 
     def make_cache_key(self):
         """Creates and returns a cache key representing the diff to render."""
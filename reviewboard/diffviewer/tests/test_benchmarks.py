@@ -0,0 +1,94 @@
+"""Unit tests for reviewboard.diffviewer.benchmarks."""
+
+from __future__ import unicode_literals
+
+from reviewboard.diffviewer.benchmarks.corpora import (get_generated_corpora,
+                                                       get_recorded_corpora)
+from reviewboard.diffviewer.benchmarks.runner import (BenchmarkResult,
+                                                      compare_results,
+                                                      run_benchmark)
+from reviewboard.diffviewer.benchmarks.stages import STAGES
+from reviewboard.diffviewer.models import DiffSet
+from reviewboard.scmtools.models import Repository
+from reviewboard.testing import TestCase
+
+
+class BenchmarkTests(TestCase):
+    """Unit tests for reviewboard.diffviewer.benchmarks."""
+
+    def test_generated_corpora(self):
+        """Testing get_generated_corpora is deterministic"""
+        corpora = get_generated_corpora(0.01)
+
+        self.assertEqual(
+            [corpus.name for corpus in corpora],
+            ['huge-file', 'many-files', 'mass-rename', 'whitespace-reformat',
+             'move-heavy'])
+        self.assertEqual(
+            [corpus.get_diff() for corpus in corpora],
+            [corpus.get_diff() for corpus in get_generated_corpora(0.01)])
+        self.assertEqual(len(corpora[1].files), 50)
+
+    def test_recorded_corpora(self):
+        """Testing get_recorded_corpora"""
+        corpora = get_recorded_corpora()
+
+        self.assertEqual([corpus.name for corpus in corpora],
+                         ['recorded-bug-4371'])
+        self.assertEqual(corpora[0].files[0].orig_filename,
+                         'recorded/bug-4371.js')
+
+    def test_run_benchmark(self):
+        """Testing run_benchmark with each stage"""
+        corpus = get_generated_corpora(0.001)[1]
+
+        for stage in STAGES:
+            result = run_benchmark(stage, corpus, repeat=1,
+                                   measure_memory=False)
+
+            self.assertEqual(result.key, '%s/many-files' % stage.name)
+            self.assertEqual(result.num_units,
+                             stage.get_num_units(corpus))
+            self.assertIsNotNone(result.seconds)
+            self.assertIsNone(result.peak_memory)
+
+        # The pipeline's repository and diff should have been rolled back.
+        self.assertFalse(Repository.objects.exists())
+        self.assertFalse(DiffSet.objects.exists())
+
+    def test_compare_results(self):
+        """Testing compare_results"""
+        baseline = {
+            'results': {
+                'myers/huge-file': {
+                    'peak_memory': 1000,
+                    'seconds': 1.0,
+                },
+                'parser/huge-file': {
+                    'peak_memory': 1000,
+                    'seconds': 1.0,
+                },
+            },
+        }
+        slower = BenchmarkResult(stage='myers',
+                                 corpus='huge-file',
+                                 seconds=1.5,
+                                 peak_memory=1050,
+                                 num_units=100,
+                                 unit='lines')
+        within_tolerance = BenchmarkResult(stage='parser',
+                                           corpus='huge-file',
+                                           seconds=1.1,
+                                           peak_memory=None,
+                                           num_units=100,
+                                           unit='bytes')
+        new = BenchmarkResult(stage='chunks',
+                              corpus='huge-file',
+                              seconds=10.0,
+                              peak_memory=None,
+                              num_units=100,
+                              unit='lines')
+
+        self.assertEqual(
+            compare_results([slower, within_tolerance, new], baseline),
+            [(slower, 'seconds', 1.0, 1.5)])
@@ -0,0 +1,149 @@
+"""Unit tests for reviewboard.diffviewer.chunk_index."""
+
+from __future__ import unicode_literals
+
+from reviewboard.diffviewer.chunk_index import DiffChunkIndex
+from reviewboard.diffviewer.diffutils import (
+    _get_last_header_in_chunks_before_line)
+from reviewboard.testing import TestCase
+
+
+class DiffChunkIndexTests(TestCase):
+    """Unit tests for reviewboard.diffviewer.chunk_index.DiffChunkIndex."""
+
+    def setUp(self):
+        super(DiffChunkIndexTests, self).setUp()
+
+        # See diffviewer.diffutils.get_chunks_in_range for a description of
+        # the lines. Only the line numbers are needed here.
+        self.chunks = [
+            {
+                'change': 'equal',
+                'meta': {
+                    'left_headers': [(1, 'def foo():')],
+                    'right_headers': [(1, 'def foo():')],
+                },
+                'lines': [
+                    [1, 1, '', [], 1, '', [], False],
+                    [2, 2, '', [], 2, '', [], False],
+                    [3, 3, '', [], 3, '', [], False],
+                ],
+            },
+            {
+                'change': 'insert',
+                'meta': {
+                    'left_headers': [],
+                    'right_headers': [(4, 'def bar():')],
+                },
+                'lines': [
+                    [4, '', '', [], 4, '', [], False],
+                    [5, '', '', [], 5, '', [], False],
+                ],
+            },
+            {
+                'change': 'equal',
+                'meta': {
+                    'left_headers': [
+                        (4, 'def baz():'),
+                        (100, 'def merged():'),
+                    ],
+                    'right_headers': [(6, 'def baz():')],
+                },
+                'lines': [
+                    [6, 4, '', [], 6, '', [], False],
+                    [7, 5, '', [], 7, '', [], False],
+                    [8, 6, '', [], 8, '', [], False],
+                    [9, 7, '', [], 9, '', [], False],
+                ],
+            },
+        ]
+        self.index = DiffChunkIndex.from_chunks(self.chunks)
+
+    def test_from_chunks(self):
+        """Testing DiffChunkIndex.from_chunks"""
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.first_lines, [1, 4, 6])
+        self.assertEqual(self.index.last_lines, [3, 5, 9])
+        self.assertEqual(self.index.num_lines, [3, 2, 4])
+
+        # The header past the end of the last chunk doesn't belong to it.
+        self.assertEqual(self.index.left_headers,
+                         [(1, 'def foo():'), (6, 'def baz():')])
+        self.assertEqual(self.index.left_header_counts, [1, 1, 2])
+        self.assertEqual(self.index.right_headers,
+                         [(1, 'def foo():'), (4, 'def bar():'),
+                          (6, 'def baz():')])
+        self.assertEqual(self.index.right_header_counts, [1, 2, 3])
+
+    def test_from_chunks_with_empty(self):
+        """Testing DiffChunkIndex.from_chunks with no chunks"""
+        index = DiffChunkIndex.from_chunks([])
+
+        self.assertEqual(len(index), 0)
+        self.assertEqual(index.get_chunk_ranges(1, 10), [])
+        self.assertEqual(index.get_last_header_before_line(10), {
+            'left': None,
+            'right': None,
+        })
+
+        with self.assertRaises(IndexError):
+            index.get_last_line_number()
+
+    def test_serialize(self):
+        """Testing DiffChunkIndex.serialize and deserialize"""
+        index = DiffChunkIndex.deserialize(self.index.serialize())
+
+        self.assertEqual(index.serialize(), self.index.serialize())
+        self.assertEqual(index.get_last_line_number(), 9)
+
+    def test_get_last_line_number(self):
+        """Testing DiffChunkIndex.get_last_line_number"""
+        self.assertEqual(self.index.get_last_line_number(), 9)
+
+    def test_get_chunk_ranges(self):
+        """Testing DiffChunkIndex.get_chunk_ranges within a chunk"""
+        self.assertEqual(self.index.get_chunk_ranges(7, 2), [(2, 1, 3)])
+
+    def test_get_chunk_ranges_across_chunks(self):
+        """Testing DiffChunkIndex.get_chunk_ranges across chunks"""
+        self.assertEqual(self.index.get_chunk_ranges(2, 6),
+                         [(0, 1, 3), (1, 0, 2), (2, 0, 2)])
+
+    def test_get_chunk_ranges_past_end(self):
+        """Testing DiffChunkIndex.get_chunk_ranges past the last line"""
+        self.assertEqual(self.index.get_chunk_ranges(8, 10), [(2, 2, 4)])
+        self.assertEqual(self.index.get_chunk_ranges(10, 5), [])
+
+    def test_get_last_header_before_line(self):
+        """Testing DiffChunkIndex.get_last_header_before_line"""
+        for target_line in range(1, 11):
+            self.assertEqual(
+                self.index.get_last_header_before_line(target_line),
+                _get_last_header_in_chunks_before_line(self.chunks,
+                                                       target_line))
+
+        self.assertEqual(self.index.get_last_header_before_line(5), {
+            'left': {
+                'line': 1,
+                'text': 'def foo():',
+            },
+            'right': {
+                'line': 4,
+                'text': 'def bar():',
+            },
+        })
+
+    def test_get_last_header_before_line_at_chunk_start(self):
+        """Testing DiffChunkIndex.get_last_header_before_line with the first
+        line of a chunk
+        """
+        self.assertEqual(self.index.get_last_header_before_line(4), {
+            'left': {
+                'line': 1,
+                'text': 'def foo():',
+            },
+            'right': {
+                'line': 1,
+                'text': 'def foo():',
+            },
+        })
@@ -1,11 +1,13 @@
 from __future__ import unicode_literals
 
+from kgb import SpyAgency
+
 from reviewboard.diffviewer.chunk_generator import DiffChunkGenerator
 from reviewboard.scmtools.core import PRE_CREATION
 from reviewboard.testing import TestCase
 
 
-class DiffChunkGeneratorTests(TestCase):
+class DiffChunkGeneratorTests(SpyAgency, TestCase):
     """Unit tests for DiffChunkGenerator."""
 
     fixtures = ['test_scmtools']
@@ -311,6 +313,54 @@ class DiffChunkGeneratorTests(TestCase):
 
         self.assertEqual(line_counts, self.filediff.get_line_counts())
 
+    def test_get_chunk_index(self):
+        """Testing DiffChunkGenerator.get_chunk_index"""
+        self.filediff.source_revision = PRE_CREATION
+        self.filediff.diff = (
+            b'--- README\n'
+            b'+++ README\n'
+            b'@@ -0,0 +1,3 @@\n'
+            b'+line 1\n'
+            b'+line 2\n'
+            b'+line 3\n'
+        )
+
+        index = self.generator.get_chunk_index()
+        self.assertEqual(len(index), 1)
+        self.assertEqual(index.get_last_line_number(), 3)
+
+        # The index should now be loaded from the cache.
+        self.spy_on(self.generator.get_chunks)
+
+        index = self.generator.get_chunk_index()
+        self.assertEqual(index.get_last_line_number(), 3)
+        self.assertFalse(self.generator.get_chunks.called)
+
+    def test_get_chunks_in_range(self):
+        """Testing DiffChunkGenerator.get_chunks_in_range"""
+        self.filediff.source_revision = PRE_CREATION
+        self.filediff.diff = (
+            b'--- README\n'
+            b'+++ README\n'
+            b'@@ -0,0 +1,3 @@\n'
+            b'+line 1\n'
+            b'+line 2\n'
+            b'+line 3\n'
+        )
+
+        chunks = self.generator.get_chunks_in_range(2, 2)
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0]['index'], 0)
+        self.assertEqual(chunks[0]['numlines'], 2)
+        self.assertEqual(chunks[0]['change'], 'insert')
+        self.assertEqual([line[0] for line in chunks[0]['lines']], [2, 3])
+
+        # The index and chunk should now be loaded from the cache.
+        self.spy_on(self.generator.get_chunks)
+
+        self.assertEqual(self.generator.get_chunks_in_range(2, 2), chunks)
+        self.assertFalse(self.generator.get_chunks.called)
+
     def _make_delete_recreate_commits(self):
         """Finalize and return commits for a delete/re-create test.
 
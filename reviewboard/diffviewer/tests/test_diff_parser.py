@@ -1,8 +1,14 @@
 from __future__ import unicode_literals
 
+import io
+import mmap
+import tempfile
+
 from djblets.testing.decorators import add_fixtures
 
-from reviewboard.diffviewer.parser import DiffParser
+from reviewboard.diffviewer.diffutils import split_line_endings
+from reviewboard.diffviewer.models import DiffSet
+from reviewboard.diffviewer.parser import DiffLines, DiffParser
 from reviewboard.testing import TestCase
 
 
@@ -51,6 +57,129 @@ class DiffParserTest(TestCase):
         self.assertEqual(files[0].insert_count, 3)
         self.assertEqual(files[0].delete_count, 4)
 
+    def test_iter_files(self):
+        """Testing DiffParser.iter_files"""
+        diff = (
+            b'preamble\n'
+            b'--- README  123\n'
+            b'+++ README  (new)\n'
+            b'@@ -1,1 +1,1 @@\n'
+            b'-blah\n'
+            b'+blah!\n'
+        )
+        diff2 = (
+            b'--- README2  123\n'
+            b'+++ README2  (new)\n'
+            b'@@ -1,1 +1,1 @@\n'
+            b'-blah\n'
+            b'+blah?\n'
+        )
+        parser = DiffParser(diff + diff2)
+        files = parser.iter_files()
+
+        parsed_file = next(files)
+        self.assertEqual(parsed_file.orig_filename, b'README')
+        self.assertEqual(parsed_file.data, diff)
+
+        parsed_file = next(files)
+        self.assertEqual(parsed_file.orig_filename, b'README2')
+        self.assertEqual(parsed_file.data, diff2)
+
+        with self.assertRaises(StopIteration):
+            next(files)
+
+    def test_parse_with_memoryview(self):
+        """Testing DiffParser.parse with a memoryview"""
+        diff = (
+            b'preamble\r\n'
+            b'--- README  123\r\n'
+            b'+++ README  (new)\r\n'
+            b'@@ -1,1 +1,1 @@\r\n'
+            b'-blah\r\n'
+            b'+blah!\n'
+            b'--- README2  123\n'
+            b'+++ README2  (new)\n'
+            b'@@ -1,1 +1,1 @@\n'
+            b'-blah\n'
+            b'+blah?'
+        )
+        parser = DiffParser(memoryview(diff))
+        self.assertIsInstance(parser.lines, DiffLines)
+
+        files = parser.parse()
+        expected_files = DiffParser(diff).parse()
+
+        self.assertEqual(len(files), 2)
+        self.assertEqual([f.data for f in files],
+                         [f.data for f in expected_files])
+        self.assertEqual([f.insert_count for f in files], [1, 1])
+        self.assertEqual([f.delete_count for f in files], [1, 1])
+        self.assertEqual(
+            files[1].data,
+            b'--- README2  123\n'
+            b'+++ README2  (new)\n'
+            b'@@ -1,1 +1,1 @@\n'
+            b'-blah\n'
+            b'+blah?\n')
+
+    def test_parse_with_file(self):
+        """Testing DiffParser.parse with file-like objects"""
+        diff = (
+            b'--- README  123\n'
+            b'+++ README  (new)\n'
+            b'@@ -1,1 +1,1 @@\n'
+            b'-blah\n'
+            b'+blah!\n'
+        )
+
+        files = DiffParser(io.BytesIO(diff)).parse()
+        self.assertEqual(len(files), 1)
+        self.assertEqual(files[0].data, diff)
+
+        with tempfile.TemporaryFile() as fp:
+            fp.write(diff)
+            fp.flush()
+
+            with DiffParser(fp) as parser:
+                files = parser.parse()
+                self.assertEqual(len(files), 1)
+                self.assertEqual(files[0].data, diff)
+
+        with tempfile.TemporaryFile() as fp:
+            with DiffParser(fp) as parser:
+                self.assertEqual(parser.parse(), [])
+
+    def test_close(self):
+        """Testing DiffParser.close with a memory-mapped file"""
+        diff = (
+            b'--- README  123\n'
+            b'+++ README  (new)\n'
+            b'@@ -1,1 +1,1 @@\n'
+            b'-blah\n'
+            b'+blah!\n'
+        )
+
+        with tempfile.TemporaryFile() as fp:
+            fp.write(diff)
+            fp.flush()
+
+            parser = DiffParser(fp)
+            mapped_data = parser.data
+            self.assertIsInstance(mapped_data, mmap.mmap)
+
+            parser.close()
+
+            with self.assertRaises(ValueError):
+                mapped_data[:1]
+
+            # Closing again is harmless.
+            parser.close()
+
+    def test_parse_with_unicode(self):
+        """Testing DiffParser with Unicode data"""
+        with self.assertRaises(TypeError):
+            DiffParser('--- README  123\n')
+
     @add_fixtures(['test_scmtools'])
     def test_raw_diff_with_diffset(self):
         """Testing DiffParser.raw_diff with DiffSet"""
@@ -206,3 +335,75 @@ class DiffParserTest(TestCase):
 
         parser = DiffParser(b'')
         self.assertEqual(parser.raw_diff(commit1), commit1_diff)
+
+    @add_fixtures(['test_scmtools'])
+    def test_iter_raw_diff_in_batches(self):
+        """Testing DiffParser.iter_raw_diff with FileDiffs spanning batches"""
+        repository = self.create_repository(tool_name='Test')
+        diffset = self.create_diffset(repository=repository)
+        diffs = []
+
+        for i in range(5):
+            # Large, repetitive diffs will be stored compressed.
+            diff = (
+                b'--- README%d\n'
+                b'+++ README%d\n'
+                b'@@ -1,1 +1,1000 @@\n'
+                % (i, i)
+            ) + b'+Hello, world!\n' * 1000
+
+            self.create_filediff(diffset=diffset,
+                                 source_file='README%d' % i,
+                                 dest_file='README%d' % i,
+                                 diff=diff)
+            diffs.append(diff)
+
+        self.assertTrue(
+            diffset.files.filter(diff_hash__compression='B').exists())
+
+        diffset = DiffSet.objects.get(pk=diffset.pk)
+        parser = DiffParser(b'')
+
+        with self.assertNumQueries(4):
+            blocks = list(parser.iter_raw_diff(diffset, batch_size=2))
+
+        self.assertEqual(b''.join(blocks), b''.join(diffs))
+
+
+class DiffLinesTests(TestCase):
+    """Unit tests for reviewboard.diffviewer.parser.DiffLines."""
+
+    def test_lines(self):
+        """Testing DiffLines matches split_line_endings"""
+        for data in (b'',
+                     b'\n',
+                     b'line',
+                     b'line1\nline2\n',
+                     b'line1\r\nline2\rline3\r\r\nline4\n\nline5',
+                     b'\x0cform feed\n'):
+            lines = DiffLines(memoryview(data))
+            expected = split_line_endings(data)
+
+            self.assertEqual(len(lines), len(expected))
+            self.assertEqual(list(lines), expected)
+            self.assertEqual(lines[1:3], expected[1:3])
+
+            if expected:
+                self.assertEqual(lines[-1], expected[-1])
+
+    def test_get_data_ranges(self):
+        """Testing DiffLines.get_data_ranges"""
+        data = b'line1\nline2\nline3'
+        lines = DiffLines(data)
+
+        self.assertEqual(lines.get_data_ranges(0, 2), [(0, 12)])
+        self.assertEqual(lines.get_data_ranges(1, 3), [(6, 17), b'\n'])
+        self.assertEqual(lines.get_data_ranges(2, 2), [])
+
+    def test_get_data_ranges_with_carriage_returns(self):
+        """Testing DiffLines.get_data_ranges with carriage returns"""
+        data = b'line1\r\nline2\nline3\r'
+        lines = DiffLines(data)
+
+        self.assertEqual(lines.get_data_ranges(0, 3),
+                         [(0, 5), b'\n', (7, 13), (13, 18), b'\n'])
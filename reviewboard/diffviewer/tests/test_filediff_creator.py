@@ -3,13 +3,14 @@
 from __future__ import unicode_literals
 
 from django.utils.timezone import now
+from kgb import SpyAgency
 
 from reviewboard.diffviewer.filediff_creator import create_filediffs
-from reviewboard.diffviewer.models import DiffCommit, DiffSet
+from reviewboard.diffviewer.models import DiffCommit, DiffSet, FileDiff
 from reviewboard.testing import TestCase
 
 
-class FileDiffCreatorTests(TestCase):
+class FileDiffCreatorTests(SpyAgency, TestCase):
     """Tests for reviewboard.diffviewer.filediff_creator."""
 
     fixtures = ['test_scmtools']
@@ -93,3 +94,41 @@ class FileDiffCreatorTests(TestCase):
 
         self.assertEqual(diffset.files.count(), 2)
         self.assertEqual(commits[1].files.count(), 1)
+
+    def test_create_filediffs_with_batch_size(self):
+        """Testing create_filediffs() saves FileDiffs in batches"""
+        repository = self.create_repository()
+        diffset = self.create_diffset(repository=repository)
+        diff = (self.DEFAULT_GIT_FILEDIFF_DATA_DIFF +
+                self.DEFAULT_GIT_README_DIFF)
+
+        self.spy_on(FileDiff.objects.bulk_create)
+
+        filediffs = create_filediffs(
+            diff,
+            None,
+            repository=repository,
+            basedir='/',
+            base_commit_id='0' * 40,
+            diffset=diffset,
+            check_existence=False,
+            batch_size=1)
+
+        self.assertEqual(len(filediffs), 2)
+        self.assertEqual(len(FileDiff.objects.bulk_create.calls), 2)
+
+        filediffs = list(diffset.files.order_by('source_file'))
+        self.assertEqual(len(filediffs), 2)
+
+        self.assertEqual(filediffs[0].source_file, 'README')
+        self.assertEqual(filediffs[0].diff,
+                         self.DEFAULT_GIT_FILEDIFF_DATA_DIFF)
+        self.assertEqual(filediffs[0].get_line_counts()['raw_insert_count'],
+                         1)
+        self.assertEqual(filediffs[0].diff_hash.insert_count, 1)
+
+        self.assertEqual(filediffs[1].source_file, 'readme')
+        self.assertEqual(filediffs[1].diff, self.DEFAULT_GIT_README_DIFF)
+        self.assertEqual(filediffs[1].get_line_counts()['raw_insert_count'],
+                         2)
+        self.assertEqual(filediffs[1].diff_hash.insert_count, 2)
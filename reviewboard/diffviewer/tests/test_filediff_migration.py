@@ -323,3 +323,85 @@ class FileDiffMigrationTests(TestCase):
         self.assertEqual(filediff2.parent_diff64, b'')
         self.assertEqual(filediff1.parent_diff_hash.content, self.parent_diff)
         self.assertEqual(filediff2.parent_diff_hash.content, self.parent_diff)
+
+    def test_needing_migration(self):
+        """Testing FileDiffManager.needing_migration"""
+        self.assertFalse(FileDiff.objects.needing_migration().exists())
+
+        self._create_filediff(pk=5, diff64=self.DEFAULT_GIT_FILEDIFF_DATA_DIFF)
+        self._create_filediff(
+            pk=27,
+            legacy_parent_diff_hash=LegacyFileDiffData.objects.create(
+                binary_hash='abc123',
+                binary=Base64DecodedValue(self.parent_diff)))
+
+        # Migrated FileDiffs aren't included.
+        self._create_filediff(
+            pk=40,
+            diff_hash=RawFileDiffData.objects.get_or_create_from_data(
+                self.DEFAULT_GIT_FILEDIFF_DATA_DIFF)[0])
+
+        self.assertEqual(
+            list(FileDiff.objects.needing_migration()
+                 .order_by('pk')
+                 .values_list('pk', flat=True)),
+            [5, 27])
+
+    def test_migrate_chunk(self):
+        """Testing FileDiffManager.migrate_chunk"""
+        legacy = LegacyFileDiffData.objects.create(
+            binary_hash='abc123',
+            binary=Base64DecodedValue(self.DEFAULT_GIT_FILEDIFF_DATA_DIFF))
+        LegacyFileDiffData.objects.create(
+            binary_hash='def456',
+            binary=Base64DecodedValue(self.parent_diff))
+
+        filediff1 = self._create_filediff(
+            pk=5,
+            diff64=self.DEFAULT_GIT_FILEDIFF_DATA_DIFF)
+        filediff2 = self._create_filediff(pk=12, legacy_diff_hash=legacy)
+        filediff3 = self._create_filediff(pk=25, legacy_diff_hash=legacy)
+
+        info = FileDiff.objects.migrate_chunk(10, 20)
+
+        self.assertEqual(info['diffs_migrated'], 1)
+
+        # The legacy data is converted for all FileDiffs using it.
+        filediff2 = FileDiff.objects.get(pk=filediff2.pk)
+        filediff3 = FileDiff.objects.get(pk=filediff3.pk)
+        self.assertIsNone(filediff2.legacy_diff_hash_id)
+        self.assertIsNone(filediff3.legacy_diff_hash_id)
+        self.assertEqual(filediff2.diff_hash.content,
+                         self.DEFAULT_GIT_FILEDIFF_DATA_DIFF)
+        self.assertEqual(filediff3.diff_hash_id, filediff2.diff_hash_id)
+
+        # FileDiffs outside of the range and unreferenced legacy data are
+        # left alone.
+        self.assertEqual(FileDiff.objects.unmigrated().get(), filediff1)
+        self.assertEqual(
+            list(LegacyFileDiffData.objects.values_list('pk', flat=True)),
+            ['def456'])
+
+        info = FileDiff.objects.migrate_chunk(0, 10)
+
+        self.assertEqual(info['diffs_migrated'], 1)
+        self.assertFalse(FileDiff.objects.unmigrated().exists())
+
+    def _create_filediff(self, **kwargs):
+        """Create a FileDiff for migration tests.
+
+        Args:
+            **kwargs (dict):
+                Fields to set on the FileDiff.
+
+        Returns:
+            reviewboard.diffviewer.models.filediff.FileDiff:
+            The new FileDiff.
+        """
+        kwargs.setdefault('diff64', b'')
+        kwargs.setdefault('parent_diff64', b'')
+
+        return FileDiff.objects.create(source_file='README',
+                                       dest_file='README',
+                                       diffset=self.filediff.diffset,
+                                       **kwargs)
@@ -4,7 +4,10 @@ from django.contrib import admin
 from django.utils.translation import ugettext_lazy as _
 
 from reviewboard.notifications.forms import WebHookTargetForm
-from reviewboard.notifications.models import WebHookTarget
+from reviewboard.notifications.models import (QueuedEmail,
+                                              WebHookDelivery,
+                                              WebHookTarget)
+from reviewboard.notifications.webhooks import retry_webhook_deliveries
 
 
 class WebHookTargetAdmin(admin.ModelAdmin):
@@ -40,4 +43,50 @@ class WebHookTargetAdmin(admin.ModelAdmin):
     )
 
 
+class WebHookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('event', 'target', 'status', 'attempts',
+                    'response_code', 'timestamp', 'last_attempt_time')
+    list_filter = ('status', 'event')
+    raw_id_fields = ('target',)
+    readonly_fields = ('target', 'event', 'content_type', 'body',
+                       'signature', 'status', 'attempts', 'timestamp',
+                       'next_attempt_time', 'last_attempt_time',
+                       'response_code', 'last_error')
+    actions = ['retry_deliveries']
+
+    def has_add_permission(self, request):
+        return False
+
+    def retry_deliveries(self, request, queryset):
+        """Queue the selected deliveries to be sent again.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            queryset (django.db.models.query.QuerySet):
+                The selected deliveries.
+        """
+        retry_webhook_deliveries(queryset)
+
+    retry_deliveries.short_description = \
+        _('Retry the selected webhook deliveries')
+
+
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'timestamp',
+                    'last_attempt_time')
+    list_filter = ('status',)
+    search_fields = ('subject', 'recipients')
+    exclude = ('message_data',)
+    readonly_fields = ('subject', 'recipients', 'status', 'attempts',
+                       'timestamp', 'next_attempt_time', 'last_attempt_time',
+                       'last_error')
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(QueuedEmail, QueuedEmailAdmin)
 admin.site.register(WebHookTarget, WebHookTargetAdmin)
+admin.site.register(WebHookDelivery, WebHookDeliveryAdmin)
@@ -313,7 +313,9 @@ def prepare_reply_published_mail(user, reply, review, review_request):
     }
 
     extra_context['comment_entries'] = build_diff_comment_fragments(
-        reply.comments.order_by('filediff', 'first_line'),
+        (reply.comments
+         .select_related('filediff__diffset', 'interfilediff__diffset')
+         .order_by('filediff', 'first_line')),
         extra_context,
         'notifications/email_diff_comment_fragment.html')[1]
 
@@ -361,8 +363,10 @@ def prepare_review_published_mail(user, review, review_request, request,
     """
     from reviewboard.reviews.views import build_diff_comment_fragments
 
-    review.ordered_comments = review.comments.order_by('filediff',
-                                                       'first_line')
+    review.ordered_comments = (
+        review.comments
+        .select_related('filediff__diffset', 'interfilediff__diffset')
+        .order_by('filediff', 'first_line'))
     has_issues = (review.ship_it and
                   review.has_comments(only_issues=True))
     extra_context = {
@@ -0,0 +1,337 @@
+"""Background sending of queued e-mail messages."""
+
+from __future__ import unicode_literals
+
+import logging
+import re
+import time
+from datetime import timedelta
+from email.message import Message
+from email.parser import HeaderParser
+
+from django.core.mail import EmailMessage as DjangoEmailMessage, get_connection
+from django.db.models import F
+from django.utils import six, timezone
+from djblets.siteconfig.models import SiteConfiguration
+
+from reviewboard.admin.background_worker import BackgroundWorker
+from reviewboard.notifications.models import QueuedEmail
+
+
+class _RenderedMIMEMessage(Message):
+    """A MIME message that was rendered before it was queued.
+
+    The headers are parsed so they can be inspected, but the message is
+    always sent as it was rendered.
+    """
+
+    def __init__(self, data):
+        """Initialize the message.
+
+        Args:
+            data (bytes):
+                The rendered MIME data.
+        """
+        Message.__init__(self)
+
+        self._rendered_data = data
+
+        headers = HeaderParser().parsestr(
+            data.decode('utf-8', 'replace'),
+            headersonly=True)
+
+        for name, value in headers.items():
+            self[name] = value
+
+    def as_bytes(self, unixfrom=False, policy=None, linesep='\n'):
+        """Return the rendered message.
+
+        Args:
+            unixfrom (bool, optional):
+                Unused.
+
+            policy (email.policy.Policy, optional):
+                Unused.
+
+            linesep (unicode, optional):
+                The line separator to use.
+
+        Returns:
+            bytes:
+            The rendered message.
+        """
+        return re.sub(br'\r?\n', linesep.encode('ascii'), self._rendered_data)
+
+    def as_string(self, *args, **kwargs):
+        """Return the rendered message as a native string.
+
+        Args:
+            *args (tuple):
+                Unused positional arguments.
+
+            **kwargs (dict):
+                Unused keyword arguments.
+
+        Returns:
+            str:
+            The rendered message.
+        """
+        if six.PY2:
+            return self._rendered_data
+        else:
+            return self._rendered_data.decode('utf-8', 'surrogateescape')
+
+
+class _QueuedEmailMessage(DjangoEmailMessage):
+    """An e-mail message rebuilt from a queued e-mail.
+
+    This sends the stored MIME data to the stored envelope addresses through
+    any e-mail backend.
+    """
+
+    def __init__(self, queued_email):
+        """Initialize the message.
+
+        Args:
+            queued_email (reviewboard.notifications.models.QueuedEmail):
+                The queued e-mail.
+        """
+        super(_QueuedEmailMessage, self).__init__(
+            subject=queued_email.subject,
+            from_email=queued_email.from_email,
+            to=queued_email.get_recipients())
+
+        self._mime_message = _RenderedMIMEMessage(
+            bytes(queued_email.message_data))
+
+    def message(self):
+        """Return the rendered MIME message.
+
+        Returns:
+            email.message.Message:
+            The message.
+        """
+        return self._mime_message
+
+
+def queue_email(message):
+    """Queue an e-mail message to be sent in the background.
+
+    The message is rendered immediately, so that its ``message_id`` is
+    known (and can be recorded by the caller) before it's sent. Only the
+    rendered MIME data and envelope addresses are stored.
+
+    Args:
+        message (reviewboard.notifications.email.message.EmailMessage):
+            The message to queue.
+
+    Returns:
+        reviewboard.notifications.models.QueuedEmail:
+        The queued message.
+    """
+    mime_message = message.message()
+
+    # Django's messages provide as_bytes(), but Python 2's as_string()
+    # already returns bytes.
+    if hasattr(mime_message, 'as_bytes'):
+        message_data = mime_message.as_bytes()
+    else:
+        message_data = mime_message.as_string()
+
+    queued_email = QueuedEmail.objects.create(
+        subject=message.subject,
+        from_email=message.from_email,
+        recipients='\n'.join(message.recipients()),
+        message_data=message_data)
+
+    get_email_outbox_worker().wake()
+
+    return queued_email
+
+
+def send_queued_emails():
+    """Send a batch of queued e-mail messages that are due.
+
+    Up to ``mail_send_batch_size`` messages are sent over a single
+    connection to the mail server, no faster than ``mail_send_rate_limit``
+    messages per second (if set). Messages that fail to send are retried
+    later with an exponential backoff, based on the ``mail_send_retry_delay``
+    and ``mail_send_max_attempts`` settings.
+
+    Returns:
+        tuple:
+        A 2-tuple containing:
+
+        1. The number of messages that were due (up to the batch size).
+        2. The number of messages that were sent.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+    rate_limit = siteconfig.get('mail_send_rate_limit')
+    batch_size = siteconfig.get('mail_send_batch_size')
+    queued_emails = list(QueuedEmail.objects.get_due()[:batch_size])
+
+    if not queued_emails:
+        return 0, 0
+
+    if rate_limit > 0:
+        min_interval = 1.0 / rate_limit
+    else:
+        min_interval = 0
+
+    num_sent = 0
+    last_send_time = None
+    connection = get_connection()
+
+    try:
+        connection.open()
+    except Exception as e:
+        logging.exception('Could not connect to the mail server to send '
+                          'queued e-mail: %s',
+                          e)
+        return len(queued_emails), 0
+
+    try:
+        for queued_email in queued_emails:
+            if not _claim_queued_email(queued_email):
+                continue
+
+            if min_interval and last_send_time is not None:
+                time.sleep(max(0, last_send_time + min_interval -
+                               time.time()))
+
+            last_send_time = time.time()
+
+            try:
+                connection.send_messages([_QueuedEmailMessage(queued_email)])
+            except Exception as e:
+                logging.exception('Could not send queued e-mail message '
+                                  '%s with subject "%s" to "%s": %s',
+                                  queued_email.pk, queued_email.subject,
+                                  queued_email.recipients, e)
+                _record_failure(queued_email, e, siteconfig)
+
+                # The connection may be in a bad state. Start a new one for
+                # the rest of the batch.
+                connection.close()
+                connection.open()
+            else:
+                queued_email.status = QueuedEmail.STATUS_SENT
+                queued_email.next_attempt_time = None
+                queued_email.last_error = ''
+                queued_email.save(update_fields=('status',
+                                                 'next_attempt_time',
+                                                 'last_error'))
+                num_sent += 1
+    except Exception as e:
+        logging.exception('Could not reconnect to the mail server to send '
+                          'queued e-mail: %s',
+                          e)
+    finally:
+        connection.close()
+
+    return len(queued_emails), num_sent
+
+
+def _claim_queued_email(queued_email):
+    """Claim a send attempt for a queued message.
+
+    This ensures that other workers (or processes) don't send the same
+    message at the same time.
+
+    Args:
+        queued_email (reviewboard.notifications.models.QueuedEmail):
+            The message to claim.
+
+    Returns:
+        bool:
+        Whether the attempt was claimed.
+    """
+    now = timezone.now()
+    claimed = (
+        QueuedEmail.objects
+        .filter(pk=queued_email.pk,
+                status=QueuedEmail.STATUS_PENDING,
+                attempts=queued_email.attempts)
+        .update(attempts=F('attempts') + 1,
+                last_attempt_time=now)
+    )
+
+    if claimed:
+        queued_email.attempts += 1
+        queued_email.last_attempt_time = now
+
+    return bool(claimed)
+
+
+def _record_failure(queued_email, error, siteconfig):
+    """Record a failed send attempt, scheduling a retry if possible.
+
+    Args:
+        queued_email (reviewboard.notifications.models.QueuedEmail):
+            The message that failed to send.
+
+        error (Exception):
+            The error that occurred.
+
+        siteconfig (djblets.siteconfig.models.SiteConfiguration):
+            The site configuration.
+    """
+    queued_email.last_error = six.text_type(error) or type(error).__name__
+
+    if queued_email.attempts < siteconfig.get('mail_send_max_attempts'):
+        retry_delay = (siteconfig.get('mail_send_retry_delay') *
+                       2 ** (queued_email.attempts - 1))
+        queued_email.next_attempt_time = \
+            queued_email.last_attempt_time + timedelta(seconds=retry_delay)
+    else:
+        queued_email.status = QueuedEmail.STATUS_FAILED
+        queued_email.next_attempt_time = None
+
+    queued_email.save(update_fields=('status', 'next_attempt_time',
+                                     'last_error'))
+
+
+class EmailOutboxWorker(BackgroundWorker):
+    """A background thread for sending queued e-mail messages.
+
+    The worker wakes up when a message is queued (and periodically, to pick
+    up retries and messages queued by other processes), and sends batches of
+    due messages until none are left.
+
+    Messages that are pending when the process exits are left in the
+    database, and can be sent by the :command:`send-queued-mail` management
+    command.
+    """
+
+    thread_name = 'email-outbox'
+
+    #: The number of seconds between checks for due messages.
+    poll_interval = 30
+
+    def process(self):
+        """Send due messages until none are left.
+
+        Messages are sent in batches of ``mail_send_batch_size``.
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        batch_size = siteconfig.get('mail_send_batch_size')
+
+        # Keep going while there may be more due messages.
+        while True:
+            num_due, num_sent = send_queued_emails()
+
+            if num_due < batch_size or num_sent == 0:
+                break
+
+
+_outbox_worker = EmailOutboxWorker()
+
+
+def get_email_outbox_worker():
+    """Return the e-mail outbox worker for this process.
+
+    Returns:
+        EmailOutboxWorker:
+        The worker.
+    """
+    return _outbox_worker
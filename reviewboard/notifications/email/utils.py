@@ -3,17 +3,33 @@
 from __future__ import unicode_literals
 
 import logging
+from collections import defaultdict
 
 from django.contrib.auth.models import User
 from django.db.models import Q
 from djblets.mail.utils import (build_email_address,
                                 build_email_address_for_user)
+from djblets.siteconfig.models import SiteConfiguration
 
-from reviewboard.accounts.models import ReviewRequestVisit
+from reviewboard.accounts.models import Profile, ReviewRequestVisit
 from reviewboard.changedescs.models import ChangeDescription
+from reviewboard.notifications.email.outbox import queue_email
 from reviewboard.reviews.models import Group
 
 
+#: SQL for checking whether a user is a member or administrator of a LocalSite.
+_LOCAL_SITE_MEMBER_SQL = """
+    (EXISTS(SELECT 1
+              FROM site_localsite_users
+             WHERE site_localsite_users.localsite_id = %(local_site_id)s
+               AND site_localsite_users.user_id = %(user_id_column)s) OR
+     EXISTS(SELECT 1
+              FROM site_localsite_admins
+             WHERE site_localsite_admins.localsite_id = %(local_site_id)s
+               AND site_localsite_admins.user_id = %(user_id_column)s))
+"""
+
+
 def build_recipients(user, review_request, extra_recipients=None,
                      limit_recipients_to=None):
     """Build the recipient sets for an e-mail.
@@ -55,44 +71,14 @@ def build_recipients(user, review_request, extra_recipients=None,
     recipients = set()
     to_field = set()
 
-    local_site = review_request.local_site_id
+    local_site_id = review_request.local_site_id
     submitter = review_request.submitter
 
-    target_people = review_request.target_people.filter(is_active=True).extra(
-        select={
-            'visibility': """
-                SELECT accounts_reviewrequestvisit.visibility
-                  FROM accounts_reviewrequestvisit
-                 WHERE accounts_reviewrequestvisit.review_request_id =
-                       reviews_reviewrequest_target_people.reviewrequest_id
-                   AND accounts_reviewrequestvisit.user_id =
-                       reviews_reviewrequest_target_people.user_id
-            """
-        })
-
-    starred_users = User.objects.filter(
-        is_active=True,
-        profile__starred_review_requests=review_request,
-        profile__should_send_email=True)
-
-    local_site_q = Q()
-
-    if local_site:
-        # Filter out users who are on the reviewer list in some form or have
-        # starred the review request but are no longer part of the LocalSite.
-        local_site_q = (Q(local_site=local_site) |
-                        Q(local_site_admins=local_site))
-
-        target_people = target_people.filter(local_site_q)
-
-        starred_users = starred_users.filter(local_site_q)
-
-    if not extra_recipients:
-        extra_recipients = User.objects.none()
-
     if user.should_send_email():
         recipients.add(user)
 
+    prev_submitter_pk = None
+
     try:
         changedesc = review_request.changedescs.latest()
     except ChangeDescription.DoesNotExist:
@@ -106,65 +92,125 @@ def build_recipients(user, review_request, extra_recipients=None,
 
             if submitter_info:
                 prev_submitter_pk = submitter_info['old'][0][2]
-                prev_submitter = User.objects.get(pk=prev_submitter_pk)
-
-                if (prev_submitter.is_active and
-                    prev_submitter.should_send_email()):
-                    recipients.add(prev_submitter)
 
     if submitter.is_active and submitter.should_send_email():
         recipients.add(submitter)
 
-    recipients.update(starred_users)
-
-    def _filter_recipients(to_filter):
-        """Filter the given recipients.
-
-        All groups will be added to the resulting recipients. Only users with a
-        matching local site will be added to the resulting recipients.
-
-        Args:
-            to_filter (list):
-                A list of recipients as
-                :py:class:`Users <django.contrib.auth.models.User>` and
-                :py:class:`Groups <reviewboard.reviews.models.Group>`.
-        """
-        pks = set()
-
-        for recipient in to_filter:
-            if isinstance(recipient, User):
-                pks.add(recipient.pk)
-            elif isinstance(recipient, Group):
-                recipients.add(recipient)
-            else:
-                logging.error(
-                    'Unexpected e-mail recipient %r; expected '
-                    'django.contrib.auth.models.User or '
-                    'reviewboard.reviews.models.Group.',
-                    recipient)
-        if pks:
-            filtered_users = User.objects.filter(
-                Q(is_active=True, pk__in=pks),
-                local_site_q)
-
-            recipients.update(
-                recipient
-                for recipient in filtered_users.select_related('profile')
-                if recipient.should_send_email()
-            )
-
     if limit_recipients_to is not None:
-        _filter_recipients(limit_recipients_to)
+        explicit_recipients = limit_recipients_to
+        include_target_people = False
     else:
-        _filter_recipients(extra_recipients)
+        explicit_recipients = extra_recipients or []
+        include_target_people = True
 
-        to_field.update(
-            recipient
-            for recipient in target_people.select_related('profile')
-            if (recipient.should_send_email() and
-                recipient.visibility != ReviewRequestVisit.MUTED)
-        )
+    # All groups will be added to the resulting recipients. Users will be
+    # fetched and filtered below, along with everyone else.
+    explicit_user_pks = set()
 
+    for recipient in explicit_recipients:
+        if isinstance(recipient, User):
+            explicit_user_pks.add(recipient.pk)
+        elif isinstance(recipient, Group):
+            recipients.add(recipient)
+        else:
+            logging.error(
+                'Unexpected e-mail recipient %r; expected '
+                'django.contrib.auth.models.User or '
+                'reviewboard.reviews.models.Group.',
+                recipient)
+
+    # Every other possible recipient (the previous submitter, users who have
+    # starred the review request, target people, and the explicit users) is
+    # fetched in a single query, along with the information needed to decide
+    # whether they should receive the e-mail.
+    target_people_table = review_request.target_people.through._meta.db_table
+    starred_table = \
+        Profile.starred_review_requests.through._meta.db_table
+
+    candidates_q = Q(pk__in=(
+        Profile.starred_review_requests.through.objects
+        .filter(reviewrequest=review_request.pk)
+        .values('profile__user')
+    ))
+
+    if include_target_people:
+        candidates_q |= Q(pk__in=(
+            review_request.target_people.through.objects
+            .filter(reviewrequest=review_request.pk)
+            .values('user')
+        ))
+
+    if explicit_user_pks:
+        candidates_q |= Q(pk__in=explicit_user_pks)
+
+    if prev_submitter_pk:
+        candidates_q |= Q(pk=prev_submitter_pk)
+
+    select = {
+        'is_target_person': """
+            EXISTS(SELECT 1
+                     FROM %(table)s
+                    WHERE %(table)s.reviewrequest_id = %(review_request_id)s
+                      AND %(table)s.user_id = auth_user.id)
+        """ % {
+            'review_request_id': review_request.pk,
+            'table': target_people_table,
+        },
+        'is_starred': """
+            EXISTS(SELECT 1
+                     FROM %(table)s
+                     JOIN accounts_profile
+                       ON accounts_profile.id = %(table)s.profile_id
+                    WHERE %(table)s.reviewrequest_id = %(review_request_id)s
+                      AND accounts_profile.user_id = auth_user.id)
+        """ % {
+            'review_request_id': review_request.pk,
+            'table': starred_table,
+        },
+        'visibility': """
+            SELECT accounts_reviewrequestvisit.visibility
+              FROM accounts_reviewrequestvisit
+             WHERE accounts_reviewrequestvisit.review_request_id =
+                   %s
+               AND accounts_reviewrequestvisit.user_id = auth_user.id
+        """ % review_request.pk,
+    }
+
+    if local_site_id:
+        # Users who are on the reviewer list in some form or have starred the
+        # review request but are no longer part of the LocalSite will be
+        # filtered out.
+        select['in_local_site'] = _LOCAL_SITE_MEMBER_SQL % {
+            'local_site_id': local_site_id,
+            'user_id_column': 'auth_user.id',
+        }
+
+    candidates = (
+        User.objects
+        .filter(candidates_q, is_active=True)
+        .select_related('profile')
+        .extra(select=select)
+    )
+
+    for candidate in candidates:
+        if not candidate.should_send_email():
+            continue
+
+        if candidate.pk == prev_submitter_pk:
+            recipients.add(candidate)
+
+        if local_site_id and not candidate.in_local_site:
+            continue
+
+        if candidate.is_starred or candidate.pk in explicit_user_pks:
+            recipients.add(candidate)
+
+        if (include_target_people and
+            candidate.is_target_person and
+            candidate.visibility != ReviewRequestVisit.MUTED):
+            to_field.add(candidate)
+
+    if include_target_people:
         recipients.update(to_field)
         recipients.update(review_request.target_groups.all())
 
@@ -189,73 +235,143 @@ def get_email_addresses_for_group(group, review_request_id=None):
             The review group to build the e-mail addresses for.
 
         review_request_id (int, optional):
-
+            The ID of the review request the e-mail is for. If provided,
+            members who have muted the review request will be excluded.
 
     Returns:
         list of unicode:
         A list of properly formatted e-mail addresses for all users in the
         review group.
     """
-    addresses = []
-
-    if group.mailing_list:
-        if ',' not in group.mailing_list:
-            # The mailing list field has only one e-mail address in it,
-            # so we can just use that and the group's display name.
-            addresses = [build_email_address(full_name=group.display_name,
-                                             email=group.mailing_list)]
-        else:
-            # The mailing list field has multiple e-mail addresses in it.
-            # We don't know which one should have the group's display name
-            # attached to it, so just return their custom list as-is.
-            addresses = group.mailing_list.split(',')
+    return get_email_addresses_for_groups([group], review_request_id)[0]
+
 
-    if not (group.mailing_list and group.email_list_only):
-        users_q = Q(is_active=True)
+def get_email_addresses_for_groups(groups, review_request_id=None):
+    """Build lists of e-mail addresses for several groups at once.
 
-        local_site = group.local_site
+    The members of all the groups are fetched in a single query, which only
+    returns the information needed to build their addresses.
 
-        if local_site:
-            users_q = users_q & (Q(local_site=local_site) |
-                                 Q(local_site_admins=local_site))
+    Args:
+        groups (list of reviewboard.reviews.models.Group):
+            The review groups to build the e-mail addresses for.
+
+        review_request_id (int, optional):
+            The ID of the review request the e-mail is for. If provided,
+            members who have muted the review request will be excluded.
 
-        users = group.users.filter(users_q).select_related('profile')
+    Returns:
+        list:
+        A list containing a list of properly formatted e-mail addresses for
+        each group, in the same order as ``groups``.
+    """
+    group_addresses = []
+    member_group_local_site_ids = {}
+
+    for group in groups:
+        addresses = []
+
+        if group.mailing_list:
+            if ',' not in group.mailing_list:
+                # The mailing list field has only one e-mail address in it,
+                # so we can just use that and the group's display name.
+                addresses = [build_email_address(
+                    full_name=group.display_name,
+                    email=group.mailing_list)]
+            else:
+                # The mailing list field has multiple e-mail addresses in it.
+                # We don't know which one should have the group's display
+                # name attached to it, so just return their custom list
+                # as-is.
+                addresses = group.mailing_list.split(',')
+
+        if (group.pk is not None and
+            not (group.mailing_list and group.email_list_only)):
+            member_group_local_site_ids[group.pk] = group.local_site_id
+
+        group_addresses.append(addresses)
+
+    if member_group_local_site_ids:
+        member_addresses = defaultdict(list)
+
+        select = {
+            # Users without a profile will have one created with the default
+            # (enabled) setting.
+            'should_send_email': """
+                SELECT accounts_profile.should_send_email
+                  FROM accounts_profile
+                 WHERE accounts_profile.user_id = reviews_group_users.user_id
+            """,
+            # Members of a group in a LocalSite must still be members or
+            # administrators of that LocalSite.
+            'in_local_site': _LOCAL_SITE_MEMBER_SQL % {
+                'local_site_id': """
+                    (SELECT reviews_group.local_site_id
+                       FROM reviews_group
+                      WHERE reviews_group.id = reviews_group_users.group_id)
+                """,
+                'user_id_column': 'reviews_group_users.user_id',
+            },
+            'visibility': 'NULL',
+        }
 
         if review_request_id:
-            users = users.extra(select={
-                'visibility': """
-                    SELECT accounts_reviewrequestvisit.visibility
-                      FROM accounts_reviewrequestvisit
-                     WHERE accounts_reviewrequestvisit.review_request_id =
-                           %s
-                       AND accounts_reviewrequestvisit.user_id =
-                           reviews_group_users.user_id
-                """ % review_request_id
-            })
-
-        addresses.extend([
-            build_email_address_for_user(u)
-            for u in users
-            if (u.should_send_email() and
-                (not review_request_id or
-                 u.visibility != ReviewRequestVisit.MUTED))
-        ])
+            select['visibility'] = """
+                SELECT accounts_reviewrequestvisit.visibility
+                  FROM accounts_reviewrequestvisit
+                 WHERE accounts_reviewrequestvisit.review_request_id =
+                       %s
+                   AND accounts_reviewrequestvisit.user_id =
+                       reviews_group_users.user_id
+            """ % review_request_id
+
+        members = (
+            Group.users.through.objects
+            .filter(group__in=list(member_group_local_site_ids),
+                    user__is_active=True)
+            .extra(select=select)
+            .values_list('group', 'user__first_name', 'user__last_name',
+                         'user__email', 'should_send_email', 'in_local_site',
+                         'visibility')
+        )
 
-    return addresses
+        for (group_id, first_name, last_name, email, should_send_email,
+             in_local_site, visibility) in members:
+            if ((should_send_email is None or should_send_email) and
+                (member_group_local_site_ids[group_id] is None or
+                 in_local_site) and
+                visibility != ReviewRequestVisit.MUTED):
+                member_addresses[group_id].append(build_email_address(
+                    full_name=('%s %s' % (first_name, last_name)).strip(),
+                    email=email))
+
+        for group, addresses in zip(groups, group_addresses):
+            if group.pk in member_group_local_site_ids:
+                addresses.extend(member_addresses[group.pk])
+
+    return group_addresses
 
 
 def recipients_to_addresses(recipients, review_request_id=None):
     """Return the set of e-mail addresses for the recipients.
 
+    The members of all groups in ``recipients`` are looked up together, so
+    the number of queries doesn't depend on the number of groups.
+
     Args:
         recipients (list):
             A list of :py:class:`Users <django.contrib.auth.models.User>` and
             :py:class:`Groups <reviewboard.reviews.models.Group>`.
 
+        review_request_id (int, optional):
+            The ID of the review request the e-mail is for. If provided,
+            group members who have muted the review request will be excluded.
+
     Returns:
         set: The e-mail addresses for all recipients.
     """
     addresses = set()
+    groups = []
 
     for recipient in recipients:
         assert isinstance(recipient, User) or isinstance(recipient, Group)
@@ -263,8 +379,12 @@ def recipients_to_addresses(recipients, review_request_id=None):
         if isinstance(recipient, User):
             addresses.add(build_email_address_for_user(recipient))
         else:
-            addresses.update(get_email_addresses_for_group(recipient,
-                                                           review_request_id))
+            groups.append(recipient)
+
+    if groups:
+        for group_addresses in get_email_addresses_for_groups(
+                groups, review_request_id):
+            addresses.update(group_addresses)
 
     return addresses
 
@@ -272,6 +392,10 @@ def recipients_to_addresses(recipients, review_request_id=None):
 def send_email(email_builder, **kwargs):
     """Attempt to send an e-mail, logging any exceptions that occur.
 
+    If the ``mail_send_in_background`` site configuration setting is enabled,
+    the message will be queued and sent by a background worker, rather than
+    sent immediately.
+
     Args:
         email_builder (callable):
             A function that generates an :py:class:`EmailMessage`.
@@ -284,15 +408,21 @@ def send_email(email_builder, **kwargs):
         A tuple of:
 
         * The message that was generated (:py:class`EmailMessage`).
-        * Whether or not the message was sent successfully (:py:class:`bool`).
+        * Whether or not the message was sent (or queued) successfully
+          (:py:class:`bool`).
     """
     message = email_builder(**kwargs)
 
     if message is None:
         return None, False
 
+    siteconfig = SiteConfiguration.objects.get_current()
+
     try:
-        message.send()
+        if siteconfig.get('mail_send_in_background'):
+            queue_email(message)
+        else:
+            message.send()
     except Exception:
         logging.exception(
             'Could not send e-mail message with subject "%s" from "%s" to '
@@ -0,0 +1,76 @@
+"""Management command to deliver queued webhooks."""
+
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.notifications.models import WebHookDelivery
+from reviewboard.notifications.webhooks import deliver_webhook
+
+
+class Command(BaseCommand):
+    """Management command to deliver queued webhooks.
+
+    This sends any pending webhook deliveries that are due, such as those
+    left over when a server process exited before delivering them. It can
+    also purge old delivery records. It's meant to be run periodically.
+    """
+
+    help = _('Delivers pending webhooks that are due, and optionally purges '
+             'old delivery records.')
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--purge-days',
+            type=int,
+            default=None,
+            dest='purge_days',
+            help=_('Delete delivered and failed records older than this '
+                   'many days.'))
+
+    def handle(self, **options):
+        """Handle the command.
+
+        Args:
+            **options (dict):
+                Options parsed on the command line.
+        """
+        num_delivered = 0
+        num_attempted = 0
+
+        for delivery in WebHookDelivery.objects.get_due():
+            num_attempted += 1
+
+            if deliver_webhook(delivery):
+                num_delivered += 1
+
+        self.stdout.write(
+            _('Delivered %(delivered)d of %(attempted)d pending webhooks.')
+            % {
+                'attempted': num_attempted,
+                'delivered': num_delivered,
+            })
+
+        purge_days = options.get('purge_days')
+
+        if purge_days is not None:
+            cutoff = timezone.now() - timedelta(days=purge_days)
+            q = WebHookDelivery.objects.filter(
+                timestamp__lt=cutoff,
+                status__in=(WebHookDelivery.STATUS_DELIVERED,
+                            WebHookDelivery.STATUS_FAILED))
+            num_purged = q.count()
+            q.delete()
+
+            self.stdout.write(_('Purged %d webhook delivery records.')
+                              % num_purged)
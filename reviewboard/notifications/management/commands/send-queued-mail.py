@@ -0,0 +1,81 @@
+"""Management command to send queued e-mail."""
+
+from __future__ import unicode_literals
+
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.translation import ugettext as _
+from djblets.siteconfig.models import SiteConfiguration
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.notifications.email.outbox import send_queued_emails
+from reviewboard.notifications.models import QueuedEmail
+
+
+class Command(BaseCommand):
+    """Management command to send queued e-mail.
+
+    This sends any queued e-mail messages that are due, such as those left
+    over when a server process exited before sending them. It can also purge
+    old records. It's meant to be run periodically.
+    """
+
+    help = _('Sends queued e-mail messages that are due, and optionally '
+             'purges old records.')
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--purge-days',
+            type=int,
+            default=None,
+            dest='purge_days',
+            help=_('Delete sent and failed records older than this many '
+                   'days.'))
+
+    def handle(self, **options):
+        """Handle the command.
+
+        Args:
+            **options (dict):
+                Options parsed on the command line.
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        batch_size = siteconfig.get('mail_send_batch_size')
+        total_due = 0
+        total_sent = 0
+
+        while True:
+            num_due, num_sent = send_queued_emails()
+            total_due += num_due
+            total_sent += num_sent
+
+            if num_due < batch_size or num_sent == 0:
+                break
+
+        self.stdout.write(
+            _('Sent %(sent)d of %(due)d queued e-mail messages.')
+            % {
+                'due': total_due,
+                'sent': total_sent,
+            })
+
+        purge_days = options.get('purge_days')
+
+        if purge_days is not None:
+            cutoff = timezone.now() - timedelta(days=purge_days)
+            q = QueuedEmail.objects.filter(
+                timestamp__lt=cutoff,
+                status__in=(QueuedEmail.STATUS_SENT,
+                            QueuedEmail.STATUS_FAILED))
+            num_purged = q.count()
+            q.delete()
+
+            self.stdout.write(_('Purged %d queued e-mail records.')
+                              % num_purged)
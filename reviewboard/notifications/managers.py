@@ -1,6 +1,11 @@
 from __future__ import unicode_literals
 
-from django.db.models import Manager, Q
+import threading
+from collections import defaultdict
+
+from django.db.models import Manager
+from django.utils import timezone
+from djblets.cache.synchronizer import GenerationSynchronizer
 
 
 class WebHookTargetManager(Manager):
@@ -8,28 +13,151 @@ class WebHookTargetManager(Manager):
 
     This provides a utility function for querying WebHookTargets for a
     given event.
+
+    Matching targets are looked up from an in-memory index of all enabled
+    targets. The index is shared across processes through a cache-backed
+    generation number, and is rebuilt after :py:meth:`clear_index` is called
+    (which happens whenever a target is saved or deleted, or its
+    repositories change).
     """
 
+    def __init__(self, *args, **kwargs):
+        """Initialize the manager.
+
+        Args:
+            *args (tuple):
+                Positional arguments to pass to the parent.
+
+            **kwargs (dict):
+                Keyword arguments to pass to the parent.
+        """
+        super(WebHookTargetManager, self).__init__(*args, **kwargs)
+
+        self._index = None
+        self._index_lock = threading.Lock()
+        self._index_sync = None
+
     def for_event(self, event, local_site_id=None, repository_id=None):
-        """Returns a list of matching webhook targets for the given event."""
+        """Return a list of matching webhook targets for the given event.
+
+        Args:
+            event (unicode):
+                The name of the event.
+
+            local_site_id (int, optional):
+                The ID of the Local Site the event happened on.
+
+            repository_id (int, optional):
+                The ID of the repository of the review request the event
+                happened on.
+
+        Returns:
+            list of reviewboard.notifications.models.WebHookTarget:
+            The matching targets. These are shared between calls, and must
+            not be modified.
+
+        Raises:
+            ValueError:
+                The event name was not valid.
+        """
         if event == self.model.ALL_EVENTS:
             raise ValueError('"%s" is not a valid event choice' % event)
 
-        q = Q(enabled=True) & Q(local_site=local_site_id)
+        key = (local_site_id, repository_id, event)
+
+        with self._index_lock:
+            index = self._get_index()
+
+            try:
+                return list(index['results'][key])
+            except KeyError:
+                pass
+
+            candidates = (
+                index['apply_to'][(local_site_id, self.model.APPLY_TO_ALL)] +
+                index['apply_to'][(local_site_id,
+                                   self.model.APPLY_TO_NO_REPOS
+                                   if repository_id is None
+                                   else repository_id)]
+            )
+
+            targets = sorted(
+                (
+                    target
+                    for target in candidates
+                    if (event in target.events or
+                        self.model.ALL_EVENTS in target.events)
+                ),
+                key=lambda target: target.pk)
+            index['results'][key] = targets
+
+            return list(targets)
+
+    def clear_index(self):
+        """Clear the index of targets used by :py:meth:`for_event`.
+
+        The index will be rebuilt (in this and all other processes) on the
+        next lookup.
+        """
+        with self._index_lock:
+            self._index = None
+            self._get_index_sync().mark_updated()
+
+    def _get_index_sync(self):
+        """Return the synchronizer for the index of targets.
+
+        The synchronizer is created the first time it's needed, rather than
+        when the manager is created, so that the cache isn't accessed while
+        models are still being loaded.
+
+        This must be called with the index lock held.
+
+        Returns:
+            djblets.cache.synchronizer.GenerationSynchronizer:
+            The synchronizer for the index.
+        """
+        if self._index_sync is None:
+            self._index_sync = GenerationSynchronizer('webhook-targets-index')
+
+        return self._index_sync
 
-        if repository_id is None:
-            q &= (Q(apply_to=self.model.APPLY_TO_ALL) |
-                  Q(apply_to=self.model.APPLY_TO_NO_REPOS))
-        else:
-            q &= (Q(apply_to=self.model.APPLY_TO_ALL) |
-                  (Q(apply_to=self.model.APPLY_TO_SELECTED_REPOS) &
-                   Q(repositories=repository_id)))
+    def _get_index(self):
+        """Return the index of targets, rebuilding it if needed.
 
-        return [
-            target
-            for target in self.filter(q)
-            if event in target.events or self.model.ALL_EVENTS in target.events
-        ]
+        This must be called with the index lock held.
+
+        Returns:
+            dict:
+            The index of targets.
+        """
+        index_sync = self._get_index_sync()
+
+        if self._index is not None and not index_sync.is_expired():
+            return self._index
+
+        index_sync.refresh()
+
+        # Targets are grouped by Local Site and what they apply to. For
+        # targets on selected repositories, the group key is the repository
+        # ID.
+        apply_to = defaultdict(list)
+
+        for target in self.filter(enabled=True).prefetch_related(
+                'repositories'):
+            local_site_id = target.local_site_id
+
+            if target.apply_to == self.model.APPLY_TO_SELECTED_REPOS:
+                for repository in target.repositories.all():
+                    apply_to[(local_site_id, repository.pk)].append(target)
+            else:
+                apply_to[(local_site_id, target.apply_to)].append(target)
+
+        self._index = {
+            'apply_to': apply_to,
+            'results': {},
+        }
+
+        return self._index
 
     def for_local_site(self, local_site=None):
         """Return a list of webhooks on the local site.
@@ -62,3 +190,51 @@ class WebHookTargetManager(Manager):
                 (user.is_authenticated() and
                  local_site and
                  local_site.is_mutable_by(user)))
+
+
+class QueuedItemManager(Manager):
+    """Manages models for items queued to be sent in the background.
+
+    This is used for models with ``status`` and ``next_attempt_time`` fields,
+    such as :py:class:`~reviewboard.notifications.models.QueuedEmail`.
+    """
+
+    def get_due(self, now=None):
+        """Return the pending items that are due for a send attempt.
+
+        Args:
+            now (datetime.datetime, optional):
+                The current time. Defaults to now.
+
+        Returns:
+            django.db.models.query.QuerySet:
+            The pending items, oldest first.
+        """
+        if now is None:
+            now = timezone.now()
+
+        return (
+            self.filter(status=self.model.STATUS_PENDING,
+                        next_attempt_time__lte=now)
+            .order_by('next_attempt_time', 'pk')
+        )
+
+
+class WebHookDeliveryManager(QueuedItemManager):
+    """Manages WebHookDelivery models."""
+
+    def get_due(self, now=None):
+        """Return the pending deliveries that are due for an attempt.
+
+        Args:
+            now (datetime.datetime, optional):
+                The current time. Defaults to now.
+
+        Returns:
+            django.db.models.query.QuerySet:
+            The pending deliveries, oldest first.
+        """
+        return (
+            super(WebHookDeliveryManager, self).get_due(now)
+            .select_related('target')
+        )
@@ -1,13 +1,16 @@
 from __future__ import unicode_literals
 
 from django.db import models
+from django.utils import timezone
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_lazy as _
-from djblets.db.fields import JSONField
+from djblets.db.fields import Base64Field, JSONField
 from djblets.util.compat.django.core.validators import URLValidator
 from multiselectfield import MultiSelectField
 
-from reviewboard.notifications.managers import WebHookTargetManager
+from reviewboard.notifications.managers import (QueuedItemManager,
+                                                WebHookDeliveryManager,
+                                                WebHookTargetManager)
 from reviewboard.scmtools.models import Repository
 from reviewboard.site.models import LocalSite
 
@@ -174,3 +177,170 @@ class WebHookTarget(models.Model):
         db_table = 'notifications_webhooktarget'
         verbose_name = _('Webhook')
         verbose_name_plural = _('Webhooks')
+
+
+@python_2_unicode_compatible
+class WebHookDelivery(models.Model):
+    """A queued delivery of a webhook payload to a target.
+
+    Payloads are stored when an event is dispatched, and are then delivered
+    by a pool of workers (or the :command:`deliver-webhooks` management
+    command). Failed deliveries are retried with an exponential backoff,
+    and the result of the last attempt is stored for display in the
+    administration UI.
+    """
+
+    STATUS_PENDING = 'P'
+    STATUS_DELIVERED = 'D'
+    STATUS_FAILED = 'F'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_DELIVERED, _('Delivered')),
+        (STATUS_FAILED, _('Failed')),
+    )
+
+    #: The target the payload is being delivered to.
+    target = models.ForeignKey(
+        WebHookTarget,
+        related_name='deliveries',
+        verbose_name=_('webhook'))
+
+    #: The name of the event that was dispatched.
+    event = models.CharField(_('event'), max_length=64)
+
+    #: The content type of the encoded payload.
+    content_type = models.CharField(_('content type'), max_length=40)
+
+    #: The encoded payload.
+    body = models.TextField(_('body'))
+
+    #: The HMAC signature of the payload, if the target has a secret.
+    signature = models.CharField(_('signature'), max_length=128, blank=True)
+
+    #: The delivery status.
+    status = models.CharField(
+        _('status'),
+        max_length=1,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        db_index=True)
+
+    #: The number of delivery attempts made so far.
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+
+    #: The time when the delivery was queued.
+    timestamp = models.DateTimeField(_('queued'), default=timezone.now)
+
+    #: The earliest time when the next delivery attempt can be made.
+    next_attempt_time = models.DateTimeField(
+        _('next attempt'),
+        default=timezone.now,
+        null=True,
+        blank=True,
+        db_index=True)
+
+    #: The time of the last delivery attempt.
+    last_attempt_time = models.DateTimeField(_('last attempt'), null=True,
+                                             blank=True)
+
+    #: The HTTP status code returned by the last delivery attempt.
+    response_code = models.IntegerField(_('response code'), null=True,
+                                        blank=True)
+
+    #: The error from the last failed delivery attempt.
+    last_error = models.TextField(_('last error'), blank=True)
+
+    objects = WebHookDeliveryManager()
+
+    def __str__(self):
+        return '%s: %s' % (self.event, self.target_id)
+
+    class Meta:
+        db_table = 'notifications_webhookdelivery'
+        ordering = ['-timestamp']
+        verbose_name = _('Webhook Delivery')
+        verbose_name_plural = _('Webhook Deliveries')
+
+
+@python_2_unicode_compatible
+class QueuedEmail(models.Model):
+    """An e-mail message queued to be sent in the background.
+
+    Messages are stored when they're generated, and are then sent in
+    batches over a shared connection by
+    :py:class:`~reviewboard.notifications.email.outbox.EmailOutboxWorker`
+    (or the :command:`send-queued-mail` management command). Failed sends
+    are retried with an exponential backoff.
+    """
+
+    STATUS_PENDING = 'P'
+    STATUS_SENT = 'S'
+    STATUS_FAILED = 'F'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, _('Pending')),
+        (STATUS_SENT, _('Sent')),
+        (STATUS_FAILED, _('Failed')),
+    )
+
+    #: The subject of the message, for display purposes.
+    subject = models.CharField(_('subject'), max_length=255)
+
+    #: The envelope sender address of the message.
+    from_email = models.CharField(_('envelope sender'), max_length=254)
+
+    #: The envelope recipient addresses of the message, one per line.
+    recipients = models.TextField(_('recipients'))
+
+    #: The rendered MIME data of the message.
+    message_data = Base64Field(_('message data'))
+
+    #: The send status.
+    status = models.CharField(
+        _('status'),
+        max_length=1,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        db_index=True)
+
+    #: The number of send attempts made so far.
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+
+    #: The time when the message was queued.
+    timestamp = models.DateTimeField(_('queued'), default=timezone.now)
+
+    #: The earliest time when the next send attempt can be made.
+    next_attempt_time = models.DateTimeField(
+        _('next attempt'),
+        default=timezone.now,
+        null=True,
+        blank=True,
+        db_index=True)
+
+    #: The time of the last send attempt.
+    last_attempt_time = models.DateTimeField(_('last attempt'), null=True,
+                                             blank=True)
+
+    #: The error from the last failed send attempt.
+    last_error = models.TextField(_('last error'), blank=True)
+
+    objects = QueuedItemManager()
+
+    def get_recipients(self):
+        """Return the envelope recipient addresses of the message.
+
+        Returns:
+            list of unicode:
+            The recipient addresses.
+        """
+        return self.recipients.splitlines()
+
+    def __str__(self):
+        return self.subject
+
+    class Meta:
+        db_table = 'notifications_queuedemail'
+        ordering = ['-timestamp']
+        verbose_name = _('Queued E-mail')
+        verbose_name_plural = _('Queued E-mails')
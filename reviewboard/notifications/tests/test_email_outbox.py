@@ -0,0 +1,203 @@
+"""Unit tests for reviewboard.notifications.email.outbox."""
+
+from __future__ import unicode_literals
+
+import asyncore
+import smtpd
+import smtplib
+import threading
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from djblets.siteconfig.models import SiteConfiguration
+from kgb import SpyAgency
+
+from reviewboard.notifications.email.message import EmailMessage
+from reviewboard.notifications.email.outbox import (EmailOutboxWorker,
+                                                    queue_email,
+                                                    send_queued_emails)
+from reviewboard.notifications.email.utils import send_email
+from reviewboard.notifications.models import QueuedEmail
+from reviewboard.testing import TestCase
+
+
+class _StubSMTPServer(smtpd.SMTPServer):
+    """A local SMTP server that records the messages it receives."""
+
+    def __init__(self, *args, **kwargs):
+        smtpd.SMTPServer.__init__(self, *args, **kwargs)
+
+        self.messages = []
+
+    def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+        """Record a received message."""
+        self.messages.append({
+            'from': mailfrom,
+            'to': rcpttos,
+            'data': data,
+        })
+
+
+class EmailOutboxTests(SpyAgency, TestCase):
+    """Unit tests for the e-mail outbox."""
+
+    def setUp(self):
+        super(EmailOutboxTests, self).setUp()
+
+        siteconfig = SiteConfiguration.objects.get_current()
+        siteconfig.set('mail_send_in_background', True)
+        siteconfig.save()
+
+        # Messages are sent explicitly by the tests, rather than by the
+        # worker thread.
+        self.spy_on(EmailOutboxWorker.wake,
+                    owner=EmailOutboxWorker,
+                    call_original=False)
+
+    def test_send_email_queues(self):
+        """Testing send_email with mail_send_in_background queues the
+        message
+        """
+        message, sent = send_email(self._build_message)
+
+        self.assertTrue(sent)
+        self.assertIsNotNone(message.message_id)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertTrue(EmailOutboxWorker.wake.called)
+
+        queued_email = QueuedEmail.objects.get()
+        self.assertEqual(queued_email.status, QueuedEmail.STATUS_PENDING)
+        self.assertEqual(queued_email.subject, 'Test subject')
+        self.assertEqual(queued_email.from_email, message.from_email)
+        self.assertEqual(queued_email.get_recipients(), ['user@example.com'])
+
+        # The rendered message is stored, rather than a serialized object.
+        message_data = bytes(queued_email.message_data)
+        self.assertIn(b'Subject: Test subject', message_data)
+        self.assertIn(('Message-ID: %s' % message.message_id).encode('ascii'),
+                      message_data)
+
+    def test_send_queued_emails(self):
+        """Testing send_queued_emails"""
+        message = self._build_message()
+        queue_email(message)
+
+        self.assertEqual(send_queued_emails(), (1, 1))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].message()['Message-ID'],
+                         message.message_id)
+        self.assertEqual(mail.outbox[0].recipients(), ['user@example.com'])
+
+        queued_email = QueuedEmail.objects.get()
+        self.assertEqual(queued_email.status, QueuedEmail.STATUS_SENT)
+        self.assertEqual(queued_email.attempts, 1)
+
+        # It shouldn't be sent again.
+        self.assertEqual(send_queued_emails(), (0, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_send_queued_emails_with_error(self):
+        """Testing send_queued_emails with an error schedules a retry"""
+        queue_email(self._build_message())
+
+        self.spy_on(EmailBackend.send_messages,
+                    owner=EmailBackend,
+                    call_fake=self._raise_error)
+
+        self.assertEqual(send_queued_emails(), (1, 0))
+
+        queued_email = QueuedEmail.objects.get()
+        self.assertEqual(queued_email.status, QueuedEmail.STATUS_PENDING)
+        self.assertEqual(queued_email.attempts, 1)
+        self.assertEqual(queued_email.last_error, 'Oh no')
+        self.assertGreater(queued_email.next_attempt_time,
+                           queued_email.last_attempt_time)
+
+        # It's not due yet.
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+    def test_send_queued_emails_with_max_attempts(self):
+        """Testing send_queued_emails fails after the maximum attempts"""
+        siteconfig = SiteConfiguration.objects.get_current()
+        siteconfig.set('mail_send_max_attempts', 1)
+        siteconfig.save()
+
+        queue_email(self._build_message())
+
+        self.spy_on(EmailBackend.send_messages,
+                    owner=EmailBackend,
+                    call_fake=self._raise_error)
+
+        send_queued_emails()
+
+        queued_email = QueuedEmail.objects.get()
+        self.assertEqual(queued_email.status, QueuedEmail.STATUS_FAILED)
+        self.assertIsNone(queued_email.next_attempt_time)
+
+    def test_send_queued_emails_with_smtp(self):
+        """Testing send_queued_emails reuses one SMTP connection per batch"""
+        server = _StubSMTPServer(('127.0.0.1', 0), None)
+        port = server.socket.getsockname()[1]
+
+        thread = threading.Thread(
+            target=asyncore.loop,
+            kwargs={
+                'timeout': 0.05,
+            })
+        thread.daemon = True
+        thread.start()
+
+        try:
+            for i in range(3):
+                queue_email(self._build_message(to=['user%d@example.com'
+                                                    % i]))
+
+            self.spy_on(smtplib.SMTP.connect, owner=smtplib.SMTP)
+
+            with self.settings(
+                    EMAIL_BACKEND='django.core.mail.backends.smtp.'
+                                  'EmailBackend',
+                    EMAIL_HOST='127.0.0.1',
+                    EMAIL_PORT=port,
+                    EMAIL_HOST_USER='',
+                    EMAIL_HOST_PASSWORD='',
+                    EMAIL_USE_TLS=False):
+                self.assertEqual(send_queued_emails(), (3, 3))
+        finally:
+            server.close()
+            thread.join(5)
+
+        self.assertEqual(len(smtplib.SMTP.connect.calls), 1)
+        self.assertEqual(
+            sorted(message['to'][0] for message in server.messages),
+            ['user0@example.com', 'user1@example.com', 'user2@example.com'])
+
+        for message in server.messages:
+            self.assertIn(b'Subject: Test subject', message['data'])
+
+    def _build_message(self, to=['user@example.com']):
+        """Return a message for testing.
+
+        Args:
+            to (list of unicode, optional):
+                The recipients of the message.
+
+        Returns:
+            reviewboard.notifications.email.message.EmailMessage:
+            The message.
+        """
+        return EmailMessage(subject='Test subject',
+                            text_body='Test body',
+                            html_body='<p>Test body</p>',
+                            from_email='noreply@example.com',
+                            sender='noreply@example.com',
+                            to=to)
+
+    def _raise_error(self, *args, **kwargs):
+        """Raise an error when sending messages.
+
+        Raises:
+            Exception:
+                Always.
+        """
+        raise Exception('Oh no')
@@ -1,6 +1,8 @@
 from __future__ import unicode_literals
 
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from djblets.mail.utils import build_email_address_for_user
 from djblets.testing.decorators import add_fixtures
 
@@ -217,6 +219,27 @@ class EmailUtilsTests(TestCase):
         self.assertEqual(len(addresses), 1)
         self.assertEqual(addresses, set([build_email_address_for_user(user1)]))
 
+    def test_recipients_to_addresses_with_groups_query_count(self):
+        """Testing generating addresses from recipients that are groups
+        looks up all members in one query
+        """
+        groups = []
+
+        for i in range(3):
+            group = self.create_review_group('group%d' % i)
+            group.users = [
+                User.objects.create_user(username='user%d-%d' % (i, j),
+                                         email='user%d-%d@example.com'
+                                               % (i, j))
+                for j in range(3)
+            ]
+            groups.append(group)
+
+        with self.assertNumQueries(1):
+            addresses = recipients_to_addresses(groups)
+
+        self.assertEqual(len(addresses), 9)
+
     @add_fixtures(['test_users'])
     def test_build_recipients_user_receive_email(self):
         """Testing building recipients for a review request where the user
@@ -797,3 +820,38 @@ class EmailUtilsTests(TestCase):
 
         self.assertEqual(to, set([submitter, user1]))
         self.assertEqual(len(cc), 0)
+
+    @add_fixtures(['test_users'])
+    def test_build_recipients_query_count(self):
+        """Testing building recipients uses a constant number of queries"""
+        review_request = self.create_review_request()
+        submitter = review_request.submitter
+
+        def _get_num_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                to, cc = build_recipients(submitter, review_request)
+
+            return len(ctx.captured_queries), to, cc
+
+        review_request.target_people = [User.objects.get(username='doc')]
+
+        # Load the submitter's profile first, so it doesn't count below.
+        _get_num_queries()
+
+        num_queries, to, cc = _get_num_queries()
+        self.assertEqual(len(to), 1)
+
+        users = [
+            User.objects.create_user(username='user%d' % i,
+                                     email='user%d@example.com' % i)
+            for i in range(5)
+        ]
+
+        for user in users:
+            Profile.objects.create(user=user).starred_review_requests = \
+                [review_request]
+
+        review_request.target_people = users[:3]
+
+        self.assertEqual(_get_num_queries(), (num_queries, set(users[:3]),
+                                              set([submitter] + users[3:])))
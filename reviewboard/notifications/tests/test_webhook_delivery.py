@@ -0,0 +1,328 @@
+"""Unit tests for queued webhook delivery."""
+
+from __future__ import unicode_literals
+
+import threading
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.six.moves import BaseHTTPServer
+from djblets.siteconfig.models import SiteConfiguration
+from kgb import SpyAgency
+
+from reviewboard.notifications.models import WebHookDelivery, WebHookTarget
+from reviewboard.notifications.webhooks import (FakeHTTPRequest,
+                                                WebHookDeliveryQueue,
+                                                deliver_webhook,
+                                                dispatch_webhook_event,
+                                                get_webhook_delivery_queue,
+                                                queue_webhook_deliveries)
+from reviewboard.testing import TestCase
+
+
+class _StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """A request handler for the local HTTP stub server."""
+
+    def do_POST(self):
+        """Record the request and send the configured response."""
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+
+        server.requests.append({
+            'body': self.rfile.read(length),
+            'event': self.headers.get('X-ReviewBoard-Event'),
+            'signature': self.headers.get('X-Hub-Signature'),
+        })
+
+        self.send_response(server.response_code)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args, **kwargs):
+        """Silence request logging."""
+        pass
+
+
+class WebHookDeliveryTests(SpyAgency, TestCase):
+    """Unit tests for delivering queued webhooks to a local HTTP stub."""
+
+    def setUp(self):
+        super(WebHookDeliveryTests, self).setUp()
+
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0),
+                                                _StubHandler)
+        self.server.requests = []
+        self.server.response_code = 200
+
+        self.server_thread = threading.Thread(
+            target=self.server.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+        self.target = WebHookTarget.objects.create(
+            events='my-event',
+            url='http://127.0.0.1:%d/endpoint/' % self.server.server_port,
+            encoding=WebHookTarget.ENCODING_JSON,
+            secret='abc123')
+
+    def tearDown(self):
+        super(WebHookDeliveryTests, self).tearDown()
+
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_dispatch_delivers(self):
+        """Testing dispatch_webhook_event records a successful delivery"""
+        dispatch_webhook_event(request=FakeHTTPRequest(None),
+                               webhook_targets=[self.target],
+                               event='my-event',
+                               payload={'key': 'value'})
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.requests[0]['body'],
+                         b'{"key": "value"}')
+        self.assertEqual(self.server.requests[0]['event'], 'my-event')
+        self.assertTrue(
+            self.server.requests[0]['signature'].startswith('sha1='))
+
+        delivery = WebHookDelivery.objects.get()
+        self.assertEqual(delivery.status, WebHookDelivery.STATUS_DELIVERED)
+        self.assertEqual(delivery.attempts, 1)
+        self.assertEqual(delivery.response_code, 200)
+        self.assertIsNone(delivery.next_attempt_time)
+
+    def test_dispatch_encodes_once_per_encoding(self):
+        """Testing dispatch_webhook_event shares encoded payloads between
+        targets
+        """
+        target2 = WebHookTarget.objects.create(
+            events='my-event',
+            url=self.target.url,
+            encoding=WebHookTarget.ENCODING_JSON)
+
+        deliveries = dispatch_webhook_event(
+            request=FakeHTTPRequest(None),
+            webhook_targets=[self.target, target2],
+            event='my-event',
+            payload={'key': 'value'})
+
+        self.assertEqual(len(deliveries), 2)
+        self.assertEqual(deliveries[0].body, deliveries[1].body)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_deliver_with_server_error(self):
+        """Testing deliver_webhook with a server error schedules a retry"""
+        self.server.response_code = 500
+
+        delivery = self._create_delivery()
+        self.assertFalse(deliver_webhook(delivery))
+
+        delivery = WebHookDelivery.objects.get(pk=delivery.pk)
+        self.assertEqual(delivery.status, WebHookDelivery.STATUS_PENDING)
+        self.assertEqual(delivery.attempts, 1)
+        self.assertEqual(delivery.response_code, 500)
+        self.assertGreater(delivery.next_attempt_time,
+                           delivery.last_attempt_time)
+
+    def test_deliver_with_server_error_backoff(self):
+        """Testing deliver_webhook with repeated server errors backs off
+        exponentially
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        retry_delay = siteconfig.get('webhooks_delivery_retry_delay')
+
+        self.server.response_code = 503
+
+        delivery = self._create_delivery()
+        deliver_webhook(delivery)
+        self.assertEqual(
+            delivery.next_attempt_time - delivery.last_attempt_time,
+            timedelta(seconds=retry_delay))
+
+        deliver_webhook(delivery)
+        self.assertEqual(
+            delivery.next_attempt_time - delivery.last_attempt_time,
+            timedelta(seconds=retry_delay * 2))
+
+    def test_deliver_with_max_attempts(self):
+        """Testing deliver_webhook fails after the maximum attempts"""
+        self.server.response_code = 500
+
+        delivery = self._create_delivery()
+
+        with self.siteconfig_settings({'webhooks_delivery_max_attempts': 2},
+                                      reload_settings=False):
+            deliver_webhook(delivery)
+            deliver_webhook(delivery)
+
+        delivery = WebHookDelivery.objects.get(pk=delivery.pk)
+        self.assertEqual(delivery.status, WebHookDelivery.STATUS_FAILED)
+        self.assertEqual(delivery.attempts, 2)
+        self.assertIsNone(delivery.next_attempt_time)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_deliver_with_client_error(self):
+        """Testing deliver_webhook with a client error doesn't retry"""
+        self.server.response_code = 404
+
+        delivery = self._create_delivery()
+        self.assertFalse(deliver_webhook(delivery))
+
+        delivery = WebHookDelivery.objects.get(pk=delivery.pk)
+        self.assertEqual(delivery.status, WebHookDelivery.STATUS_FAILED)
+        self.assertEqual(delivery.response_code, 404)
+
+    def test_deliver_with_claimed_attempt(self):
+        """Testing deliver_webhook skips attempts claimed by another worker"""
+        delivery = self._create_delivery()
+        stale_delivery = WebHookDelivery.objects.get(pk=delivery.pk)
+
+        self.assertTrue(deliver_webhook(delivery))
+        self.assertFalse(deliver_webhook(stale_delivery))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_get_due(self):
+        """Testing WebHookDeliveryManager.get_due"""
+        delivery = self._create_delivery()
+        self._create_delivery(
+            next_attempt_time=timezone.now() + timedelta(hours=1))
+        self._create_delivery(status=WebHookDelivery.STATUS_FAILED)
+
+        self.assertEqual(list(WebHookDelivery.objects.get_due()),
+                         [delivery])
+
+    def test_queue_with_workers(self):
+        """Testing queue_webhook_deliveries with webhooks_delivery_workers
+        submits deliveries to the delivery queue
+        """
+        delivery_queue = WebHookDeliveryQueue(num_workers=2,
+                                              target_concurrency=1)
+        self.spy_on(delivery_queue.submit, call_original=False)
+        self.spy_on(get_webhook_delivery_queue,
+                    call_fake=lambda: delivery_queue)
+
+        delivery = WebHookDelivery(target=self.target,
+                                   event='my-event',
+                                   content_type=WebHookTarget.ENCODING_JSON,
+                                   body='{}')
+
+        with self.siteconfig_settings({'webhooks_delivery_workers': 2},
+                                      reload_settings=False):
+            queue_webhook_deliveries([delivery])
+
+        self.assertIsNotNone(delivery.pk)
+        self.assertTrue(delivery_queue.submit.called_with(delivery.pk))
+        self.assertEqual(len(self.server.requests), 0)
+
+    def test_queue_process_with_server_error(self):
+        """Testing WebHookDeliveryQueue schedules a retry with backoff after
+        a server error
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        retry_delay = siteconfig.get('webhooks_delivery_retry_delay')
+
+        self.server.response_code = 500
+
+        delivery = self._create_delivery()
+        delivery_queue = WebHookDeliveryQueue(num_workers=2,
+                                              target_concurrency=1)
+        self.spy_on(delivery_queue.submit, call_original=False)
+
+        delivery_queue._process_delivery(delivery.pk)
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(delivery_queue.submit.calls), 1)
+
+        call = delivery_queue.submit.calls[0]
+        self.assertEqual(call.args, (delivery.pk,))
+        self.assertAlmostEqual(call.kwargs['delay'], retry_delay, delta=1)
+
+        # The second attempt backs off for twice as long.
+        WebHookDelivery.objects.filter(pk=delivery.pk).update(
+            next_attempt_time=timezone.now())
+        delivery_queue._process_delivery(delivery.pk)
+
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(len(delivery_queue.submit.calls), 2)
+        self.assertAlmostEqual(delivery_queue.submit.calls[1].kwargs['delay'],
+                               retry_delay * 2, delta=1)
+
+    def test_queue_process_not_due(self):
+        """Testing WebHookDeliveryQueue reschedules deliveries that aren't
+        due yet
+        """
+        delivery = self._create_delivery(
+            next_attempt_time=timezone.now() + timedelta(seconds=60))
+        delivery_queue = WebHookDeliveryQueue(num_workers=2,
+                                              target_concurrency=1)
+        self.spy_on(delivery_queue.submit, call_original=False)
+
+        delivery_queue._process_delivery(delivery.pk)
+
+        self.assertEqual(len(self.server.requests), 0)
+        self.assertEqual(len(delivery_queue.submit.calls), 1)
+        self.assertAlmostEqual(delivery_queue.submit.calls[0].kwargs['delay'],
+                               60, delta=1)
+
+    def test_queue_process_with_busy_target(self):
+        """Testing WebHookDeliveryQueue limits concurrent deliveries to a
+        target
+        """
+        delivery1 = self._create_delivery()
+        delivery2 = self._create_delivery()
+        delivery_queue = WebHookDeliveryQueue(num_workers=2,
+                                              target_concurrency=1)
+        self.spy_on(delivery_queue.submit, call_original=False)
+
+        # Simulate another worker delivering to the same target.
+        semaphore = delivery_queue._get_target_semaphore(self.target.pk)
+        self.assertTrue(semaphore.acquire(False))
+
+        delivery_queue._process_delivery(delivery1.pk)
+
+        self.assertEqual(len(self.server.requests), 0)
+        self.assertTrue(delivery_queue.submit.called_with(
+            delivery1.pk,
+            delay=WebHookDeliveryQueue.TARGET_BUSY_DELAY))
+
+        semaphore.release()
+
+        delivery_queue._process_delivery(delivery2.pk)
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(delivery_queue.submit.calls), 1)
+        self.assertEqual(
+            WebHookDelivery.objects.get(pk=delivery2.pk).status,
+            WebHookDelivery.STATUS_DELIVERED)
+
+    def test_queue_scheduler(self):
+        """Testing WebHookDeliveryQueue moves scheduled deliveries to the
+        ready queue when they're due
+        """
+        delivery_queue = WebHookDeliveryQueue(num_workers=0,
+                                              target_concurrency=1)
+        delivery_queue.start()
+
+        delivery_queue.submit(2, delay=0.2)
+        delivery_queue.submit(1, delay=0.1)
+
+        self.assertEqual(delivery_queue._ready.get(timeout=5), 1)
+        self.assertEqual(delivery_queue._ready.get(timeout=5), 2)
+
+    def _create_delivery(self, **kwargs):
+        """Create a delivery for the stub server's target.
+
+        Args:
+            **kwargs (dict):
+                Additional fields for the delivery.
+
+        Returns:
+            reviewboard.notifications.models.WebHookDelivery:
+            The new delivery.
+        """
+        return WebHookDelivery.objects.create(
+            target=self.target,
+            event='my-event',
+            content_type=WebHookTarget.ENCODING_JSON,
+            body='{}',
+            **kwargs)
@@ -2,6 +2,7 @@ from __future__ import unicode_literals
 
 from djblets.testing.decorators import add_fixtures
 
+from reviewboard.notifications.managers import WebHookTargetManager
 from reviewboard.notifications.models import WebHookTarget
 from reviewboard.site.models import LocalSite
 from reviewboard.testing import TestCase
@@ -170,3 +171,98 @@ class WebHookTargetManagerTests(TestCase):
         with self.assertRaisesMessage(ValueError,
                                       '"*" is not a valid event choice'):
             WebHookTarget.objects.for_event(WebHookTarget.ALL_EVENTS)
+
+    def test_for_event_cached(self):
+        """Testing WebHookTargetManager.for_event caches results"""
+        target = WebHookTarget.objects.create(
+            events='event1',
+            url=self.ENDPOINT_URL,
+            enabled=True,
+            apply_to=WebHookTarget.APPLY_TO_ALL)
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [target])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(WebHookTarget.objects.for_event('event1'),
+                             [target])
+
+    def test_for_event_after_target_saved(self):
+        """Testing WebHookTargetManager.for_event after a target is saved"""
+        target = WebHookTarget.objects.create(
+            events='event1',
+            url=self.ENDPOINT_URL,
+            enabled=True,
+            apply_to=WebHookTarget.APPLY_TO_ALL)
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [target])
+
+        target.enabled = False
+        target.save()
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [])
+
+    def test_for_event_after_target_deleted(self):
+        """Testing WebHookTargetManager.for_event after a target is deleted
+        """
+        target = WebHookTarget.objects.create(
+            events='event1',
+            url=self.ENDPOINT_URL,
+            enabled=True,
+            apply_to=WebHookTarget.APPLY_TO_ALL)
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [target])
+
+        target.delete()
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [])
+
+    def test_for_event_after_index_cleared_in_other_manager(self):
+        """Testing WebHookTargetManager.for_event after the index is cleared
+        by another manager that never built an index
+        """
+        target = WebHookTarget.objects.create(
+            events='event1',
+            url=self.ENDPOINT_URL,
+            enabled=True,
+            apply_to=WebHookTarget.APPLY_TO_ALL)
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [target])
+
+        # Simulate another process disabling the target. This is updated
+        # directly, so that this process's index isn't cleared by the
+        # target's signal handlers.
+        WebHookTarget.objects.filter(pk=target.pk).update(enabled=False)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(WebHookTarget.objects.for_event('event1'),
+                             [target])
+
+        other_manager = WebHookTargetManager()
+        other_manager.model = WebHookTarget
+        other_manager.clear_index()
+
+        self.assertEqual(WebHookTarget.objects.for_event('event1'), [])
+
+    @add_fixtures(['test_scmtools'])
+    def test_for_event_after_repositories_changed(self):
+        """Testing WebHookTargetManager.for_event after a target's
+        repositories change
+        """
+        repository = self.create_repository()
+        target = WebHookTarget.objects.create(
+            events='event1',
+            url=self.ENDPOINT_URL,
+            enabled=True,
+            apply_to=WebHookTarget.APPLY_TO_SELECTED_REPOS)
+
+        self.assertEqual(
+            WebHookTarget.objects.for_event('event1',
+                                            repository_id=repository.pk),
+            [])
+
+        target.repositories.add(repository)
+
+        self.assertEqual(
+            WebHookTarget.objects.for_event('event1',
+                                            repository_id=repository.pk),
+            [target])
@@ -1,19 +1,26 @@
 from __future__ import unicode_literals
 
 import hashlib
+import heapq
 import hmac
 import logging
+import threading
+import time
 from collections import OrderedDict
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import django
 from django.contrib.sites.models import Site
-from django.db.models import Model
+from django.db import close_old_connections
+from django.db.models import F, Model
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.db.models.query import QuerySet
 from django.http.request import HttpRequest
-from django.utils import six
+from django.utils import six, timezone
 from django.utils.encoding import force_bytes, force_text
 from django.utils.safestring import SafeText
+from django.utils.six.moves import queue
+from django.utils.six.moves.urllib.error import HTTPError
 from django.utils.six.moves.urllib.parse import (urlencode, urlsplit,
                                                  urlunsplit)
 from django.utils.six.moves.urllib.request import (
@@ -30,7 +37,7 @@ from djblets.webapi.encoders import (BasicAPIEncoder, JSONEncoderAdapter,
                                      ResourceAPIEncoder, XMLEncoderAdapter)
 
 from reviewboard import get_package_version
-from reviewboard.notifications.models import WebHookTarget
+from reviewboard.notifications.models import WebHookDelivery, WebHookTarget
 from reviewboard.reviews.models import Review, ReviewRequest
 from reviewboard.reviews.signals import (review_request_closed,
                                          review_request_published,
@@ -133,6 +140,42 @@ class CustomPayloadParser(Parser):
             raise self.error(token, "Invalid block tag: '%s'" % command)
 
 
+def compile_custom_content(body):
+    """Compile custom content for the payload into a template.
+
+    This parses the custom payload content template provided by the user
+    using a stripped down version of Django's templating system. See
+    :py:func:`render_custom_content` for details.
+
+    Args:
+        body (unicode):
+            The template content to compile.
+
+    Returns:
+        django.template.Template:
+        The compiled template.
+
+    Raises:
+        django.template.TemplateSyntaxError:
+            There was a syntax error in the template.
+    """
+    template = Template('')
+
+    if django.VERSION >= (1, 9):
+        lexer = Lexer(body)
+        parser_args = (template.engine.template_libraries,
+                       template.engine.template_builtins,
+                       template.origin)
+    else:
+        lexer = Lexer(body, origin=None)
+        parser_args = ()
+
+    parser = CustomPayloadParser(lexer.tokenize(), *parser_args)
+    template.nodelist = parser.parse()
+
+    return template
+
+
 def render_custom_content(body, context_data={}):
     """Render custom content for the payload using Django templating.
 
@@ -146,8 +189,9 @@ def render_custom_content(body, context_data={}):
     ``{% load %}`` and ``{% include %}``.
 
     Args:
-        body (unicode):
-            The template content to render.
+        body (unicode or django.template.Template):
+            The template content to render, or a template compiled by
+            :py:func:`compile_custom_content`.
 
         context_data (dict, optional):
             Context data for the template.
@@ -160,19 +204,10 @@ def render_custom_content(body, context_data={}):
         django.template.TemplateSyntaxError:
             There was a syntax error in the template.
     """
-    template = Template('')
-
-    if django.VERSION >= (1, 9):
-        lexer = Lexer(body)
-        parser_args = (template.engine.template_libraries,
-                       template.engine.template_builtins,
-                       template.origin)
+    if isinstance(body, Template):
+        template = body
     else:
-        lexer = Lexer(body, origin=None)
-        parser_args = ()
-
-    parser = CustomPayloadParser(lexer.tokenize(), *parser_args)
-    template.nodelist = parser.parse()
+        template = compile_custom_content(body)
 
     return template.render(Context(context_data))
 
@@ -268,6 +303,9 @@ def normalize_webhook_payload(payload, request, use_string_keys=False):
 def dispatch_webhook_event(request, webhook_targets, event, payload):
     """Dispatch the given event and payload to the given WebHook targets.
 
+    The payload is encoded once for each encoding used by the targets, and
+    queued for delivery (see :py:func:`queue_webhook_deliveries`).
+
     Args:
         request (django.http.HttpRequest):
             The HTTP request from the client.
@@ -283,6 +321,10 @@ def dispatch_webhook_event(request, webhook_targets, event, payload):
         payload (dict):
             The payload data to encode for the WebHook payload.
 
+    Returns:
+        list of reviewboard.notifications.models.WebHookDelivery:
+        The deliveries queued for the targets.
+
     Raises:
         ValueError:
             There was an error with the payload format. Details are in the
@@ -290,6 +332,7 @@ def dispatch_webhook_event(request, webhook_targets, event, payload):
     """
     encoder = BasicAPIEncoder()
     bodies = {}
+    deliveries = []
 
     raw_norm_payload = None
     json_norm_payload = None
@@ -332,8 +375,9 @@ def dispatch_webhook_event(request, webhook_targets, event, payload):
         if use_custom_content:
             try:
                 assert raw_norm_payload is not None
-                body = render_custom_content(webhook_target.custom_content,
-                                             raw_norm_payload)
+                body = render_custom_content(
+                    _get_custom_content_template(webhook_target),
+                    raw_norm_payload)
                 body = force_bytes(body)
             except Exception as e:
                 logging.exception('Could not render WebHook payload: %s', e)
@@ -373,46 +417,458 @@ def dispatch_webhook_event(request, webhook_targets, event, payload):
             else:
                 body = bodies[encoding]
 
-        headers = {
-            b'X-ReviewBoard-Event': event.encode('utf-8'),
-            b'Content-Type': webhook_target.encoding.encode('utf-8'),
-            b'Content-Length': len(body),
-            b'User-Agent':
-                ('ReviewBoard-WebHook/%s' % get_package_version())
-                .encode('utf-8'),
-        }
-
         if webhook_target.secret:
             signer = hmac.new(webhook_target.secret.encode('utf-8'), body,
                               hashlib.sha1)
-            headers[b'X-Hub-Signature'] = \
-                ('sha1=%s' % signer.hexdigest()).encode('utf-8')
+            signature = 'sha1=%s' % signer.hexdigest()
+        else:
+            signature = ''
 
-        logging.info('Dispatching webhook for event %s to %s',
-                     event, webhook_target.url)
+        deliveries.append(WebHookDelivery(
+            target=webhook_target,
+            event=event,
+            content_type=webhook_target.encoding,
+            body=force_text(body),
+            signature=signature))
 
-        try:
-            url = webhook_target.url
-            url_parts = urlsplit(url)
-
-            if url_parts.username or url_parts.password:
-                netloc = url_parts.netloc.split('@', 1)[1]
-                url = urlunsplit(
-                    (url_parts.scheme, netloc, url_parts.path,
-                     url_parts.params, url_parts.query))
-
-                password_mgr = HTTPPasswordMgrWithDefaultRealm()
-                password_mgr.add_password(
-                    None, url, url_parts.username, url_parts.password)
-                handler = HTTPBasicAuthHandler(password_mgr)
-                opener = build_opener(handler)
+    queue_webhook_deliveries(deliveries)
+
+    return deliveries
+
+
+def _get_custom_content_template(webhook_target):
+    """Return the compiled custom content template for a target.
+
+    The template is compiled once and stored on the target. Targets returned
+    by :py:meth:`WebHookTargetManager.for_event
+    <reviewboard.notifications.managers.WebHookTargetManager.for_event>` are
+    kept in memory, so the template is reused across dispatches until the
+    target changes.
+
+    Args:
+        webhook_target (reviewboard.notifications.models.WebHookTarget):
+            The target.
+
+    Returns:
+        django.template.Template:
+        The compiled template.
+
+    Raises:
+        django.template.TemplateSyntaxError:
+            There was a syntax error in the template.
+    """
+    custom_content = webhook_target.custom_content
+    cached = getattr(webhook_target, '_custom_content_template', None)
+
+    if cached is None or cached[0] != custom_content:
+        cached = (custom_content, compile_custom_content(custom_content))
+        webhook_target._custom_content_template = cached
+
+    return cached[1]
+
+
+def queue_webhook_deliveries(deliveries):
+    """Queue webhook deliveries to be sent.
+
+    The deliveries are saved, and then handed off to the worker pool. If
+    ``webhooks_delivery_workers`` is set to 0 in the site configuration, they
+    will instead be delivered immediately.
+
+    Deliveries for targets that haven't been saved to the database can't be
+    stored, and will always be delivered immediately.
+
+    Args:
+        deliveries (list of
+                    reviewboard.notifications.models.WebHookDelivery):
+            The unsaved deliveries to queue.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+    use_workers = siteconfig.get('webhooks_delivery_workers') > 0
+    queued_ids = []
+
+    for delivery in deliveries:
+        if delivery.target.pk is None:
+            deliver_webhook(delivery)
+        else:
+            delivery.save()
+
+            if use_workers:
+                queued_ids.append(delivery.pk)
             else:
-                opener = build_opener()
+                deliver_webhook(delivery)
+
+    if queued_ids:
+        delivery_queue = get_webhook_delivery_queue()
+
+        for delivery_id in queued_ids:
+            delivery_queue.submit(delivery_id)
+
+
+def retry_webhook_deliveries(deliveries):
+    """Reset and re-queue webhook deliveries.
+
+    Args:
+        deliveries (django.db.models.query.QuerySet):
+            The deliveries to retry.
+    """
+    delivery_ids = list(deliveries.values_list('pk', flat=True))
+
+    WebHookDelivery.objects.filter(pk__in=delivery_ids).update(
+        status=WebHookDelivery.STATUS_PENDING,
+        attempts=0,
+        next_attempt_time=timezone.now())
+
+    siteconfig = SiteConfiguration.objects.get_current()
+
+    if siteconfig.get('webhooks_delivery_workers') > 0:
+        delivery_queue = get_webhook_delivery_queue()
+
+        for delivery_id in delivery_ids:
+            delivery_queue.submit(delivery_id)
+    else:
+        for delivery in (WebHookDelivery.objects
+                         .filter(pk__in=delivery_ids)
+                         .select_related('target')):
+            deliver_webhook(delivery)
+
+
+def deliver_webhook(delivery):
+    """Attempt to deliver a webhook payload to its target.
+
+    This makes a single delivery attempt and records the result on the
+    delivery. If the attempt fails and the delivery can be retried, its next
+    attempt will be scheduled using an exponential backoff, based on the
+    ``webhooks_delivery_retry_delay`` and ``webhooks_delivery_max_attempts``
+    site configuration settings.
+
+    Args:
+        delivery (reviewboard.notifications.models.WebHookDelivery):
+            The delivery to attempt.
+
+    Returns:
+        bool:
+        ``True`` if the payload was delivered. ``False`` if it wasn't, or if
+        another worker had already claimed this attempt.
+    """
+    siteconfig = SiteConfiguration.objects.get_current()
+    webhook_target = delivery.target
+    now = timezone.now()
+
+    if delivery.pk is not None:
+        # Claim this attempt, so that other workers (or processes) don't
+        # deliver the same payload at the same time.
+        claimed = (
+            WebHookDelivery.objects
+            .filter(pk=delivery.pk,
+                    status=WebHookDelivery.STATUS_PENDING,
+                    attempts=delivery.attempts)
+            .update(attempts=F('attempts') + 1,
+                    last_attempt_time=now)
+        )
+
+        if not claimed:
+            return False
+
+    delivery.attempts += 1
+    delivery.last_attempt_time = now
+
+    body = delivery.body.encode('utf-8')
+    headers = {
+        b'X-ReviewBoard-Event': delivery.event.encode('utf-8'),
+        b'Content-Type': delivery.content_type.encode('utf-8'),
+        b'Content-Length': len(body),
+        b'User-Agent':
+            ('ReviewBoard-WebHook/%s' % get_package_version())
+            .encode('utf-8'),
+    }
+
+    if delivery.signature:
+        headers[b'X-Hub-Signature'] = delivery.signature.encode('utf-8')
+
+    logging.info('Dispatching webhook for event %s to %s',
+                 delivery.event, webhook_target.url)
 
-            opener.open(Request(url, body, headers))
-        except Exception as e:
-            logging.exception('Could not dispatch WebHook to %s: %s',
-                              webhook_target.url, e)
+    try:
+        url = webhook_target.url
+        url_parts = urlsplit(url)
+
+        if url_parts.username or url_parts.password:
+            netloc = url_parts.netloc.split('@', 1)[1]
+            url = urlunsplit(
+                (url_parts.scheme, netloc, url_parts.path,
+                 url_parts.params, url_parts.query))
+
+            password_mgr = HTTPPasswordMgrWithDefaultRealm()
+            password_mgr.add_password(
+                None, url, url_parts.username, url_parts.password)
+            handler = HTTPBasicAuthHandler(password_mgr)
+            opener = build_opener(handler)
+        else:
+            opener = build_opener()
+
+        response = opener.open(
+            Request(url, body, headers),
+            timeout=siteconfig.get('webhooks_delivery_timeout'))
+
+        if response is not None:
+            delivery.response_code = response.getcode()
+            response.close()
+    except Exception as e:
+        logging.exception('Could not dispatch WebHook to %s: %s',
+                          webhook_target.url, e)
+
+        if isinstance(e, HTTPError):
+            delivery.response_code = e.code
+
+            # Client errors won't be fixed by trying again, unless the
+            # server asked us to.
+            can_retry = (e.code >= 500 or e.code in (408, 429))
+        else:
+            delivery.response_code = None
+            can_retry = True
+
+        delivery.last_error = six.text_type(e) or type(e).__name__
+
+        if (can_retry and
+            delivery.attempts <
+            siteconfig.get('webhooks_delivery_max_attempts')):
+            retry_delay = (siteconfig.get('webhooks_delivery_retry_delay') *
+                           2 ** (delivery.attempts - 1))
+            delivery.next_attempt_time = now + timedelta(seconds=retry_delay)
+        else:
+            delivery.status = WebHookDelivery.STATUS_FAILED
+            delivery.next_attempt_time = None
+    else:
+        delivery.status = WebHookDelivery.STATUS_DELIVERED
+        delivery.next_attempt_time = None
+        delivery.last_error = ''
+
+    if delivery.pk is not None:
+        delivery.save(update_fields=('status', 'next_attempt_time',
+                                     'response_code', 'last_error'))
+
+    return delivery.status == WebHookDelivery.STATUS_DELIVERED
+
+
+class WebHookDeliveryQueue(object):
+    """A pool of worker threads for delivering queued webhooks.
+
+    Deliveries are submitted by ID, and are picked up by the next available
+    worker. Each target is limited to a number of concurrent deliveries, so
+    that one slow endpoint can't tie up every worker. Deliveries that need
+    to wait (for a retry, or for a busy target) are held by a scheduler
+    thread until they're due.
+
+    Deliveries that are pending when the process exits are left in the
+    database, and can be sent by the :command:`deliver-webhooks` management
+    command.
+    """
+
+    #: The number of seconds to wait before retrying for a busy target.
+    TARGET_BUSY_DELAY = 1
+
+    def __init__(self, num_workers, target_concurrency):
+        """Initialize the queue.
+
+        Args:
+            num_workers (int):
+                The number of worker threads to run.
+
+            target_concurrency (int):
+                The maximum number of concurrent deliveries per target.
+        """
+        self.num_workers = num_workers
+        self.target_concurrency = target_concurrency
+
+        self._ready = queue.Queue()
+        self._scheduled = []
+        self._scheduled_cond = threading.Condition()
+        self._target_semaphores = {}
+        self._target_semaphores_lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        """Start the worker threads."""
+        with self._scheduled_cond:
+            if self._started:
+                return
+
+            self._started = True
+
+        for i in range(self.num_workers):
+            self._start_thread(self._run_worker,
+                               'webhook-delivery-worker-%d' % i)
+
+        self._start_thread(self._run_scheduler, 'webhook-delivery-scheduler')
+
+    def submit(self, delivery_id, delay=0):
+        """Submit a delivery to be attempted.
+
+        Args:
+            delivery_id (int):
+                The ID of the delivery.
+
+            delay (float, optional):
+                The number of seconds to wait before attempting the delivery.
+        """
+        if delay > 0:
+            with self._scheduled_cond:
+                heapq.heappush(self._scheduled,
+                               (time.time() + delay, delivery_id))
+                self._scheduled_cond.notify()
+        else:
+            self._ready.put(delivery_id)
+
+    def _start_thread(self, target, name):
+        """Start a daemon thread.
+
+        Args:
+            target (callable):
+                The function to run in the thread.
+
+            name (unicode):
+                The name of the thread.
+        """
+        thread = threading.Thread(target=target, name=str(name))
+        thread.daemon = True
+        thread.start()
+
+    def _run_scheduler(self):
+        """Move scheduled deliveries to the ready queue when they're due."""
+        while True:
+            with self._scheduled_cond:
+                while not self._scheduled:
+                    self._scheduled_cond.wait()
+
+                due_time, delivery_id = self._scheduled[0]
+                wait_time = due_time - time.time()
+
+                if wait_time > 0:
+                    self._scheduled_cond.wait(wait_time)
+                    continue
+
+                heapq.heappop(self._scheduled)
+
+            self._ready.put(delivery_id)
+
+    def _run_worker(self):
+        """Process deliveries from the ready queue."""
+        while True:
+            delivery_id = self._ready.get()
+
+            try:
+                self._process_delivery(delivery_id)
+            except Exception as e:
+                logging.exception('Unexpected error delivering WebHook '
+                                  'delivery ID %s: %s',
+                                  delivery_id, e)
+            finally:
+                close_old_connections()
+
+    def _process_delivery(self, delivery_id):
+        """Attempt a delivery, rescheduling it if needed.
+
+        Args:
+            delivery_id (int):
+                The ID of the delivery.
+        """
+        try:
+            delivery = (
+                WebHookDelivery.objects
+                .select_related('target')
+                .get(pk=delivery_id,
+                     status=WebHookDelivery.STATUS_PENDING)
+            )
+        except WebHookDelivery.DoesNotExist:
+            # It's already been delivered, or was deleted.
+            return
+
+        wait_time = self._get_wait_time(delivery)
+
+        if wait_time > 0:
+            self.submit(delivery_id, delay=wait_time)
+            return
+
+        semaphore = self._get_target_semaphore(delivery.target_id)
+
+        if not semaphore.acquire(False):
+            self.submit(delivery_id, delay=self.TARGET_BUSY_DELAY)
+            return
+
+        try:
+            deliver_webhook(delivery)
+        finally:
+            semaphore.release()
+
+        if delivery.status == WebHookDelivery.STATUS_PENDING:
+            self.submit(delivery_id, delay=self._get_wait_time(delivery))
+
+    def _get_wait_time(self, delivery):
+        """Return the number of seconds until a delivery is due.
+
+        Args:
+            delivery (reviewboard.notifications.models.WebHookDelivery):
+                The delivery.
+
+        Returns:
+            float:
+            The number of seconds to wait, or 0 if it's due now.
+        """
+        if delivery.next_attempt_time is None:
+            return 0
+
+        return max(0, (delivery.next_attempt_time -
+                       timezone.now()).total_seconds())
+
+    def _get_target_semaphore(self, target_id):
+        """Return the semaphore limiting deliveries to a target.
+
+        Args:
+            target_id (int):
+                The ID of the target.
+
+        Returns:
+            threading.BoundedSemaphore:
+            The semaphore for the target.
+        """
+        with self._target_semaphores_lock:
+            try:
+                return self._target_semaphores[target_id]
+            except KeyError:
+                semaphore = threading.BoundedSemaphore(
+                    self.target_concurrency)
+                self._target_semaphores[target_id] = semaphore
+
+                return semaphore
+
+
+_delivery_queue = None
+_delivery_queue_lock = threading.Lock()
+
+
+def get_webhook_delivery_queue():
+    """Return the webhook delivery queue for this process.
+
+    The queue is created and started the first time this is called, using
+    the ``webhooks_delivery_workers`` and
+    ``webhooks_delivery_target_concurrency`` site configuration settings.
+
+    Returns:
+        WebHookDeliveryQueue:
+        The delivery queue.
+    """
+    global _delivery_queue
+
+    with _delivery_queue_lock:
+        if _delivery_queue is None:
+            siteconfig = SiteConfiguration.objects.get_current()
+            _delivery_queue = WebHookDeliveryQueue(
+                num_workers=siteconfig.get('webhooks_delivery_workers'),
+                target_concurrency=siteconfig.get(
+                    'webhooks_delivery_target_concurrency'))
+            _delivery_queue.start()
+
+    return _delivery_queue
 
 
 def _serialize_review(review, request):
@@ -579,7 +1035,22 @@ def reply_published_cb(user, reply, **kwargs):
             pass
 
 
+def _on_webhook_target_changed(**kwargs):
+    """Clear the index of webhook targets when a target changes.
+
+    Args:
+        **kwargs (dict):
+            Keyword arguments from the signal.
+    """
+    WebHookTarget.objects.clear_index()
+
+
 def connect_signals():
+    post_save.connect(_on_webhook_target_changed, sender=WebHookTarget)
+    post_delete.connect(_on_webhook_target_changed, sender=WebHookTarget)
+    m2m_changed.connect(_on_webhook_target_changed,
+                        sender=WebHookTarget.repositories.through)
+
     review_request_closed.connect(review_request_closed_cb,
                                   sender=ReviewRequest)
     review_request_published.connect(review_request_published_cb,
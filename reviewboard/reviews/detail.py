@@ -7,10 +7,11 @@ from collections import Counter, defaultdict
 from datetime import datetime
 from itertools import chain
 
+from django.conf import settings
 from django.db.models import Q
 from django.utils import six
-from django.utils.timezone import utc
-from django.utils.translation import ugettext as _
+from django.utils.timezone import get_current_timezone_name, utc
+from django.utils.translation import get_language, ugettext as _
 from djblets.registries.registry import (ALREADY_REGISTERED,
                                          ATTRIBUTE_REGISTERED,
                                          NOT_REGISTERED)
@@ -19,6 +20,8 @@ from djblets.util.compat.django.template.loader import render_to_string
 from djblets.util.dates import get_latest_timestamp
 from djblets.util.decorators import cached_property
 
+from reviewboard.admin.instrumentation import cache_memoize
+from reviewboard.admin.read_only import is_site_read_only_for
 from reviewboard.diffviewer.models import DiffCommit
 from reviewboard.registries.registry import OrderedRegistry
 from reviewboard.reviews.builtin_fields import (CommitListField,
@@ -179,10 +182,28 @@ class ReviewRequestPageData(object):
             Whether the status updates feature is enabled for this
             review request. This does not necessarily mean that there are
             status updates on the review request.
+
+        deferred_entries (list of DeferredEntry):
+            Stubs for the older main entries that fall outside of
+            :py:attr:`max_main_entries`. These are rendered collapsed and
+            loaded on demand through
+            :py:class:`~reviewboard.reviews.views.ReviewRequestUpdatesView`.
+
+        deferred_entry_ids (dict):
+            A mapping of entry type IDs to sets of entry IDs that have been
+            deferred.
+
+        is_partial (bool):
+            Whether the queried data has been limited to the entries listed
+            in :py:attr:`entry_ids`. If so, :py:attr:`issues` and
+            :py:attr:`issue_counts` only cover the loaded reviews.
     """
 
+    #: Entry type IDs whose queries can be scoped to specific entry IDs.
+    SCOPABLE_ENTRY_TYPE_IDS = {'review', 'changedesc'}
+
     def __init__(self, review_request, request, last_visited=None,
-                 entry_classes=None):
+                 entry_classes=None, entry_ids=None, max_main_entries=None):
         """Initialize the data object.
 
         Args:
@@ -199,11 +220,25 @@ class ReviewRequestPageData(object):
                 The list of entry classes that should be used for data
                 generation. If not provided, all registered entry classes
                 will be used.
+
+            entry_ids (dict, optional):
+                A mapping of entry type IDs to sets of entry IDs that are
+                being requested. If all the requested types are review or
+                change description entries, queries will be limited to the
+                matching objects.
+
+            max_main_entries (int, optional):
+                The maximum number of main entries to fully load and render.
+                Older entries beyond this count will be represented by
+                :py:class:`DeferredEntry` stubs. If not provided, all entries
+                will be loaded.
         """
         self.review_request = review_request
         self.request = request
         self.last_visited = last_visited
         self.entry_classes = entry_classes or list(entry_registry)
+        self.entry_ids = entry_ids or {}
+        self.max_main_entries = max_main_entries
 
         # These are populated in query_data_pre_etag().
         self.reviews = []
@@ -215,6 +250,7 @@ class ReviewRequestPageData(object):
         self.latest_review_timestamp = None
         self.latest_changedesc_timestamp = None
         self.draft = None
+        self.is_partial = False
 
         # These are populated in query_data_post_etag().
         self.initial_status_updates = []
@@ -243,10 +279,14 @@ class ReviewRequestPageData(object):
             'dropped': 0,
             'verifying': 0,
         }
+        self.deferred_entries = []
+        self.deferred_entry_ids = {}
 
         self.status_updates_enabled = status_updates_feature.is_enabled(
             local_site=review_request.local_site)
 
+        self._has_all_comments = True
+        self._user_render_flags = None
         self._needs_draft = False
         self._needs_reviews = False
         self._needs_changedescs = False
@@ -284,10 +324,37 @@ class ReviewRequestPageData(object):
         if self.request.user.is_authenticated():
             reviews_query |= Q(user_id=self.request.user.pk)
 
+        # If the caller only wants specific reviews or change descriptions,
+        # we can limit the queries to those objects (along with their
+        # replies and status update reviews).
+        review_ids = None
+        changedesc_ids = None
+
+        if (self.entry_ids and
+            set(six.iterkeys(self.entry_ids)) <=
+            self.SCOPABLE_ENTRY_TYPE_IDS):
+            self.is_partial = True
+            review_ids = self._get_requested_pks('review')
+            changedesc_ids = self._get_requested_pks('changedesc')
+
         if self._needs_reviews or self._needs_status_updates:
+            reviews_qs = self.review_request.reviews.filter(reviews_query)
+
+            if self.is_partial:
+                scope_q = (Q(pk__in=review_ids) |
+                           Q(base_reply_to__in=review_ids))
+
+                if changedesc_ids:
+                    changedesc_key = 'status_update__change_description__in'
+                    scope_q |= (
+                        Q(**{changedesc_key: changedesc_ids}) |
+                        Q(**{'base_reply_to__%s' % changedesc_key:
+                             changedesc_ids}))
+
+                reviews_qs = reviews_qs.filter(scope_q)
+
             self.reviews = list(
-                self.review_request.reviews
-                .filter(reviews_query)
+                reviews_qs
                 .order_by('-timestamp')
                 .select_related('user', 'user__profile')
             )
@@ -299,10 +366,25 @@ class ReviewRequestPageData(object):
 
         # Get all the public ChangeDescriptions.
         if self._needs_changedescs:
-            self.changedescs = list(
-                self.review_request.changedescs.filter(public=True))
+            changedescs_qs = self.review_request.changedescs.filter(
+                public=True)
+
+            if self.is_partial:
+                changedescs_qs = changedescs_qs.filter(pk__in=changedesc_ids)
 
-        if self.changedescs:
+            self.changedescs = list(changedescs_qs)
+
+        if self.is_partial and self._needs_changedescs:
+            # Collapsing rules are based on the latest change description,
+            # which may not be in the subset we've loaded.
+            self.latest_changedesc_timestamp = (
+                self.review_request.changedescs
+                .filter(public=True)
+                .order_by('-timestamp')
+                .values_list('timestamp', flat=True)
+                .first()
+            )
+        elif self.changedescs:
             self.latest_changedesc_timestamp = self.changedescs[0].timestamp
 
         # Get the active draft (if any).
@@ -316,8 +398,14 @@ class ReviewRequestPageData(object):
 
         # Get all status updates.
         if self.status_updates_enabled and self._needs_status_updates:
+            status_updates_qs = self.review_request.status_updates
+
+            if self.is_partial:
+                status_updates_qs = status_updates_qs.filter(
+                    change_description__in=changedesc_ids)
+
             self.all_status_updates = list(
-                self.review_request.status_updates.order_by('summary'))
+                status_updates_qs.order_by('summary'))
 
     def query_data_post_etag(self):
         """Perform remaining queries for the page.
@@ -394,6 +482,17 @@ class ReviewRequestPageData(object):
 
         self.review_request_details = self.draft or self.review_request
 
+        # Figure out which of the older entries should only be stubbed out,
+        # so that we can avoid querying their comments below.
+        if self.max_main_entries and not self.is_partial:
+            self._build_deferred_entries()
+
+        # If we're only loading comments for some of the reviews, the file
+        # attachments and screenshots will need to fetch their own comments
+        # when asked.
+        has_all_comments = not (self.is_partial or self.deferred_entry_ids)
+        self._has_all_comments = has_all_comments
+
         # Get all the file attachments and screenshots.
         #
         # Note that we fetch both active and inactive file attachments and
@@ -409,8 +508,9 @@ class ReviewRequestPageData(object):
             self.file_attachments_by_id = \
                 self._build_id_map(self.all_file_attachments)
 
-            for attachment in self.all_file_attachments:
-                attachment._comments = []
+            if has_all_comments:
+                for attachment in self.all_file_attachments:
+                    attachment._comments = []
 
         if self._needs_screenshots or self._needs_reviews:
             self.active_screenshots = \
@@ -420,11 +520,21 @@ class ReviewRequestPageData(object):
                 list(self.review_request_details.get_inactive_screenshots()))
             self.screenshots_by_id = self._build_id_map(self.all_screenshots)
 
-            for screenshot in self.all_screenshots:
-                screenshot._comments = []
-
-        if self.reviews:
-            review_ids = self.reviews_by_id.keys()
+            if has_all_comments:
+                for screenshot in self.all_screenshots:
+                    screenshot._comments = []
+
+        if self.reviews or self.is_partial:
+            if self.deferred_entry_ids:
+                deferred_review_ids = self._get_deferred_review_ids()
+                review_ids = [
+                    review.pk
+                    for review in self.reviews
+                    if ((review.base_reply_to_id or review.pk) not in
+                        deferred_review_ids)
+                ]
+            else:
+                review_ids = list(six.iterkeys(self.reviews_by_id))
 
             for model, review_field_name, key, ordering in (
                 (GeneralComment,
@@ -485,30 +595,7 @@ class ReviewRequestPageData(object):
                     # setting some internal state on them.
                     assert obj.review_id in self.reviews_by_id
                     review = self.reviews_by_id[obj.review_id]
-                    comment.review_obj = review
-                    comment._review = review
-                    comment._review_request = self.review_request
-
-                    # If the comment has an associated object (such as a file
-                    # attachment) that we've already fetched, attach it to
-                    # prevent future queries.
-                    if isinstance(comment, FileAttachmentComment):
-                        attachment_id = comment.file_attachment_id
-                        f = self.file_attachments_by_id[attachment_id]
-                        comment.file_attachment = f
-                        f._comments.append(comment)
-
-                        diff_against_id = \
-                            comment.diff_against_file_attachment_id
-
-                        if diff_against_id is not None:
-                            f = self.file_attachments_by_id[diff_against_id]
-                            comment.diff_against_file_attachment = f
-                    elif isinstance(comment, ScreenshotComment):
-                        screenshot = \
-                            self.screenshots_by_id[comment.screenshot_id]
-                        comment.screenshot = screenshot
-                        screenshot._comments.append(comment)
+                    self._attach_comment_objects(comment, review)
 
                     # We've hit legacy database cases where there were entries
                     # that weren't a reply, and were just orphaned. Check and
@@ -529,18 +616,42 @@ class ReviewRequestPageData(object):
                                 review.pk, []).append(comment)
 
                     if review.public and comment.issue_opened:
-                        status_key = comment.issue_status_to_string(
-                            comment.issue_status)
-
-                        # Both "verifying" states get lumped together in the
-                        # same section in the issue summary table.
-                        if status_key in ('verifying-resolved',
-                                          'verifying-dropped'):
-                            status_key = 'verifying'
-
-                        self.issue_counts[status_key] += 1
-                        self.issue_counts['total'] += 1
-                        self.issues.append(comment)
+                        self._add_issue(comment)
+
+                if self.deferred_entry_ids:
+                    # Only the newest reviews have been fully loaded, but
+                    # the issue summary table on the page still needs to
+                    # reflect all issues on the review request. Fetch just
+                    # the comments with issues for the deferred reviews.
+                    #
+                    # Partial updates skip this, and only collect issues for
+                    # the reviews being rendered.
+                    q = (
+                        through.objects
+                        .filter(**{
+                            'review__review_request': self.review_request,
+                            'review__public': True,
+                            '%s__issue_opened' % comment_field_name: True,
+                        })
+                        .exclude(review__in=review_ids)
+                        .select_related()
+                    )
+
+                    if ordering:
+                        q = q.order_by(*ordering)
+
+                    for obj in q:
+                        comment = getattr(obj, comment_field_name)
+
+                        if comment.is_reply():
+                            continue
+
+                        comment._type = key
+                        comment._replies = []
+                        self._attach_comment_objects(
+                            comment,
+                            self.reviews_by_id.get(obj.review_id, obj.review))
+                        self._add_issue(comment)
 
         if self.review_request.created_with_history:
             pks = [diffset.pk for diffset in self.diffsets]
@@ -586,6 +697,8 @@ class ReviewRequestPageData(object):
         for entry in main_entries:
             entry.finalize()
 
+        main_entries += self.deferred_entries
+
         # Sort all the main entries (such as reviews and change descriptions)
         # by their timestamp. We don't sort the initial entries, which are
         # displayed in registration order.
@@ -596,6 +709,195 @@ class ReviewRequestPageData(object):
             'main': main_entries,
         }
 
+    def get_user_render_flags(self, user):
+        """Return flags affecting what a user sees when rendering entries.
+
+        These are used as part of the cache keys for rendered entries. They
+        are computed once and then reused for every entry on the page.
+
+        Args:
+            user (django.contrib.auth.models.User):
+                The user viewing the page.
+
+        Returns:
+            tuple:
+            The flags for the user.
+        """
+        if self._user_render_flags is None:
+            if user.is_authenticated():
+                review_request = self.review_request
+                local_site = review_request.local_site
+
+                self._user_render_flags = (
+                    'auth',
+                    review_request.is_mutable_by(user),
+                    user.is_superuser or bool(local_site and
+                                              local_site.is_mutable_by(user)),
+                    is_site_read_only_for(user),
+                )
+            else:
+                self._user_render_flags = ('anon',)
+
+        return self._user_render_flags
+
+    def is_entry_deferred(self, entry_type_id, entry_id):
+        """Return whether an entry has been deferred for later loading.
+
+        Args:
+            entry_type_id (unicode):
+                The ID of the entry type.
+
+            entry_id (unicode):
+                The ID of the entry.
+
+        Returns:
+            bool:
+            ``True`` if the entry is represented by a :py:class:`DeferredEntry`
+            stub on the page. ``False`` if it's fully loaded.
+        """
+        return entry_id in self.deferred_entry_ids.get(entry_type_id, ())
+
+    def _build_deferred_entries(self):
+        """Build stubs for main entries outside of the loading window.
+
+        Entry classes that support deferred loading provide information on
+        the entries they would build. The newest :py:attr:`max_main_entries`
+        of those will be loaded normally, and the rest will be represented by
+        :py:class:`DeferredEntry` stubs.
+        """
+        candidates = []
+
+        for entry_cls in self.entry_classes:
+            if entry_cls.entry_pos != entry_cls.ENTRY_POS_MAIN:
+                continue
+
+            entry_infos = entry_cls.get_deferrable_entry_info(self)
+
+            if entry_infos:
+                candidates += [
+                    (entry_cls, entry_info)
+                    for entry_info in entry_infos
+                ]
+
+        if len(candidates) <= self.max_main_entries:
+            return
+
+        candidates.sort(key=lambda item: item[1]['added_timestamp'],
+                        reverse=True)
+
+        for entry_cls, entry_info in candidates[self.max_main_entries:]:
+            self.deferred_entries.append(
+                DeferredEntry(data=self,
+                              entry_cls=entry_cls,
+                              **entry_info))
+            self.deferred_entry_ids.setdefault(
+                entry_cls.entry_type_id, set()).add(entry_info['entry_id'])
+
+    def _get_deferred_review_ids(self):
+        """Return the IDs of all reviews belonging to deferred entries.
+
+        This includes the reviews for deferred review entries and the status
+        update reviews for deferred change description entries.
+
+        Returns:
+            set of int:
+            The set of review IDs.
+        """
+        deferred_review_ids = set(
+            int(entry_id)
+            for entry_id in self.deferred_entry_ids.get('review', [])
+        )
+
+        for entry_id in self.deferred_entry_ids.get('changedesc', []):
+            deferred_review_ids.update(
+                status_update.review_id
+                for status_update in self.change_status_updates.get(
+                    int(entry_id), [])
+                if status_update.review_id is not None
+            )
+
+        return deferred_review_ids
+
+    def _attach_comment_objects(self, comment, review):
+        """Attach pre-fetched objects to a comment.
+
+        This short-circuits some object fetches for the comment by setting
+        some internal state on it.
+
+        Args:
+            comment (reviewboard.reviews.models.BaseComment):
+                The comment to attach objects to.
+
+            review (reviewboard.reviews.models.Review):
+                The review owning the comment.
+        """
+        comment.review_obj = review
+        comment._review = review
+        comment._review_request = self.review_request
+
+        # If the comment has an associated object (such as a file
+        # attachment) that we've already fetched, attach it to
+        # prevent future queries.
+        if isinstance(comment, FileAttachmentComment):
+            attachment_id = comment.file_attachment_id
+            f = self.file_attachments_by_id[attachment_id]
+            comment.file_attachment = f
+
+            if self._has_all_comments:
+                f._comments.append(comment)
+
+            diff_against_id = comment.diff_against_file_attachment_id
+
+            if diff_against_id is not None:
+                f = self.file_attachments_by_id[diff_against_id]
+                comment.diff_against_file_attachment = f
+        elif isinstance(comment, ScreenshotComment):
+            screenshot = self.screenshots_by_id[comment.screenshot_id]
+            comment.screenshot = screenshot
+
+            if self._has_all_comments:
+                screenshot._comments.append(comment)
+
+    def _add_issue(self, comment):
+        """Record a comment with an opened issue.
+
+        Args:
+            comment (reviewboard.reviews.models.BaseComment):
+                The comment with an opened issue.
+        """
+        status_key = comment.issue_status_to_string(comment.issue_status)
+
+        # Both "verifying" states get lumped together in the same section in
+        # the issue summary table.
+        if status_key in ('verifying-resolved', 'verifying-dropped'):
+            status_key = 'verifying'
+
+        self.issue_counts[status_key] += 1
+        self.issue_counts['total'] += 1
+        self.issues.append(comment)
+
+    def _get_requested_pks(self, entry_type_id):
+        """Return the requested database IDs for a type of entry.
+
+        Args:
+            entry_type_id (unicode):
+                The ID of the entry type.
+
+        Returns:
+            list of int:
+            The list of requested IDs. Any IDs that aren't valid integers
+            will be ignored.
+        """
+        pks = []
+
+        for entry_id in self.entry_ids.get(entry_type_id, []):
+            try:
+                pks.append(int(entry_id))
+            except ValueError:
+                pass
+
+        return pks
+
     def _build_id_map(self, objects):
         """Return an ID map from a list of objects.
 
@@ -728,6 +1030,14 @@ class BaseReviewRequestPageEntry(object):
     #: the entry, or disabled altogether.
     has_content = True
 
+    #: Whether the rendered HTML for the entry can be cached.
+    #:
+    #: If set, the rendered HTML will be cached using the key from
+    #: :py:meth:`get_render_cache_key`. Subclasses enabling this must ensure
+    #: that the key reflects everything that can change in the entry's
+    #: rendered output.
+    render_cacheable = False
+
     @classmethod
     def build_entries(cls, data):
         """Generate entry instances from review request page data.
@@ -762,6 +1072,32 @@ class BaseReviewRequestPageEntry(object):
         """
         return ''
 
+    @classmethod
+    def get_deferrable_entry_info(cls, data):
+        """Return information on entries that can be loaded on demand.
+
+        Entry types that support deferred loading should return information
+        on each entry that :py:meth:`build_entries` would generate, so that
+        older entries can be represented by a :py:class:`DeferredEntry` stub.
+        :py:meth:`build_entries` must then skip any entries for which
+        :py:meth:`ReviewRequestPageData.is_entry_deferred` returns ``True``.
+
+        By default, entries are never deferred.
+
+        Args:
+            data (ReviewRequestPageData):
+                The data used for the entries on the page. Comments will not
+                yet be available.
+
+        Returns:
+            list of dict:
+            A list of dictionaries containing ``entry_id``,
+            ``added_timestamp``, ``updated_timestamp``, ``avatar_user``, and
+            (optionally) ``title`` keys, or ``None`` if entries of this type
+            can't be deferred.
+        """
+        return None
+
     def __init__(self, data, entry_id, added_timestamp,
                  updated_timestamp=None, avatar_user=None):
         """Initialize the entry.
@@ -929,13 +1265,15 @@ class BaseReviewRequestPageEntry(object):
         """
         return {}
 
-    def render_to_string(self, request, context):
+    def render_to_string(self, request, context, require_content=True):
         """Render the entry to a string.
 
         If the entry doesn't have a template associated, or doesn't have
         any content (as determined by :py:attr:`has_content`), then this
         will return an empty string.
 
+        The rendered HTML may be cached (see :py:attr:`render_cacheable`).
+
         Args:
             request (django.http.HttpRequest):
                 The HTTP request from the client.
@@ -943,11 +1281,16 @@ class BaseReviewRequestPageEntry(object):
             context (django.template.RequestContext):
                 The existing template context on the page.
 
+            require_content (bool, optional):
+                Whether to skip rendering if :py:attr:`has_content` is
+                ``False``.
+
         Returns:
             unicode:
             The resulting HTML for the entry.
         """
-        if not self.template_name or not self.has_content:
+        if not self.template_name or (require_content and
+                                      not self.has_content):
             return ''
 
         user = request.user
@@ -975,14 +1318,118 @@ class BaseReviewRequestPageEntry(object):
             return ''
 
         try:
-            return render_to_string(template_name=self.template_name,
-                                    context=new_context,
-                                    request=request)
+            cache_key = self.get_render_cache_key(
+                request=request,
+                last_visited=last_visited,
+                entry_is_new=new_context['entry_is_new'])
+
+            if cache_key:
+                return cache_memoize(
+                    cache_key,
+                    lambda: render_to_string(template_name=self.template_name,
+                                             context=new_context,
+                                             request=request),
+                    large_data=True)
+            else:
+                return render_to_string(template_name=self.template_name,
+                                        context=new_context,
+                                        request=request)
         except Exception as e:
             logging.exception('Error rendering template for %s (ID=%s): %s',
                               self.__class__.__name__, self.entry_id, e)
             return ''
 
+    def get_render_cache_key(self, request, last_visited, entry_is_new):
+        """Return a cache key for the entry's rendered HTML.
+
+        The key is based on the entry's type, ID, and updated timestamp, the
+        active locale and timezone, and the flags that affect what the
+        viewing user sees in the entry. Subclasses can add to the key by
+        overriding :py:meth:`get_render_cache_key_parts`.
+
+        Entries won't be cached if :py:attr:`render_cacheable` is ``False``,
+        if the user has draft replies in the entry, or if there may be
+        activity in the entry that's new to the user.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            last_visited (datetime.datetime):
+                The last time the user visited the page, if known.
+
+            entry_is_new (bool):
+                Whether the entry is shown as new to the user.
+
+        Returns:
+            unicode:
+            The cache key, or ``None`` if the entry should not be cached.
+        """
+        if (not self.render_cacheable or
+            (last_visited is not None and
+             last_visited < self.updated_timestamp)):
+            return None
+
+        extra_parts = self.get_render_cache_key_parts(request)
+
+        if extra_parts is None:
+            return None
+
+        user = request.user
+        user_flags = self.data.get_user_render_flags(user)
+
+        if user.is_authenticated():
+            user_flags += (user.pk in self.get_author_ids(),)
+
+        return 'review-request-page-entry-%s' % '-'.join(
+            six.text_type(part)
+            for part in (
+                (self.entry_type_id,
+                 self.entry_id,
+                 self.updated_timestamp.isoformat(),
+                 self.collapsed,
+                 entry_is_new,
+                 get_language(),
+                 get_current_timezone_name(),
+                 settings.TEMPLATE_SERIAL) +
+                user_flags +
+                tuple(extra_parts)
+            )
+        )
+
+    def get_render_cache_key_parts(self, request):
+        """Return additional parts for the rendered HTML cache key.
+
+        Subclasses can override this to include state that can change
+        without affecting :py:attr:`updated_timestamp`.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+        Returns:
+            list:
+            A list of values to include in the key, or ``None`` if the entry
+            should not be cached for this request.
+        """
+        return []
+
+    def get_author_ids(self):
+        """Return the IDs of users who authored content in the entry.
+
+        These users may see additional controls in the entry (such as the
+        ability to change issue statuses), which is taken into account when
+        caching the entry's rendered HTML.
+
+        Returns:
+            set of int:
+            The IDs of the users.
+        """
+        if self.avatar_user is not None:
+            return {self.avatar_user.pk}
+
+        return set()
+
     def finalize(self):
         """Perform final computations after all comments have been added."""
         pass
@@ -1040,6 +1487,42 @@ class ReviewEntryMixin(object):
             )
         )
 
+    def get_review_render_cache_key_parts(self, reviews, comments):
+        """Return cache key parts for the reviews shown in an entry.
+
+        Args:
+            reviews (list of reviewboard.reviews.models.review.Review):
+                The reviews shown in the entry.
+
+            comments (list of reviewboard.reviews.models.BaseComment):
+                The comments shown in the entry.
+
+        Returns:
+            list:
+            The cache key parts, or ``None`` if the entry should not be cached
+            due to draft replies.
+        """
+        data = self.data
+
+        for review in reviews:
+            if (data.draft_body_top_replies.get(review.pk) or
+                data.draft_body_bottom_replies.get(review.pk) or
+                data.draft_reply_comments.get(review.pk)):
+                return None
+
+        # Comments are re-saved with a new timestamp when their issue status
+        # changes, which doesn't otherwise affect the entry's timestamps.
+        return [
+            ','.join(
+                '%s:%s' % (review.pk, review.ship_it)
+                for review in reviews
+            ),
+            get_latest_timestamp(
+                comment.timestamp
+                for comment in comments
+            ),
+        ]
+
     def serialize_review_js_model_data(self, review):
         """Serialize information on a review for JavaScript models.
 
@@ -1104,6 +1587,7 @@ class StatusUpdatesEntryMixin(DiffCommentsSerializerMixin, ReviewEntryMixin):
 
     needs_reviews = True
     needs_status_updates = True
+    render_cacheable = True
 
     @classmethod
     def build_etag_data(cls, data):
@@ -1181,6 +1665,57 @@ class StatusUpdatesEntryMixin(DiffCommentsSerializerMixin, ReviewEntryMixin):
 
         return True
 
+    def get_render_cache_key_parts(self, request):
+        """Return additional parts for the rendered HTML cache key.
+
+        This includes the state of each status update and the state of their
+        reviews.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+        Returns:
+            list:
+            A list of values to include in the key, or ``None`` if the entry
+            should not be cached for this request.
+        """
+        status_updates = getattr(self, 'status_updates', [])
+        parts = self.get_review_render_cache_key_parts(
+            reviews=[
+                update.review
+                for update in status_updates
+                if update.review_id is not None
+            ],
+            comments=chain.from_iterable(
+                chain.from_iterable(six.itervalues(update.comments))
+                for update in status_updates
+            ))
+
+        if parts is not None:
+            parts.append(','.join(
+                '%s:%s' % (update.pk, update.effective_state)
+                for update in status_updates
+            ))
+
+        return parts
+
+    def get_author_ids(self):
+        """Return the IDs of users who authored content in the entry.
+
+        Returns:
+            set of int:
+            The IDs of the users.
+        """
+        author_ids = super(StatusUpdatesEntryMixin, self).get_author_ids()
+        author_ids.update(
+            update.review.user_id
+            for update in getattr(self, 'status_updates', [])
+            if update.review_id is not None
+        )
+
+        return author_ids
+
     def add_update(self, update):
         """Add a status update to the entry.
 
@@ -1518,6 +2053,7 @@ class ReviewEntry(ReviewEntryMixin, DiffCommentsSerializerMixin,
     entry_type_id = 'review'
 
     needs_reviews = True
+    render_cacheable = True
 
     template_name = 'reviews/entries/review.html'
     js_model_class = 'RB.ReviewRequestPage.ReviewEntry'
@@ -1535,11 +2071,9 @@ class ReviewEntry(ReviewEntryMixin, DiffCommentsSerializerMixin,
             ReviewEntry:
             A review entry to include on the page.
         """
-        for review in data.reviews:
-            if (not review.public or
-                review.is_reply() or
-                (data.status_updates_enabled and
-                 hasattr(review, 'status_update'))):
+        for review in cls._iter_entry_reviews(data):
+            if data.is_entry_deferred(cls.entry_type_id,
+                                      six.text_type(review.pk)):
                 continue
 
             entry = cls(data=data,
@@ -1550,6 +2084,49 @@ class ReviewEntry(ReviewEntryMixin, DiffCommentsSerializerMixin,
 
             yield entry
 
+    @classmethod
+    def get_deferrable_entry_info(cls, data):
+        """Return information on review entries that can be loaded on demand.
+
+        Args:
+            data (ReviewRequestPageData):
+                The data used for the entries on the page.
+
+        Returns:
+            list of dict:
+            Information on each review entry.
+        """
+        return [
+            {
+                'entry_id': six.text_type(review.pk),
+                'added_timestamp': review.timestamp,
+                'updated_timestamp':
+                    data.latest_timestamps_by_review_id.get(review.pk,
+                                                            review.timestamp),
+                'avatar_user': review.user,
+            }
+            for review in cls._iter_entry_reviews(data)
+        ]
+
+    @classmethod
+    def _iter_entry_reviews(cls, data):
+        """Iterate through the reviews that should be shown as entries.
+
+        Args:
+            data (ReviewRequestPageData):
+                The data used for the entries on the page.
+
+        Yields:
+            reviewboard.reviews.models.Review:
+            Each published, top-level review not belonging to a status update.
+        """
+        for review in data.reviews:
+            if (review.public and
+                not review.is_reply() and
+                not (data.status_updates_enabled and
+                     hasattr(review, 'status_update'))):
+                yield review
+
     def __init__(self, data, review):
         """Initialize the entry.
 
@@ -1636,6 +2213,24 @@ class ReviewEntry(ReviewEntryMixin, DiffCommentsSerializerMixin,
                                         BaseComment.VERIFYING_DROPPED):
                 self.issue_open_count += 1
 
+    def get_render_cache_key_parts(self, request):
+        """Return additional parts for the rendered HTML cache key.
+
+        This includes the state of the review and its comments.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+        Returns:
+            list:
+            A list of values to include in the key, or ``None`` if the entry
+            should not be cached for this request.
+        """
+        return self.get_review_render_cache_key_parts(
+            reviews=[self.review],
+            comments=chain.from_iterable(six.itervalues(self.comments)))
+
     def get_js_model_data(self):
         """Return data to pass to the JavaScript Model during instantiation.
 
@@ -1705,6 +2300,10 @@ class ChangeEntry(StatusUpdatesEntryMixin, BaseReviewRequestPageEntry):
             A change entry to include on the page.
         """
         for changedesc in data.changedescs:
+            if data.is_entry_deferred(cls.entry_type_id,
+                                      six.text_type(changedesc.pk)):
+                continue
+
             entry = cls(data=data,
                         changedesc=changedesc)
             entry.populate_status_updates(
@@ -1712,6 +2311,38 @@ class ChangeEntry(StatusUpdatesEntryMixin, BaseReviewRequestPageEntry):
 
             yield entry
 
+    @classmethod
+    def get_deferrable_entry_info(cls, data):
+        """Return information on change entries that can be loaded on demand.
+
+        Args:
+            data (ReviewRequestPageData):
+                The data used for the entries on the page.
+
+        Returns:
+            list of dict:
+            Information on each change entry.
+        """
+        review_request = data.review_request
+        entry_infos = []
+
+        for changedesc in data.changedescs:
+            timestamps = [changedesc.timestamp] + [
+                status_update.timestamp
+                for status_update in data.change_status_updates.get(
+                    changedesc.pk, [])
+            ]
+
+            entry_infos.append({
+                'entry_id': six.text_type(changedesc.pk),
+                'added_timestamp': changedesc.timestamp,
+                'updated_timestamp': get_latest_timestamp(timestamps),
+                'avatar_user': changedesc.get_user(review_request),
+                'title': _('Review request changed'),
+            })
+
+        return entry_infos
+
     def __init__(self, data, changedesc):
         """Initialize the entry.
 
@@ -1880,6 +2511,95 @@ class ChangeEntry(StatusUpdatesEntryMixin, BaseReviewRequestPageEntry):
         return model_data
 
 
+class DeferredEntry(BaseReviewRequestPageEntry):
+    """A stub for an entry that will be loaded on demand.
+
+    Long-lived review requests can have hundreds of reviews and changes.
+    Rather than querying and rendering all of them, the page only fully loads
+    the newest entries. Older entries are represented by collapsed stubs of
+    this type, which are replaced with the real entry through
+    :py:class:`~reviewboard.reviews.views.ReviewRequestUpdatesView` when
+    expanded.
+
+    These are never registered in the entry registry.
+
+    Attributes:
+        entry_cls (type):
+            The entry class for the real entry.
+
+        title (unicode):
+            The title to show for the collapsed entry. If ``None``, the
+            avatar user's name will be shown.
+    """
+
+    template_name = 'reviews/entries/deferred.html'
+
+    def __init__(self, data, entry_cls, entry_id, added_timestamp,
+                 updated_timestamp=None, avatar_user=None, title=None):
+        """Initialize the entry.
+
+        Args:
+            data (ReviewRequestPageData):
+                Pre-queried data for the review request page.
+
+            entry_cls (type):
+                The entry class for the real entry.
+
+            entry_id (unicode):
+                The ID of the real entry.
+
+            added_timestamp (datetime.datetime):
+                The timestamp of the real entry.
+
+            updated_timestamp (datetime.datetime, optional):
+                The timestamp when the real entry was last updated.
+
+            avatar_user (django.contrib.auth.models.User, optional):
+                The user to display an avatar for.
+
+            title (unicode, optional):
+                The title to show for the collapsed entry.
+        """
+        super(DeferredEntry, self).__init__(
+            data=data,
+            entry_id=entry_id,
+            added_timestamp=added_timestamp,
+            updated_timestamp=updated_timestamp,
+            avatar_user=avatar_user)
+
+        self.entry_cls = entry_cls
+        self.entry_type_id = entry_cls.entry_type_id
+        self.title = title
+
+    def calculate_collapsed(self):
+        """Calculate whether the entry should currently be collapsed.
+
+        Deferred entries are always collapsed, as their contents haven't been
+        loaded.
+
+        Returns:
+            bool:
+            ``True``, always.
+        """
+        return True
+
+    def get_js_model_data(self):
+        """Return data to pass to the JavaScript Model during instantiation.
+
+        This provides the JavaScript classes for the real entry, so that the
+        page can construct them once the entry has been loaded.
+
+        Returns:
+            dict:
+            A dictionary of attributes to pass to the Model instance.
+        """
+        return {
+            'deferred': True,
+            'deferredModelClass': self.entry_cls.js_model_class,
+            'deferredViewClass': self.entry_cls.js_view_class,
+        }
+
+
 class ReviewRequestPageEntryRegistry(OrderedRegistry):
     """A registry for types of entries on the review request page."""
 
@@ -1924,12 +2644,16 @@ class ReviewRequestPageEntryRegistry(OrderedRegistry):
             list of BaseReviewRequestPageEntry:
             The list of default entry types.
         """
-        return [
-            ReviewRequestEntry,
-            InitialStatusUpdatesEntry,
-            ChangeEntry,
-            ReviewEntry,
-        ]
+        return list(BUILTIN_ENTRY_CLASSES)
+
+
+#: The review request page entry types provided by Review Board.
+BUILTIN_ENTRY_CLASSES = (
+    ReviewRequestEntry,
+    InitialStatusUpdatesEntry,
+    ChangeEntry,
+    ReviewEntry,
+)
 
 
 entry_registry = ReviewRequestPageEntryRegistry()
@@ -0,0 +1,197 @@
+"""Management command to generate a large dataset for load testing."""
+
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.utils import six
+from django.utils.translation import ugettext as _
+from djblets.util.compat.django.core.management.base import BaseCommand
+
+from reviewboard.admin.activity_counts import (activity_counts_enabled,
+                                               rebuild_activity_counts)
+from reviewboard.scmtools.models import Tool
+from reviewboard.testing.bulk_fixtures import (BulkFixtureGenerator,
+                                               Distribution)
+
+
+class Command(BaseCommand):
+    """Management command to generate a large dataset for load testing.
+
+    This inserts users, review groups, Local Sites, review requests, diffs,
+    reviews and comments in bulk, and can generate millions of review
+    requests in minutes. The data is deterministic for a given seed.
+
+    This is meant for development and load testing databases only. Since
+    rows are inserted directly, no signals are emitted and the search index
+    is not updated. The generated diffs can't be viewed, since the
+    repositories don't exist.
+    """
+
+    help = _('Generates a large dataset for load testing.')
+
+    DISTRIBUTION_HELP = _(
+        'Specified as N, MIN:MAX (uniform) or MIN:MAX:MODE (triangular, '
+        'with MODE being the most common value).')
+
+    def add_arguments(self, parser):
+        """Add arguments to the command.
+
+        Args:
+            parser (argparse.ArgumentParser):
+                The argument parser for the command.
+        """
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help=_('The number of users to create.'))
+        parser.add_argument(
+            '--review-requests',
+            type=int,
+            default=10000,
+            dest='review_requests',
+            help=_('The number of review requests to create.'))
+        parser.add_argument(
+            '--groups',
+            type=int,
+            default=100,
+            help=_('The number of review groups to create.'))
+        parser.add_argument(
+            '--local-sites',
+            type=int,
+            default=0,
+            dest='local_sites',
+            help=_('The number of Local Sites to create. Users, groups and '
+                   'review requests are spread evenly across the Local '
+                   'Sites and the global site.'))
+        parser.add_argument(
+            '--group-size',
+            default='5:50:10',
+            dest='group_sizes',
+            help=(_('The number of users in each review group. %s')
+                  % self.DISTRIBUTION_HELP))
+        parser.add_argument(
+            '--diffs',
+            default='1:3:1',
+            help=(_('The number of diff revisions on each review request. %s')
+                  % self.DISTRIBUTION_HELP))
+        parser.add_argument(
+            '--files-per-diff',
+            default='1:20:3',
+            dest='files_per_diff',
+            help=(_('The number of files in each diff revision. %s')
+                  % self.DISTRIBUTION_HELP))
+        parser.add_argument(
+            '--diff-size',
+            default='10:500:50',
+            dest='diff_sizes',
+            help=(_('The number of changed lines in each file. %s')
+                  % self.DISTRIBUTION_HELP))
+        parser.add_argument(
+            '--reviews',
+            default='0:6:1',
+            help=(_('The number of reviews on each published review '
+                    'request. %s')
+                  % self.DISTRIBUTION_HELP))
+        parser.add_argument(
+            '--comments',
+            default='0:10:2',
+            help=(_('The number of diff comments in each review. %s')
+                  % self.DISTRIBUTION_HELP))
+        parser.add_argument(
+            '--unique-diffs',
+            type=int,
+            default=1000,
+            dest='unique_diffs',
+            help=_('The number of unique file diffs to generate. Diffs are '
+                   'deduplicated by content, so this controls how much '
+                   'diff data is stored.'))
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help=_('The seed for generating data.'))
+        parser.add_argument(
+            '--prefix',
+            default=None,
+            help=_('The prefix for the names of created users, groups, '
+                   'Local Sites and repositories. This must be different '
+                   'for each run against the same database. Defaults to '
+                   '"load<seed>".'))
+        parser.add_argument(
+            '-p',
+            '--password',
+            default='test1',
+            help=_('The login password for created users.'))
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            dest='batch_size',
+            help=_('The number of review requests to create in each '
+                   'transaction.'))
+
+    def handle(self, **options):
+        """Handle the command.
+
+        Args:
+            **options (dict):
+                Options parsed on the command line.
+
+        Raises:
+            django.core.management.base.CommandError:
+                The options were invalid, or the Git tool isn't registered.
+        """
+        # Don't allow queries to be stored.
+        settings.DEBUG = False
+
+        num_review_requests = options['review_requests']
+
+        def _on_progress(count):
+            self.stdout.write(
+                _('Created %(count)d of %(total)d review requests.')
+                % {
+                    'count': count,
+                    'total': num_review_requests,
+                })
+
+        try:
+            generator = BulkFixtureGenerator(
+                num_users=options['users'],
+                num_review_requests=num_review_requests,
+                num_groups=options['groups'],
+                num_local_sites=options['local_sites'],
+                group_sizes=Distribution.parse(options['group_sizes']),
+                diffs_per_review_request=Distribution.parse(options['diffs']),
+                files_per_diff=Distribution.parse(options['files_per_diff']),
+                diff_sizes=Distribution.parse(options['diff_sizes']),
+                reviews_per_review_request=Distribution.parse(
+                    options['reviews']),
+                comments_per_review=Distribution.parse(options['comments']),
+                num_unique_diffs=options['unique_diffs'],
+                seed=options['seed'],
+                name_prefix=options['prefix'],
+                password=options['password'],
+                batch_size=options['batch_size'],
+                progress_callback=_on_progress)
+        except ValueError as e:
+            raise CommandError(six.text_type(e))
+
+        try:
+            counts = generator.generate()
+        except Tool.DoesNotExist:
+            raise CommandError(_('The Git tool must be registered to '
+                                 'generate data.'))
+
+        if activity_counts_enabled():
+            # Activity counts aren't updated for bulk inserts.
+            rebuild_activity_counts()
+
+        for name, count in sorted(six.iteritems(counts)):
+            self.stdout.write(
+                _('%(name)s: %(count)d created')
+                % {
+                    'count': count,
+                    'name': name,
+                })
@@ -1,8 +1,73 @@
 """Management command to manage the search index."""
 
+from __future__ import unicode_literals
+
+import multiprocessing
+from functools import partial
+
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.utils.translation import ugettext as _
 from djblets.util.compat.django.core.management.base import BaseCommand
+from haystack import connections
+from haystack.constants import DEFAULT_ALIAS
+
+from reviewboard.admin.management.chunked_tasks import (get_pk_chunks,
+                                                        read_checkpoint,
+                                                        remove_checkpoint,
+                                                        run_chunked_tasks,
+                                                        write_checkpoint)
+from reviewboard.search import search_backend_registry
+from reviewboard.search.indexing import (get_index_for_model_label,
+                                         get_index_model_label,
+                                         index_chunk)
+
+
+#: The lock used by worker processes to serialize writes to the index.
+_write_lock = None
+
+
+def _init_worker(write_lock):
+    """Initialize a worker process for parallel indexing.
+
+    Args:
+        write_lock (multiprocessing.Lock):
+            The lock to hold while writing to the index, or ``None`` if the
+            backend supports concurrent writers.
+    """
+    global _write_lock
+
+    _write_lock = write_lock
+
+
+def _index_chunk_in_worker(label, start_pk, end_pk):
+    """Index a chunk of objects in a worker process.
+
+    Args:
+        label (unicode):
+            The label of the model to index.
+
+        start_pk (int):
+            The first primary key in the chunk.
+
+        end_pk (int):
+            The primary key ending the chunk (exclusive).
+
+    Returns:
+        tuple:
+        The arguments, along with the number of objects indexed, so the
+        parent process can record the chunk as completed.
+    """
+    connection = connections[DEFAULT_ALIAS]
+    index = get_index_for_model_label(connection, label)
+    num_indexed = index_chunk(index=index,
+                              backend=connection.get_backend(),
+                              start_pk=start_pk,
+                              end_pk=end_pk,
+                              using=DEFAULT_ALIAS,
+                              write_lock=_write_lock)
+
+    return label, start_pk, end_pk, num_indexed
 
 
 class Command(BaseCommand):
@@ -24,6 +89,27 @@ class Command(BaseCommand):
             dest='rebuild',
             default=False,
             help='Rebuild the database index')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help='Index all objects in chunks split across this many '
+                 'processes, rather than using Haystack\'s indexing '
+                 'commands')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='The number of primary keys to index in each chunk when '
+                 'using --workers')
+        parser.add_argument(
+            '--checkpoint',
+            metavar='FILE',
+            default=None,
+            help='A file for recording completed chunks when using '
+                 '--workers. If the file exists, indexing resumes after '
+                 'the chunks it lists. It is removed once indexing '
+                 'completes.')
 
     def handle(self, **options):
         """Handle the command.
@@ -31,9 +117,151 @@ class Command(BaseCommand):
         Args:
             **options (dict):
                 Options parsed on the command line.
+
+        Raises:
+            django.core.management.CommandError:
+                There was an error with the provided options.
         """
-        # Call the appropriate Haystack command to refresh the search index.
-        if options['rebuild']:
+        workers = options['workers']
+
+        if workers < 0:
+            raise CommandError(_('--workers must be 0 or higher.'))
+
+        if workers:
+            self._index_in_chunks(workers=workers,
+                                  chunk_size=options['chunk_size'],
+                                  checkpoint_path=options['checkpoint'],
+                                  rebuild=options['rebuild'])
+        elif options['rebuild']:
+            # Call the appropriate Haystack command to refresh the search
+            # index.
             call_command('rebuild_index', interactive=False)
         else:
             call_command('update_index')
+
+    def _index_in_chunks(self, workers, chunk_size, checkpoint_path,
+                         rebuild):
+        """Index all objects in chunks of primary keys.
+
+        Args:
+            workers (int):
+                The number of worker processes to use. If 1, chunks will be
+                indexed in this process.
+
+            chunk_size (int):
+                The number of primary keys in each chunk.
+
+            checkpoint_path (unicode):
+                The path to the checkpoint file, if any.
+
+            rebuild (bool):
+                Whether to clear the index before indexing. This is skipped
+                when resuming from a checkpoint.
+
+        Raises:
+            django.core.management.CommandError:
+                There was an error with the provided options.
+        """
+        if chunk_size < 1:
+            raise CommandError(_('--chunk-size must be 1 or higher.'))
+
+        search_backend = search_backend_registry.current_backend
+
+        if search_backend is None:
+            raise CommandError(_('Search is not enabled.'))
+
+        completed = {}
+        checkpoint = read_checkpoint(checkpoint_path)
+
+        if checkpoint:
+            # The chunks must line up with the ones already completed.
+            chunk_size = checkpoint['chunk_size']
+            completed = checkpoint['completed']
+
+            self.stdout.write(_('Resuming from checkpoint %s')
+                              % checkpoint_path)
+        elif rebuild:
+            connections[DEFAULT_ALIAS].get_backend().clear()
+
+        connection = connections[DEFAULT_ALIAS]
+        unified_index = connection.get_unified_index()
+        tasks = []
+        self._chunk_size = chunk_size
+        self._num_completed = 0
+
+        for model in unified_index.get_indexed_models():
+            label = get_index_model_label(model)
+            completed_starts = set(
+                start_pk
+                for start_pk, end_pk in completed.get(label, [])
+            )
+
+            tasks += [
+                (label, start_pk, end_pk)
+                for start_pk, end_pk in get_pk_chunks(
+                    unified_index.get_index(model).index_queryset(
+                        using=DEFAULT_ALIAS),
+                    chunk_size)
+                if start_pk not in completed_starts
+            ]
+
+        if not tasks:
+            self.stdout.write(_('Nothing to index.'))
+        else:
+            if workers == 1 or search_backend.supports_concurrent_writes:
+                write_lock = None
+            else:
+                write_lock = multiprocessing.Lock()
+
+            run_chunked_tasks(
+                func=_index_chunk_in_worker,
+                tasks=tasks,
+                workers=workers,
+                on_result=partial(self._record_chunk,
+                                  completed=completed,
+                                  checkpoint_path=checkpoint_path,
+                                  num_tasks=len(tasks)),
+                initializer=_init_worker,
+                initargs=(write_lock,))
+
+        remove_checkpoint(checkpoint_path)
+
+    def _record_chunk(self, result, completed, checkpoint_path, num_tasks):
+        """Record a completed chunk.
+
+        Args:
+            result (tuple):
+                The result from :py:func:`_index_chunk_in_worker`.
+
+            completed (dict):
+                A mapping of model labels to completed chunks, which will be
+                updated.
+
+            checkpoint_path (unicode):
+                The path to the checkpoint file, if any.
+
+            num_tasks (int):
+                The total number of chunks being indexed in this run.
+        """
+        label, start_pk, end_pk, num_indexed = result
+
+        completed.setdefault(label, []).append([start_pk, end_pk])
+        self._num_completed += 1
+
+        write_checkpoint(checkpoint_path, {
+            'chunk_size': self._chunk_size,
+            'completed': completed,
+        })
+
+        self.stdout.write(
+            _('Indexed %(num_indexed)s %(label)s objects with IDs '
+              '%(start_pk)s-%(end_pk)s (%(num_completed)s/%(num_tasks)s '
+              'chunks)')
+            % {
+                'end_pk': end_pk - 1,
+                'label': label,
+                'num_completed': self._num_completed,
+                'num_indexed': num_indexed,
+                'num_tasks': num_tasks,
+                'start_pk': start_pk,
+            })
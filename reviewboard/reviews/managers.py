@@ -4,10 +4,10 @@ import logging
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import connections, router, transaction
-from django.db.models import Manager, Q
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F, Manager, Q, Sum
 from django.db.models.query import QuerySet
-from django.utils import six
+from django.utils import six, timezone
 from djblets.db.managers import ConcurrencyManager
 
 from reviewboard.diffviewer.models import DiffSetHistory
@@ -15,6 +15,138 @@ from reviewboard.scmtools.errors import ChangeNumberInUseError
 from reviewboard.scmtools.models import Repository
 
 
+class DailyActivityCountManager(Manager):
+    """A manager for DailyActivityCount models."""
+
+    def add(self, name, date, local_site_id, delta):
+        """Add to a count.
+
+        Args:
+            name (unicode):
+                The name of the counter.
+
+            date (datetime.date):
+                The day being counted, or ``None`` for counters that only
+                track totals.
+
+            local_site_id (int):
+                The ID of the Local Site the counted objects belong to, if
+                any.
+
+            delta (int):
+                The amount to add. This may be negative.
+        """
+        if not self._add_to_first_row(name, date, local_site_id, delta):
+            try:
+                with transaction.atomic():
+                    self.create(name=name,
+                                date=date,
+                                local_site_id=local_site_id,
+                                count=delta)
+            except IntegrityError:
+                # Another process created the row first.
+                if not self._add_to_first_row(name, date, local_site_id,
+                                              delta):
+                    raise
+
+    def get_totals(self, names, local_site=None):
+        """Return the totals for one or more counters.
+
+        Args:
+            names (list of unicode):
+                The names of the counters.
+
+            local_site (reviewboard.site.models.LocalSite, optional):
+                A Local Site to limit the totals to. If not provided, the
+                totals will cover all Local Sites.
+
+        Returns:
+            dict:
+            A dictionary mapping each counter name to its total.
+        """
+        q = self.filter(name__in=names)
+
+        if local_site is not None:
+            q = q.filter(local_site=local_site)
+
+        totals = dict.fromkeys(names, 0)
+        totals.update(
+            q.values_list('name')
+            .annotate(total=Sum('count'))
+            .order_by())
+
+        return totals
+
+    def get_daily_totals(self, name, start_date=None, end_date=None):
+        """Return the daily totals for a counter.
+
+        Days without any objects are left out.
+
+        Args:
+            name (unicode):
+                The name of the counter.
+
+            start_date (datetime.date, optional):
+                The first day to include.
+
+            end_date (datetime.date, optional):
+                The last day to include.
+
+        Returns:
+            list of tuple:
+            A list of ``(date, total)`` tuples, ordered by date.
+        """
+        q = self.filter(name=name, date__isnull=False)
+
+        if start_date is not None:
+            q = q.filter(date__gte=start_date)
+
+        if end_date is not None:
+            q = q.filter(date__lte=end_date)
+
+        return [
+            (date, total)
+            for date, total in (q.values_list('date')
+                                .annotate(total=Sum('count'))
+                                .order_by('date'))
+            if total > 0
+        ]
+
+    def _add_to_first_row(self, name, date, local_site_id, delta):
+        """Add to the first row for a count, if one exists.
+
+        Only one row is ever updated. Rows with no day or Local Site aren't
+        covered by the unique constraint, so duplicates may still exist, and
+        updating all of them would over-count.
+
+        Args:
+            name (unicode):
+                The name of the counter.
+
+            date (datetime.date):
+                The day being counted.
+
+            local_site_id (int):
+                The ID of the Local Site the counted objects belong to.
+
+            delta (int):
+                The amount to add.
+
+        Returns:
+            bool:
+            Whether a row was updated.
+        """
+        pks = list(
+            self.filter(name=name, date=date, local_site=local_site_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:1])
+
+        if pks:
+            self.filter(pk=pks[0]).update(count=F('count') + delta)
+
+        return bool(pks)
+
+
 class DefaultReviewerManager(Manager):
     """A manager for DefaultReviewer models."""
 
@@ -574,6 +706,47 @@ class ReviewRequestManager(ConcurrencyManager):
                                           Q(local_site=local_site))
 
 
+class ReviewRequestPageVersionManager(Manager):
+    """A manager for ReviewRequestPageVersion models."""
+
+    def get_for_review_request(self, review_request):
+        """Return the page version for a review request.
+
+        If the review request does not yet have a page version, one will be
+        created.
+
+        Args:
+            review_request (reviewboard.reviews.models.ReviewRequest):
+                The review request.
+
+        Returns:
+            reviewboard.reviews.models.ReviewRequestPageVersion:
+            The page version for the review request.
+        """
+        page_version, is_new = self.get_or_create(
+            review_request=review_request)
+
+        return page_version
+
+    def bump(self, review_request_ids):
+        """Bump the page versions for one or more review requests.
+
+        This only updates existing page versions. A page version is created
+        the first time a review request page is viewed, so review requests
+        without one have no cached state to invalidate.
+
+        Args:
+            review_request_ids (list of int):
+                The IDs of the review requests whose pages have changed.
+        """
+        review_request_ids = set(review_request_ids) - {None}
+
+        if review_request_ids:
+            self.filter(review_request__in=review_request_ids).update(
+                version=F('version') + 1,
+                last_updated=timezone.now())
+
+
 class ReviewManager(ConcurrencyManager):
     """A manager for Review models.
 
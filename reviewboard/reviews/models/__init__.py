@@ -1,12 +1,15 @@
 from __future__ import unicode_literals
 
 from reviewboard.reviews.models.base_comment import BaseComment
+from reviewboard.reviews.models.daily_activity_count import \
+    DailyActivityCount
 from reviewboard.reviews.models.default_reviewer import DefaultReviewer
 from reviewboard.reviews.models.diff_comment import Comment
 from reviewboard.reviews.models.file_attachment_comment import \
     FileAttachmentComment
 from reviewboard.reviews.models.general_comment import GeneralComment
 from reviewboard.reviews.models.group import Group
+from reviewboard.reviews.models.page_version import ReviewRequestPageVersion
 from reviewboard.reviews.models.review import Review
 from reviewboard.reviews.models.review_request import ReviewRequest
 from reviewboard.reviews.models.review_request_draft import ReviewRequestDraft
@@ -18,6 +21,7 @@ from reviewboard.reviews.models.status_update import StatusUpdate
 __all__ = [
     'BaseComment',
     'Comment',
+    'DailyActivityCount',
     'DefaultReviewer',
     'FileAttachmentComment',
     'GeneralComment',
@@ -25,6 +29,7 @@ __all__ = [
     'Review',
     'ReviewRequest',
     'ReviewRequestDraft',
+    'ReviewRequestPageVersion',
     'Screenshot',
     'ScreenshotComment',
     'StatusUpdate',
@@ -0,0 +1,52 @@
+"""Definitions for the DailyActivityCount model."""
+
+from __future__ import unicode_literals
+
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
+from reviewboard.reviews.managers import DailyActivityCountManager
+from reviewboard.site.models import LocalSite
+
+
+class DailyActivityCount(models.Model):
+    """A rolled-up count of objects, used by the administration dashboard.
+
+    Each row holds a change in the number of objects of some kind (such as
+    reviews created on a given day). The count for a day or a total is the
+    sum of all matching rows. There's normally one row for each counter,
+    day and Local Site.
+
+    Counts are maintained by :py:mod:`reviewboard.admin.activity_counts`.
+    """
+
+    #: The name of the counter, such as ``reviews``.
+    name = models.CharField(_('Name'), max_length=64)
+
+    #: The day being counted.
+    #:
+    #: This is ``None`` for counters that only track totals.
+    date = models.DateField(_('Date'), blank=True, null=True)
+
+    #: The Local Site the counted objects belong to.
+    #:
+    #: This is only set for counters of objects that store a Local Site
+    #: directly.
+    local_site = models.ForeignKey(LocalSite,
+                                   blank=True,
+                                   null=True,
+                                   related_name='+',
+                                   verbose_name=_('Local Site'))
+
+    #: The number of objects.
+    count = models.IntegerField(_('Count'), default=0)
+
+    objects = DailyActivityCountManager()
+
+    class Meta:
+        app_label = 'reviews'
+        db_table = 'reviews_dailyactivitycount'
+        index_together = [('name', 'date')]
+        unique_together = [('name', 'date', 'local_site')]
+        verbose_name = _('Daily Activity Count')
+        verbose_name_plural = _('Daily Activity Counts')
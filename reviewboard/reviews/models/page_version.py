@@ -0,0 +1,42 @@
+"""Definitions for the ReviewRequestPageVersion model."""
+
+from __future__ import unicode_literals
+
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from reviewboard.reviews.managers import ReviewRequestPageVersionManager
+from reviewboard.reviews.models.review_request import ReviewRequest
+
+
+class ReviewRequestPageVersion(models.Model):
+    """The version of the content shown on a review request page.
+
+    This is bumped whenever something that's visible on the review request
+    page changes, such as a review being published, a comment's issue being
+    resolved, or a status update being posted. It allows the review request
+    page to compute an ETag with a single lookup, instead of querying all of
+    the data shown on the page.
+    """
+
+    #: The review request this version applies to.
+    review_request = models.OneToOneField(
+        ReviewRequest,
+        related_name='page_version',
+        verbose_name=_('Review Request'))
+
+    #: The version of the page content.
+    version = models.PositiveIntegerField(_('Version'), default=0)
+
+    #: The date and time when the version was last bumped.
+    last_updated = models.DateTimeField(_('Last Updated'),
+                                        default=timezone.now)
+
+    objects = ReviewRequestPageVersionManager()
+
+    class Meta:
+        app_label = 'reviews'
+        db_table = 'reviews_reviewrequestpageversion'
+        verbose_name = _('Review Request Page Version')
+        verbose_name_plural = _('Review Request Page Versions')
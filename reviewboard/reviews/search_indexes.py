@@ -1,11 +1,22 @@
 from __future__ import unicode_literals
 
+from collections import defaultdict
+
 from django.contrib.auth.models import AnonymousUser
 from django.db.models import Q
+from django.utils import six
+from djblets.siteconfig.models import SiteConfiguration
 from haystack import indexes
 
-from reviewboard.reviews.models import ReviewRequest
+from reviewboard.diffviewer.models import FileDiff, RawFileDiffData
+from reviewboard.reviews.models import (Comment,
+                                        FileAttachmentComment,
+                                        GeneralComment,
+                                        ReviewRequest,
+                                        ScreenshotComment)
 from reviewboard.search.indexes import BaseSearchIndex
+from reviewboard.search.indexing import iter_diff_changed_lines
+from reviewboard.site.models import LocalSite
 
 
 class ReviewRequestIndex(BaseSearchIndex, indexes.Indexable):
@@ -13,6 +24,19 @@ class ReviewRequestIndex(BaseSearchIndex, indexes.Indexable):
     model = ReviewRequest
     local_site_attr = 'local_site_id'
 
+    #: The maximum number of characters of diff content to index.
+    #:
+    #: This applies both to each stored diff and to each review request.
+    MAX_DIFF_CONTENT_LENGTH = 1024 * 1024
+
+    #: The comment models whose text is indexed.
+    COMMENT_MODELS = (
+        Comment,
+        FileAttachmentComment,
+        GeneralComment,
+        ScreenshotComment,
+    )
+
     # We shouldn't use 'id' as a field name because it's by default reserved
     # for Haystack. Hiding it will cause duplicates when updating the index.
     review_request_id = indexes.IntegerField(model_attr='display_id')
@@ -27,6 +51,12 @@ class ReviewRequestIndex(BaseSearchIndex, indexes.Indexable):
     url = indexes.CharField(model_attr='get_absolute_url')
     file = indexes.CharField()
 
+    # These fields are only populated if the search_index_diff_content and
+    # search_index_comments settings are enabled. They're searchable, but
+    # not stored, in order to keep the index small.
+    diff_content = indexes.CharField(null=True, stored=False)
+    comments = indexes.CharField(null=True, stored=False)
+
     # These fields all contain information needed to perform queries about
     # whether a review request is accessible by a given user.
     private = indexes.BooleanField()
@@ -59,19 +89,189 @@ class ReviewRequestIndex(BaseSearchIndex, indexes.Indexable):
                               'target_people')
         )
 
+    def build_batch_queryset(self, using=None):
+        """Return a queryset for fetching review requests in batches.
+
+        The related files, target groups and target people are computed by
+        :py:meth:`prepare_batch` instead of being prefetched.
+
+        Args:
+            using (unicode, optional):
+                The name of the search connection being used.
+
+        Returns:
+            django.db.models.query.QuerySet:
+            The queryset.
+        """
+        return self.index_queryset(using=using).prefetch_related(None)
+
+    def prepare_batch(self, review_requests):
+        """Prepare data for a batch of review requests.
+
+        This fetches only the columns needed for the ``file``, ``private``,
+        ``private_target_groups`` and ``target_users`` fields, for all review
+        requests at once, rather than loading full related objects or
+        performing access checks for each review request. If enabled, the
+        ``diff_content`` and ``comments`` fields are computed for all review
+        requests at once as well.
+
+        Args:
+            review_requests (list of reviewboard.reviews.models.
+                             review_request.ReviewRequest):
+                The review requests that will be indexed.
+        """
+        review_request_ids = [
+            review_request.pk
+            for review_request in review_requests
+        ]
+        files = defaultdict(set)
+        target_groups = defaultdict(list)
+        target_users = defaultdict(list)
+
+        filediffs = (
+            FileDiff.objects
+            .filter(diffset__history__in=[
+                review_request.diffset_history_id
+                for review_request in review_requests
+            ])
+            .values_list('diffset__history', 'source_file', 'dest_file')
+        )
+
+        for history_id, source_file, dest_file in filediffs:
+            files[history_id].add((source_file, dest_file))
+
+        groups = (
+            ReviewRequest.target_groups.through.objects
+            .filter(reviewrequest__in=review_request_ids)
+            .values_list('reviewrequest', 'group', 'group__invite_only',
+                         'group__local_site')
+        )
+
+        for review_request_id, group_id, invite_only, local_site_id in groups:
+            target_groups[review_request_id].append(
+                (group_id, invite_only, local_site_id))
+
+        people = (
+            ReviewRequest.target_people.through.objects
+            .filter(reviewrequest__in=review_request_ids)
+            .values_list('reviewrequest', 'user')
+        )
+
+        for review_request_id, user_id in people:
+            target_users[review_request_id].append(user_id)
+
+        public_local_site_ids = set(
+            LocalSite.objects
+            .filter(public=True)
+            .values_list('pk', flat=True)
+        )
+
+        siteconfig = SiteConfiguration.objects.get_current()
+
+        if siteconfig.get('search_index_diff_content'):
+            diff_content = self._get_diff_content([
+                review_request.diffset_history_id
+                for review_request in review_requests
+            ])
+        else:
+            diff_content = None
+
+        if siteconfig.get('search_index_comments'):
+            comments = self._get_comments(review_request_ids)
+        else:
+            comments = None
+
+        for review_request in review_requests:
+            groups = target_groups[review_request.pk]
+
+            review_request._search_files = \
+                files[review_request.diffset_history_id]
+            review_request._search_private = self._is_private(
+                review_request, groups, public_local_site_ids)
+            review_request._search_private_target_groups = [
+                group_id
+                for group_id, invite_only, local_site_id in groups
+                if invite_only
+            ]
+            review_request._search_target_users = \
+                target_users[review_request.pk]
+
+            if diff_content is not None:
+                review_request._search_diff_content = \
+                    diff_content.get(review_request.diffset_history_id, '')
+
+            if comments is not None:
+                review_request._search_comments = \
+                    comments.get(review_request.pk, '')
+
     def prepare_file(self, obj):
+        if hasattr(obj, '_search_files'):
+            return obj._search_files
+
         return set([
             (filediff.source_file, filediff.dest_file)
             for diffset in obj.diffset_history.diffsets.all()
             for filediff in diffset.files.all()
         ])
 
+    def prepare_diff_content(self, review_request):
+        """Prepare the changed lines in the review request's diffs.
+
+        Args:
+            review_request (reviewboard.reviews.models.review_request.
+                            ReviewRequest):
+                The review request being indexed.
+
+        Returns:
+            unicode:
+            The inserted and deleted lines from all of the review request's
+            diffs, or ``None`` if diff content isn't being indexed.
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+
+        if not siteconfig.get('search_index_diff_content'):
+            return None
+
+        if hasattr(review_request, '_search_diff_content'):
+            return review_request._search_diff_content
+
+        return self._get_diff_content(
+            [review_request.diffset_history_id]
+        ).get(review_request.diffset_history_id, '')
+
+    def prepare_comments(self, review_request):
+        """Prepare the text of the review request's published comments.
+
+        Args:
+            review_request (reviewboard.reviews.models.review_request.
+                            ReviewRequest):
+                The review request being indexed.
+
+        Returns:
+            unicode:
+            The text of all published comments on the review request, or
+            ``None`` if comments aren't being indexed.
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+
+        if not siteconfig.get('search_index_comments'):
+            return None
+
+        if hasattr(review_request, '_search_comments'):
+            return review_request._search_comments
+
+        return self._get_comments([review_request.pk]).get(review_request.pk,
+                                                           '')
+
     def prepare_private(self, review_request):
         """Prepare the private flag for the index.
 
         This will be set to true if the review request isn't generally
         accessible to users.
         """
+        if hasattr(review_request, '_search_private'):
+            return review_request._search_private
+
         return not review_request.is_accessible_by(AnonymousUser(),
                                                    silent=True)
 
@@ -92,6 +292,9 @@ class ReviewRequestIndex(BaseSearchIndex, indexes.Indexable):
         returned. This allows queries to be performed that check that none
         of the groups are private, since we can't query against empty lists.
         """
+        if hasattr(review_request, '_search_private_target_groups'):
+            return review_request._search_private_target_groups or [0]
+
         return [
             group.pk
             for group in review_request.target_groups.all()
@@ -105,6 +308,9 @@ class ReviewRequestIndex(BaseSearchIndex, indexes.Indexable):
         allows queries to be performed that check that there aren't any
         users in the list, since we can't query against empty lists.
         """
+        if hasattr(review_request, '_search_target_users'):
+            return review_request._search_target_users or [0]
+
         return [
             user.pk
             for user in review_request.target_people.all()
@@ -130,3 +336,143 @@ class ReviewRequestIndex(BaseSearchIndex, indexes.Indexable):
             return ''
 
         return user.get_full_name()
+
+    def _get_diff_content(self, history_ids):
+        """Return the changed lines in the diffs for diffset histories.
+
+        Content is built one history at a time. Diffs are fetched and
+        decompressed one at a time, and only until the history's content
+        reaches :py:attr:`MAX_DIFF_CONTENT_LENGTH` characters, so neither
+        the raw diff data nor the content for the whole batch is held in
+        memory at once.
+
+        FileDiffs that haven't been migrated to
+        :py:class:`~reviewboard.diffviewer.models.raw_file_diff_data.
+        RawFileDiffData` are skipped.
+
+        Args:
+            history_ids (list of int):
+                The IDs of the diffset histories.
+
+        Returns:
+            dict:
+            A mapping of diffset history IDs to the changed lines in their
+            diffs, up to :py:attr:`MAX_DIFF_CONTENT_LENGTH` characters each.
+        """
+        diff_hash_ids = defaultdict(list)
+
+        filediffs = (
+            FileDiff.objects
+            .filter(diffset__history__in=history_ids,
+                    diff_hash__isnull=False)
+            .order_by('diffset__history', 'diff_hash')
+            .values_list('diffset__history', 'diff_hash')
+            .distinct()
+        )
+
+        for history_id, diff_hash_id in filediffs:
+            diff_hash_ids[history_id].append(diff_hash_id)
+
+        diff_content = {}
+
+        for history_id, history_diff_hash_ids in six.iteritems(diff_hash_ids):
+            lines = []
+            remaining = self.MAX_DIFF_CONTENT_LENGTH
+
+            for diff_hash_id in history_diff_hash_ids:
+                if remaining <= 0:
+                    break
+
+                data, compression = (
+                    RawFileDiffData.objects
+                    .filter(pk=diff_hash_id)
+                    .values_list('binary', 'compression')
+                    .get()
+                )
+
+                for line in iter_diff_changed_lines(data, compression,
+                                                    max_length=remaining):
+                    lines.append(line)
+
+                    # This accounts for the newline joining this line to
+                    # the next.
+                    remaining -= len(line) + 1
+
+            diff_content[history_id] = \
+                '\n'.join(lines)[:self.MAX_DIFF_CONTENT_LENGTH]
+
+        return diff_content
+
+    def _get_comments(self, review_request_ids):
+        """Return the text of published comments on review requests.
+
+        Args:
+            review_request_ids (list of int):
+                The IDs of the review requests.
+
+        Returns:
+            dict:
+            A mapping of review request IDs to the text of their published
+            comments.
+        """
+        comments = defaultdict(list)
+
+        for comment_model in self.COMMENT_MODELS:
+            comment_texts = (
+                comment_model.objects
+                .filter(review__review_request__in=review_request_ids,
+                        review__public=True)
+                .order_by('pk')
+                .values_list('review__review_request', 'text')
+            )
+
+            for review_request_id, text in comment_texts:
+                comments[review_request_id].append(text)
+
+        return {
+            review_request_id: '\n'.join(texts)
+            for review_request_id, texts in six.iteritems(comments)
+        }
+
+    def _is_private(self, review_request, groups, public_local_site_ids):
+        """Return whether a review request is inaccessible to anonymous users.
+
+        This mirrors the checks performed by
+        :py:meth:`ReviewRequest.is_accessible_by()
+        <reviewboard.reviews.models.review_request.ReviewRequest.
+        is_accessible_by>` for an anonymous user, using data fetched by
+        :py:meth:`prepare_batch`.
+
+        Args:
+            review_request (reviewboard.reviews.models.review_request.
+                            ReviewRequest):
+                The review request being indexed.
+
+            groups (list of tuple):
+                A list of ``(group_id, invite_only, local_site_id)`` tuples
+                for the target groups.
+
+            public_local_site_ids (set of int):
+                The IDs of all public Local Sites.
+
+        Returns:
+            bool:
+            Whether the review request is private.
+        """
+        repository = review_request.repository
+
+        if (repository is not None and
+            not (repository.public and
+                 (repository.local_site_id is None or
+                  repository.local_site_id in public_local_site_ids))):
+            return True
+
+        if groups:
+            return not any(
+                (not invite_only and
+                 (local_site_id is None or
+                  local_site_id in public_local_site_ids))
+                for group_id, invite_only, local_site_id in groups
+            )
+
+        return False
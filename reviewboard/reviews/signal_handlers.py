@@ -0,0 +1,193 @@
+"""Signal handlers for the reviews app."""
+
+from __future__ import unicode_literals
+
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.utils import six
+
+from reviewboard.reviews.models import (Comment,
+                                        FileAttachmentComment,
+                                        GeneralComment,
+                                        Review,
+                                        ReviewRequest,
+                                        ReviewRequestDraft,
+                                        ReviewRequestPageVersion,
+                                        ScreenshotComment,
+                                        StatusUpdate)
+
+
+def _on_review_request_saved(instance, update_fields=None, **kwargs):
+    """Bump the page version when a review request is saved.
+
+    Saves that only initialize the issue counters are skipped. The counts
+    are computed from the comments, and changes to those already bump the
+    page version.
+
+    Args:
+        instance (reviewboard.reviews.models.ReviewRequest):
+            The review request that was saved.
+
+        update_fields (frozenset of unicode, optional):
+            The fields that were saved, if only some were saved.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    if (update_fields and
+        set(update_fields).issubset(
+            six.itervalues(ReviewRequest.ISSUE_COUNTER_FIELDS))):
+        return
+
+    ReviewRequestPageVersion.objects.bump([instance.pk])
+
+
+def _on_review_request_child_changed(instance, **kwargs):
+    """Bump the page version when an object on the page changes.
+
+    This handles any model with a ``review_request_id`` field, such as
+    reviews, drafts, and status updates.
+
+    Args:
+        instance (django.db.models.Model):
+            The object that was saved or deleted.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    ReviewRequestPageVersion.objects.bump([instance.review_request_id])
+
+
+def _on_comment_changed(instance, **kwargs):
+    """Bump the page version when a comment is saved or deleted.
+
+    Comments are saved before they're added to their review, and their
+    review is removed before they're deleted, so this is called when
+    existing comments are saved and before comments are deleted. Adding
+    comments to a review is handled by :py:func:`_on_review_comments_changed`.
+
+    Args:
+        instance (reviewboard.reviews.models.BaseComment):
+            The comment that was saved or is being deleted.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    try:
+        review = instance.get_review()
+    except Review.DoesNotExist:
+        # The comment is not yet (or no longer) attached to a review, so it
+        # can't be shown on any page.
+        return
+
+    ReviewRequestPageVersion.objects.bump([review.review_request_id])
+
+
+def _on_review_comments_changed(instance, action, reverse, pk_set,
+                                **kwargs):
+    """Bump the page version when comments are added to or removed from a
+    review.
+
+    Args:
+        instance (django.db.models.Model):
+            The review, or the comment if the reverse side of the relation
+            was changed.
+
+        action (unicode):
+            The change action.
+
+        reverse (bool):
+            Whether the reverse side of the relation was changed.
+
+        pk_set (set of int):
+            The IDs of the objects being added or removed.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        review_request_ids = [instance.review_request_id]
+    else:
+        if action == 'pre_clear':
+            reviews = instance.review.all()
+        else:
+            reviews = Review.objects.filter(pk__in=pk_set)
+
+        review_request_ids = set(
+            reviews.values_list('review_request_id', flat=True))
+
+    ReviewRequestPageVersion.objects.bump(review_request_ids)
+
+
+def _on_review_request_m2m_changed(instance, action, reverse, model, pk_set,
+                                   **kwargs):
+    """Bump page versions when a review request's relations change.
+
+    This covers file attachments, screenshots, reviewers, and dependencies,
+    which are modified without saving the review request or draft.
+    Dependency changes also affect the "Blocks" field of the review requests
+    being depended on.
+
+    Args:
+        instance (django.db.models.Model):
+            The instance whose relation changed.
+
+        action (unicode):
+            The change action.
+
+        reverse (bool):
+            Whether the reverse side of the relation was changed.
+
+        model (type):
+            The model class for the objects being added or removed.
+
+        pk_set (set of int):
+            The IDs of the objects being added or removed.
+
+        **kwargs (dict):
+            Additional keyword arguments from the signal.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    review_request_ids = set()
+
+    if isinstance(instance, ReviewRequest):
+        review_request_ids.add(instance.pk)
+    elif isinstance(instance, ReviewRequestDraft):
+        review_request_ids.add(instance.review_request_id)
+
+    if model is ReviewRequest and pk_set:
+        review_request_ids.update(pk_set)
+
+    ReviewRequestPageVersion.objects.bump(review_request_ids)
+
+
+def connect_signal_handlers():
+    """Connect the signal handlers for the reviews app."""
+    post_save.connect(_on_review_request_saved, sender=ReviewRequest)
+
+    for model in (Review, ReviewRequestDraft, StatusUpdate):
+        post_save.connect(_on_review_request_child_changed, sender=model)
+        post_delete.connect(_on_review_request_child_changed, sender=model)
+
+    for model in (Comment, FileAttachmentComment, GeneralComment,
+                  ScreenshotComment):
+        post_save.connect(_on_comment_changed, sender=model)
+        pre_delete.connect(_on_comment_changed, sender=model)
+
+    for field_name in ('comments', 'file_attachment_comments',
+                       'general_comments', 'screenshot_comments'):
+        m2m_changed.connect(_on_review_comments_changed,
+                            sender=getattr(Review, field_name).through)
+
+    for model in (ReviewRequest, ReviewRequestDraft):
+        for field_name in ('depends_on', 'file_attachments',
+                           'inactive_file_attachments', 'inactive_screenshots',
+                           'screenshots', 'target_groups', 'target_people'):
+            m2m_changed.connect(
+                _on_review_request_m2m_changed,
+                sender=getattr(model, field_name).through)
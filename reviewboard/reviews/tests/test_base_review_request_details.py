@@ -43,7 +43,8 @@ class BaseReviewRequestDetailsTests(TestCase):
         # 5. Group list for all matched default reviewers
         # 6. Existing user ID list (m2m.add())
         # 7. Setting new users (m2m.add())
-        with self.assertNumQueries(7):
+        # 8. Bumping the page version (m2m.add())
+        with self.assertNumQueries(8):
             review_request.add_default_reviewers()
 
         self.assertEqual(list(review_request.target_people.all()),
@@ -78,9 +79,10 @@ class BaseReviewRequestDetailsTests(TestCase):
         # 3. The default reviewer list
         # 4. User list for all matched default reviewers
         # 5. Group list for all matched default reviewers
-        # 8. Existing group ID list (m2m.add())
-        # 9. Setting new groups (m2m.add())
-        with self.assertNumQueries(7):
+        # 6. Existing group ID list (m2m.add())
+        # 7. Setting new groups (m2m.add())
+        # 8. Bumping the page version (m2m.add())
+        with self.assertNumQueries(8):
             review_request.add_default_reviewers()
 
         self.assertEqual(list(review_request.target_groups.all()),
@@ -124,9 +126,11 @@ class BaseReviewRequestDetailsTests(TestCase):
         # 5. Group list for all matched default reviewers
         # 6. Existing user ID list (m2m.add())
         # 7. Setting new users (m2m.add())
-        # 8. Existing group ID list (m2m.add())
-        # 9. Setting new groups (m2m.add())
-        with self.assertNumQueries(9):
+        # 8. Bumping the page version (m2m.add())
+        # 9. Existing group ID list (m2m.add())
+        # 10. Setting new groups (m2m.add())
+        # 11. Bumping the page version (m2m.add())
+        with self.assertNumQueries(11):
             review_request.add_default_reviewers()
 
         self.assertEqual(list(review_request.target_people.all()),
@@ -0,0 +1,109 @@
+"""Unit tests for reviewboard.testing.bulk_fixtures."""
+
+from __future__ import unicode_literals
+
+import random
+
+from django.contrib.auth.models import User
+
+from reviewboard.diffviewer.models import FileDiff, RawFileDiffData
+from reviewboard.reviews.models import Comment, Group, Review, ReviewRequest
+from reviewboard.site.models import LocalSite
+from reviewboard.testing import TestCase
+from reviewboard.testing.bulk_fixtures import (BulkFixtureGenerator,
+                                               Distribution)
+
+
+class DistributionTests(TestCase):
+    """Unit tests for reviewboard.testing.bulk_fixtures.Distribution."""
+
+    def test_parse(self):
+        """Testing Distribution.parse"""
+        distribution = Distribution.parse('1:10:2')
+        self.assertEqual(distribution.low, 1)
+        self.assertEqual(distribution.high, 10)
+        self.assertEqual(distribution.mode, 2)
+
+        distribution = Distribution.parse('3')
+        self.assertEqual(distribution.sample(random.Random(0)), 3)
+
+    def test_parse_invalid(self):
+        """Testing Distribution.parse with invalid values"""
+        for value in ('a', '5:1', '1:5:9', '1:2:3:4', '-1'):
+            with self.assertRaises(ValueError):
+                Distribution.parse(value)
+
+    def test_sample(self):
+        """Testing Distribution.sample stays within bounds"""
+        distribution = Distribution(2, 8, 3)
+        rand = random.Random(0)
+
+        for i in range(100):
+            self.assertTrue(2 <= distribution.sample(rand) <= 8)
+
+
+class BulkFixtureGeneratorTests(TestCase):
+    """Unit tests for reviewboard.testing.bulk_fixtures.BulkFixtureGenerator.
+    """
+
+    fixtures = ['test_scmtools']
+
+    def test_generate(self):
+        """Testing BulkFixtureGenerator.generate"""
+        generator = BulkFixtureGenerator(
+            num_users=12,
+            num_review_requests=25,
+            num_groups=4,
+            num_local_sites=2,
+            num_unique_diffs=5,
+            files_per_diff=Distribution(1, 3),
+            reviews_per_review_request=Distribution(1, 3),
+            comments_per_review=Distribution(1, 2),
+            batch_size=10)
+        counts = generator.generate()
+
+        self.assertEqual(User.objects.count(), 12)
+        self.assertEqual(LocalSite.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(ReviewRequest.objects.count(), 25)
+        self.assertEqual(RawFileDiffData.objects.count(), 5)
+        self.assertEqual(counts['ReviewRequest'], 25)
+        self.assertEqual(counts['FileDiff'], FileDiff.objects.count())
+        self.assertEqual(counts['Comment'], Comment.objects.count())
+
+        for review_request in ReviewRequest.objects.all():
+            self.assertEqual(
+                review_request.shipit_count,
+                review_request.reviews.filter(ship_it=True).count())
+            self.assertEqual(
+                review_request.issue_open_count,
+                Comment.objects.filter(
+                    review__review_request=review_request,
+                    issue_opened=True,
+                    issue_status=Comment.OPEN).count())
+            self.assertEqual(review_request.local_id is None,
+                             review_request.local_site_id is None)
+
+        # New objects should get primary keys past the generated ones.
+        user = User.objects.create(username='new-user')
+        self.assertEqual(user.pk, 13)
+
+    def test_generate_deterministic(self):
+        """Testing BulkFixtureGenerator.generate is deterministic for a seed
+        """
+        def _generate(prefix):
+            BulkFixtureGenerator(num_users=5,
+                                 num_review_requests=10,
+                                 num_groups=2,
+                                 seed=42,
+                                 name_prefix=prefix,
+                                 num_unique_diffs=3).generate()
+
+            return list(
+                Review.objects
+                .filter(user__username__startswith=prefix)
+                .order_by('pk')
+                .values_list('review_request__summary', 'ship_it',
+                             'body_top'))
+
+        self.assertEqual(_generate('a'), _generate('b'))
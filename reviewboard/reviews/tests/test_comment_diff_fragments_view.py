@@ -8,12 +8,14 @@ import struct
 from django.contrib.auth.models import User
 from django.utils import six
 from djblets.testing.decorators import add_fixtures
+from kgb import SpyAgency
 
+from reviewboard.diffviewer import diffutils
 from reviewboard.site.urlresolvers import local_site_reverse
 from reviewboard.testing import TestCase
 
 
-class CommentDiffFragmentsViewTests(TestCase):
+class CommentDiffFragmentsViewTests(SpyAgency, TestCase):
     """Unit tests for reviewboard.reviews.views.CommentDiffFragmentsView."""
 
     fixtures = ['test_users', 'test_scmtools']
@@ -193,6 +195,38 @@ class CommentDiffFragmentsViewTests(TestCase):
         self.assertEqual(fragments[0][0], comment1.pk)
         self.assertEqual(fragments[1][0], comment2.pk)
 
+    def test_get_with_comments_on_multiple_files(self):
+        """Testing CommentDiffFragmentsView with comments on multiple files
+        loads each file once
+        """
+        user = User.objects.create_user(username='reviewer',
+                                        email='reviewer@example.com')
+
+        review_request = self.create_review_request(create_repository=True,
+                                                    publish=True)
+        diffset = self.create_diffset(review_request)
+        filediff1 = self.create_filediff(diffset, source_file='/foo',
+                                         dest_file='/foo')
+        filediff2 = self.create_filediff(diffset, source_file='/bar',
+                                         dest_file='/bar')
+
+        review = self.create_review(review_request, user=user)
+        comment1 = self.create_diff_comment(review, filediff1)
+        comment2 = self.create_diff_comment(review, filediff2)
+        comment3 = self.create_diff_comment(review, filediff1)
+        review.publish()
+
+        self.spy_on(diffutils.get_diff_files)
+
+        fragments = self._get_fragments(review_request,
+                                        [comment1.pk, comment2.pk,
+                                         comment3.pk])
+        self.assertEqual(len(fragments), 3)
+        self.assertEqual(fragments[0][0], comment1.pk)
+        self.assertEqual(fragments[1][0], comment2.pk)
+        self.assertEqual(fragments[2][0], comment3.pk)
+        self.assertEqual(len(diffutils.get_diff_files.calls), 2)
+
     def test_get_with_valid_and_invalid_comment_ids(self):
         """Testing CommentDiffFragmentsView with mix of valid comment IDs and
         comment IDs not found in database
@@ -109,4 +109,4 @@ class DownloadRawDiffViewTests(TestCase):
             save=True)
 
         response = self.client.get('/r/%d/diff/raw/' % review_request.pk)
-        self.assertEqual(response.content, cumulative_diff)
+        self.assertEqual(b''.join(response.streaming_content), cumulative_diff)
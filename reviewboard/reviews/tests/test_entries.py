@@ -1309,6 +1309,80 @@ class ReviewEntryTests(TestCase):
         self.assertTrue(entry.has_issues)
         self.assertEqual(entry.issue_open_count, 1)
 
+    def test_get_render_cache_key(self):
+        """Testing ReviewEntry.get_render_cache_key"""
+        self.data.query_data_pre_etag()
+        self.data.query_data_post_etag()
+
+        entry = ReviewEntry(data=self.data,
+                            review=self.review)
+        cache_key = entry.get_render_cache_key(
+            request=self.request,
+            last_visited=self.data.last_visited,
+            entry_is_new=False)
+
+        self.assertIsNotNone(cache_key)
+        self.assertTrue(cache_key.startswith(
+            'review-request-page-entry-review-123-'))
+
+    def test_get_render_cache_key_with_ship_it_change(self):
+        """Testing ReviewEntry.get_render_cache_key changes when Ship It
+        changes
+        """
+        self.data.query_data_pre_etag()
+        self.data.query_data_post_etag()
+
+        entry = ReviewEntry(data=self.data,
+                            review=self.review)
+        cache_key = entry.get_render_cache_key(
+            request=self.request,
+            last_visited=self.data.last_visited,
+            entry_is_new=False)
+
+        self.review.ship_it = not self.review.ship_it
+
+        self.assertNotEqual(
+            entry.get_render_cache_key(request=self.request,
+                                       last_visited=self.data.last_visited,
+                                       entry_is_new=False),
+            cache_key)
+
+    def test_get_render_cache_key_with_new_activity(self):
+        """Testing ReviewEntry.get_render_cache_key with activity newer than
+        the last visit
+        """
+        self.data.query_data_pre_etag()
+        self.data.query_data_post_etag()
+
+        entry = ReviewEntry(data=self.data,
+                            review=self.review)
+
+        self.assertIsNone(entry.get_render_cache_key(
+            request=self.request,
+            last_visited=self.review.timestamp - timedelta(days=1),
+            entry_is_new=True))
+
+    def test_get_render_cache_key_with_draft_reply_comments(self):
+        """Testing ReviewEntry.get_render_cache_key with draft reply comments
+        """
+        self.request.user = self.review_request.submitter
+
+        comment = self.create_general_comment(self.review)
+
+        reply = self.create_reply(self.review, user=self.request.user)
+        self.create_general_comment(reply, reply_to=comment)
+
+        self.data.query_data_pre_etag()
+        self.data.query_data_post_etag()
+
+        entry = ReviewEntry(data=self.data,
+                            review=self.review)
+
+        self.assertIsNone(entry.get_render_cache_key(
+            request=self.request,
+            last_visited=self.data.last_visited,
+            entry_is_new=False))
+
     def test_build_entries(self):
         """Testing ReviewEntry.build_entries"""
         review1 = self.create_review(
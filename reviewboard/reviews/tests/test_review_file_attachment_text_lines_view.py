@@ -0,0 +1,91 @@
+"""Unit tests for reviewboard.reviews.views.ReviewFileAttachmentTextLinesView.
+"""
+
+from __future__ import unicode_literals
+
+import json
+
+from django.core.files.base import ContentFile
+
+from reviewboard.reviews.ui.text import TextBasedReviewUI
+from reviewboard.site.urlresolvers import local_site_reverse
+from reviewboard.testing import TestCase
+
+
+class ReviewFileAttachmentTextLinesViewTests(TestCase):
+    """Unit tests for
+    reviewboard.reviews.views.ReviewFileAttachmentTextLinesView.
+    """
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(ReviewFileAttachmentTextLinesViewTests, self).setUp()
+
+        self.review_request = self.create_review_request(publish=True)
+        self.attachment = self.create_file_attachment(
+            self.review_request,
+            has_file=False,
+            mimetype='text/plain')
+        self.attachment.orig_filename = 'test.txt'
+        self.attachment.file.save(
+            'test.txt',
+            ContentFile(b''.join(
+                b'line %d\n' % i
+                for i in range(1, TextBasedReviewUI.LINES_PER_WINDOW + 3)
+            )),
+            save=True)
+
+    def test_get(self):
+        """Testing ReviewFileAttachmentTextLinesView returns a window of
+        lines
+        """
+        response = self.client.get(self._get_url(), {'window': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        num_lines = TextBasedReviewUI.LINES_PER_WINDOW
+        self.assertEqual(
+            json.loads(response.content.decode('utf-8')),
+            {
+                'begin_line_num': num_lines + 1,
+                'lines': [
+                    '<pre>line %d</pre>' % (num_lines + 1),
+                    '<pre>line %d</pre>' % (num_lines + 2),
+                ],
+            })
+
+    def test_get_with_window_out_of_range(self):
+        """Testing ReviewFileAttachmentTextLinesView with a window past the
+        end of the file
+        """
+        response = self.client.get(self._get_url(), {'window': 2})
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_with_non_text_attachment(self):
+        """Testing ReviewFileAttachmentTextLinesView with an attachment
+        without a text review UI
+        """
+        attachment = self.create_file_attachment(self.review_request)
+
+        response = self.client.get(self._get_url(attachment), {'window': 0})
+        self.assertEqual(response.status_code, 404)
+
+    def _get_url(self, attachment=None):
+        """Return the URL for the view.
+
+        Args:
+            attachment (reviewboard.attachments.models.FileAttachment,
+                        optional):
+                The file attachment. This defaults to the text attachment.
+
+        Returns:
+            unicode:
+            The URL for the view.
+        """
+        return local_site_reverse(
+            'file-attachment-text-lines',
+            kwargs={
+                'review_request_id': self.review_request.pk,
+                'file_attachment_id': (attachment or self.attachment).pk,
+            })
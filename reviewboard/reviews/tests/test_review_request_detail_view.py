@@ -383,6 +383,36 @@ class ReviewRequestDetailViewTests(SpyAgency, TestCase):
         # Make sure they're not equal
         self.assertNotEqual(etag1, etag2)
 
+    def test_etag_with_unchanged_page(self):
+        """Testing ReviewRequestDetailView ETags with an unchanged page
+        returns HTTP 304
+        """
+        review_request = self.create_review_request(publish=True)
+        self.create_review(review_request, publish=True)
+
+        response = self.client.get(review_request.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(review_request.get_absolute_url(),
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_with_new_review(self):
+        """Testing ReviewRequestDetailView ETags after publishing a review"""
+        review_request = self.create_review_request(publish=True)
+
+        response = self.client.get(review_request.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        self.create_review(review_request, publish=True)
+
+        response = self.client.get(review_request.get_absolute_url(),
+                                   HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
     def test_review_request_box_template_hooks(self):
         """Testing ReviewRequestDetailView template hooks for the review
         request box
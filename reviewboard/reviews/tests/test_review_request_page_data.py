@@ -5,9 +5,10 @@ from __future__ import unicode_literals
 from datetime import datetime, timedelta
 
 from django.test.client import RequestFactory
-from django.utils import timezone
+from django.utils import six, timezone
 
 from reviewboard.reviews.detail import (ChangeEntry,
+                                        DeferredEntry,
                                         InitialStatusUpdatesEntry,
                                         ReviewEntry,
                                         ReviewRequestEntry,
@@ -164,15 +165,89 @@ class ReviewRequestPageDataTests(TestCase):
         self.assertIsInstance(entry, ChangeEntry)
         self.assertEqual(entry.changedesc, self.changedesc2)
 
-    def _build_data(self, entry_classes=None):
+    def test_get_entries_with_max_main_entries(self):
+        """Testing ReviewRequestPageData.get_entries with max_main_entries
+        defers older entries
+        """
+        data = self._build_data(max_main_entries=2)
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        self.assertEqual(data.deferred_entry_ids, {
+            'review': {six.text_type(self.review1.pk)},
+            'changedesc': {six.text_type(self.changedesc1.pk)},
+        })
+
+        # Comments are only loaded for the newest review, but the issues
+        # are still available for the issue summary table.
+        self.assertNotIn(self.review1.pk, data.review_comments)
+        self.assertIn(self.review2.pk, data.review_comments)
+        self.assertEqual(data.issue_counts['total'], 6)
+
+        entries = data.get_entries()
+
+        self.assertEqual(len(entries['main']), 4)
+
+        entry = entries['main'][0]
+        self.assertIsInstance(entry, DeferredEntry)
+        self.assertEqual(entry.entry_type_id, ReviewEntry.entry_type_id)
+        self.assertEqual(entry.entry_id, six.text_type(self.review1.pk))
+        self.assertTrue(entry.collapsed)
+
+        entry = entries['main'][1]
+        self.assertIsInstance(entry, DeferredEntry)
+        self.assertEqual(entry.entry_type_id, ChangeEntry.entry_type_id)
+        self.assertEqual(entry.entry_id, six.text_type(self.changedesc1.pk))
+
+        entry = entries['main'][2]
+        self.assertIsInstance(entry, ReviewEntry)
+        self.assertEqual(entry.review, self.review2)
+
+        entry = entries['main'][3]
+        self.assertIsInstance(entry, ChangeEntry)
+        self.assertEqual(entry.changedesc, self.changedesc2)
+
+    def test_query_data_with_entry_ids(self):
+        """Testing ReviewRequestPageData query methods with entry_ids limits
+        queried reviews
+        """
         self._populate_review_request()
 
+        data = self._build_data(
+            entry_classes=[ReviewEntry],
+            entry_ids={
+                'review': {six.text_type(self.review1.pk)},
+            })
+        data.query_data_pre_etag()
+        data.query_data_post_etag()
+
+        self.assertTrue(data.is_partial)
+        self.assertEqual(data.reviews, [self.review1])
+        self.assertEqual(list(data.review_comments), [self.review1.pk])
+
+        # Only the issues for the requested review are loaded.
+        self.assertEqual(data.issue_counts['total'], 3)
+        self.assertEqual(
+            set(comment.pk for comment in data.issues),
+            {self.general_comment1.pk, self.diff_comment1.pk,
+             self.file_attachment_comment1.pk})
+
+        entries = data.get_entries()
+
+        self.assertEqual(len(entries['main']), 1)
+        self.assertEqual(entries['main'][0].review, self.review1)
+
+    def _build_data(self, entry_classes=None, **kwargs):
+        if not hasattr(self, 'review_request'):
+            self._populate_review_request()
+
         request = RequestFactory().get('/r/1/')
         request.user = self.review_request.submitter
 
         return ReviewRequestPageData(review_request=self.review_request,
                                      request=request,
-                                     entry_classes=entry_classes)
+                                     entry_classes=entry_classes,
+                                     **kwargs)
 
     def _test_query_data_pre_etag_with(self,
                                        entry_classes=None,
@@ -0,0 +1,143 @@
+"""Unit tests for reviewboard.reviews.models.ReviewRequestPageVersion."""
+
+from __future__ import unicode_literals
+
+from reviewboard.reviews.models import (Comment,
+                                        ReviewRequestPageVersion,
+                                        StatusUpdate)
+from reviewboard.testing import TestCase
+
+
+class ReviewRequestPageVersionTests(TestCase):
+    """Unit tests for reviewboard.reviews.models.ReviewRequestPageVersion."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(ReviewRequestPageVersionTests, self).setUp()
+
+        self.review_request = self.create_review_request(publish=True)
+        self.page_version = \
+            ReviewRequestPageVersion.objects.get_for_review_request(
+                self.review_request)
+
+    def test_get_for_review_request(self):
+        """Testing ReviewRequestPageVersionManager.get_for_review_request"""
+        self.assertEqual(self.page_version.version, 0)
+
+        with self.assertNumQueries(1):
+            page_version = \
+                ReviewRequestPageVersion.objects.get_for_review_request(
+                    self.review_request)
+
+        self.assertEqual(page_version.pk, self.page_version.pk)
+
+    def test_bump_without_page_version(self):
+        """Testing ReviewRequestPageVersionManager.bump without an existing
+        page version
+        """
+        review_request = self.create_review_request()
+
+        ReviewRequestPageVersion.objects.bump([review_request.pk])
+
+        self.assertFalse(ReviewRequestPageVersion.objects.filter(
+            review_request=review_request).exists())
+
+    def test_bump_on_review_request_save(self):
+        """Testing ReviewRequestPageVersion bumped on review request save"""
+        self.review_request.summary = 'New summary'
+        self.review_request.save()
+
+        self._check_bumped()
+
+    def test_bump_on_review_request_save_issue_counts(self):
+        """Testing ReviewRequestPageVersion not bumped when only saving
+        review request issue counts
+        """
+        self.review_request.issue_open_count = 1
+        self.review_request.save(update_fields=['issue_open_count'])
+
+        page_version = \
+            ReviewRequestPageVersion.objects.get(pk=self.page_version.pk)
+        self.assertEqual(page_version.version, self.page_version.version)
+
+    def test_bump_on_review_publish(self):
+        """Testing ReviewRequestPageVersion bumped on review publish"""
+        self.create_review(self.review_request, publish=True)
+
+        self._check_bumped()
+
+    def test_bump_on_issue_status_change(self):
+        """Testing ReviewRequestPageVersion bumped on comment issue status
+        change
+        """
+        review = self.create_review(self.review_request)
+        comment = self.create_general_comment(review, issue_opened=True)
+        review.publish()
+        self.page_version = \
+            ReviewRequestPageVersion.objects.get(pk=self.page_version.pk)
+
+        comment.issue_status = Comment.RESOLVED
+        comment.save()
+
+        self._check_bumped()
+
+    def test_bump_on_comment_create(self):
+        """Testing ReviewRequestPageVersion bumped on comment creation"""
+        review = self.create_review(self.review_request, publish=True)
+        self.page_version = \
+            ReviewRequestPageVersion.objects.get(pk=self.page_version.pk)
+
+        self.create_general_comment(review)
+
+        self._check_bumped()
+
+    def test_bump_on_comment_delete(self):
+        """Testing ReviewRequestPageVersion bumped on comment deletion"""
+        review = self.create_review(self.review_request)
+        comment = self.create_general_comment(review)
+        review.publish()
+        self.page_version = \
+            ReviewRequestPageVersion.objects.get(pk=self.page_version.pk)
+
+        comment.delete()
+
+        self._check_bumped()
+
+    def test_bump_on_comment_remove(self):
+        """Testing ReviewRequestPageVersion bumped on comment removal from
+        a review
+        """
+        review = self.create_review(self.review_request)
+        comment = self.create_general_comment(review)
+        review.publish()
+        self.page_version = \
+            ReviewRequestPageVersion.objects.get(pk=self.page_version.pk)
+
+        comment.review.clear()
+
+        self._check_bumped()
+
+    def test_bump_on_status_update(self):
+        """Testing ReviewRequestPageVersion bumped on status update save"""
+        self.create_status_update(self.review_request,
+                                  state=StatusUpdate.PENDING)
+
+        self._check_bumped()
+
+    def test_bump_on_depends_on_change(self):
+        """Testing ReviewRequestPageVersion bumped for blocked review
+        requests on depends_on change
+        """
+        other_review_request = self.create_review_request(publish=True)
+        other_review_request.depends_on.add(self.review_request)
+
+        self._check_bumped()
+
+    def _check_bumped(self):
+        page_version = \
+            ReviewRequestPageVersion.objects.get(pk=self.page_version.pk)
+
+        self.assertGreater(page_version.version, self.page_version.version)
+        self.assertGreaterEqual(page_version.last_updated,
+                                self.page_version.last_updated)
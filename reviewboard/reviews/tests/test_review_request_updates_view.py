@@ -356,7 +356,9 @@ class ReviewRequestUpdatesViewTests(TestCase):
         response = self.client.get(self._build_url(), query)
         self.assertEqual(response.status_code, 200)
 
-        content = response.content
+        self.assertTrue(response.streaming)
+
+        content = b''.join(response.streaming_content)
         self.assertIs(type(content), bytes)
 
         i = 0
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 
 from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
 from django.test import RequestFactory
 from djblets.util.templatetags.djblets_images import crop_image
 from kgb import SpyAgency
@@ -11,6 +12,7 @@ from reviewboard.reviews.ui.base import (FileAttachmentReviewUI,
                                          register_ui,
                                          unregister_ui)
 from reviewboard.reviews.ui.image import ImageReviewUI
+from reviewboard.reviews.ui.text import TextBasedReviewUI
 from reviewboard.testing import TestCase
 
 
@@ -284,3 +286,88 @@ class ImageReviewUITests(TestCase):
                build_server_url(crop_image(self.attachment.file, 0, 0, 1, 1)),
                comment.text)
         )
+
+
+class TextBasedReviewUITests(SpyAgency, TestCase):
+    """Tests for the TextBasedReviewUI."""
+
+    fixtures = ['test_users']
+
+    def setUp(self):
+        super(TextBasedReviewUITests, self).setUp()
+
+        self.review_request = self.create_review_request()
+        self.attachment = self.create_file_attachment(
+            self.review_request,
+            has_file=False,
+            mimetype='text/plain')
+        self.attachment.orig_filename = 'test.txt'
+        self.attachment.file.save(
+            'test.txt',
+            ContentFile(b''.join(
+                b'line %d\n' % i
+                for i in range(1, 11)
+            )),
+            save=True)
+
+        self.ui = TextBasedReviewUI(self.review_request, self.attachment)
+        self.ui.LINES_PER_WINDOW = 4
+
+    def test_get_text_window(self):
+        """Testing TextBasedReviewUI.get_text_window"""
+        self.assertEqual(self.ui.get_num_text_lines(), 10)
+        self.assertEqual(self.ui.get_num_text_windows(), 3)
+        self.assertEqual(self.ui.get_text_window_offsets(), [0, 28, 56, 71])
+        self.assertEqual(self.ui.get_text_window(1), [
+            '<pre>line 5</pre>',
+            '<pre>line 6</pre>',
+            '<pre>line 7</pre>',
+            '<pre>line 8</pre>',
+        ])
+        self.assertEqual(self.ui.get_text_window(2), [
+            '<pre>line 9</pre>',
+            '<pre>line 10</pre>',
+        ])
+        self.assertEqual(self.ui.get_text_window(3), [])
+
+    def test_get_text_lines(self):
+        """Testing TextBasedReviewUI.get_text_lines"""
+        self.assertEqual(
+            self.ui.get_text_lines(),
+            [
+                '<pre>line %d</pre>' % i
+                for i in range(1, 11)
+            ])
+
+    def test_get_text_lines_in_range(self):
+        """Testing TextBasedReviewUI.get_text_lines_in_range only reads the
+        windows containing the lines
+        """
+        self.spy_on(self.ui._read_text_range)
+
+        self.assertEqual(self.ui.get_text_lines_in_range(4, 6), [
+            '<pre>line 4</pre>',
+            '<pre>line 5</pre>',
+            '<pre>line 6</pre>',
+        ])
+        self.assertEqual(
+            [
+                call.args
+                for call in self.ui._read_text_range.calls
+            ],
+            [(0, 28), (28, 56)])
+
+    def test_get_text_window_without_trailing_newline(self):
+        """Testing TextBasedReviewUI.get_text_window with a file not ending
+        in a newline
+        """
+        self.attachment.file.save('test.txt', ContentFile(b'a\n\nb'),
+                                  save=True)
+        ui = TextBasedReviewUI(self.review_request, self.attachment)
+
+        self.assertEqual(ui.get_num_text_lines(), 3)
+        self.assertEqual(ui.get_text_window(0), [
+            '<pre>a</pre>',
+            '<pre></pre>',
+            '<pre>b</pre>',
+        ])
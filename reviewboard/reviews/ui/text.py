@@ -1,19 +1,23 @@
 from __future__ import unicode_literals
 
 import logging
+import mmap
+import os
+from contextlib import contextmanager
 
 from django.utils.safestring import mark_safe
-from djblets.cache.backend import cache_memoize
 from djblets.util.compat.django.template.loader import render_to_string
 from pygments import highlight
 from pygments.lexers import (ClassNotFound, guess_lexer_for_filename,
                              TextLexer)
 
+from reviewboard.admin.instrumentation import cache_memoize
 from reviewboard.attachments.models import FileAttachment
 from reviewboard.diffviewer.chunk_generator import (NoWrapperHtmlFormatter,
                                                     RawDiffChunkGenerator)
 from reviewboard.diffviewer.diffutils import get_chunks_in_range
 from reviewboard.reviews.ui.base import FileAttachmentReviewUI
+from reviewboard.site.urlresolvers import local_site_reverse
 
 
 class TextBasedReviewUI(FileAttachmentReviewUI):
@@ -41,6 +45,16 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
     js_model_class = 'RB.TextBasedReviewable'
     js_view_class = 'RB.TextBasedReviewableView'
 
+    #: The number of lines in each window of the source text.
+    #:
+    #: The source text is read, highlighted and cached one window at a time.
+    #: Only the first window is rendered with the page, and the rest are
+    #: loaded as the user scrolls.
+    LINES_PER_WINDOW = 1000
+
+    #: The number of bytes to read at a time when scanning for lines.
+    READ_BLOCK_SIZE = 64 * 1024
+
     def get_js_model_data(self):
         data = super(TextBasedReviewUI, self).get_js_model_data()
         data['hasRenderedView'] = self.can_render_text
@@ -50,6 +64,23 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
         else:
             data['viewMode'] = 'source'
 
+        if not self.diff_against_obj:
+            local_site_name = None
+
+            if self.review_request.local_site:
+                local_site_name = self.review_request.local_site.name
+
+            data.update({
+                'numTextLines': self.get_num_text_lines(),
+                'textLinesURL': local_site_reverse(
+                    'file-attachment-text-lines',
+                    local_site_name=local_site_name,
+                    kwargs={
+                        'review_request_id': self.review_request.display_id,
+                        'file_attachment_id': self.obj.pk,
+                    }),
+            })
+
         return data
 
     def get_extra_context(self, request):
@@ -74,9 +105,11 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
                 chunk_generator = self._get_rendered_diff_chunk_generator()
                 context['rendered_chunks'] = chunk_generator.get_chunks()
         else:
+            # Only the first window of the text is rendered. The rest is
+            # loaded by the page as needed.
             file_line_list = [
                 mark_safe(line)
-                for line in self.get_text_lines()
+                for line in self.get_text_window(0)
             ]
 
             rendered_line_list = [
@@ -117,11 +150,221 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
         """Return the file contents as syntax-highlighted lines.
 
         This will fetch the file, render it however appropriate for the review
-        UI, and split it into reviewable lines. It will then cache it for
-        future renders.
+        UI, and split it into reviewable lines. Each window of lines is cached
+        for future renders.
+
+        This will load the entire file. Callers that only need some lines
+        should use :py:meth:`get_text_window` or
+        :py:meth:`get_text_lines_in_range` instead.
+
+        Returns:
+            list of unicode:
+            The syntax-highlighted lines.
+        """
+        lines = []
+
+        for window in range(self.get_num_text_windows()):
+            lines += self.get_text_window(window)
+
+        return lines
+
+    def get_text_lines_in_range(self, begin_line_num, end_line_num):
+        """Return a range of syntax-highlighted lines from the file.
+
+        Only the windows containing the lines will be loaded.
+
+        Args:
+            begin_line_num (int):
+                The first line number to return (1-based).
+
+            end_line_num (int):
+                The last line number to return (inclusive).
+
+        Returns:
+            list of unicode:
+            The syntax-highlighted lines.
+        """
+        begin_line_num = max(begin_line_num, 1)
+        end_line_num = min(end_line_num, self.get_num_text_lines())
+        first_window = (begin_line_num - 1) // self.LINES_PER_WINDOW
+        lines = []
+
+        for window in range(first_window,
+                            (end_line_num - 1) // self.LINES_PER_WINDOW + 1):
+            lines += self.get_text_window(window)
+
+        offset = first_window * self.LINES_PER_WINDOW
+
+        return lines[begin_line_num - 1 - offset:end_line_num - offset]
+
+    def get_text_window(self, window):
+        """Return a window of syntax-highlighted lines from the file.
+
+        Only the part of the file covering the window will be read. The
+        highlighted lines will be cached for future renders.
+
+        Args:
+            window (int):
+                The index of the window, starting at 0. Each window contains
+                :py:attr:`LINES_PER_WINDOW` lines.
+
+        Returns:
+            list of unicode:
+            The syntax-highlighted lines. This will be empty if the window
+            is past the end of the file.
+        """
+        offsets = self.get_text_window_offsets()
+
+        if window < 0 or window >= len(offsets) - 1:
+            return []
+
+        return cache_memoize(
+            'text-attachment-%d-lines-%d' % (self.obj.pk, window),
+            lambda: list(self.generate_highlighted_text(
+                self._read_text_range(offsets[window], offsets[window + 1]))),
+            large_data=True)
+
+    def get_num_text_lines(self):
+        """Return the number of lines in the file.
+
+        Returns:
+            int:
+            The number of lines.
+        """
+        return self._get_text_window_info()['num_lines']
+
+    def get_num_text_windows(self):
+        """Return the number of windows of lines in the file.
+
+        Returns:
+            int:
+            The number of windows.
+        """
+        return len(self.get_text_window_offsets()) - 1
+
+    def get_text_window_offsets(self):
+        """Return the byte offsets of each window of lines in the file.
+
+        Returns:
+            list of int:
+            The offset of the start of each window, followed by the size of
+            the file.
+        """
+        return self._get_text_window_info()['offsets']
+
+    def _get_text_window_info(self):
+        """Return information on the windows of lines in the file.
+
+        The file is scanned for lines once, and the results are cached.
+
+        Returns:
+            dict:
+            A dictionary containing ``num_lines`` and ``offsets`` keys.
+        """
+        return cache_memoize('text-attachment-%d-windows' % self.obj.pk,
+                             self._scan_text_windows)
+
+    def _scan_text_windows(self):
+        """Scan the file for the windows of lines it contains.
+
+        Returns:
+            dict:
+            A dictionary containing ``num_lines`` and ``offsets`` keys.
         """
-        return cache_memoize('text-attachment-%d-lines' % self.obj.pk,
-                             lambda: list(self.generate_highlighted_text()))
+        lines_per_window = self.LINES_PER_WINDOW
+        offsets = [0]
+        num_lines = 0
+        pos = 0
+        last_block = b''
+
+        with self._open_text_file() as f:
+            while True:
+                block = f.read(self.READ_BLOCK_SIZE)
+
+                if not block:
+                    break
+
+                block_num_lines = block.count(b'\n')
+                next_window_line = len(offsets) * lines_per_window
+
+                if num_lines + block_num_lines < next_window_line:
+                    num_lines += block_num_lines
+                else:
+                    # A window starts in this block, so find exactly where.
+                    i = block.find(b'\n')
+
+                    while i != -1:
+                        num_lines += 1
+
+                        if num_lines % lines_per_window == 0:
+                            offsets.append(pos + i + 1)
+
+                        i = block.find(b'\n', i + 1)
+
+                pos += len(block)
+                last_block = block
+
+        if last_block and not last_block.endswith(b'\n'):
+            # Count the final line, which has no trailing newline.
+            num_lines += 1
+
+        if offsets[-1] != pos:
+            offsets.append(pos)
+
+        return {
+            'num_lines': num_lines,
+            'offsets': offsets,
+        }
+
+    @contextmanager
+    def _open_text_file(self):
+        """Open the file for reading.
+
+        If the file is stored on the local filesystem, it will be memory
+        mapped, rather than being read into memory.
+
+        Yields:
+            object:
+            A file-like object for reading the file.
+        """
+        try:
+            path = self.obj.file.path
+        except NotImplementedError:
+            # The storage backend doesn't support local paths.
+            path = None
+
+        if path and os.path.getsize(path) > 0:
+            with open(path, 'rb') as fp:
+                f = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+                try:
+                    yield f
+                finally:
+                    f.close()
+        else:
+            self.obj.file.open('rb')
+
+            with self.obj.file as f:
+                yield f
+
+    def _read_text_range(self, start, end):
+        """Return a range of bytes from the file.
+
+        Args:
+            start (int):
+                The offset of the first byte.
+
+            end (int):
+                The offset ending the range (exclusive).
+
+        Returns:
+            bytes:
+            The data in the range.
+        """
+        with self._open_text_file() as f:
+            f.seek(start)
+
+            return f.read(end - start)
 
     def get_rendered_lines(self):
         """Returns the file contents as a render, based on the raw text.
@@ -146,17 +389,40 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
 
         return data
 
-    def generate_highlighted_text(self):
+    def generate_highlighted_text(self, data=None):
         """Generates syntax-highlighted text for the file.
 
         This will render the text file to HTML, applying any syntax
         highlighting that's appropriate. The contents will be split into
-        reviewable lines and will be cached for future renders.
+        reviewable lines.
+
+        Args:
+            data (bytes, optional):
+                The text to highlight. This is used to highlight a window of
+                the file. If not provided, the whole file will be
+                highlighted.
+
+        Returns:
+            list of unicode:
+            The syntax-highlighted lines.
         """
-        data = self.get_text()
+        if data is None:
+            data = self.get_text()
 
         lexer = self.get_source_lexer(self.obj.filename, data)
-        lines = highlight(data, lexer, NoWrapperHtmlFormatter()).splitlines()
+
+        # Leading and trailing blank lines must be kept, so that windows of
+        # the file keep their line numbers.
+        lexer.stripnl = False
+
+        highlighted = highlight(data, lexer, NoWrapperHtmlFormatter())
+
+        # Lines are split only on newlines, matching how windows of the file
+        # are found.
+        if highlighted.endswith('\n'):
+            highlighted = highlighted[:-1]
+
+        lines = highlighted.split('\n')
 
         return [
             '<pre>%s</pre>' % line
@@ -263,20 +529,23 @@ class TextBasedReviewUI(FileAttachmentReviewUI):
         else:
             try:
                 if view_mode == 'source':
-                    lines = self.get_text_lines()
+                    # Only read the windows containing the lines we care
+                    # about.
+                    lines = self.get_text_lines_in_range(begin_line_num,
+                                                         end_line_num)
                 elif view_mode == 'rendered':
-                    lines = self.get_rendered_lines()
+                    # Grab only the lines we care about.
+                    #
+                    # The line numbers are stored 1-indexed, so normalize
+                    # to 0.
+                    lines = self.get_rendered_lines()[
+                        begin_line_num - 1:end_line_num]
             except Exception as e:
                 logging.error('Unable to generate text attachment comment '
                               'thumbnail for comment %s: %s',
                               comment, e)
                 return ''
 
-            # Grab only the lines we care about.
-            #
-            # The line numbers are stored 1-indexed, so normalize to 0.
-            lines = lines[begin_line_num - 1:end_line_num]
-
             context['lines'] = [
                 {
                     'line_num': begin_line_num + i,
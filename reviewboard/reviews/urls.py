@@ -99,6 +99,10 @@ review_request_urls = [
         views.ReviewFileAttachmentView.as_view(),
         name='file-attachment'),
 
+    url(r'^file/(?P<file_attachment_id>\d+)/_text-lines/$',
+        views.ReviewFileAttachmentTextLinesView.as_view(),
+        name='file-attachment-text-lines'),
+
     url(r'^file/(?P<file_attachment_diff_id>\d+)'
         r'-(?P<file_attachment_id>\d+)/$',
         views.ReviewFileAttachmentView.as_view(),
@@ -5,6 +5,7 @@ import json
 import logging
 import re
 import struct
+from collections import OrderedDict
 
 import dateutil.parser
 from django.conf import settings
@@ -14,10 +15,12 @@ from django.db.models import Q
 from django.http import (Http404,
                          HttpResponse,
                          HttpResponseBadRequest,
-                         HttpResponseNotFound)
+                         HttpResponseNotFound,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, get_list_or_404, render
+from django.template import Context
 from django.template.defaultfilters import date
-from django.utils import six, timezone
+from django.utils import six, timezone, translation
 from django.utils.formats import localize
 from django.utils.html import escape, format_html, strip_tags
 from django.utils.safestring import mark_safe
@@ -42,12 +45,12 @@ from reviewboard.admin.mixins import CheckReadOnlyViewMixin
 from reviewboard.admin.read_only import is_site_read_only_for
 from reviewboard.attachments.models import (FileAttachment,
                                             get_latest_file_attachments)
-from reviewboard.diffviewer.diffutils import (convert_to_unicode,
-                                              get_file_chunks_in_range,
-                                              get_last_header_before_line,
-                                              get_last_line_number_in_diff,
-                                              get_original_file,
-                                              get_patched_file)
+from reviewboard.diffviewer.diffutils import (
+    convert_to_unicode,
+    get_file_chunk_index,
+    get_file_chunks_in_range,
+    get_original_file,
+    get_patched_file)
 from reviewboard.diffviewer.models import DiffSet
 from reviewboard.diffviewer.views import (DiffFragmentView,
                                           DiffViewerView,
@@ -65,14 +68,18 @@ from reviewboard.reviews.context import (comment_counts,
                                          has_comments_in_diffsets_excluding,
                                          interdiffs_with_comments,
                                          make_review_request_context)
-from reviewboard.reviews.detail import ReviewRequestPageData, entry_registry
+from reviewboard.reviews.detail import (BUILTIN_ENTRY_CLASSES,
+                                        ReviewRequestPageData,
+                                        entry_registry)
 from reviewboard.reviews.markdown_utils import (is_rich_text_default_for_user,
                                                 render_markdown)
 from reviewboard.reviews.models import (Comment,
                                         Review,
                                         ReviewRequest,
+                                        ReviewRequestPageVersion,
                                         Screenshot)
 from reviewboard.reviews.ui.base import FileAttachmentReviewUI
+from reviewboard.reviews.ui.text import TextBasedReviewUI
 from reviewboard.scmtools.errors import FileNotFoundError
 from reviewboard.scmtools.models import Repository
 from reviewboard.site.mixins import CheckLocalSiteAccessViewMixin
@@ -349,74 +356,132 @@ def build_diff_comment_fragments(
     lines_of_context=None,
     show_controls=False,
     request=None):
+    """Render the diff fragments for a list of comments.
 
-    comment_entries = []
+    Comments are grouped by the file (and interdiff file) they were made on.
+    The chunk index for each file is loaded once, and is then used to load
+    only the chunks for each comment's fragment.
+
+    Args:
+        comments (list of reviewboard.reviews.models.diff_comment.Comment):
+            The comments to render fragments for.
+
+        context (dict):
+            The template context. This must contain a ``user`` key.
+
+        comment_template_name (unicode, optional):
+            The template used to render each fragment.
+
+        error_template_name (unicode, optional):
+            The template used to render errors.
+
+        lines_of_context (list of int, optional):
+            The number of lines of context to show before and after each
+            commented region.
+
+        show_controls (bool, optional):
+            Whether to show controls for expanding the fragments.
+
+        request (django.http.HttpRequest, optional):
+            The HTTP request from the client.
+
+    Returns:
+        tuple:
+        A 2-tuple containing:
+
+        1. Whether there were any errors rendering the fragments.
+        2. A list of dictionaries with ``comment``, ``html``, and ``chunks``
+           keys, in the same order as ``comments``.
+    """
     had_error = False
     siteconfig = SiteConfiguration.objects.get_current()
+    domain = Site.objects.get_current().domain
+    domain_method = siteconfig.get('site_domain_method')
 
     if lines_of_context is None:
         lines_of_context = [0, 0]
 
-    for comment in comments:
+    comments = list(comments)
+    comment_entries = [None] * len(comments)
+    comments_by_file = OrderedDict()
+
+    for i, comment in enumerate(comments):
+        comments_by_file.setdefault(
+            (comment.filediff_id, comment.interfilediff_id),
+            []).append((i, comment))
+
+    for file_comments in six.itervalues(comments_by_file):
+        filediff = file_comments[0][1].filediff
+        interfilediff = file_comments[0][1].interfilediff
+        chunk_index = None
+        file_error = None
+
         try:
-            max_line = get_last_line_number_in_diff(context, comment.filediff,
-                                                    comment.interfilediff)
+            chunk_index = get_file_chunk_index(context, filediff,
+                                               interfilediff)
+            max_line = chunk_index.get_last_line_number()
+        except Exception as e:
+            file_error = e
+
+        for i, comment in file_comments:
+            try:
+                if file_error is not None:
+                    raise file_error
 
-            first_line = max(1, comment.first_line - lines_of_context[0])
-            last_line = min(comment.last_line + lines_of_context[1], max_line)
-            num_lines = last_line - first_line + 1
+                first_line = max(1, comment.first_line - lines_of_context[0])
+                last_line = min(comment.last_line + lines_of_context[1],
+                                max_line)
+                num_lines = last_line - first_line + 1
 
-            chunks = list(get_file_chunks_in_range(context,
-                                                   comment.filediff,
-                                                   comment.interfilediff,
-                                                   first_line,
-                                                   num_lines))
+                chunks = list(get_file_chunks_in_range(
+                    context, filediff, interfilediff, first_line,
+                    num_lines))
 
-            comment_context = {
+                comment_context = {
+                    'comment': comment,
+                    'header': chunk_index.get_last_header_before_line(
+                        first_line),
+                    'chunks': chunks,
+                    'domain': domain,
+                    'domain_method': domain_method,
+                    'lines_of_context': lines_of_context,
+                    'expandable_above': show_controls and first_line != 1,
+                    'expandable_below': (show_controls and
+                                         last_line != max_line),
+                    'collapsible': lines_of_context != [0, 0],
+                    'lines_above': first_line - 1,
+                    'lines_below': max_line - last_line,
+                    'first_line': first_line,
+                }
+                comment_context.update(context)
+                content = render_to_string(
+                    template_name=comment_template_name,
+                    context=comment_context,
+                    request=request)
+            except Exception as e:
+                content = exception_traceback_string(
+                    None, e, error_template_name, {
+                        'comment': comment,
+                        'file': {
+                            'depot_filename': filediff.source_file,
+                            'index': None,
+                            'filediff': filediff,
+                        },
+                        'domain': domain,
+                        'domain_method': domain_method,
+                    })
+
+                # It's bad that we failed, and we'll return a 500, but we'll
+                # still return content for anything we have. This will
+                # prevent any caching.
+                had_error = True
+                chunks = []
+
+            comment_entries[i] = {
                 'comment': comment,
-                'header': get_last_header_before_line(context,
-                                                      comment.filediff,
-                                                      comment.interfilediff,
-                                                      first_line),
+                'html': content,
                 'chunks': chunks,
-                'domain': Site.objects.get_current().domain,
-                'domain_method': siteconfig.get('site_domain_method'),
-                'lines_of_context': lines_of_context,
-                'expandable_above': show_controls and first_line != 1,
-                'expandable_below': show_controls and last_line != max_line,
-                'collapsible': lines_of_context != [0, 0],
-                'lines_above': first_line - 1,
-                'lines_below': max_line - last_line,
-                'first_line': first_line,
             }
-            comment_context.update(context)
-            content = render_to_string(template_name=comment_template_name,
-                                       context=comment_context,
-                                       request=request)
-        except Exception as e:
-            content = exception_traceback_string(
-                None, e, error_template_name, {
-                    'comment': comment,
-                    'file': {
-                        'depot_filename': comment.filediff.source_file,
-                        'index': None,
-                        'filediff': comment.filediff,
-                    },
-                    'domain': Site.objects.get_current().domain,
-                    'domain_method': siteconfig.get("site_domain_method"),
-                })
-
-            # It's bad that we failed, and we'll return a 500, but we'll
-            # still return content for anything we have. This will prevent any
-            # caching.
-            had_error = True
-            chunks = []
-
-        comment_entries.append({
-            'comment': comment,
-            'html': content,
-            'chunks': chunks,
-        })
 
     return had_error, comment_entries
 
@@ -569,6 +634,10 @@ class ReviewRequestDetailView(ReviewRequestViewMixin,
         suitable ETag. Some of the information will be stored for later
         computation of the template context.
 
+        Rather than querying everything shown on the page, this combines the
+        review request's page version (which is bumped whenever anything
+        visible on the page changes) with the state specific to the user.
+
         Args:
             request (django.http.HttpRequest):
                 The HTTP request from the client.
@@ -589,53 +658,59 @@ class ReviewRequestDetailView(ReviewRequestViewMixin,
         # reflect whether there are new updates.
         self.visited, self.last_visited = self.track_review_request_visit()
 
-        # Begin building data for the contents of the page. This will include
-        # the reviews, change descriptions, and other content shown on the
-        # page.
-        data = ReviewRequestPageData(review_request=review_request,
-                                     request=request,
-                                     last_visited=self.last_visited)
-        self.data = data
-
-        data.query_data_pre_etag()
-
-        self.blocks = review_request.get_blocks()
-
-        # Prepare data used in both the page and the ETag.
-        starred = self.is_review_request_starred()
+        page_version = ReviewRequestPageVersion.objects.get_for_review_request(
+            review_request)
 
-        self.last_activity_time = review_request.get_last_activity_info(
-            data.diffsets, data.reviews)['timestamp']
-        etag_timestamp = self.last_activity_time
+        # Entries provided by extensions may contribute their own ETag data,
+        # which requires the pre-ETag data for the page.
+        custom_entry_etags = ''
 
-        entry_etags = ':'.join(
-            entry_cls.build_etag_data(data)
-            for entry_cls in entry_registry
-        )
+        if any(entry_cls not in BUILTIN_ENTRY_CLASSES
+               for entry_cls in entry_registry):
+            data = self._build_page_data()
 
-        if data.draft:
-            draft_timestamp = data.draft.last_updated
-        else:
-            draft_timestamp = ''
+            custom_entry_etags = ':'.join(
+                entry_cls.build_etag_data(data)
+                for entry_cls in entry_registry
+            )
 
         return ':'.join(six.text_type(value) for value in (
             request.user,
-            etag_timestamp,
-            draft_timestamp,
-            data.latest_changedesc_timestamp,
-            entry_etags,
-            data.latest_review_timestamp,
-            review_request.last_review_activity_timestamp,
+            page_version.version,
+            page_version.last_updated,
+            custom_entry_etags,
             is_rich_text_default_for_user(request.user),
             is_site_read_only_for(request.user),
-            [r.pk for r in self.blocks],
-            starred,
+            self.is_review_request_starred(),
             self.visited and self.visited.visibility,
             (self.last_visited and
-             self.last_visited < self.last_activity_time),
+             self.last_visited < page_version.last_updated),
             settings.AJAX_SERIAL,
         ))
 
+    def _build_page_data(self):
+        """Build and pre-query the data for the page.
+
+        This will only query the data once, storing it for later use.
+
+        Returns:
+            reviewboard.reviews.detail.ReviewRequestPageData:
+            The data for the page.
+        """
+        if self.data is None:
+            siteconfig = SiteConfiguration.objects.get_current()
+            data = ReviewRequestPageData(
+                review_request=self.review_request,
+                request=self.request,
+                last_visited=self.last_visited,
+                max_main_entries=siteconfig.get(
+                    'reviews_page_entries_window'))
+            data.query_data_pre_etag()
+
+            self.data = data
+
+        return self.data
+
     def track_review_request_visit(self):
         """Track a visit to the review request.
 
@@ -727,11 +802,18 @@ class ReviewRequestDetailView(ReviewRequestViewMixin,
         """
         review_request = self.review_request
         request = self.request
-        data = self.data
 
+        # Begin building data for the contents of the page. This will include
+        # the reviews, change descriptions, and other content shown on the
+        # page.
+        data = self._build_page_data()
         data.query_data_post_etag()
         entries = data.get_entries()
 
+        self.blocks = review_request.get_blocks()
+        self.last_activity_time = review_request.get_last_activity_info(
+            data.diffsets, data.reviews)['timestamp']
+
         review = review_request.get_pending_review(request.user)
         close_info = review_request.get_close_info()
         review_request_status_html = self.get_review_request_status_html(
@@ -789,6 +871,7 @@ class ReviewRequestUpdatesView(ReviewRequestViewMixin, ETagViewMixin,
     to be quick to parse and reduces the amount of data to send across the
     wire (unlike a format like JSON, which would add overhead to the
     serialization/deserialization time and data size when storing HTML).
+    Updates are streamed to the client as each one is rendered.
 
     Each entry in the payload is in the following format, with all entries
     joined together:
@@ -868,7 +951,8 @@ class ReviewRequestUpdatesView(ReviewRequestViewMixin, ETagViewMixin,
         self.since = request.GET.get('since')
 
         self.data = ReviewRequestPageData(self.review_request, request,
-                                          entry_classes=entry_classes)
+                                          entry_classes=entry_classes,
+                                          entry_ids=self.entry_ids)
 
     def get_etag_data(self, request, *args, **kwargs):
         """Return an ETag for the view.
@@ -926,12 +1010,10 @@ class ReviewRequestUpdatesView(ReviewRequestViewMixin, ETagViewMixin,
                 Keyword arguments passed to the handler.
 
         Returns:
-            django.http.HttpResponse:
-            The HTTP response to send to the client. This will contain the
+            django.http.StreamingHttpResponse:
+            The HTTP response to send to the client. This will stream the
             custom update payload content.
         """
-        request = self.request
-        review_request = self.review_request
         data = self.data
         since = self.since
 
@@ -972,97 +1054,116 @@ class ReviewRequestUpdatesView(ReviewRequestViewMixin, ETagViewMixin,
                     entry.updated_timestamp > since)
             )
 
-        # We can now begin to serialize the payload for all the updates.
-        payload = io.BytesIO()
-        base_entry_context = None
-        needs_issue_summary_table = False
-
-        for entry in entries:
-            metadata = {
-                'type': 'entry',
-                'entryType': entry.entry_type_id,
-                'entryID': entry.entry_id,
-                'addedTimestamp': six.text_type(entry.added_timestamp),
-                'updatedTimestamp': six.text_type(entry.updated_timestamp),
-                'modelData': entry.get_js_model_data(),
-                'viewOptions': entry.get_js_view_data(),
-            }
+        # The payload is rendered and sent one update at a time, letting the
+        # client start receiving updates while the rest are being rendered.
+        return StreamingHttpResponse(
+            self._iter_payload(entries, **kwargs),
+            content_type='text/plain; charset=utf-8')
 
-            if base_entry_context is None:
-                # Now that we know the context is needed for entries,
-                # we can construct and populate it.
-                base_entry_context = (
-                    super(ReviewRequestUpdatesView, self)
-                    .get_context_data(**kwargs)
-                )
-                base_entry_context.update(
-                    make_review_request_context(request, review_request))
+    def _iter_payload(self, entries, **kwargs):
+        """Generate the serialized updates for the payload.
 
-            try:
-                html = render_to_string(
-                    template_name=entry.template_name,
-                    context=dict({
-                        'show_entry_statuses_area': (
-                            entry.entry_pos == entry.ENTRY_POS_MAIN),
-                        'entry': entry,
-                    }, **base_entry_context),
-                    request=request)
-            except Exception as e:
-                logging.error('Error rendering review request page entry '
-                              '%r: %s',
-                              entry, e, request=request)
+        Rendering happens as the response is being sent, after the view (and
+        any middleware) has returned, so the active language and timezone
+        are captured up-front and restored while rendering.
 
-            self._write_update(payload, metadata, html)
+        Args:
+            entries (iterable of reviewboard.reviews.detail.
+                     BaseReviewRequestPageEntry):
+                The entries to render.
 
-            if entry.needs_reviews:
-                needs_issue_summary_table = True
+            **kwargs (dict):
+                Keyword arguments passed to the handler.
 
-        # If any of the entries required any information on reviews, then
-        # the state of the issue summary table may have changed. We'll need
-        # to send this along as well.
-        if needs_issue_summary_table:
-            metadata = {
-                'type': 'issue-summary-table',
-            }
+        Yields:
+            bytes:
+            Each serialized update.
+        """
+        request = self.request
+        review_request = self.review_request
+        data = self.data
 
-            html = render_to_string(
-                template_name='reviews/review_issue_summary_table.html',
-                context={
-                    'issue_counts': data.issue_counts,
-                    'issues': data.issues,
-                },
-                request=request)
+        with translation.override(translation.get_language()), \
+                timezone.override(timezone.get_current_timezone()):
+            base_entry_context = None
+            needs_issue_summary_table = False
+
+            for entry in entries:
+                metadata = {
+                    'type': 'entry',
+                    'entryType': entry.entry_type_id,
+                    'entryID': entry.entry_id,
+                    'addedTimestamp': six.text_type(entry.added_timestamp),
+                    'updatedTimestamp':
+                        six.text_type(entry.updated_timestamp),
+                    'modelData': entry.get_js_model_data(),
+                    'viewOptions': entry.get_js_view_data(),
+                }
 
-            self._write_update(payload, metadata, html)
+                if base_entry_context is None:
+                    # Now that we know the context is needed for entries,
+                    # we can construct and populate it.
+                    base_entry_context = (
+                        super(ReviewRequestUpdatesView, self)
+                        .get_context_data(**kwargs)
+                    )
+                    base_entry_context.update(
+                        make_review_request_context(request, review_request))
+
+                # This shares the rendered HTML cache with the review request
+                # page.
+                html = entry.render_to_string(request,
+                                              Context(base_entry_context),
+                                              require_content=False)
+
+                yield self._serialize_update(metadata, html)
+
+                if entry.needs_reviews:
+                    needs_issue_summary_table = True
+
+            # If any of the entries required any information on reviews, then
+            # the state of the issue summary table may have changed. We'll
+            # need to send this along as well.
+            if needs_issue_summary_table:
+                metadata = {
+                    'type': 'issue-summary-table',
+                }
 
-        # The payload's complete. Close it out and send to the client.
-        result = payload.getvalue()
-        payload.close()
+                html = render_to_string(
+                    template_name='reviews/review_issue_summary_table.html',
+                    context={
+                        'issue_counts': data.issue_counts,
+                        'issues': data.issues,
+                    },
+                    request=request)
 
-        return HttpResponse(result, content_type='text/plain; charset=utf-8')
+                yield self._serialize_update(metadata, html)
 
-    def _write_update(self, payload, metadata, html):
-        """Write an update to the payload.
+    def _serialize_update(self, metadata, html):
+        """Serialize an update for the payload.
 
-        This will format the metadata and HTML for the update and write it.
+        This will format the metadata and HTML for the update.
 
         Args:
-            payload (io.BytesIO):
-                The payload to write to.
-
             metadata (dict):
                 The JSON-serializable metadata to write.
 
             html (unicode):
                 The HTML to write.
+
+        Returns:
+            bytes:
+            The serialized update.
         """
         metadata = json.dumps(metadata).encode('utf-8')
         html = html.strip().encode('utf-8')
 
-        payload.write(struct.pack(b'<L', len(metadata)))
-        payload.write(metadata)
-        payload.write(struct.pack(b'<L', len(html)))
-        payload.write(html)
+        return b''.join([
+            struct.pack(b'<L', len(metadata)),
+            metadata,
+            struct.pack(b'<L', len(html)),
+            html,
+        ])
 
 
 class ReviewsDiffViewerView(ReviewRequestViewMixin,
@@ -1376,7 +1477,7 @@ class DownloadRawDiffView(ReviewRequestViewMixin, View):
                 Keyword arguments passed to the handler.
 
         Returns:
-            django.http.HttpResponse:
+            django.http.StreamingHttpResponse:
             The HTTP response to send to the client.
         """
         review_request = self.review_request
@@ -1385,9 +1486,9 @@ class DownloadRawDiffView(ReviewRequestViewMixin, View):
         diffset = self.get_diff(revision, draft)
 
         tool = review_request.repository.get_scmtool()
-        data = tool.get_parser(b'').raw_diff(diffset)
-
-        resp = HttpResponse(data, content_type='text/x-patch')
+        resp = StreamingHttpResponse(
+            tool.get_parser(b'').iter_raw_diff(diffset),
+            content_type='text/x-patch')
 
         if diffset.name == 'diff':
             filename = 'rb%d.patch' % review_request.display_id
@@ -1485,7 +1586,10 @@ class CommentDiffFragmentsView(ReviewRequestViewMixin, ETagViewMixin,
         else:
             q &= Q(review__public=True)
 
-        self.comments = get_list_or_404(Comment, q)
+        self.comments = get_list_or_404(
+            Comment.objects.select_related('filediff__diffset',
+                                           'interfilediff__diffset'),
+            q)
 
         latest_timestamp = get_latest_timestamp(
             comment.timestamp
@@ -2031,17 +2135,7 @@ class ReviewFileAttachmentView(ReviewRequestViewMixin,
             django.http.HttpResponse:
             The resulting HTTP response from the handler.
         """
-        review_request = self.review_request
-        draft = review_request.get_draft(request.user)
-
-        # Make sure the attachment returned is part of either the review request
-        # or an accessible draft.
-        review_request_q = (Q(review_request=review_request) |
-                            Q(inactive_review_request=review_request))
-
-        if draft:
-            review_request_q |= Q(drafts=draft) | Q(inactive_drafts=draft)
-
+        review_request_q = self.get_file_attachment_q()
         file_attachment = get_object_or_404(
             FileAttachment,
             Q(pk=file_attachment_id) & review_request_q)
@@ -2049,7 +2143,8 @@ class ReviewFileAttachmentView(ReviewRequestViewMixin,
         review_ui = file_attachment.review_ui
 
         if not review_ui:
-            review_ui = FileAttachmentReviewUI(review_request, file_attachment)
+            review_ui = FileAttachmentReviewUI(self.review_request,
+                                               file_attachment)
 
         if file_attachment_diff_id:
             file_attachment_revision = get_object_or_404(
@@ -2059,22 +2154,112 @@ class ReviewFileAttachmentView(ReviewRequestViewMixin,
                 review_request_q)
             review_ui.set_diff_against(file_attachment_revision)
 
+        if self.is_review_ui_enabled(review_ui, file_attachment):
+            return review_ui.render_to_response(request)
+        else:
+            raise Http404
+
+    def get_file_attachment_q(self):
+        """Return a query for file attachments the user can view.
+
+        This matches file attachments on either the review request or an
+        accessible draft.
+
+        Returns:
+            django.db.models.Q:
+            The query for the file attachments.
+        """
+        review_request = self.review_request
+        draft = review_request.get_draft(self.request.user)
+
+        review_request_q = (Q(review_request=review_request) |
+                            Q(inactive_review_request=review_request))
+
+        if draft:
+            review_request_q |= Q(drafts=draft) | Q(inactive_drafts=draft)
+
+        return review_request_q
+
+    def is_review_ui_enabled(self, review_ui, file_attachment):
+        """Return whether a review UI is enabled for the user.
+
+        Args:
+            review_ui (reviewboard.reviews.ui.base.FileAttachmentReviewUI):
+                The review UI for the file attachment.
+
+            file_attachment (reviewboard.attachments.models.FileAttachment):
+                The file attachment being reviewed.
+
+        Returns:
+            bool:
+            Whether the review UI is enabled.
+        """
         try:
-            is_enabled_for = review_ui.is_enabled_for(
-                user=request.user,
-                review_request=review_request,
+            return review_ui.is_enabled_for(
+                user=self.request.user,
+                review_request=self.review_request,
                 file_attachment=file_attachment)
         except Exception as e:
             logging.error('Error when calling is_enabled_for for '
                           'FileAttachmentReviewUI %r: %s',
                           review_ui, e, exc_info=1)
-            is_enabled_for = False
+            return False
 
-        if review_ui and is_enabled_for:
-            return review_ui.render_to_response(request)
-        else:
+
+class ReviewFileAttachmentTextLinesView(ReviewFileAttachmentView):
+    """Returns a window of lines from a text file attachment.
+
+    The text review UI only renders the first window of lines with the
+    page. This is used to load the rest as the user scrolls.
+    """
+
+    def get(self, request, file_attachment_id, *args, **kwargs):
+        """Handle a HTTP GET request.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            file_attachment_id (int):
+                The ID of the file attachment.
+
+            *args (tuple):
+                Positional arguments passed to the handler.
+
+            **kwargs (dict):
+                Keyword arguments passed to the handler.
+
+        Returns:
+            django.http.HttpResponse:
+            The resulting HTTP response from the handler. This contains a
+            JSON payload with the syntax-highlighted ``lines`` in the window
+            and the ``begin_line_num`` of the first line.
+        """
+        try:
+            window = int(request.GET.get('window', 0))
+        except ValueError:
+            return HttpResponseBadRequest()
+
+        file_attachment = get_object_or_404(
+            FileAttachment,
+            Q(pk=file_attachment_id) & self.get_file_attachment_q())
+
+        review_ui = file_attachment.review_ui
+
+        if (not isinstance(review_ui, TextBasedReviewUI) or
+            not self.is_review_ui_enabled(review_ui, file_attachment) or
+            window < 0 or
+            window >= review_ui.get_num_text_windows()):
             raise Http404
 
+        data = {
+            'begin_line_num': window * review_ui.LINES_PER_WINDOW + 1,
+            'lines': review_ui.get_text_window(window),
+        }
+
+        return HttpResponse(json.dumps(data),
+                            content_type='application/json')
+
 
 class ReviewScreenshotView(ReviewRequestViewMixin,
                            UserProfileRequiredViewMixin,
@@ -1,6 +1,5 @@
 from __future__ import unicode_literals
 
-import io
 import logging
 import os
 import platform
@@ -295,51 +294,52 @@ class GitDiffParser(DiffParser):
 
         return headers, linenum
 
-    def parse(self):
-        """
-        Parses the diff, returning a list of File objects representing each
-        file in the diff.
+    def iter_files(self):
+        """Parse the diff, yielding each file as it's parsed.
+
+        Yields:
+            reviewboard.diffviewer.parser.ParsedDiffFile:
+            Each file in the diff.
+
+        Raises:
+            reviewboard.diffviewer.errors.DiffParserError:
+                The diff could not be parsed.
         """
-        self.files = []
+        prev_file_info = None
+        preamble_start = 0
         i = 0
-        preamble = io.BytesIO()
 
         while i < len(self.lines):
             next_i, file_info, new_diff = self._parse_diff(i)
 
             if file_info:
-                if self.files:
-                    self.files[-1].finalize()
+                if prev_file_info:
+                    prev_file_info.finalize()
+
+                    yield prev_file_info
 
                 self._ensure_file_has_required_fields(file_info)
 
-                file_info.prepend_data(preamble.getvalue())
-                preamble.close()
-                preamble = io.BytesIO()
+                # Any lines since the last file are a preamble for this one.
+                file_info.prepend_lines(self.lines, preamble_start, i)
+                preamble_start = next_i
 
-                self.files.append(file_info)
+                prev_file_info = file_info
             elif new_diff:
                 # We found a diff, but it was empty and has no file entry.
                 # Reset the preamble.
-                preamble.close()
-                preamble = io.BytesIO()
-            else:
-                preamble.write(self.lines[i])
-                preamble.write(b'\n')
+                preamble_start = next_i
 
             i = next_i
 
-        try:
-            if self.files:
-                self.files[-1].finalize()
-            elif preamble.getvalue().strip() != b'':
-                # This is probably not an actual git diff file.
-                raise DiffParserError('This does not appear to be a git diff',
-                                      0)
-        finally:
-            preamble.close()
+        if prev_file_info:
+            prev_file_info.finalize()
 
-        return self.files
+            yield prev_file_info
+        elif any(self.lines[linenum].strip()
+                 for linenum in range(preamble_start, len(self.lines))):
+            # This is probably not an actual git diff file.
+            raise DiffParserError('This does not appear to be a git diff', 0)
 
     def _parse_diff(self, linenum):
         """Parses out one file from a Git diff
@@ -367,8 +367,7 @@ class GitDiffParser(DiffParser):
         diff_git_line = self.lines[linenum]
 
         file_info = ParsedDiffFile()
-        file_info.append_data(diff_git_line)
-        file_info.append_data(b'\n')
+        file_info.append_lines(self.lines, linenum, linenum + 1)
         file_info.binary = False
 
         linenum += 1
@@ -447,8 +446,7 @@ class GitDiffParser(DiffParser):
                 break
             elif self._is_binary_patch(linenum):
                 file_info.binary = True
-                file_info.append_data(self.lines[linenum])
-                file_info.append_data(b'\n')
+                file_info.append_lines(self.lines, linenum, linenum + 1)
                 empty_change = False
                 linenum += 1
                 break
@@ -489,10 +487,7 @@ class GitDiffParser(DiffParser):
                 else:
                     file_info.modified_filename = new_filename
 
-                file_info.append_data(orig_line)
-                file_info.append_data(b'\n')
-                file_info.append_data(new_line)
-                file_info.append_data(b'\n')
+                file_info.append_lines(self.lines, linenum, linenum + 2)
                 linenum += 2
             else:
                 empty_change = False
@@ -254,12 +254,16 @@ class HgDiffParser(DiffParser):
 class HgGitDiffParser(GitDiffParser):
     """Parser for git diffs which understands mercurial headers."""
 
-    def parse(self):
-        """Parse the diff returning a list of File objects.
+    def iter_files(self):
+        """Parse the diff, yielding each file as it's parsed.
 
         This will first parse special mercurial headers if they exist
         and then use the GitDiffParser functionality to parse the
         remainder of the diff.
+
+        Yields:
+            reviewboard.diffviewer.parser.ParsedDiffFile:
+            Each file in the diff.
         """
         # We need to parse out the commit information from the
         # commented header mercurial outputs.
@@ -275,7 +279,8 @@ class HgGitDiffParser(GitDiffParser):
             elif line.startswith(b"# Parent") and len(split_line) == 3:
                 self.base_commit_id = split_line[2]
 
-        return super(HgGitDiffParser, self).parse()
+        for parsed_file in super(HgGitDiffParser, self).iter_files():
+            yield parsed_file
 
     def get_orig_commit_id(self):
         """Return base commit, either parsed from the header or None."""
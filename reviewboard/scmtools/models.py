@@ -17,10 +17,11 @@ from django.utils.functional import cached_property
 from django.utils.http import urlquote
 from django.utils.six.moves import range
 from django.utils.translation import ugettext_lazy as _
-from djblets.cache.backend import cache_memoize, make_cache_key
+from djblets.cache.backend import make_cache_key
 from djblets.db.fields import JSONField
 from djblets.log import log_timed
 
+from reviewboard.admin.instrumentation import cache_memoize, scm_call
 from reviewboard.hostingsvcs.models import HostingServiceAccount
 from reviewboard.hostingsvcs.service import get_hosting_service
 from reviewboard.scmtools.crypto_utils import (decrypt_password,
@@ -500,7 +501,11 @@ class Repository(models.Model):
         else:
             branches_callable = self.get_scmtool().get_branches
 
-        return cache_memoize(cache_key, branches_callable,
+        def _get_branches():
+            with scm_call(self, 'get_branches'):
+                return branches_callable()
+
+        return cache_memoize(cache_key, _get_branches,
                              self.BRANCHES_CACHE_PERIOD)
 
     def get_commit_cache_key(self, commit):
@@ -572,8 +577,12 @@ class Repository(models.Model):
 
         cache_key = make_cache_key('repository-commits:%s:%s:%s'
                                    % (self.pk, branch, start))
-        commits = cache_memoize(cache_key, commits_callable,
-                                cache_period)
+
+        def _get_commits():
+            with scm_call(self, 'get_commits'):
+                return commits_callable()
+
+        commits = cache_memoize(cache_key, _get_commits, cache_period)
 
         for commit in commits:
             cache.set(self.get_commit_cache_key(commit.id),
@@ -605,10 +614,11 @@ class Repository(models.Model):
         """
         hosting_service = self.hosting_service
 
-        if hosting_service:
-            return hosting_service.get_change(self, revision)
-        else:
-            return self.get_scmtool().get_change(revision)
+        with scm_call(self, 'get_change'):
+            if hosting_service:
+                return hosting_service.get_change(self, revision)
+            else:
+                return self.get_scmtool().get_change(revision)
 
     def normalize_patch(self, patch, filename, revision):
         """Normalize a diff/patch file before it's applied.
@@ -727,24 +737,25 @@ class Repository(models.Model):
 
         hosting_service = self.hosting_service
 
-        if hosting_service:
-            data = hosting_service.get_file(
-                self,
-                path,
-                revision,
-                base_commit_id=base_commit_id)
-
-            assert isinstance(data, bytes), (
-                '%s.get_file() must return a byte string, not %s'
-                % (type(hosting_service).__name__, type(data)))
-        else:
-            tool = self.get_scmtool()
-            data = tool.get_file(path, revision,
-                                 base_commit_id=base_commit_id)
+        with scm_call(self, 'get_file'):
+            if hosting_service:
+                data = hosting_service.get_file(
+                    self,
+                    path,
+                    revision,
+                    base_commit_id=base_commit_id)
+
+                assert isinstance(data, bytes), (
+                    '%s.get_file() must return a byte string, not %s'
+                    % (type(hosting_service).__name__, type(data)))
+            else:
+                tool = self.get_scmtool()
+                data = tool.get_file(path, revision,
+                                     base_commit_id=base_commit_id)
 
-            assert isinstance(data, bytes), (
-                '%s.get_file() must return a byte string, not %s'
-                % (type(tool).__name__, type(data)))
+                assert isinstance(data, bytes), (
+                    '%s.get_file() must return a byte string, not %s'
+                    % (type(tool).__name__, type(data)))
 
         log_timer.done()
 
@@ -784,16 +795,17 @@ class Repository(models.Model):
 
             hosting_service = self.hosting_service
 
-            if hosting_service:
-                exists = hosting_service.get_file_exists(
-                    self,
-                    path,
-                    revision,
-                    base_commit_id=base_commit_id)
-            else:
-                tool = self.get_scmtool()
-                exists = tool.file_exists(path, revision,
-                                          base_commit_id=base_commit_id)
+            with scm_call(self, 'file_exists'):
+                if hosting_service:
+                    exists = hosting_service.get_file_exists(
+                        self,
+                        path,
+                        revision,
+                        base_commit_id=base_commit_id)
+                else:
+                    tool = self.get_scmtool()
+                    exists = tool.file_exists(path, revision,
+                                              base_commit_id=base_commit_id)
 
             checked_file_exists.send(sender=self,
                                      path=path,
@@ -4,8 +4,20 @@ from __future__ import unicode_literals
 
 from djblets.registries.importer import lazy_import_registry
 
+from reviewboard.signals import initializing
+
 
 #: The search backend registry.
 search_backend_registry = \
     lazy_import_registry('reviewboard.search.search_backends.registry',
                          'SearchBackendRegistry')
+
+
+def _on_initializing(**kwargs):
+    """Set up signal handlers for search."""
+    from reviewboard.search.access import connect_signals
+
+    connect_signals()
+
+
+initializing.connect(_on_initializing)
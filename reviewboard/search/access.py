@@ -0,0 +1,109 @@
+"""Cached access information used to filter search results."""
+
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Group as AuthGroup, User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from djblets.cache.backend import cache_memoize
+from djblets.cache.synchronizer import GenerationSynchronizer
+
+from reviewboard.accounts.models import LocalSiteProfile
+from reviewboard.reviews.models import Group
+from reviewboard.scmtools.models import Repository
+
+
+#: The cache key tracking the generation of cached access information.
+_GENERATION_CACHE_KEY = 'search-access-generation'
+
+#: How long access information is cached for, in seconds.
+#:
+#: Cached information is invalidated whenever groups, repositories or
+#: permissions change, so this is only a safety net.
+ACCESS_CACHE_EXPIRATION = 60 * 60
+
+
+def get_private_ids_accessible_by(user, local_site=None):
+    """Return the IDs of private repositories and groups a user can access.
+
+    These are the IDs needed to filter private review requests out of
+    search results. Public repositories and groups aren't included, since
+    they're never stored in the ``private_repository_id`` and
+    ``private_target_groups`` fields of the index.
+
+    The results are cached until any repositories, review groups or
+    permissions change, or the user's superuser status changes.
+
+    Args:
+        user (django.contrib.auth.models.User):
+            The user performing the search.
+
+        local_site (reviewboard.site.models.LocalSite, optional):
+            The Local Site the search is being performed on.
+
+    Returns:
+        tuple:
+        A 2-tuple containing:
+
+        1. A sorted list of accessible private repository IDs.
+        2. A sorted list of accessible invite-only review group IDs.
+    """
+    if local_site:
+        local_site_id = local_site.pk
+    else:
+        local_site_id = 0
+
+    generation = GenerationSynchronizer(_GENERATION_CACHE_KEY).sync_gen
+
+    def _get_ids():
+        repository_ids = sorted(
+            Repository.objects
+            .accessible(user, visible_only=False, local_site=local_site)
+            .filter(public=False)
+            .values_list('pk', flat=True)
+        )
+        group_ids = sorted(
+            Group.objects
+            .accessible(user, visible_only=False, local_site=local_site)
+            .filter(invite_only=True)
+            .values_list('pk', flat=True)
+        )
+
+        return repository_ids, group_ids
+
+    # Superusers can access everything. This is part of the key, rather than
+    # invalidating on every user save (which includes every login), so that
+    # granting or revoking superuser status takes effect immediately.
+    return cache_memoize(
+        'search-private-ids:%s:%s:%s:%d' % (generation, user.pk,
+                                            local_site_id,
+                                            user.is_superuser),
+        _get_ids,
+        expiration=ACCESS_CACHE_EXPIRATION)
+
+
+def invalidate_private_ids(**kwargs):
+    """Invalidate all cached access information.
+
+    This is called when anything affecting access to repositories or review
+    groups changes.
+
+    Args:
+        **kwargs (dict):
+            Keyword arguments from the signal, if called from a signal.
+    """
+    GenerationSynchronizer(_GENERATION_CACHE_KEY).mark_updated()
+
+
+def connect_signals():
+    """Connect signals for invalidating cached access information."""
+    for model in (Group, Repository, LocalSiteProfile):
+        post_save.connect(invalidate_private_ids, sender=model)
+        post_delete.connect(invalidate_private_ids, sender=model)
+
+    for through in (Group.users.through,
+                    Repository.users.through,
+                    Repository.review_groups.through,
+                    User.user_permissions.through,
+                    User.groups.through,
+                    AuthGroup.permissions.through):
+        m2m_changed.connect(invalidate_private_ids, sender=through)
@@ -8,12 +8,13 @@ from django import forms
 from django.contrib.auth.models import User
 from django.utils import six
 from django.utils.translation import ugettext_lazy as _
+from djblets.siteconfig.models import SiteConfiguration
 from haystack.forms import ModelSearchForm
 from haystack.inputs import Raw
 from haystack.query import SQ
 
-from reviewboard.reviews.models import Group, ReviewRequest
-from reviewboard.scmtools.models import Repository
+from reviewboard.reviews.models import ReviewRequest
+from reviewboard.search.access import get_private_ids_accessible_by
 from reviewboard.search.indexes import BaseSearchIndex
 
 
@@ -125,6 +126,14 @@ class RBSearchForm(ModelSearchForm):
             .models(*model_filters)
         )
 
+        siteconfig = SiteConfiguration.objects.get_current()
+
+        if siteconfig.get('search_index_diff_content'):
+            sqs = sqs.filter_or(SQ(diff_content=Raw(q)))
+
+        if siteconfig.get('search_index_comments'):
+            sqs = sqs.filter_or(SQ(comments=Raw(q)))
+
         if id_q:
             sqs = sqs.filter_or(SQ(id=q))
 
@@ -153,28 +162,23 @@ class RBSearchForm(ModelSearchForm):
                 # Note that we are not performing Local Site checks here,
                 # because we're already filtering by Local Sites.
 
-                # Make sure they have access to the repository, if any.
-                accessible_repo_ids = list(Repository.objects.accessible_ids(
-                    user,
-                    visible_only=False,
-                    local_site=self.local_site,
-                ))
-
-                accessible_group_ids = Group.objects.accessible_ids(
-                    user,
-                    visible_only=False,
-                )
+                # Only the IDs of private repositories and invite-only groups
+                # are needed, since those are the only ones stored in the
+                # index. They're cached for the user, and matched with a
+                # single term query per field rather than a chain of queries.
+                accessible_repo_ids, accessible_group_ids = \
+                    get_private_ids_accessible_by(user, self.local_site)
 
+                # Make sure they have access to the repository, if any.
                 repository_sq = SQ(
                     private_repository_id__in=[0] + accessible_repo_ids
                 )
 
                 # Next, build a query to see if the review request targets any
                 # invite-only groups the user is a member of.
-                target_groups_sq = SQ(private_target_groups__contains=0)
-
-                for pk in accessible_group_ids:
-                    target_groups_sq |= SQ(private_target_groups__contains=pk)
+                target_groups_sq = SQ(
+                    private_target_groups__in=[0] + accessible_group_ids
+                )
 
                 # Build a query to see if the user is explicitly listed
                 # in the list of reviewers.
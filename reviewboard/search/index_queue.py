@@ -0,0 +1,235 @@
+"""A queue for batching on-the-fly search index updates."""
+
+from __future__ import unicode_literals
+
+import atexit
+import logging
+from collections import OrderedDict, defaultdict
+
+from djblets.siteconfig.models import SiteConfiguration
+from haystack.exceptions import NotHandled
+from haystack.utils import get_identifier
+
+from reviewboard.admin.background_worker import BackgroundWorker
+
+
+class SearchIndexQueue(BackgroundWorker):
+    """A deduplicating queue of pending search index updates.
+
+    Objects that need to be re-indexed or removed from the index are recorded
+    by model and primary key, so repeated changes to the same object only
+    result in a single index update. A background thread flushes the queue,
+    re-fetching the objects to update in bulk (through each index's
+    ``build_batch_queryset()`` and ``prepare_batch()``, see
+    :py:class:`~reviewboard.search.indexes.BaseSearchIndex`) and sending them
+    to the search backend in batches of ``search_index_batch_size``.
+
+    Anything still queued when the process exits is flushed at exit.
+    """
+
+    thread_name = 'search-index-queue'
+
+    #: The number of seconds to wait for more changes before flushing.
+    #:
+    #: This gives bulk operations (such as changing a group's membership) a
+    #: chance to finish queueing before their objects are indexed.
+    coalesce_delay = 1
+
+    #: An action for re-indexing an object.
+    ACTION_UPDATE = 'update'
+
+    #: An action for removing an object from the index.
+    ACTION_REMOVE = 'remove'
+
+    def __init__(self, signal_processor):
+        """Initialize the queue.
+
+        Args:
+            signal_processor (reviewboard.search.signal_processor.
+                              SignalProcessor):
+                The signal processor, which provides the search connections
+                and router.
+        """
+        super(SearchIndexQueue, self).__init__()
+
+        self.signal_processor = signal_processor
+        self._pending = OrderedDict()
+
+    def __len__(self):
+        """Return the number of pending updates.
+
+        Returns:
+            int:
+            The number of pending updates.
+        """
+        return len(self._pending)
+
+    def queue_update(self, model, pk):
+        """Queue an object to be re-indexed.
+
+        Args:
+            model (type):
+                The model of the object.
+
+            pk (int):
+                The primary key of the object.
+        """
+        self._queue(model, pk, self.ACTION_UPDATE, None)
+
+    def queue_removal(self, model, instance):
+        """Queue an object to be removed from the index.
+
+        Args:
+            model (type):
+                The model of the object.
+
+            instance (django.db.models.Model):
+                The object to remove. This may already be deleted from the
+                database.
+        """
+        self._queue(model, instance.pk, self.ACTION_REMOVE,
+                    get_identifier(instance))
+
+    def flush(self, batch_size=None):
+        """Apply a batch of pending updates to the search index.
+
+        Args:
+            batch_size (int, optional):
+                The maximum number of updates to apply. If not provided, all
+                pending updates will be applied.
+
+        Returns:
+            int:
+            The number of updates that were applied.
+        """
+        with self._lock:
+            if batch_size is None:
+                batch_size = len(self._pending)
+
+            batch = []
+
+            while self._pending and len(batch) < batch_size:
+                batch.append(self._pending.popitem(last=False))
+
+        if not batch:
+            return 0
+
+        updates = defaultdict(list)
+        removals = defaultdict(list)
+
+        for (model, pk), (action, identifier) in batch:
+            if action == self.ACTION_UPDATE:
+                updates[model].append(pk)
+            else:
+                removals[model].append(identifier)
+
+        for model in set(updates) | set(removals):
+            try:
+                self._apply(model, updates.get(model, []),
+                            removals.get(model, []))
+            except Exception as e:
+                logging.exception('Unable to update the search index for '
+                                  '%s: %s',
+                                  model.__name__, e)
+
+        return len(batch)
+
+    def process(self):
+        """Flush the queue in batches until it's empty.
+
+        Updates are applied in batches of ``search_index_batch_size``.
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        batch_size = siteconfig.get('search_index_batch_size')
+
+        while self.flush(batch_size):
+            pass
+
+    def on_started(self):
+        """Handle the worker thread starting.
+
+        This registers the queue to be flushed when the process exits.
+        """
+        atexit.register(self.flush)
+
+    def _queue(self, model, pk, action, identifier):
+        """Queue an update to the index.
+
+        Any previously-queued update for the same object is replaced.
+
+        Args:
+            model (type):
+                The model of the object.
+
+            pk (int):
+                The primary key of the object.
+
+            action (unicode):
+                The action to perform.
+
+            identifier (unicode):
+                The object's identifier in the index, for removals.
+        """
+        with self._lock:
+            self._pending[(model, pk)] = (action, identifier)
+
+        self.wake()
+
+    def _apply(self, model, pks, identifiers):
+        """Apply updates for objects of a model to each search connection.
+
+        Objects to update that are no longer included in the index's
+        queryset will be removed from the index instead.
+
+        Args:
+            model (type):
+                The model of the objects.
+
+            pks (list of int):
+                The primary keys of the objects to re-index.
+
+            identifiers (list of unicode):
+                The identifiers of the objects to remove from the index.
+        """
+        signal_processor = self.signal_processor
+
+        for using in signal_processor.connection_router.for_write():
+            connection = signal_processor.connections[using]
+
+            try:
+                index = connection.get_unified_index().get_index(model)
+            except NotHandled:
+                continue
+
+            backend = connection.get_backend()
+            remove_identifiers = list(identifiers)
+
+            if pks:
+                if hasattr(index, 'build_batch_queryset'):
+                    queryset = index.build_batch_queryset(using=using)
+                else:
+                    queryset = index.index_queryset(using=using)
+
+                objs = list(queryset.filter(pk__in=pks))
+                found_pks = set(obj.pk for obj in objs)
+
+                remove_identifiers += [
+                    get_identifier(model(pk=pk))
+                    for pk in pks
+                    if pk not in found_pks
+                ]
+
+                objs = [
+                    obj
+                    for obj in objs
+                    if index.should_update(obj)
+                ]
+
+                if objs:
+                    if hasattr(index, 'prepare_batch'):
+                        index.prepare_batch(objs)
+
+                    backend.update(index, objs)
+
+            for identifier in remove_identifiers:
+                backend.remove(identifier)
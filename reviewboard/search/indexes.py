@@ -30,6 +30,37 @@ class BaseSearchIndex(indexes.SearchIndex):
         """Return the model for this index."""
         return self.model
 
+    def build_batch_queryset(self, using=None):
+        """Return a queryset for fetching objects to index in batches.
+
+        Objects fetched through this queryset will be passed to
+        :py:meth:`prepare_batch` before being indexed. Subclasses can
+        override this to skip prefetching data that :py:meth:`prepare_batch`
+        computes in bulk.
+
+        Args:
+            using (unicode, optional):
+                The name of the search connection being used.
+
+        Returns:
+            django.db.models.query.QuerySet:
+            The queryset.
+        """
+        return self.index_queryset(using=using)
+
+    def prepare_batch(self, objs):
+        """Prepare data for a batch of objects before they're indexed.
+
+        Subclasses can override this to fetch data for all the objects at
+        once, storing it on each object for use by the ``prepare_*``
+        methods. By default, this does nothing.
+
+        Args:
+            objs (list of django.db.models.Model):
+                The objects that will be indexed.
+        """
+        pass
+
     def prepare_local_sites(self, obj):
         """Prepare the list of local sites for the search index.
 
@@ -0,0 +1,176 @@
+"""Utilities for building the search index in chunks."""
+
+from __future__ import unicode_literals
+
+from reviewboard.diffviewer.models import RawFileDiffData
+
+
+#: The number of bytes of stored diff data to decompress at a time.
+DIFF_BLOCK_SIZE = 64 * 1024
+
+
+def get_index_model_label(model):
+    """Return a label identifying an indexed model.
+
+    Args:
+        model (type):
+            The indexed model.
+
+    Returns:
+        unicode:
+        The label, in ``app_label.ModelName`` form.
+    """
+    return '%s.%s' % (model._meta.app_label, model._meta.object_name)
+
+
+def get_index_for_model_label(connection, label):
+    """Return the search index for a model label.
+
+    Args:
+        connection (haystack.utils.loading.ConnectionHandler):
+            The search connection.
+
+        label (unicode):
+            The label returned by :py:func:`get_index_model_label`.
+
+    Returns:
+        haystack.indexes.SearchIndex:
+        The search index, or ``None`` if the model isn't indexed.
+    """
+    unified_index = connection.get_unified_index()
+
+    for model in unified_index.get_indexed_models():
+        if get_index_model_label(model) == label:
+            return unified_index.get_index(model)
+
+    return None
+
+
+def index_chunk(index, backend, start_pk, end_pk, using=None,
+                write_lock=None):
+    """Index all objects in a range of primary keys.
+
+    The objects are fetched through the index's ``build_batch_queryset()``
+    and passed to its ``prepare_batch()`` (see
+    :py:class:`~reviewboard.search.indexes.BaseSearchIndex`), if available,
+    so that data can be computed in bulk.
+
+    Args:
+        index (haystack.indexes.SearchIndex):
+            The search index.
+
+        backend (haystack.backends.BaseSearchBackend):
+            The search backend to write to.
+
+        start_pk (int):
+            The first primary key in the range.
+
+        end_pk (int):
+            The primary key ending the range (exclusive).
+
+        using (unicode, optional):
+            The name of the search connection being used.
+
+        write_lock (multiprocessing.Lock, optional):
+            A lock to hold while writing to the index, for backends that
+            don't support concurrent writers.
+
+    Returns:
+        int:
+        The number of objects indexed.
+    """
+    if hasattr(index, 'build_batch_queryset'):
+        queryset = index.build_batch_queryset(using=using)
+    else:
+        queryset = index.index_queryset(using=using)
+
+    objs = list(queryset.filter(pk__gte=start_pk, pk__lt=end_pk))
+
+    if objs:
+        if hasattr(index, 'prepare_batch'):
+            index.prepare_batch(objs)
+
+        if write_lock is None:
+            backend.update(index, objs)
+        else:
+            with write_lock:
+                backend.update(index, objs)
+
+    return len(objs)
+
+
+def iter_diff_changed_lines(data, compression, max_length=None):
+    """Yield the inserted and deleted lines in stored diff data.
+
+    The diff data is decompressed and split into lines incrementally, so
+    only a block of the decompressed diff is held in memory at a time. File
+    headers, hunk headers and context lines are skipped.
+
+    Args:
+        data (bytes):
+            The stored diff data, from :py:attr:`RawFileDiffData.binary
+            <reviewboard.diffviewer.models.raw_file_diff_data.
+            RawFileDiffData.binary>`.
+
+        compression (unicode):
+            The compression method used for the data, from
+            :py:attr:`RawFileDiffData.compression
+            <reviewboard.diffviewer.models.raw_file_diff_data.
+            RawFileDiffData.compression>`.
+
+        max_length (int, optional):
+            The maximum number of characters to yield, in total. Once
+            reached, the rest of the diff won't be decompressed.
+
+    Yields:
+        unicode:
+        Each changed line, without the leading ``+`` or ``-``.
+
+    Raises:
+        NotImplementedError:
+            The compression method isn't supported.
+    """
+    remaining = max_length
+    pending = b''
+
+    for block in RawFileDiffData.iter_decompressed(data, compression,
+                                                   DIFF_BLOCK_SIZE):
+        lines = (pending + block).split(b'\n')
+        pending = lines.pop()
+
+        for line in lines:
+            text = _get_changed_line_text(line)
+
+            if text:
+                if remaining is not None:
+                    if remaining <= 0:
+                        return
+
+                    text = text[:remaining]
+                    remaining -= len(text)
+
+                yield text
+
+    text = _get_changed_line_text(pending)
+
+    if text and (remaining is None or remaining > 0):
+        yield text[:remaining]
+
+
+def _get_changed_line_text(line):
+    """Return the text of a changed line in a diff.
+
+    Args:
+        line (bytes):
+            The line in the diff.
+
+    Returns:
+        unicode:
+        The text of the line, without the leading ``+`` or ``-``, or ``None``
+        if this isn't an inserted or deleted line.
+    """
+    if (line[:1] in (b'+', b'-') and
+        not line.startswith((b'+++ ', b'--- '))):
+        return line[1:].rstrip(b'\r').decode('utf-8', 'replace')
+
+    return None
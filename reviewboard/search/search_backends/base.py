@@ -53,6 +53,11 @@ class SearchBackend(object):
     #: A mapping of search engine settings to form fields.
     form_field_map = {}
 
+    #: Whether multiple processes can write to the index at the same time.
+    #:
+    #: If ``False``, parallel indexing will serialize writes to the index.
+    supports_concurrent_writes = True
+
     @property
     def configuration(self):
         """The configuration for the search engine.
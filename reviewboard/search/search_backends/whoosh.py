@@ -55,6 +55,9 @@ class WhooshBackend(SearchBackend):
         'search_index_file': 'PATH',
     }
 
+    # Whoosh only allows a single writer to hold the index lock at a time.
+    supports_concurrent_writes = False
+
     @property
     def default_settings(self):
         """The default settings for the backend.
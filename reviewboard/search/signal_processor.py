@@ -8,12 +8,16 @@ from functools import partial
 from django.contrib.auth.models import User
 from django.db.models.signals import post_delete, post_save, m2m_changed
 from django.utils import six
+from djblets.siteconfig.models import SiteConfiguration
 from haystack.signals import BaseSignalProcessor
 
 from reviewboard.accounts.models import Profile
-from reviewboard.reviews.models import Group, ReviewRequest
-from reviewboard.reviews.signals import review_request_published
+from reviewboard.reviews.models import Group, Review, ReviewRequest
+from reviewboard.reviews.signals import (reply_published,
+                                         review_published,
+                                         review_request_published)
 from reviewboard.search import search_backend_registry
+from reviewboard.search.index_queue import SearchIndexQueue
 
 
 class SignalProcessor(BaseSignalProcessor):
@@ -27,12 +31,19 @@ class SignalProcessor(BaseSignalProcessor):
 
     1) Search is enabled.
     2) The current search engine backend supports on-the-fly indexing.
+
+    If the ``search_index_in_background`` setting is enabled, changes are
+    added to a :py:class:`~reviewboard.search.index_queue.SearchIndexQueue`,
+    which coalesces repeated changes to the same object and updates the index
+    in batches from a background thread.
     """
 
     save_signals = [
         (ReviewRequest, review_request_published, 'review_request'),
         (User, post_save, 'instance'),
         (Profile, post_save, 'instance'),
+        (Review, review_published, 'review'),
+        (Review, reply_published, 'reply'),
     ]
 
     delete_signals = [
@@ -53,6 +64,7 @@ class SignalProcessor(BaseSignalProcessor):
         self.is_setup = False
         self._handlers = {}
         self._pending_user_changes = threading.local()
+        self.index_queue = SearchIndexQueue(self)
 
         super(SignalProcessor, self).__init__(*args, **kwargs)
 
@@ -109,8 +121,21 @@ class SignalProcessor(BaseSignalProcessor):
                 # When we save a Profile, we want to update the User index.
                 kwargs['sender'] = User
                 instance = instance.user
+            elif isinstance(instance, Review):
+                # When a review is published, the review request needs to be
+                # updated, but only if comments are being indexed.
+                siteconfig = SiteConfiguration.objects.get_current()
+
+                if not siteconfig.get('search_index_comments'):
+                    return
 
-            self.handle_save(instance=instance, **kwargs)
+                kwargs['sender'] = ReviewRequest
+                instance = instance.review_request
+
+            if self._should_queue():
+                self.index_queue.queue_update(kwargs['sender'], instance.pk)
+            else:
+                self.handle_save(instance=instance, **kwargs)
 
     def check_handle_delete(self, **kwargs):
         """Conditionally update the search index when an object is deleted.
@@ -123,7 +148,11 @@ class SignalProcessor(BaseSignalProcessor):
         backend = search_backend_registry.current_backend
 
         if backend and search_backend_registry.on_the_fly_indexing_enabled:
-            self.handle_delete(**kwargs)
+            if self._should_queue():
+                self.index_queue.queue_removal(kwargs['sender'],
+                                               kwargs['instance'])
+            else:
+                self.handle_delete(**kwargs)
 
     def _handle_group_m2m_changed(self, instance, action, pk_set, reverse,
                                   **kwargs):
@@ -185,15 +214,11 @@ class SignalProcessor(BaseSignalProcessor):
             if reverse:
                 # When using the reverse relation, the instance is the User and
                 # the pk_set is the PKs of the groups being added or removed.
-                users = [instance]
+                self._handle_user_saves([instance.pk])
             else:
                 # Otherwise the instance is the Group and the pk_set is the set
                 # of User primary keys.
-                users = User.objects.filter(pk__in=pk_set)
-
-            for user in users:
-                self.handle_save(instance=user, instance_kwarg='instance',
-                                 sender=User)
+                self._handle_user_saves(pk_set)
         elif action == 'pre_clear':
             # When ``reverse`` is ``True``, a User is having their groups
             # cleared so we don't need to worry about storing any state in the
@@ -210,13 +235,39 @@ class SignalProcessor(BaseSignalProcessor):
             if reverse:
                 # When ``reverse`` is ``True``, we just have to reindex a
                 # single user.
-                self.handle_save(instance=instance, instance_kwarg='instance',
-                                 sender=User)
+                self._handle_user_saves([instance.pk])
             else:
                 # Here, we are reindexing every user that got removed from the
                 # group via clearing.
-                pks = self._pending_user_changes.data.pop(instance.pk)
+                self._handle_user_saves(
+                    self._pending_user_changes.data.pop(instance.pk))
+
+    def _handle_user_saves(self, pks):
+        """Update the search index for users whose groups changed.
+
+        If updates are queued, the users won't be fetched until the queue
+        is flushed.
+
+        Args:
+            pks (list of int):
+                The primary keys of the users.
+        """
+        if self._should_queue():
+            for pk in pks:
+                self.index_queue.queue_update(User, pk)
+        else:
+            for user in User.objects.filter(pk__in=pks):
+                self.handle_save(instance=user, instance_kwarg='instance',
+                                 sender=User)
+
+    def _should_queue(self):
+        """Return whether index updates should be queued.
+
+        Returns:
+            bool:
+            Whether updates should be added to the index queue, rather than
+            applied immediately.
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
 
-                for user in User.objects.filter(pk__in=pks):
-                    self.handle_save(instance=user, instance_kwarg='instance',
-                                     sender=User)
+        return siteconfig.get('search_index_in_background')
@@ -1,8 +1,15 @@
 from __future__ import unicode_literals
 
+import bz2
+import json
+import os
+import shutil
+import tempfile
+
 import django
 from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
+from django.core.management import call_command
 from django.core.urlresolvers import reverse
 from django.utils import six
 from django.utils.six.moves.urllib.parse import urlencode
@@ -19,7 +26,13 @@ except ImportError:
 
 from reviewboard.admin.server import build_server_url
 from reviewboard.admin.siteconfig import load_site_config
+from reviewboard.diffviewer.models import RawFileDiffData
+from reviewboard.reviews.management.commands.index import \
+    _index_chunk_in_worker
 from reviewboard.reviews.models import ReviewRequestDraft
+from reviewboard.reviews.search_indexes import ReviewRequestIndex
+from reviewboard.search.access import get_private_ids_accessible_by
+from reviewboard.search.indexing import iter_diff_changed_lines
 from reviewboard.search.testing import reindex_search
 from reviewboard.site.urlresolvers import local_site_reverse
 from reviewboard.testing.testcase import TestCase
@@ -500,6 +513,84 @@ class SearchTests(SpyAgency, TestCase):
         self.assertEqual(result.username, 'doc')
         self.assertEqual(result.full_name, '')
 
+    def test_on_the_fly_indexing_queued(self):
+        """Testing on-the-fly indexing with search_index_in_background
+        coalesces and batches updates
+        """
+        reindex_search()
+
+        signal_processor = self._get_signal_processor()
+        index_queue = signal_processor.index_queue
+
+        u = User.objects.get(username='doc')
+        group = self.create_review_group()
+
+        # Updates are flushed explicitly below, rather than by the worker
+        # thread.
+        self.spy_on(index_queue.wake, call_original=False)
+
+        with self.siteconfig_settings({'search_on_the_fly_indexing': True,
+                                       'search_index_in_background': True},
+                                      reload_settings=False):
+            self.spy_on(signal_processor.handle_save)
+
+            u.first_name = 'Not Doc'
+            u.save()
+
+            u.last_name = 'Dwarf'
+            u.save()
+
+            u.get_profile().save()
+            group.users = [u]
+
+            self.assertFalse(signal_processor.handle_save.spy.called)
+            self.assertEqual(len(index_queue), 1)
+
+            backend = signal_processor.connections['default'].get_backend()
+            self.spy_on(backend.update)
+
+            self.assertEqual(index_queue.flush(), 1)
+            self.assertEqual(len(index_queue), 0)
+
+            self.assertEqual(len(backend.update.spy.calls), 1)
+            self.assertEqual(backend.update.spy.calls[0].args[1], [u])
+
+            rsp = self.search('doc')
+
+        self.assertEqual(rsp.context['hits_returned'], 1)
+        result = rsp.context['result']
+
+        self.assertEqual(result.groups, 'test-group')
+        self.assertEqual(result.full_name, 'Not Doc Dwarf')
+
+    def test_on_the_fly_indexing_queued_removal(self):
+        """Testing on-the-fly indexing with search_index_in_background
+        removes deleted and deactivated objects
+        """
+        reindex_search()
+
+        signal_processor = self._get_signal_processor()
+        index_queue = signal_processor.index_queue
+
+        self.spy_on(index_queue.wake, call_original=False)
+
+        with self.siteconfig_settings({'search_on_the_fly_indexing': True,
+                                       'search_index_in_background': True},
+                                      reload_settings=False):
+            User.objects.get(username='doc').delete()
+
+            grumpy = User.objects.get(username='grumpy')
+            grumpy.is_active = False
+            grumpy.save()
+
+            self.assertEqual(index_queue.flush(), 2)
+
+            rsp = self.search('doc')
+            self.assertEqual(rsp.context['hits_returned'], 0)
+
+            rsp = self.search('grumpy')
+            self.assertEqual(rsp.context['hits_returned'], 0)
+
     def test_search_by_full_name_public_profile(self):
         """Testing searching by full name for users with public profiles"""
         user = User.objects.get(username='doc')
@@ -657,6 +748,227 @@ class SearchTests(SpyAgency, TestCase):
 
         self.assertEqual(expected_results, actual_results)
 
+    @add_fixtures(['test_scmtools'])
+    def test_review_request_index_prepare_batch(self):
+        """Testing ReviewRequestIndex.prepare_batch matches per-object
+        preparation
+        """
+        public_group = self.create_review_group(name='public-group')
+        invite_only_group = self.create_review_group(name='invite-only-group',
+                                                     invite_only=True)
+        grumpy = User.objects.get(username='grumpy')
+
+        review_request = self.create_review_request(create_repository=True,
+                                                    publish=True)
+        diffset = self.create_diffset(review_request)
+        self.create_filediff(diffset, source_file='/a', dest_file='/b')
+        self.create_filediff(diffset)
+        review_request.target_groups = [invite_only_group]
+        review_request.target_people = [grumpy]
+
+        review_request = self.create_review_request(
+            repository=self.create_repository(name='private', public=False),
+            publish=True)
+        review_request.target_groups = [public_group, invite_only_group]
+
+        review_request = self.create_review_request(publish=True)
+        review_request.target_groups = [public_group]
+
+        index = ReviewRequestIndex()
+        review_requests = list(index.build_batch_queryset())
+        self.assertEqual(len(review_requests), 3)
+
+        index.prepare_batch(review_requests)
+
+        for review_request in review_requests:
+            expected = dict(index.full_prepare(
+                index.index_queryset().get(pk=review_request.pk)))
+
+            self.assertEqual(dict(index.full_prepare(review_request)),
+                             expected)
+
+    @add_fixtures(['test_scmtools'])
+    def test_review_request_index_diff_content_and_comments(self):
+        """Testing ReviewRequestIndex with search_index_diff_content and
+        search_index_comments
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        siteconfig.set('search_index_diff_content', True)
+        siteconfig.set('search_index_comments', True)
+        siteconfig.save()
+
+        review_request = self.create_review_request(create_repository=True,
+                                                    publish=True)
+        diffset = self.create_diffset(review_request)
+        filediff = self.create_filediff(diffset, source_file='/a',
+                                        dest_file='/a')
+        self.create_filediff(diffset, source_file='/b', dest_file='/b')
+
+        review = self.create_review(review_request)
+        self.create_diff_comment(review, filediff, text='Diff comment')
+        self.create_general_comment(review, text='General comment')
+        review.publish()
+
+        draft_review = self.create_review(review_request, user='grumpy')
+        self.create_general_comment(draft_review, text='Draft comment')
+
+        self.spy_on(iter_diff_changed_lines)
+
+        index = ReviewRequestIndex()
+        review_requests = list(index.build_batch_queryset())
+        index.prepare_batch(review_requests)
+
+        # Both files share the same diff data, so it's only read once.
+        self.assertEqual(len(iter_diff_changed_lines.spy.calls), 1)
+
+        data = index.full_prepare(review_requests[0])
+        self.assertEqual(data['diff_content'],
+                         'Hello, world!\nHello, everybody!')
+        self.assertEqual(data['comments'], 'Diff comment\nGeneral comment')
+
+        expected = dict(index.full_prepare(
+            index.index_queryset().get(pk=review_request.pk)))
+        self.assertEqual(dict(data), expected)
+
+    @add_fixtures(['test_scmtools'])
+    def test_review_request_index_diff_content_max_length(self):
+        """Testing ReviewRequestIndex with search_index_diff_content stops
+        reading diffs once the maximum content length is reached
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        siteconfig.set('search_index_diff_content', True)
+        siteconfig.save()
+
+        review_request = self.create_review_request(create_repository=True,
+                                                    publish=True)
+        diffset = self.create_diffset(review_request)
+        self.create_filediff(diffset, source_file='/a', dest_file='/a')
+        self.create_filediff(diffset, source_file='/b', dest_file='/b',
+                             diff=self.DEFAULT_GIT_FILEDIFF_DATA_DIFF)
+
+        self.spy_on(iter_diff_changed_lines)
+
+        old_max_length = ReviewRequestIndex.MAX_DIFF_CONTENT_LENGTH
+        ReviewRequestIndex.MAX_DIFF_CONTENT_LENGTH = 20
+
+        try:
+            index = ReviewRequestIndex()
+            review_requests = list(index.build_batch_queryset())
+            index.prepare_batch(review_requests)
+        finally:
+            ReviewRequestIndex.MAX_DIFF_CONTENT_LENGTH = old_max_length
+
+        self.assertEqual(len(iter_diff_changed_lines.spy.calls), 1)
+
+        data = index.full_prepare(review_requests[0])
+        self.assertEqual(data['diff_content'], 'Hello, world!\nHello,')
+
+    @add_fixtures(['test_scmtools'])
+    def test_search_diff_content(self):
+        """Testing search with search_index_diff_content matches changed
+        lines
+        """
+        siteconfig = SiteConfiguration.objects.get_current()
+        siteconfig.set('search_index_diff_content', True)
+        siteconfig.save()
+
+        review_request = self.create_review_request(create_repository=True,
+                                                    publish=True)
+        diffset = self.create_diffset(review_request)
+        self.create_filediff(diffset)
+        reindex_search()
+
+        response = self.search('everybody')
+        context = response.context
+        self.assertEqual(context['hits_returned'], 1)
+
+        results = context['object_list']
+        self.assertEqual(results[0].content_type(), 'reviews.reviewrequest')
+        self.assertEqual(results[0].summary, review_request.summary)
+
+    def test_index_command_with_workers(self):
+        """Testing the index command with --workers and --checkpoint resumes
+        from the checkpoint
+        """
+        reindex_search()
+
+        review_requests = [
+            self.create_review_request(publish=True, summary='foo'),
+            self.create_review_request(publish=True, summary='foo'),
+        ]
+
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+
+        checkpoint_path = os.path.join(tempdir, 'checkpoint.json')
+        chunk_size = review_requests[1].pk - review_requests[0].pk
+
+        # Pretend the chunk containing the first review request was already
+        # indexed.
+        first_chunk_start = (review_requests[0].pk -
+                             review_requests[0].pk % chunk_size)
+
+        with open(checkpoint_path, 'w') as fp:
+            json.dump(
+                {
+                    'chunk_size': chunk_size,
+                    'completed': {
+                        'reviews.ReviewRequest': [
+                            [first_chunk_start,
+                             first_chunk_start + chunk_size],
+                        ],
+                    },
+                },
+                fp)
+
+        self.spy_on(_index_chunk_in_worker)
+
+        call_command('index', workers=1, chunk_size=chunk_size,
+                     checkpoint=checkpoint_path)
+
+        self.assertFalse(os.path.exists(checkpoint_path))
+
+        # Tasks are called with (label, start_pk, end_pk).
+        review_request_calls = [
+            call
+            for call in _index_chunk_in_worker.spy.calls
+            if call.args[0] == 'reviews.ReviewRequest'
+        ]
+        self.assertEqual(len(review_request_calls), 1)
+        self.assertEqual(review_request_calls[0].args[1],
+                         first_chunk_start + chunk_size)
+        self.assertEqual(review_request_calls[0].return_value[3], 1)
+
+        rsp = self.search('foo')
+        self.assertEqual(rsp.context['hits_returned'], 1)
+        self.assertEqual(rsp.context['result'].review_request_id,
+                         review_requests[1].display_id)
+
+    def test_index_command_with_multiple_workers(self):
+        """Testing the index command with --workers=2 and --full"""
+        reindex_search()
+
+        review_requests = [
+            self.create_review_request(publish=True, summary='foo'),
+            self.create_review_request(publish=True, summary='foo'),
+        ]
+
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+
+        checkpoint_path = os.path.join(tempdir, 'checkpoint.json')
+
+        # Each review request is indexed in its own chunk, by a worker
+        # process.
+        call_command('index', rebuild=True, workers=2,
+                     chunk_size=review_requests[1].pk - review_requests[0].pk,
+                     checkpoint=checkpoint_path)
+
+        self.assertFalse(os.path.exists(checkpoint_path))
+
+        rsp = self.search('foo')
+        self.assertEqual(rsp.context['hits_returned'], 2)
+
     def _get_signal_processor(self):
         """Return the configured signal processor.
 
@@ -679,6 +991,116 @@ class SearchTests(SpyAgency, TestCase):
         return signal_processor
 
 
+class AccessTests(TestCase):
+    """Unit tests for reviewboard.search.access."""
+
+    fixtures = ['test_users', 'test_scmtools']
+
+    def test_get_private_ids_accessible_by(self):
+        """Testing get_private_ids_accessible_by returns only private IDs"""
+        user = User.objects.get(username='doc')
+
+        public_group = self.create_review_group(name='public')
+        public_group.users.add(user)
+
+        private_group = self.create_review_group(name='private',
+                                                 invite_only=True)
+        private_group.users.add(user)
+
+        self.create_review_group(name='other', invite_only=True)
+
+        self.create_repository(name='public')
+        private_repository = self.create_repository(name='private',
+                                                    public=False)
+        private_repository.users.add(user)
+
+        self.create_repository(name='other', public=False)
+
+        self.assertEqual(get_private_ids_accessible_by(user),
+                         ([private_repository.pk], [private_group.pk]))
+
+    def test_get_private_ids_accessible_by_cached(self):
+        """Testing get_private_ids_accessible_by caches results until access
+        changes
+        """
+        user = User.objects.get(username='doc')
+        group1 = self.create_review_group(name='group1', invite_only=True)
+        group1.users.add(user)
+
+        self.assertEqual(get_private_ids_accessible_by(user),
+                         ([], [group1.pk]))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_private_ids_accessible_by(user),
+                             ([], [group1.pk]))
+
+        group2 = self.create_review_group(name='group2', invite_only=True)
+        group2.users.add(user)
+
+        self.assertEqual(get_private_ids_accessible_by(user),
+                         ([], [group1.pk, group2.pk]))
+
+        group1.users.remove(user)
+
+        self.assertEqual(get_private_ids_accessible_by(user),
+                         ([], [group2.pk]))
+
+    def test_get_private_ids_accessible_by_superuser_changed(self):
+        """Testing get_private_ids_accessible_by when a user's superuser
+        status changes
+        """
+        user = User.objects.get(username='doc')
+        group = self.create_review_group(name='group1', invite_only=True)
+
+        self.assertEqual(get_private_ids_accessible_by(user), ([], []))
+
+        user.is_superuser = True
+        user.save(update_fields=('is_superuser',))
+
+        self.assertEqual(get_private_ids_accessible_by(user),
+                         ([], [group.pk]))
+
+        user.is_superuser = False
+        user.save(update_fields=('is_superuser',))
+
+        self.assertEqual(get_private_ids_accessible_by(user), ([], []))
+
+
+class IndexingTests(TestCase):
+    """Unit tests for reviewboard.search.indexing."""
+
+    DIFF_DATA = (
+        b'--- README\trevision 123\n'
+        b'+++ README\trevision 123\n'
+        b'@@ -1,2 +1,2 @@\n'
+        b' Context\n'
+        b'-Hello, world!\n'
+        b'+Hello, everybody!\n'
+        b'+No newline'
+    )
+
+    def test_iter_diff_changed_lines(self):
+        """Testing iter_diff_changed_lines with uncompressed data"""
+        self.assertEqual(
+            list(iter_diff_changed_lines(self.DIFF_DATA, None)),
+            ['Hello, world!', 'Hello, everybody!', 'No newline'])
+
+    def test_iter_diff_changed_lines_with_bzip2(self):
+        """Testing iter_diff_changed_lines with bzip2-compressed data"""
+        self.assertEqual(
+            list(iter_diff_changed_lines(
+                bz2.compress(self.DIFF_DATA),
+                RawFileDiffData.COMPRESSION_BZIP2)),
+            ['Hello, world!', 'Hello, everybody!', 'No newline'])
+
+    def test_iter_diff_changed_lines_with_max_length(self):
+        """Testing iter_diff_changed_lines with max_length"""
+        self.assertEqual(
+            list(iter_diff_changed_lines(self.DIFF_DATA, None,
+                                         max_length=20)),
+            ['Hello, world!', 'Hello, '])
+
+
 class ViewTests(TestCase):
     """Tests for the search view."""
 
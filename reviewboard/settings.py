@@ -78,6 +78,7 @@ MIDDLEWARE_CLASSES = [
     # These must go before anything that deals with settings.
     'djblets.siteconfig.middleware.SettingsMiddleware',
     'reviewboard.admin.middleware.LoadSettingsMiddleware',
+    'reviewboard.admin.middleware.InstrumentationMiddleware',
 
     'djblets.extensions.middleware.ExtensionsMiddleware',
     'djblets.integrations.middleware.IntegrationsMiddleware',
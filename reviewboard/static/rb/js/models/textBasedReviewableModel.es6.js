@@ -14,11 +14,21 @@
  *     hasRenderedView (boolean):
  *         Whether or not the text has a rendered view, such as for Markdown,
  *         etc.
+ *
+ *     numTextLines (number):
+ *         The number of lines in the source text. This is only set when not
+ *         showing a diff.
+ *
+ *     textLinesURL (string):
+ *         The URL for loading further windows of lines of the source text.
+ *         This is only set when not showing a diff.
  */
 RB.TextBasedReviewable = RB.FileAttachmentReviewable.extend({
     defaults: _.defaults({
         viewMode: 'source',
         hasRenderedView: false,
+        numTextLines: null,
+        textLinesURL: null,
     }, RB.FileAttachmentReviewable.prototype.defaults),
 
     commentBlockModel: RB.TextCommentBlock,
@@ -14,6 +14,18 @@
  *     collapsed (boolean):
  *         Whether this entry is in a collapsed state.
  *
+ *     deferred (boolean):
+ *         Whether this entry is a stub for an older entry that hasn't been
+ *         loaded yet. Its content will be loaded when first expanded.
+ *
+ *     deferredModelClass (string):
+ *         The name of the model class to use once a deferred entry has been
+ *         loaded.
+ *
+ *     deferredViewClass (string):
+ *         The name of the view class to use once a deferred entry has been
+ *         loaded.
+ *
  *     page (RB.ReviewRequestPage):
  *         The page that owns this entry.
  *
@@ -31,6 +43,9 @@ RB.ReviewRequestPage.Entry = Backbone.Model.extend({
     defaults: {
         addedTimestamp: null,
         collapsed: false,
+        deferred: false,
+        deferredModelClass: null,
+        deferredViewClass: null,
         page: null,
         reviewRequestEditor: null,
         typeID: null,
@@ -52,6 +67,9 @@ RB.ReviewRequestPage.Entry = Backbone.Model.extend({
         return {
             id: attrs.id,
             collapsed: attrs.collapsed,
+            deferred: !!attrs.deferred,
+            deferredModelClass: attrs.deferredModelClass || null,
+            deferredViewClass: attrs.deferredViewClass || null,
             addedTimestamp: moment.utc(attrs.addedTimestamp).toDate(),
             updatedTimestamp: moment.utc(attrs.updatedTimestamp).toDate(),
             typeID: attrs.typeID,
@@ -105,6 +123,18 @@ RB.ReviewRequestPage.Entry = Backbone.Model.extend({
         this.get('page').watchEntryUpdates(this, periodMS);
     },
 
+    /**
+     * Load the content for a deferred entry.
+     *
+     * This does nothing if the entry isn't deferred or is already loading.
+     */
+    loadDeferred() {
+        if (this.get('deferred') && !this._deferredLoading) {
+            this._deferredLoading = true;
+            this.get('page').loadDeferredEntry(this);
+        }
+    },
+
     /**
      * Stop watching for updates to this entry.
      */
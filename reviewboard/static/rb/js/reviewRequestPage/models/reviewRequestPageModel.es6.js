@@ -19,6 +19,7 @@ RB.ReviewRequestPage.ReviewRequestPage = RB.ReviewablePage.extend({
         this._watchedUpdatesPeriodMS = null;
         this._watchedUpdatesTimeout = null;
         this._watchedUpdatesLastScheduleTime = null;
+        this._pendingDeferredEntries = [];
 
         this.entries = new Backbone.Collection([], {
             model: RB.ReviewRequestPage.Entry,
@@ -60,6 +61,31 @@ RB.ReviewRequestPage.ReviewRequestPage = RB.ReviewablePage.extend({
         this.entries.add(entry);
     },
 
+    /**
+     * Load the content for a deferred entry.
+     *
+     * Entries requested in the same event loop iteration (for instance, by
+     * :guilabel:`Expand All`) will be batched into a single request.
+     *
+     * Args:
+     *     entry (RB.ReviewRequestPage.Entry):
+     *         The deferred entry to load.
+     */
+    loadDeferredEntry(entry) {
+        this._pendingDeferredEntries.push(entry);
+
+        if (this._pendingDeferredEntries.length === 1) {
+            _.defer(() => {
+                const entries = this._pendingDeferredEntries;
+
+                this._pendingDeferredEntries = [];
+                this._loadUpdates({
+                    entries: entries,
+                });
+            });
+        }
+    },
+
     /**
      * Watch for updates to an entry.
      *
@@ -405,10 +431,14 @@ RB.ReviewRequestPage.ReviewRequestPage = RB.ReviewablePage.extend({
 
         console.assert(entry.get('typeID') === metadata.entryType);
 
-        /* Only reload this entry if its updated timestamp has changed. */
+        /*
+         * Only reload this entry if its updated timestamp has changed, or
+         * if it's a deferred entry that's now being loaded.
+         */
         const newTimestamp = new Date(metadata.updatedTimestamp);
 
-        if (newTimestamp <= entry.get('updatedTimestamp')) {
+        if (!entry.get('deferred') &&
+            newTimestamp <= entry.get('updatedTimestamp')) {
             return;
         }
 
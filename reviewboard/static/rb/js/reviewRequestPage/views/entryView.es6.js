@@ -41,6 +41,8 @@ RB.ReviewRequestPage.EntryView = Backbone.View.extend({
      * Expand the box.
      */
     expand() {
+        this.model.loadDeferred();
+
         this._$box.removeClass('collapsed');
         this._$expandCollapseButton
             .removeClass('rb-icon-expand-review')
@@ -60,6 +60,12 @@ RB.ReviewRequestPage.ReviewRequestPageView = RB.ReviewablePageView.extend({
         this.listenTo(this.model, 'applyingUpdate:entry', (metadata, html) => {
             const entryID = metadata.entryID;
             const entryView = this._entryViewsByID[entryID];
+
+            if (entryView.model.get('deferred')) {
+                this._replaceDeferredEntryView(entryView, metadata, html);
+                return;
+            }
+
             const collapsed = entryView.isCollapsed();
 
             this._onApplyingUpdate(entryView, metadata);
@@ -209,6 +215,59 @@ RB.ReviewRequestPage.ReviewRequestPageView = RB.ReviewablePageView.extend({
         }
     },
 
+    /**
+     * Replace a deferred entry's stub with the loaded entry.
+     *
+     * The stub's model and view are generic, so new instances of the real
+     * entry's model and view classes are constructed for the loaded HTML.
+     *
+     * Args:
+     *     stubView (RB.ReviewRequestPage.EntryView):
+     *         The view for the deferred entry's stub.
+     *
+     *     metadata (object):
+     *         The metadata for the loaded entry.
+     *
+     *     html (string):
+     *         The HTML for the loaded entry.
+     */
+    _replaceDeferredEntryView(stubView, metadata, html) {
+        const stubEntry = stubView.model;
+        const getClass = name => name.split('.').reduce(
+            (obj, attr) => obj[attr], window);
+        const ModelClass = getClass(stubEntry.get('deferredModelClass'));
+        const ViewClass = getClass(stubEntry.get('deferredViewClass'));
+        const $newEl = $(html);
+
+        stubView.$el.replaceWith($newEl);
+        stubView.undelegateEvents();
+        stubView.stopListening();
+
+        this._entryViews = _.without(this._entryViews, stubView);
+        delete this._entryViewsByID[stubEntry.id];
+        this.model.entries.remove(stubEntry);
+
+        const entry = new ModelClass(_.extend({
+            id: metadata.entryID,
+            collapsed: false,
+            addedTimestamp: metadata.addedTimestamp,
+            updatedTimestamp: metadata.updatedTimestamp,
+            typeID: metadata.entryType,
+            reviewRequestEditor: stubEntry.get('reviewRequestEditor'),
+        }, metadata.modelData), {
+            parse: true,
+        });
+
+        const entryView = new ViewClass(_.extend({
+            el: $newEl,
+            reviewRequestEditorView: this.reviewRequestEditorView,
+            model: entry,
+        }, metadata.viewOptions));
+
+        this.addEntryView(entryView);
+        entryView.expand();
+    },
+
     /**
      * Reload the HTML for a view.
      *
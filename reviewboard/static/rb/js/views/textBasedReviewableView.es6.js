@@ -25,6 +25,12 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
         this._$renderedTable = null;
         this._textSelector = null;
         this._renderedSelector = null;
+        this._numLoadedTextLines = 0;
+        this._numLoadedTextWindows = 1;
+        this._loadingTextLines = false;
+        this._pendingCommentBlockViews = [];
+        this._onWindowScrollThrottled = _.throttle(
+            () => this._onWindowScroll(), 100);
 
         this.on('commentBlockViewAdded', this._placeCommentBlockView, this);
 
@@ -64,6 +70,8 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
 
         this._textSelector.remove();
         this._renderedSelector.remove();
+
+        $(window).off('scroll', this._onWindowScrollThrottled);
     },
 
     /**
@@ -81,6 +89,17 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
         });
         this._textSelector.render();
 
+        if (this.model.get('textLinesURL')) {
+            /*
+             * Only the first window of lines is rendered with the page.
+             * Load the rest as the user scrolls towards them.
+             */
+            this._numLoadedTextLines =
+                this._$textTable[0].tBodies[0].rows.length;
+
+            $(window).on('scroll', this._onWindowScrollThrottled);
+        }
+
         if (this.model.get('hasRenderedView')) {
             // Set up the rendered table.
             this._$renderedTable = this.$('.text-review-ui-rendered-table');
@@ -166,7 +185,14 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
      *         The line number to scroll to.
      */
     _scrollToLine(lineNum) {
-        const $table = this._getTableForViewMode(this.model.get('viewMode'));
+        const viewMode = this.model.get('viewMode');
+
+        if (viewMode === 'source' && !this._hasTextLine(lineNum)) {
+            this._loadTextLines(lineNum, () => this._scrollToLine(lineNum));
+            return;
+        }
+
+        const $table = this._getTableForViewMode(viewMode);
         const rows = $table[0].tBodies[0].rows;
 
         /* Normalize this to a valid row index. */
@@ -258,6 +284,15 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
                  */
                 const rows = rowSelector.el.tBodies[0].rows;
 
+                if (viewMode === 'source' && !this._hasTextLine(endLineNum)) {
+                    /*
+                     * The lines haven't been loaded yet. The comment will
+                     * be placed once they are.
+                     */
+                    this._pendingCommentBlockViews.push(commentBlockView);
+                    return;
+                }
+
                 /* The line numbers are 1-based, so normalize for the rows. */
                 rowEls = [rows[beginLineNum - 1], rows[endLineNum - 1]];
             }
@@ -270,6 +305,131 @@ RB.TextBasedReviewableView = RB.FileAttachmentReviewableView.extend({
         }
     },
 
+    /**
+     * Return whether a line of the source text has been loaded.
+     *
+     * Args:
+     *     lineNum (number):
+     *         The line number to check.
+     *
+     * Returns:
+     *     boolean:
+     *     Whether the line has been loaded, or is past the end of the text.
+     */
+    _hasTextLine(lineNum) {
+        return (!this.model.get('textLinesURL') ||
+                lineNum <= this._numLoadedTextLines ||
+                this._numLoadedTextLines >= this.model.get('numTextLines'));
+    },
+
+    /**
+     * Load windows of lines of the source text.
+     *
+     * Windows will be loaded one at a time until the given line number has
+     * been loaded.
+     *
+     * Args:
+     *     lineNum (number):
+     *         The line number to load up to.
+     *
+     *     callback (function, optional):
+     *         A function to call once the line has been loaded.
+     */
+    _loadTextLines(lineNum, callback) {
+        if (this._hasTextLine(lineNum)) {
+            if (callback) {
+                callback();
+            }
+
+            return;
+        }
+
+        if (this._loadingTextLines) {
+            this.once('textLinesLoaded',
+                      () => this._loadTextLines(lineNum, callback));
+            return;
+        }
+
+        this._loadingTextLines = true;
+
+        RB.apiCall({
+            type: 'GET',
+            url: this.model.get('textLinesURL'),
+            data: {
+                window: this._numLoadedTextWindows,
+            },
+            success: rsp => {
+                this._addTextLines(rsp.begin_line_num, rsp.lines);
+                this._numLoadedTextWindows++;
+                this._loadingTextLines = false;
+                this.trigger('textLinesLoaded');
+
+                this._loadTextLines(lineNum, callback);
+            },
+            error: () => {
+                this._loadingTextLines = false;
+            },
+        });
+    },
+
+    /**
+     * Add lines to the source text table.
+     *
+     * Any comments waiting on the lines will be placed.
+     *
+     * Args:
+     *     beginLineNum (number):
+     *         The line number of the first line.
+     *
+     *     lines (Array of string):
+     *         The HTML for each syntax-highlighted line.
+     */
+    _addTextLines(beginLineNum, lines) {
+        const html = lines.map((line, i) => {
+            const lineNum = beginLineNum + i;
+
+            return dedent`
+                <tr line="${lineNum}">
+                 <th>${lineNum}</th>
+                 <td class="l">${line}</td>
+                </tr>
+            `;
+        });
+
+        $(this._$textTable[0].tBodies[0]).append(html.join(''));
+        this._numLoadedTextLines = beginLineNum + lines.length - 1;
+
+        const pending = this._pendingCommentBlockViews;
+        this._pendingCommentBlockViews = [];
+        pending.forEach(view => this._placeCommentBlockView(view));
+
+        /* Cause all comments to recalculate their sizes. */
+        $(window).triggerHandler('resize');
+    },
+
+    /**
+     * Handle the window scrolling.
+     *
+     * If the end of the loaded source text is coming into view, the next
+     * window of lines will be loaded.
+     */
+    _onWindowScroll() {
+        if (this.model.get('viewMode') !== 'source' ||
+            this._loadingTextLines ||
+            this._hasTextLine(this._numLoadedTextLines + 1)) {
+            return;
+        }
+
+        const $window = $(window);
+        const windowHeight = $window.height();
+        const tableBottom = (this._$textTable.offset().top +
+                             this._$textTable.outerHeight());
+
+        if (tableBottom - $window.scrollTop() < windowHeight * 2) {
+            this._loadTextLines(this._numLoadedTextLines + 1);
+        }
+    },
+
     /**
      * Handle a change to the view mode.
      *
@@ -0,0 +1,774 @@
+"""Bulk generation of large datasets for load testing.
+
+Unlike the :command:`fill-database` management command, which creates
+objects one at a time through the same code paths as the web UI, this
+inserts rows in bulk with precomputed primary keys and counters. This makes
+it possible to generate millions of review requests in minutes, for
+reproducing and benchmarking slow queries.
+
+The generated data is deterministic for a given seed and set of options,
+apart from timestamps, which are relative to the time of generation.
+
+Since rows are inserted directly, no signals are emitted, and the search
+index is not updated.
+"""
+
+from __future__ import unicode_literals
+
+import bz2
+import hashlib
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.six.moves import range
+
+from reviewboard.diffviewer.models import (DiffSet, DiffSetHistory, FileDiff,
+                                           RawFileDiffData)
+from reviewboard.reviews.models import (Comment, Group, Review,
+                                        ReviewRequest)
+from reviewboard.scmtools.models import Repository, Tool
+from reviewboard.site.models import LocalSite
+
+
+_WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod '
+    'tempor incididunt ut labore et dolore magna aliqua enim ad minim '
+    'veniam quis nostrud exercitation ullamco laboris nisi aliquip ex ea '
+    'commodo consequat duis aute irure in reprehenderit voluptate velit '
+    'esse cillum fugiat nulla pariatur excepteur sint occaecat cupidatat '
+    'non proident sunt culpa qui officia deserunt mollit anim id est '
+    'laborum'
+).split()
+
+_ISSUE_COUNT_FIELDS = {
+    Comment.OPEN: 'issue_open_count',
+    Comment.RESOLVED: 'issue_resolved_count',
+    Comment.DROPPED: 'issue_dropped_count',
+}
+
+
+class Distribution(object):
+    """A distribution of integer values for generated data.
+
+    Values are either constant, uniformly distributed between a minimum and
+    maximum, or follow a triangular distribution with a most common value,
+    which is useful for the long tails typical of real data (most review
+    requests have a few reviews, but some have dozens).
+    """
+
+    @classmethod
+    def parse(cls, value):
+        """Parse a distribution from a string.
+
+        The string is in the form of ``N`` (a constant), ``MIN:MAX``
+        (uniform) or ``MIN:MAX:MODE`` (triangular).
+
+        Args:
+            value (unicode):
+                The string to parse.
+
+        Returns:
+            Distribution:
+            The parsed distribution.
+
+        Raises:
+            ValueError:
+                The string could not be parsed.
+        """
+        parts = [int(part.strip()) for part in value.split(':')]
+
+        if len(parts) > 3:
+            raise ValueError('Expected N, MIN:MAX or MIN:MAX:MODE, not %r'
+                             % value)
+
+        return cls(*parts)
+
+    def __init__(self, low, high=None, mode=None):
+        """Initialize the distribution.
+
+        Args:
+            low (int):
+                The minimum value, or the constant value if ``high`` is not
+                provided.
+
+            high (int, optional):
+                The maximum value.
+
+            mode (int, optional):
+                The most common value. If not provided, values will be
+                uniformly distributed.
+
+        Raises:
+            ValueError:
+                The values are out of order or negative.
+        """
+        if high is None:
+            high = low
+
+        if not (0 <= low <= high and
+                (mode is None or low <= mode <= high)):
+            raise ValueError('Invalid distribution: %s:%s:%s'
+                             % (low, high, mode))
+
+        self.low = low
+        self.high = high
+        self.mode = mode
+
+    def sample(self, rand):
+        """Return a value from the distribution.
+
+        Args:
+            rand (random.Random):
+                The random number generator to use.
+
+        Returns:
+            int:
+            The value.
+        """
+        if self.low == self.high:
+            return self.low
+        elif self.mode is None:
+            return rand.randint(self.low, self.high)
+        else:
+            return int(round(rand.triangular(self.low, self.high,
+                                             self.mode)))
+
+
+class _Partition(object):
+    """The users, groups and repository for a Local Site or the global site.
+
+    Attributes:
+        local_site_id (int):
+            The ID of the Local Site, or ``None`` for the global site.
+
+        user_ids (list of int):
+            The IDs of the users in the site.
+
+        group_ids (list of int):
+            The IDs of the review groups in the site.
+
+        repository_id (int):
+            The ID of the repository in the site.
+
+        next_local_id (int):
+            The next local ID for review requests in the Local Site.
+    """
+
+    def __init__(self, local_site_id):
+        """Initialize the partition.
+
+        Args:
+            local_site_id (int):
+                The ID of the Local Site, or ``None`` for the global site.
+        """
+        self.local_site_id = local_site_id
+        self.user_ids = []
+        self.group_ids = []
+        self.repository_id = None
+        self.next_local_id = 1
+
+
+class BulkFixtureGenerator(object):
+    """Generates large datasets for load testing.
+
+    Users, Local Sites and review groups are created first, along with a
+    repository for each site. Review requests are then created in batches,
+    each in its own transaction, with their diffs, reviews and comments.
+
+    Diffs are deduplicated by content, as they are when uploaded: a fixed
+    number of unique file diffs is generated, and each generated
+    :py:class:`~reviewboard.diffviewer.models.filediff.FileDiff` refers to
+    one of them.
+    """
+
+    def __init__(self, num_users=1000, num_review_requests=10000,
+                 num_groups=100, num_local_sites=0,
+                 group_sizes=Distribution(5, 50, 10),
+                 diffs_per_review_request=Distribution(1, 3, 1),
+                 files_per_diff=Distribution(1, 20, 3),
+                 diff_sizes=Distribution(10, 500, 50),
+                 reviews_per_review_request=Distribution(0, 6, 1),
+                 comments_per_review=Distribution(0, 10, 2),
+                 num_unique_diffs=1000, seed=0, name_prefix=None,
+                 password='test1', batch_size=1000,
+                 progress_callback=None):
+        """Initialize the generator.
+
+        Args:
+            num_users (int, optional):
+                The number of users to create.
+
+            num_review_requests (int, optional):
+                The number of review requests to create.
+
+            num_groups (int, optional):
+                The number of review groups to create.
+
+            num_local_sites (int, optional):
+                The number of Local Sites to create. Users, groups and
+                review requests are spread evenly across the Local Sites and
+                the global site.
+
+            group_sizes (Distribution, optional):
+                The number of users in each review group.
+
+            diffs_per_review_request (Distribution, optional):
+                The number of diff revisions on each review request.
+
+            files_per_diff (Distribution, optional):
+                The number of files in each diff revision.
+
+            diff_sizes (Distribution, optional):
+                The number of changed lines in each unique file diff.
+
+            reviews_per_review_request (Distribution, optional):
+                The number of reviews on each published review request.
+
+            comments_per_review (Distribution, optional):
+                The number of diff comments in each review.
+
+            num_unique_diffs (int, optional):
+                The number of unique file diffs to generate.
+
+            seed (int, optional):
+                The seed for the random number generator.
+
+            name_prefix (unicode, optional):
+                The prefix for the names of created users, groups, Local
+                Sites and repositories. This must be different for each run
+                against the same database. Defaults to one based on the
+                seed.
+
+            password (unicode, optional):
+                The password for created users.
+
+            batch_size (int, optional):
+                The number of review requests to create in each transaction.
+
+            progress_callback (callable, optional):
+                A function called with the number of review requests created
+                so far, after each batch.
+
+        Raises:
+            ValueError:
+                There are fewer users than sites to put them in.
+        """
+        if num_users < num_local_sites + 1:
+            raise ValueError('At least one user is needed for each site.')
+
+        self.num_users = num_users
+        self.num_review_requests = num_review_requests
+        self.num_groups = num_groups
+        self.num_local_sites = num_local_sites
+        self.group_sizes = group_sizes
+        self.diffs_per_review_request = diffs_per_review_request
+        self.files_per_diff = files_per_diff
+        self.diff_sizes = diff_sizes
+        self.reviews_per_review_request = reviews_per_review_request
+        self.comments_per_review = comments_per_review
+        self.num_unique_diffs = num_unique_diffs
+        self.name_prefix = name_prefix or 'load%s' % seed
+        self.password = password
+        self.batch_size = batch_size
+        self.progress_callback = progress_callback
+
+        self._rand = random.Random(seed)
+        self._next_pks = {}
+        self._partitions = []
+        self._diff_pool = []
+        self._counts = {}
+        self._now = timezone.now()
+
+    def generate(self):
+        """Generate the dataset.
+
+        Returns:
+            dict:
+            A mapping of model names to the number of objects created.
+
+        Raises:
+            reviewboard.scmtools.models.Tool.DoesNotExist:
+                The Git tool, used for the generated repositories, is not
+                registered.
+        """
+        tool = Tool.objects.get(name='Git')
+
+        with transaction.atomic():
+            self._create_partitions(tool)
+            self._create_diff_pool()
+
+        for start in range(0, self.num_review_requests, self.batch_size):
+            count = min(self.batch_size, self.num_review_requests - start)
+
+            with transaction.atomic():
+                self._create_review_requests(count)
+
+            if self.progress_callback:
+                self.progress_callback(start + count)
+
+        # Rows were inserted with explicit primary keys, so the database's
+        # sequences need to be moved past them.
+        models = [
+            User, LocalSite, Group, Repository, RawFileDiffData,
+            DiffSetHistory, ReviewRequest, DiffSet, FileDiff, Review,
+            Comment,
+        ]
+        cursor = connection.cursor()
+
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+        return self._counts
+
+    def _create_partitions(self, tool):
+        """Create the Local Sites, users, groups and repositories.
+
+        Args:
+            tool (reviewboard.scmtools.models.Tool):
+                The tool for created repositories.
+        """
+        rand = self._rand
+        local_sites = [
+            LocalSite(pk=self._alloc_pk(LocalSite),
+                      name='%s-site%d' % (self.name_prefix, i))
+            for i in range(self.num_local_sites)
+        ]
+        self._bulk_create(LocalSite, local_sites)
+
+        self._partitions = [_Partition(None)] + [
+            _Partition(local_site.pk)
+            for local_site in local_sites
+        ]
+        num_partitions = len(self._partitions)
+
+        password = make_password(self.password)
+        users = []
+        local_site_users = []
+
+        for i in range(self.num_users):
+            partition = self._partitions[i % num_partitions]
+            user = User(pk=self._alloc_pk(User),
+                        username='%s-user%d' % (self.name_prefix, i),
+                        first_name=rand.choice(_WORDS).title(),
+                        last_name=rand.choice(_WORDS).title(),
+                        email='%s-user%d@example.com' % (self.name_prefix, i),
+                        password=password,
+                        is_active=True,
+                        date_joined=self._get_past_timestamp(),
+                        last_login=self._get_past_timestamp())
+            users.append(user)
+            partition.user_ids.append(user.pk)
+
+            if partition.local_site_id is not None:
+                local_site_users.append((partition.local_site_id, user.pk))
+
+        self._bulk_create(User, users)
+        self._bulk_create_m2m(LocalSite, 'users', local_site_users)
+
+        groups = []
+        group_users = []
+
+        for i in range(self.num_groups):
+            partition = self._partitions[i % num_partitions]
+            group = Group(pk=self._alloc_pk(Group),
+                          name='%s-group%d' % (self.name_prefix, i),
+                          display_name='%s group %d' % (self.name_prefix, i),
+                          local_site_id=partition.local_site_id,
+                          incoming_request_count=0)
+            groups.append(group)
+            partition.group_ids.append(group.pk)
+
+            num_members = min(self.group_sizes.sample(rand),
+                              len(partition.user_ids))
+            group_users += [
+                (group.pk, user_id)
+                for user_id in rand.sample(partition.user_ids, num_members)
+            ]
+
+        self._bulk_create(Group, groups)
+        self._bulk_create_m2m(Group, 'users', group_users)
+
+        # The incoming request counts are computed when first needed.
+        Group.objects.filter(pk__in=[group.pk for group in groups]).update(
+            incoming_request_count=None)
+
+        for i, partition in enumerate(self._partitions):
+            partition.repository_id = Repository.objects.create(
+                name='%s-repo%d' % (self.name_prefix, i),
+                path='/%s/repo%d.git' % (self.name_prefix, i),
+                tool=tool,
+                local_site_id=partition.local_site_id).pk
+
+    def _create_diff_pool(self):
+        """Create the unique file diffs that generated diffs refer to."""
+        rand = self._rand
+        pool = []
+
+        for i in range(self.num_unique_diffs):
+            filename = 'src/%s/module%d/file%d.py' % (
+                rand.choice(_WORDS), i % 50, i)
+            num_lines = max(1, self.diff_sizes.sample(rand))
+            num_deletes = rand.randint(0, num_lines)
+            num_inserts = num_lines - num_deletes
+            data = b''.join(
+                [
+                    ('--- %s\tRevision %d\n' % (filename, i)).encode('utf-8'),
+                    ('+++ %s\t(working copy)\n' % filename).encode('utf-8'),
+                    ('@@ -1,%d +1,%d @@\n'
+                     % (num_deletes, num_inserts)).encode('utf-8'),
+                ] + [
+                    ('-old line %d of %s\n' % (j, filename)).encode('utf-8')
+                    for j in range(num_deletes)
+                ] + [
+                    ('+new line %d of %s\n' % (j, filename)).encode('utf-8')
+                    for j in range(num_inserts)
+                ])
+            pool.append((filename, data, num_inserts, num_deletes))
+
+        binary_hashes = [
+            hashlib.sha1(data).hexdigest()
+            for filename, data, num_inserts, num_deletes in pool
+        ]
+        existing = dict(
+            RawFileDiffData.objects
+            .filter(binary_hash__in=binary_hashes)
+            .values_list('binary_hash', 'pk'))
+        raw_diffs = []
+
+        for binary_hash, (filename, data, num_inserts, num_deletes) in \
+                zip(binary_hashes, pool):
+            raw_diff_id = existing.get(binary_hash)
+
+            if raw_diff_id is None:
+                raw_diff_id = self._alloc_pk(RawFileDiffData)
+                existing[binary_hash] = raw_diff_id
+                compressed = bz2.compress(data, 9)
+
+                if len(compressed) < len(data):
+                    data = compressed
+                    compression = RawFileDiffData.COMPRESSION_BZIP2
+                else:
+                    compression = None
+
+                raw_diffs.append(RawFileDiffData(
+                    pk=raw_diff_id,
+                    binary_hash=binary_hash,
+                    binary=data,
+                    compression=compression,
+                    extra_data={
+                        'delete_count': num_deletes,
+                        'insert_count': num_inserts,
+                    }))
+
+            self._diff_pool.append((raw_diff_id, filename, num_inserts,
+                                    num_deletes))
+
+        self._bulk_create(RawFileDiffData, raw_diffs)
+
+    def _create_review_requests(self, count):
+        """Create a batch of review requests.
+
+        Args:
+            count (int):
+                The number of review requests to create.
+        """
+        rand = self._rand
+        histories = []
+        review_requests = []
+        diffsets = []
+        filediffs = []
+        reviews = []
+        comments = []
+        target_groups = []
+        target_people = []
+        review_comments = []
+
+        for i in range(count):
+            partition = rand.choice(self._partitions)
+            submitter_id = rand.choice(partition.user_ids)
+            time_added = self._get_past_timestamp()
+            last_updated = time_added
+            review_request_id = self._alloc_pk(ReviewRequest)
+
+            roll = rand.random()
+
+            if roll < 0.05:
+                public = False
+                status = ReviewRequest.PENDING_REVIEW
+            else:
+                public = True
+
+                if roll < 0.45:
+                    status = ReviewRequest.PENDING_REVIEW
+                elif roll < 0.9:
+                    status = ReviewRequest.SUBMITTED
+                else:
+                    status = ReviewRequest.DISCARDED
+
+            # Diffs.
+            history_id = self._alloc_pk(DiffSetHistory)
+            latest_filediffs = []
+
+            for revision in range(
+                    1, self.diffs_per_review_request.sample(rand) + 1):
+                diffset_id = self._alloc_pk(DiffSet)
+                last_updated = self._get_later_timestamp(last_updated)
+                diffsets.append(DiffSet(
+                    pk=diffset_id,
+                    name='diff',
+                    revision=revision,
+                    timestamp=last_updated,
+                    basedir='',
+                    history_id=history_id,
+                    repository_id=partition.repository_id,
+                    commit_count=0,
+                    extra_data={}))
+
+                num_files = min(self.files_per_diff.sample(rand),
+                                len(self._diff_pool))
+                latest_filediffs = []
+
+                for raw_diff_id, filename, num_inserts, num_deletes in \
+                        rand.sample(self._diff_pool, num_files):
+                    filediff = FileDiff(
+                        pk=self._alloc_pk(FileDiff),
+                        diffset_id=diffset_id,
+                        source_file=filename,
+                        dest_file=filename,
+                        source_revision='Revision %d' % revision,
+                        dest_detail='(working copy)',
+                        status=FileDiff.MODIFIED,
+                        diff_hash_id=raw_diff_id,
+                        extra_data={
+                            'raw_delete_count': num_deletes,
+                            'raw_insert_count': num_inserts,
+                        })
+                    filediffs.append(filediff)
+                    latest_filediffs.append(
+                        (filediff.pk, num_inserts + num_deletes))
+
+            histories.append(DiffSetHistory(
+                pk=history_id,
+                name='diff',
+                timestamp=time_added,
+                last_diff_updated=last_updated,
+                extra_data={}))
+
+            # Reviews and comments.
+            shipit_count = 0
+            issue_counts = {
+                'issue_dropped_count': 0,
+                'issue_open_count': 0,
+                'issue_resolved_count': 0,
+                'issue_verifying_count': 0,
+            }
+            last_review_timestamp = None
+
+            if public:
+                num_reviews = self.reviews_per_review_request.sample(rand)
+            else:
+                num_reviews = 0
+
+            for j in range(num_reviews):
+                review_id = self._alloc_pk(Review)
+                last_updated = self._get_later_timestamp(last_updated)
+                last_review_timestamp = last_updated
+                ship_it = rand.random() < 0.3
+
+                if ship_it:
+                    shipit_count += 1
+
+                reviews.append(Review(
+                    pk=review_id,
+                    review_request_id=review_request_id,
+                    user_id=rand.choice(partition.user_ids),
+                    timestamp=last_updated,
+                    public=True,
+                    ship_it=ship_it,
+                    body_top=self._get_text(10),
+                    extra_data={}))
+
+                if not latest_filediffs:
+                    continue
+
+                for k in range(self.comments_per_review.sample(rand)):
+                    filediff_id, num_lines = rand.choice(latest_filediffs)
+                    first_line = rand.randint(1, max(1, num_lines))
+                    issue_opened = rand.random() < 0.3
+
+                    if issue_opened:
+                        issue_status = rand.choice(
+                            (Comment.OPEN, Comment.RESOLVED, Comment.DROPPED))
+                        issue_counts[_ISSUE_COUNT_FIELDS[issue_status]] += 1
+                    else:
+                        issue_status = None
+
+                    comment = Comment(
+                        pk=self._alloc_pk(Comment),
+                        filediff_id=filediff_id,
+                        first_line=first_line,
+                        num_lines=rand.randint(1, 5),
+                        text=self._get_text(20),
+                        timestamp=last_updated,
+                        issue_opened=issue_opened,
+                        issue_status=issue_status,
+                        extra_data={})
+                    comments.append(comment)
+                    review_comments.append((review_id, comment.pk))
+
+            if partition.local_site_id is None:
+                local_id = None
+            else:
+                local_id = partition.next_local_id
+                partition.next_local_id += 1
+
+            review_requests.append(ReviewRequest(
+                pk=review_request_id,
+                submitter_id=submitter_id,
+                summary=self._get_text(6),
+                description=self._get_text(100),
+                time_added=time_added,
+                last_updated=last_updated,
+                last_review_activity_timestamp=last_review_timestamp,
+                status=status,
+                public=public,
+                repository_id=partition.repository_id,
+                diffset_history_id=history_id,
+                local_site_id=partition.local_site_id,
+                local_id=local_id,
+                shipit_count=shipit_count,
+                screenshots_count=0,
+                inactive_screenshots_count=0,
+                file_attachments_count=0,
+                inactive_file_attachments_count=0,
+                extra_data={},
+                **issue_counts))
+
+            if partition.group_ids:
+                target_groups += [
+                    (review_request_id, group_id)
+                    for group_id in rand.sample(
+                        partition.group_ids,
+                        min(rand.randint(1, 2), len(partition.group_ids)))
+                ]
+
+            target_people.append(
+                (review_request_id, rand.choice(partition.user_ids)))
+
+        self._bulk_create(DiffSetHistory, histories)
+        self._bulk_create(ReviewRequest, review_requests)
+        self._bulk_create(DiffSet, diffsets)
+        self._bulk_create(FileDiff, filediffs)
+        self._bulk_create(Review, reviews)
+        self._bulk_create(Comment, comments)
+        self._bulk_create_m2m(ReviewRequest, 'target_groups', target_groups)
+        self._bulk_create_m2m(ReviewRequest, 'target_people', target_people)
+        self._bulk_create_m2m(Review, 'comments', review_comments)
+
+    def _alloc_pk(self, model):
+        """Return the next primary key for a model.
+
+        Args:
+            model (type):
+                The model.
+
+        Returns:
+            int:
+            The primary key to use for a new object.
+        """
+        pk = self._next_pks.get(model)
+
+        if pk is None:
+            pk = (model.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0) + 1
+
+        self._next_pks[model] = pk + 1
+
+        return pk
+
+    def _bulk_create(self, model, objs):
+        """Insert objects in bulk.
+
+        Args:
+            model (type):
+                The model of the objects.
+
+            objs (list of django.db.models.Model):
+                The objects to insert.
+        """
+        if objs:
+            model.objects.bulk_create(objs)
+
+            name = model.__name__
+            self._counts[name] = self._counts.get(name, 0) + len(objs)
+
+    def _bulk_create_m2m(self, model, field_name, pairs):
+        """Insert rows for a many-to-many relation in bulk.
+
+        Args:
+            model (type):
+                The model containing the relation.
+
+            field_name (unicode):
+                The name of the many-to-many field.
+
+            pairs (list of tuple):
+                A list of ``(model_id, related_id)`` tuples to insert.
+        """
+        if pairs:
+            field = model._meta.get_field(field_name)
+            through = field.rel.through
+            from_attname = '%s_id' % field.m2m_field_name()
+            to_attname = '%s_id' % field.m2m_reverse_field_name()
+
+            through.objects.bulk_create([
+                through(**{
+                    from_attname: model_id,
+                    to_attname: related_id,
+                })
+                for model_id, related_id in pairs
+            ])
+
+    def _get_past_timestamp(self):
+        """Return a random timestamp within the past year.
+
+        Returns:
+            datetime.datetime:
+            The timestamp.
+        """
+        return self._now - timedelta(
+            seconds=self._rand.randint(0, 365 * 24 * 60 * 60))
+
+    def _get_later_timestamp(self, timestamp):
+        """Return a random timestamp up to two days after another.
+
+        Args:
+            timestamp (datetime.datetime):
+                The earlier timestamp.
+
+        Returns:
+            datetime.datetime:
+            The later timestamp. This will not be in the future.
+        """
+        return min(timestamp + timedelta(minutes=self._rand.randint(1, 2880)),
+                   self._now)
+
+    def _get_text(self, num_words):
+        """Return random text.
+
+        Args:
+            num_words (int):
+                The number of words in the text.
+
+        Returns:
+            unicode:
+            The text.
+        """
+        rand = self._rand
+
+        return ' '.join(rand.choice(_WORDS) for i in range(num_words))
@@ -121,7 +121,11 @@ class TestCase(FixturesCompilerMixin, DjbletsTestCase):
         super(TestCase, self).setUp()
 
         siteconfig = SiteConfiguration.objects.get_current()
+        siteconfig.set('file_attachment_thumbnails_in_background', False)
         siteconfig.set('mail_from_spoofing', 'never')
+        siteconfig.set('mail_send_in_background', False)
+        siteconfig.set('search_index_in_background', False)
+        siteconfig.set('webhooks_delivery_workers', 0)
         siteconfig.save(update_fields=('settings',))
 
         initialize(load_extensions=False)
@@ -3,11 +3,16 @@ from __future__ import unicode_literals
 import copy
 import json
 import logging
+from functools import partial
 
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils import six
 from django.utils.encoding import force_text
 from django.utils.six.moves.urllib.parse import quote as urllib_quote
 from django.utils.translation import ugettext_lazy as _
+from django.views.decorators.vary import vary_on_headers
 from djblets.registries.errors import RegistrationError
 from djblets.util.decorators import augment_method_from
 from djblets.util.json_utils import (JSONPatchError, json_merge_patch,
@@ -17,12 +22,15 @@ from djblets.webapi.decorators import (SPECIAL_PARAMS,
                                        webapi_request_fields)
 from djblets.webapi.errors import INVALID_FORM_DATA, PERMISSION_DENIED
 from djblets.webapi.fields import BooleanFieldType
-from djblets.webapi.resources.base import \
-    WebAPIResource as DjbletsWebAPIResource
+from djblets.webapi.resources.base import (
+    WebAPIResource as DjbletsWebAPIResource,
+    fkey_descriptors,
+    m2m_descriptors)
 from djblets.webapi.resources.mixins.api_tokens import ResourceAPITokenMixin
 from djblets.webapi.resources.mixins.oauth2_tokens import (
     ResourceOAuth2TokenMixin)
 from djblets.webapi.resources.mixins.queries import APIQueryUtilsMixin
+from djblets.webapi.responses import WebAPIResponsePaginated
 
 from reviewboard.admin.read_only import is_site_read_only_for
 from reviewboard.registries.registry import Registry
@@ -33,6 +41,26 @@ from reviewboard.webapi.decorators import (webapi_check_local_site,
 from reviewboard.webapi.errors import READ_ONLY_ERROR
 from reviewboard.webapi.models import WebAPIToken
 
+try:
+    # Django >= 1.10
+    from django.db.models import prefetch_related_objects
+except ImportError:
+    # Django < 1.10
+    from django.db.models.query import \
+        prefetch_related_objects as _prefetch_related_objects
+
+    def prefetch_related_objects(model_instances, *related_lookups):
+        """Prefetch related objects for a list of model instances.
+
+        Args:
+            model_instances (list of django.db.models.Model):
+                The model instances to prefetch related objects for.
+
+            *related_lookups (tuple of unicode):
+                The related lookups to prefetch.
+        """
+        _prefetch_related_objects(model_instances, related_lookups)
+
 
 CUSTOM_MIMETYPE_BASE = 'application/vnd.reviewboard.org'
 EXTRA_DATA_LEN = len('extra_data.')
@@ -108,6 +136,92 @@ class CallbackRegistry(Registry):
         super(CallbackRegistry, self).register(item)
 
 
+class BatchSerializedResponsePaginated(WebAPIResponsePaginated):
+    """A paginated response that prepares each page before serializing it.
+
+    Before the objects on a page are serialized, they're passed to the
+    resource's :py:meth:`WebAPIResource.prepare_serialization_batch`, giving
+    the resource a chance to fetch any related data for the whole page at
+    once.
+
+    If :django:setting:`DEBUG` is enabled, the number of queries performed
+    while building the response is logged.
+    """
+
+    def __init__(self, request, resource, *args, **kwargs):
+        """Initialize the response.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            resource (WebAPIResource):
+                The resource serializing the objects.
+
+            *args (tuple):
+                Positional arguments to pass to the parent constructor.
+
+            **kwargs (dict):
+                Keyword arguments to pass to the parent constructor.
+        """
+        self.resource = resource
+        self._batch_request = request
+
+        if settings.DEBUG:
+            num_queries = len(connection.queries)
+
+        super(BatchSerializedResponsePaginated, self).__init__(
+            request, *args, **kwargs)
+
+        if settings.DEBUG:
+            logging.debug('Serialized %s list for %s with %d queries',
+                          resource.name, request.path,
+                          len(connection.queries) - num_queries)
+
+    def get_results(self):
+        """Return the results for the page.
+
+        Returns:
+            list:
+            The objects on the page, prepared for serialization.
+        """
+        results = list(
+            super(BatchSerializedResponsePaginated, self).get_results())
+
+        if results:
+            self.resource.prepare_serialization_batch(
+                results, request=self._batch_request)
+
+        return results
+
+
+class StreamingResponseWrapper(HttpResponse):
+    """A wrapper for passing a streaming response through Djblets.
+
+    Djblets only passes through :py:class:`~django.http.HttpResponse`
+    results from method views, and reads their content in order to generate
+    ETags. A :py:class:`~django.http.StreamingHttpResponse` returned from a
+    method view is wrapped in this so that it can be returned from
+    :py:meth:`WebAPIResource.__call__` without its content being consumed.
+    """
+
+    def __init__(self, streaming_response):
+        """Initialize the wrapper.
+
+        Args:
+            streaming_response (django.http.StreamingHttpResponse):
+                The streaming response to wrap.
+        """
+        super(StreamingResponseWrapper, self).__init__(
+            status=streaming_response.status_code)
+
+        self.streaming_response = streaming_response
+
+        # Having an ETag set prevents one from being generated from the
+        # wrapper's empty content.
+        self['ETag'] = streaming_response.get('ETag', '')
+
+
 class RBResourceMixin(APIQueryUtilsMixin, ResourceAPITokenMixin,
                       ResourceOAuth2TokenMixin):
     """A mixin for Review Board resources.
@@ -132,11 +246,116 @@ class RBResourceMixin(APIQueryUtilsMixin, ResourceAPITokenMixin,
 class WebAPIResource(RBResourceMixin, DjbletsWebAPIResource):
     """A specialization of the Djblets WebAPIResource for Review Board."""
 
+    #: Model fields that are only loaded for list responses when needed.
+    #:
+    #: This maps the names of expensive model fields (such as large text
+    #: fields) to the names of the API fields that need them. If a list is
+    #: requested with ``?only-fields=`` and none of those API fields are
+    #: included, the model field will be deferred.
+    #:
+    #: Serialization must not access a deferred model field unless one of
+    #: its API fields was requested (see :py:meth:`is_field_requested`), or
+    #: it will be loaded separately for each object.
+    deferrable_fields = {}
+
     def __init__(self, *args, **kwargs):
         super(WebAPIResource, self).__init__(*args, **kwargs)
 
         self.extra_data_access_callbacks = CallbackRegistry()
 
+        if self.paginated_cls is WebAPIResponsePaginated:
+            # Resources with custom paginated responses are left alone.
+            self.paginated_cls = partial(BatchSerializedResponsePaginated,
+                                         resource=self)
+
+    @vary_on_headers('Accept', 'Cookie')
+    def __call__(self, request, *args, **kwargs):
+        """Handle a HTTP request to the resource.
+
+        If the method view returned a
+        :py:class:`~django.http.StreamingHttpResponse`, it will be returned
+        as-is.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            *args (tuple):
+                Positional arguments to pass to the parent method.
+
+            **kwargs (dict):
+                Keyword arguments to pass to the parent method.
+
+        Returns:
+            django.http.HttpResponseBase:
+            The HTTP response to send to the client.
+        """
+        response = super(WebAPIResource, self).__call__(request, *args,
+                                                        **kwargs)
+
+        if isinstance(response, StreamingResponseWrapper):
+            response = response.streaming_response
+
+        return response
+
+    def is_field_requested(self, request, *fields):
+        """Return whether any of the given fields will be serialized.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            *fields (tuple of unicode):
+                The names of the fields to check.
+
+        Returns:
+            bool:
+            ``True`` if any of the fields will be included in the payload,
+            based on ``?only-fields=``.
+        """
+        only_fields = self.get_only_fields(request)
+
+        return (only_fields is None or
+                any(field in only_fields for field in fields))
+
+    def is_link_requested(self, request, *links):
+        """Return whether any of the given links will be serialized.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            *links (tuple of unicode):
+                The names of the links to check.
+
+        Returns:
+            bool:
+            ``True`` if any of the links will be included in the payload,
+            based on ``?only-links=``.
+        """
+        only_links = self.get_only_links(request)
+
+        return (only_links is None or
+                any(link in only_links for link in links))
+
+    def get_deferred_fields(self, request):
+        """Return the model fields to defer for a list response.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+        Returns:
+            list of unicode:
+            The names of the model fields from :py:attr:`deferrable_fields`
+            that aren't needed for the requested fields.
+        """
+        return sorted(
+            model_field
+            for model_field, fields in six.iteritems(self.deferrable_fields)
+            if not self.is_field_requested(request, *fields)
+        )
+
     def has_access_permissions(self, *args, **kwargs):
         # By default, raise an exception if this is called. Specific resources
         # will have to explicitly override this and opt-in to access.
@@ -158,11 +377,36 @@ class WebAPIResource(RBResourceMixin, DjbletsWebAPIResource):
             dict:
             A serialized ``extra_data`` field or ``None``.
         """
+        if not self.is_field_requested(request, 'extra_data'):
+            # The field may be deferred (see deferrable_fields), and won't
+            # be included in the payload anyway.
+            return None
+
         if obj.extra_data is not None:
             return self._strip_private_data(obj.extra_data)
 
         return None
 
+    def prepare_serialization_batch(self, objs, request=None):
+        """Prepare a page of objects for serialization.
+
+        This is called with each page of objects in a list response, before
+        any of them are serialized. Subclasses can override this to fetch
+        related objects or other data for the whole page at once (for
+        instance, using :py:func:`prefetch_related_objects`), rather than
+        performing queries for each object as it's serialized.
+
+        By default, this does nothing.
+
+        Args:
+            objs (list of django.db.models.Model):
+                The objects that will be serialized.
+
+            request (django.http.HttpRequest, optional):
+                The HTTP request from the client.
+        """
+        pass
+
     @webapi_check_login_required
     @webapi_check_local_site
     @augment_method_from(DjbletsWebAPIResource)
@@ -221,6 +465,73 @@ class WebAPIResource(RBResourceMixin, DjbletsWebAPIResource):
         """
         return super(WebAPIResource, self).get_list(request, *args, **kwargs)
 
+    def _get_queryset(self, request, is_list=False, *args, **kwargs):
+        """Return a queryset for the resource, limited to what's requested.
+
+        Like the Djblets implementation, this fetches foreign keys for the
+        resource's fields with ``select_related()`` and, for lists, prefetches
+        many-to-many fields. However, for lists, many-to-many fields that
+        aren't requested through ``?only-fields=`` aren't prefetched, and
+        model fields in :py:attr:`deferrable_fields` that aren't needed are
+        deferred.
+
+        Args:
+            request (django.http.HttpRequest):
+                The HTTP request from the client.
+
+            is_list (bool, optional):
+                Whether the queryset is for a list of objects.
+
+            *args (tuple):
+                Positional arguments to pass to :py:meth:`get_queryset`.
+
+            **kwargs (dict):
+                Keyword arguments to pass to :py:meth:`get_queryset`.
+
+        Returns:
+            django.db.models.query.QuerySet:
+            The queryset.
+        """
+        queryset = self.get_queryset(request, is_list=is_list, *args, **kwargs)
+
+        if not hasattr(self, '_select_related_fields'):
+            self._select_related_fields = []
+            self._prefetch_related_fields = []
+
+            for field in six.iterkeys(self.fields):
+                if hasattr(self, 'serialize_%s_field' % field):
+                    continue
+
+                field_type = getattr(self.model, field, None)
+
+                if field_type and isinstance(field_type, fkey_descriptors):
+                    # These are always needed, since they're serialized as
+                    # links even if the field isn't requested.
+                    self._select_related_fields.append(field)
+                elif field_type and isinstance(field_type, m2m_descriptors):
+                    self._prefetch_related_fields.append(field)
+
+        if self._select_related_fields:
+            queryset = \
+                queryset.select_related(*self._select_related_fields)
+
+        if is_list:
+            prefetch_related_fields = [
+                field
+                for field in self._prefetch_related_fields
+                if self.is_field_requested(request, field)
+            ]
+
+            if prefetch_related_fields:
+                queryset = queryset.prefetch_related(*prefetch_related_fields)
+
+            deferred_fields = self.get_deferred_fields(request)
+
+            if deferred_fields:
+                queryset = queryset.defer(*deferred_fields)
+
+        return queryset
+
     def can_import_extra_data_field(self, obj, field):
         """Return whether a top-level field in extra_data can be imported.
 
@@ -331,7 +642,8 @@ class WebAPIResource(RBResourceMixin, DjbletsWebAPIResource):
             view, which will either be a
             :py:class:`~djblets.webapi.errors.WebAPIError` or a 2-tuple of the
             HTTP status code and a dict indicating the JSON response from the
-            view.
+            view. A :py:class:`~django.http.StreamingHttpResponse` from the
+            view will be wrapped in a :py:class:`StreamingResponseWrapper`.
         """
         for feature in self.required_features:
             if not feature.is_enabled(request=request):
@@ -345,9 +657,14 @@ class WebAPIResource(RBResourceMixin, DjbletsWebAPIResource):
             request.method not in ('GET', 'HEAD', 'OPTIONS')):
             return READ_ONLY_ERROR
 
-        return super(WebAPIResource, self).call_method_view(
+        result = super(WebAPIResource, self).call_method_view(
             request, method, view, *args, **kwargs)
 
+        if isinstance(result, StreamingHttpResponse):
+            result = StreamingResponseWrapper(result)
+
+        return result
+
     def build_resource_url(self, name, local_site_name=None, request=None,
                            **kwargs):
         """Build the URL to a resource, factoring in Local Sites.
@@ -3,7 +3,7 @@ from __future__ import unicode_literals
 import logging
 
 from django.core.exceptions import PermissionDenied, ObjectDoesNotExist
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.utils import six
 from djblets.util.http import get_http_requested_mimetype, set_last_modified
 from djblets.webapi.decorators import (webapi_login_required,
@@ -186,9 +186,9 @@ class DiffResource(WebAPIResource):
             return DOES_NOT_EXIST
 
         tool = review_request.repository.get_scmtool()
-        data = tool.get_parser(b'').raw_diff(diffset)
-
-        resp = HttpResponse(data, content_type='text/x-patch')
+        resp = StreamingHttpResponse(
+            tool.get_parser(b'').iter_raw_diff(diffset),
+            content_type='text/x-patch')
 
         if diffset.name == 'diff':
             filename = 'bug%s.patch' % \
@@ -3,7 +3,7 @@
 from __future__ import unicode_literals
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.utils.six.moves.urllib.parse import urlencode
 from djblets.util.decorators import augment_method_from
 from djblets.util.http import get_http_requested_mimetype, set_last_modified
@@ -249,9 +249,9 @@ class DiffCommitResource(WebAPIResource):
             return self.get_no_access_error(request)
 
         tool = review_request.repository.get_scmtool()
-        data = tool.get_parser(b'').raw_diff(commit)
-
-        rsp = HttpResponse(data, content_type=mimetype)
+        rsp = StreamingHttpResponse(
+            tool.get_parser(b'').iter_raw_diff(commit),
+            content_type=mimetype)
         rsp['Content-Disposition'] = ('inline; filename=%s.patch'
                                       % commit.commit_id)
 
@@ -48,7 +48,9 @@ from reviewboard.scmtools.errors import (AuthenticationError,
 from reviewboard.site.urlresolvers import local_site_reverse
 from reviewboard.ssh.errors import SSHError
 from reviewboard.scmtools.models import Repository
-from reviewboard.webapi.base import ImportExtraDataError, WebAPIResource
+from reviewboard.webapi.base import (ImportExtraDataError,
+                                     WebAPIResource,
+                                     prefetch_related_objects)
 from reviewboard.webapi.decorators import (webapi_check_local_site,
                                            webapi_check_login_required)
 from reviewboard.webapi.errors import (CHANGE_NUMBER_IN_USE,
@@ -93,6 +95,12 @@ class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
     model = ReviewRequest
     name = 'review_request'
 
+    deferrable_fields = {
+        'description': ['description'],
+        'extra_data': ['created_with_history', 'extra_data'],
+        'testing_done': ['testing_done'],
+    }
+
     fields = {
         'id': {
             'type': IntFieldType,
@@ -367,7 +375,7 @@ class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
         links = super(ReviewRequestResource, self).get_related_links(
             obj=obj, request=request, *args, **kwargs)
 
-        if obj:
+        if obj and self.is_link_requested(request, 'latest_diff'):
             # We already have the diffsets due to get_queryset(), so we aren't
             # performing another query here.
             diffsets = list(obj.diffset_history.diffsets.all())
@@ -531,17 +539,54 @@ class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
             #
             # By having this only in the list condition, we get the perforamnce
             # benefits we wanted without triggering that sort of bug.
-            queryset = (
-                queryset
-                .select_related('diffset_history')
-                .prefetch_related('changedescs',
-                                  'diffset_history__diffsets')
-            )
+            queryset = queryset.prefetch_related('changedescs')
+
+            # The diffsets are only needed for the latest_diff link.
+            if self.is_link_requested(request, 'latest_diff'):
+                queryset = (
+                    queryset
+                    .select_related('diffset_history')
+                    .prefetch_related('diffset_history__diffsets')
+                )
         else:
             queryset = self.model.objects.filter(local_site=local_site)
 
         return queryset
 
+    def prepare_serialization_batch(self, review_requests, request=None):
+        """Prepare a page of review requests for serialization.
+
+        The list queryset already fetches the users, repositories, groups
+        and review requests linked from each review request. This fetches
+        the Local Sites for those review requests in one query, since their
+        URLs include the Local Site name.
+
+        Args:
+            review_requests (list of reviewboard.reviews.models.
+                             review_request.ReviewRequest):
+                The review requests that will be serialized.
+
+            request (django.http.HttpRequest, optional):
+                The HTTP request from the client.
+        """
+        linked_review_requests = list(review_requests)
+
+        # These are only prefetched if requested (see _get_queryset()).
+        for field in ('blocks', 'depends_on'):
+            if self.is_field_requested(request, field):
+                for review_request in review_requests:
+                    linked_review_requests += getattr(review_request,
+                                                      field).all()
+
+        # Review requests outside of a Local Site don't need a query.
+        prefetch_related_objects(
+            [
+                review_request
+                for review_request in linked_review_requests
+                if review_request.local_site_id is not None
+            ],
+            'local_site')
+
     def has_access_permissions(self, request, review_request, *args, **kwargs):
         return review_request.is_accessible_by(request.user)
 
@@ -614,10 +659,25 @@ class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
         else:
             return None
 
+    def serialize_created_with_history_field(self, obj, request=None,
+                                             **kwargs):
+        if not self.is_field_requested(request, 'created_with_history'):
+            # This is based on extra_data, which may be deferred.
+            return None
+
+        return obj.created_with_history
+
     def serialize_close_description_text_type_field(self, obj, **kwargs):
         # This will be overridden by MarkdownFieldsMixin.
         return None
 
+    def serialize_description_field(self, obj, request=None, **kwargs):
+        if not self.is_field_requested(request, 'description'):
+            # The field may be deferred.
+            return None
+
+        return obj.description
+
     def serialize_description_text_type_field(self, obj, **kwargs):
         # This will be overridden by MarkdownFieldsMixin.
         return None
@@ -628,6 +688,13 @@ class ReviewRequestResource(MarkdownFieldsMixin, WebAPIResource):
     def serialize_status_field(self, obj, **kwargs):
         return ReviewRequest.status_to_string(obj.status)
 
+    def serialize_testing_done_field(self, obj, request=None, **kwargs):
+        if not self.is_field_requested(request, 'testing_done'):
+            # The field may be deferred.
+            return None
+
+        return obj.testing_done
+
     def serialize_testing_done_text_type_field(self, obj, **kwargs):
         # This will be overridden by MarkdownFieldsMixin.
         return None
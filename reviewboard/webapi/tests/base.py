@@ -72,6 +72,34 @@ class BaseWebAPITestCase(WebAPITestCaseMixin, TestCase, EmailTestHelper):
 
         self.assertHttpNotModified(response)
 
+    def api_get_streaming(self, path, expected_mimetype, **extra):
+        """Perform a HTTP GET request for a streaming API response.
+
+        Args:
+            path (unicode):
+                The path to the resource to request.
+
+            expected_mimetype (unicode):
+                The expected mimetype for the response payload.
+
+            **extra (dict):
+                Extra data to pass to the client HTTP method.
+
+        Returns:
+            bytes:
+            The streamed payload contents.
+        """
+        if path.startswith(self.base_url):
+            path = path[len(self.base_url):]
+
+        response = self.client.get(path, **extra)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], expected_mimetype)
+
+        return b''.join(response.streaming_content)
+
     #
     # Some utility functions shared across test suites.
     #
@@ -476,11 +476,10 @@ class ResourceItemTests(ExtraDataItemMixin, ReviewRequestChildItemMixin,
             save=True)
 
         with override_feature_check(dvcs_feature.feature_id, enabled=True):
-            rsp = self.api_get(get_diff_item_url(review_request,
-                                                 diffset.revision),
-                               HTTP_ACCEPT='text/x-patch',
-                               expected_json=False,
-                               expected_mimetype='text/x-patch')
+            rsp = self.api_get_streaming(
+                get_diff_item_url(review_request, diffset.revision),
+                expected_mimetype='text/x-patch',
+                HTTP_ACCEPT='text/x-patch')
 
         self.assertEqual(rsp, cumulative_diff)
 
@@ -167,10 +167,9 @@ class ResourceItemTests(ExtraDataItemMixin, ReviewRequestChildItemMixin,
                                         local_site_name=None)[0]
 
         with override_feature_checks(self.override_features):
-            rsp = self.api_get(url,
-                           expected_mimetype='text/x-patch',
-                           expected_json=False,
-                           HTTP_ACCEPT='text/x-patch')
+            rsp = self.api_get_streaming(url,
+                                         expected_mimetype='text/x-patch',
+                                         HTTP_ACCEPT='text/x-patch')
 
         self.assertEqual(self.DEFAULT_GIT_FILEDIFF_DATA_DIFF, rsp)
 
@@ -187,10 +186,9 @@ class ResourceItemTests(ExtraDataItemMixin, ReviewRequestChildItemMixin,
         self.client.login(username='doc', password='doc')
 
         with override_feature_checks(self.override_features):
-            rsp = self.api_get(url,
-                           expected_mimetype='text/x-patch',
-                           expected_json=False,
-                           HTTP_ACCEPT='text/x-patch')
+            rsp = self.api_get_streaming(url,
+                                         expected_mimetype='text/x-patch',
+                                         HTTP_ACCEPT='text/x-patch')
 
         self.assertEqual(self.DEFAULT_GIT_FILEDIFF_DATA_DIFF, rsp)
 
@@ -231,11 +229,10 @@ class ResourceItemTests(ExtraDataItemMixin, ReviewRequestChildItemMixin,
         self.client.login(username='doc', password='doc')
 
         with override_feature_checks(self.override_features):
-            rsp = self.api_get(
+            rsp = self.api_get_streaming(
                 get_diffcommit_item_url(review_request, diffset.revision,
                                         commit.commit_id),
                 expected_mimetype='text/x-patch',
-                expected_json=False,
                 HTTP_ACCEPT='text/x-patch')
 
         self.assertEqual(self.DEFAULT_GIT_FILEDIFF_DATA_DIFF, rsp)
@@ -3,7 +3,9 @@ from __future__ import unicode_literals
 import django
 from django.contrib import auth
 from django.contrib.auth.models import User, Permission
+from django.db import connection
 from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
 from django.utils import six
 from django.utils.timezone import get_current_timezone
 from djblets.db.query import get_object_or_none
@@ -843,6 +845,130 @@ class ResourceListTests(SpyAgency, ExtraDataListMixin, BaseWebAPITestCase):
         self.assertIn('total_results', rsp)
         self.assertEqual(rsp['total_results'], 3)
 
+    @add_fixtures(['test_scmtools', 'test_site'])
+    def test_get_num_queries_with_local_site(self):
+        """Testing the GET <URL> API for number of queries with a Local Site
+        """
+        self.user = self._login_user(local_site=True)
+
+        repo = self.create_repository(with_local_site=True)
+        group = self.create_review_group(with_local_site=True)
+        review_requests = []
+
+        def _create_review_requests(count):
+            for i in range(count):
+                review_request = self.create_review_request(
+                    repository=repo,
+                    with_local_site=True,
+                    local_id=len(review_requests) + 1,
+                    publish=True)
+                review_request.target_groups.add(group)
+                review_request.target_people.add(self.user)
+                self.create_diffset(review_request)
+                self.create_diffset(review_request)
+
+                if review_requests:
+                    review_request.depends_on.add(review_requests[0])
+
+                review_requests.append(review_request)
+
+        _create_review_requests(3)
+
+        # As above, Django 1.6 performs one more query.
+        if django.VERSION[:2] >= (1, 11):
+            expected_queries = 20
+        else:
+            expected_queries = 21
+
+        with self.assertNumQueries(expected_queries):
+            rsp = self.api_get(
+                get_review_request_list_url(self.local_site_name),
+                expected_mimetype=review_request_list_mimetype)
+
+        self.assertEqual(rsp['stat'], 'ok')
+        self.assertEqual(rsp['total_results'], 3)
+
+        # The Local Sites of the listed and linked review requests are
+        # fetched once for the page, so the number of queries doesn't depend
+        # on the number of results.
+        _create_review_requests(3)
+
+        with self.assertNumQueries(expected_queries):
+            rsp = self.api_get(
+                get_review_request_list_url(self.local_site_name),
+                expected_mimetype=review_request_list_mimetype)
+
+        self.assertEqual(rsp['stat'], 'ok')
+        self.assertEqual(rsp['total_results'], 6)
+
+        for item_rsp in rsp['review_requests']:
+            self.assertEqual(len(item_rsp['target_groups']), 1)
+            self.assertEqual(item_rsp['target_groups'][0]['title'],
+                             group.name)
+            self.assertEqual(len(item_rsp['target_people']), 1)
+            self.assertEqual(item_rsp['target_people'][0]['title'],
+                             self.user.username)
+            self.assertEqual(item_rsp['links']['repository']['title'],
+                             repo.name)
+
+    @webapi_test_template
+    def test_get_with_only_fields_defers_fields(self):
+        """Testing the GET <URL>?only-fields= API only fetches the requested
+        fields
+        """
+        review_request = self.create_review_request(
+            publish=True,
+            description='My description',
+            testing_done='My testing')
+        review_request.target_people.add(self.user)
+
+        with CaptureQueriesContext(connection) as captured:
+            rsp = self.api_get(
+                '%s?only-fields=id,summary,description'
+                % get_review_request_list_url(),
+                expected_mimetype=review_request_list_mimetype)
+
+        self.assertEqual(rsp['stat'], 'ok')
+        self.assertEqual(len(rsp['review_requests']), 1)
+
+        item_rsp = rsp['review_requests'][0]
+        self.assertEqual(item_rsp['id'], review_request.display_id)
+        self.assertEqual(item_rsp['summary'], review_request.summary)
+        self.assertEqual(item_rsp['description'], 'My description')
+        self.assertNotIn('testing_done', item_rsp)
+        self.assertNotIn('extra_data', item_rsp)
+        self.assertNotIn('target_people', item_rsp)
+
+        sql = '\n'.join(query['sql'] for query in captured)
+        self.assertIn('"reviews_reviewrequest"."description"', sql)
+        self.assertNotIn('"reviews_reviewrequest"."testing_done"', sql)
+        self.assertNotIn('"reviews_reviewrequest"."extra_data"', sql)
+
+        # The access checks join on target_people, but the users aren't
+        # prefetched.
+        self.assertNotIn('INNER JOIN "reviews_reviewrequest_target_people"',
+                         sql)
+
+    @webapi_test_template
+    def test_get_with_only_links_skips_diffsets(self):
+        """Testing the GET <URL>?only-links= API doesn't fetch diffsets when
+        latest_diff isn't requested
+        """
+        self.create_review_request(publish=True)
+
+        with CaptureQueriesContext(connection) as captured:
+            rsp = self.api_get(
+                '%s?only-links=submitter' % get_review_request_list_url(),
+                expected_mimetype=review_request_list_mimetype)
+
+        self.assertEqual(rsp['stat'], 'ok')
+        self.assertEqual(len(rsp['review_requests']), 1)
+        self.assertEqual(list(rsp['review_requests'][0]['links']),
+                         ['submitter'])
+
+        sql = '\n'.join(query['sql'] for query in captured)
+        self.assertNotIn('diffviewer_diffset', sql)
+
     #
     # HTTP POST tests
     #